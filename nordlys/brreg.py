@@ -1,9 +1,25 @@
 from __future__ import annotations
 
-from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+from dataclasses import dataclass, field
+from typing import (
+    TYPE_CHECKING,
+    Dict,
+    Iterable,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+    Tuple,
+)
 
+from .helpers.lazy_imports import lazy_pandas
 from .integrations.brreg_service import fetch_regnskapsregister
 
+if TYPE_CHECKING:  # pragma: no cover - kun for typekontroll
+    import pandas as pd
+
+pd = lazy_pandas()
+
 
 def fetch_brreg(orgnr: str) -> Tuple[Optional[Dict[str, object]], Optional[str]]:
     """Henter JSON-data for angitt organisasjonsnummer."""
@@ -13,19 +29,30 @@ def fetch_brreg(orgnr: str) -> Tuple[Optional[Dict[str, object]], Optional[str]]
 
 def find_numbers(data: object, path: str = "") -> List[Tuple[str, float]]:
     """Traverserer en struktur og finner tallverdier."""
-    found: List[Tuple[str, float]] = []
-    if isinstance(data, dict):
-        for key, value in data.items():
-            new_path = f"{path}.{key}" if path else key
-            found.extend(find_numbers(value, new_path))
-    elif isinstance(data, list):
-        for idx, value in enumerate(data):
-            new_path = f"{path}[{idx}]"
-            found.extend(find_numbers(value, new_path))
-    else:
-        if isinstance(data, (int, float)) and not isinstance(data, bool):
-            found.append((path, float(data)))
-    return found
+
+    return [(entry_path, value) for entry_path, _, value in _iter_numbers(data, path)]
+
+
+def _iter_numbers(data: object, path: str = ""):
+    """Dybde-først over strukturen uten rekursjon; gir (sti, sti_lower, verdi)."""
+
+    stack: List[Tuple[str, object]] = [(path, data)]
+    while stack:
+        current_path, value = stack.pop()
+        if isinstance(value, dict):
+            children = [
+                (f"{current_path}.{key}" if current_path else key, child)
+                for key, child in value.items()
+            ]
+        elif isinstance(value, list):
+            children = [
+                (f"{current_path}[{idx}]", child) for idx, child in enumerate(value)
+            ]
+        else:
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                yield current_path, current_path.lower(), float(value)
+            continue
+        stack.extend(reversed(children))
 
 
 def _last_key(segment_path: str) -> str:
@@ -43,6 +70,50 @@ def _last_key(segment_path: str) -> str:
     return ""
 
 
+class NumberIndex:
+    """Alle tallverdier i et JSON-dokument, indeksert på siste nøkkel.
+
+    Bygges i ett pass. Oppslag på eksakt sluttnøkkel blir et dict-oppslag;
+    bare reserveoppslaget på delstreng må se gjennom alle stiene.
+    """
+
+    __slots__ = ("_entries", "_by_last_key")
+
+    def __init__(self, numbers: Iterable[Tuple[str, str, float]]) -> None:
+        self._entries: List[Tuple[str, str, float]] = list(numbers)
+        self._by_last_key: Dict[str, List[int]] = {}
+        for position, (_, lowered, _) in enumerate(self._entries):
+            self._by_last_key.setdefault(_last_key(lowered), []).append(position)
+
+    @classmethod
+    def from_json(cls, data: object) -> "NumberIndex":
+        return cls(_iter_numbers(data))
+
+    @classmethod
+    def from_numbers(cls, numbers: Sequence[Tuple[str, float]]) -> "NumberIndex":
+        return cls((path, path.lower(), value) for path, value in numbers)
+
+    def find(
+        self,
+        prefer_keys: Sequence[str],
+        disallow_contains: Iterable[str] = (),
+    ) -> Optional[Tuple[str, float]]:
+        """Første tall der sluttnøkkelen matcher, ellers første delstrengtreff."""
+
+        disallowed = [bad.lower() for bad in disallow_contains]
+        lowered_keys = [key.lower() for key in prefer_keys]
+        for key in lowered_keys:
+            for position in self._by_last_key.get(key, ()):
+                path, lowered, value = self._entries[position]
+                if not any(bad in lowered for bad in disallowed):
+                    return (path, value)
+        for key in lowered_keys:
+            for path, lowered, value in self._entries:
+                if key in lowered and not any(bad in lowered for bad in disallowed):
+                    return (path, value)
+        return None
+
+
 def find_first_by_exact_endkey(
     data: object,
     prefer_keys: Sequence[str],
@@ -50,70 +121,142 @@ def find_first_by_exact_endkey(
     numbers: Optional[Sequence[Tuple[str, float]]] = None,
 ) -> Optional[Tuple[str, float]]:
     """Returnerer første tall der slutt-nøkkelen matcher en av preferansene."""
-    disallow_contains = disallow_contains or []
-    numbers_list = list(numbers) if numbers is not None else find_numbers(data)
-    for key in prefer_keys:
-        for path, value in numbers_list:
-            last_key = _last_key(path).lower()
-            if last_key == key.lower() and not any(
-                bad.lower() in path.lower() for bad in disallow_contains
-            ):
-                return (path, value)
-    for key in prefer_keys:
-        for path, value in numbers_list:
-            if key.lower() in path.lower() and not any(
-                bad.lower() in path.lower() for bad in disallow_contains
-            ):
-                return (path, value)
-    return None
 
-
-def map_brreg_metrics(json_obj: Dict[str, object]) -> Dict[str, Optional[float]]:
-    """Mapper regnskapsverdier til kjente nøkkeltall."""
-    mapped: Dict[str, Optional[float]] = {}
-    numbers = find_numbers(json_obj)
-    hit_eiendeler = find_first_by_exact_endkey(
-        json_obj, ["sumEiendeler"], numbers=numbers
-    )
-    if not hit_eiendeler:
-        hit_eiendeler = find_first_by_exact_endkey(
-            json_obj,
-            ["sumEgenkapitalOgGjeld"],
-            numbers=numbers,
-        )
-    mapped["eiendeler_UB"] = hit_eiendeler[1] if hit_eiendeler else None
-
-    hit_ek = find_first_by_exact_endkey(
-        json_obj,
-        ["sumEgenkapital"],
-        disallow_contains=["EgenkapitalOgGjeld", "egenkapitalOgGjeld"],
-        numbers=numbers,
+    index = (
+        NumberIndex.from_numbers(numbers)
+        if numbers is not None
+        else NumberIndex.from_json(data)
     )
-    if not hit_ek:
-        hit_ek = find_first_by_exact_endkey(
-            json_obj, ["sumEgenkapital"], numbers=numbers
-        )
-    mapped["egenkapital_UB"] = hit_ek[1] if hit_ek else None
+    return index.find(prefer_keys, disallow_contains or ())
+
+
+@dataclass(frozen=True)
+class MetricLookup:
+    """Ett forsøk på å finne et nøkkeltall: foretrukne nøkler og utelukkede stier."""
+
+    prefer_keys: Tuple[str, ...]
+    disallow_contains: Tuple[str, ...] = ()
+
 
-    hit_gjeld = find_first_by_exact_endkey(json_obj, ["sumGjeld"], numbers=numbers)
-    mapped["gjeld_UB"] = hit_gjeld[1] if hit_gjeld else None
+@dataclass(frozen=True)
+class MetricRule:
+    """Et nøkkeltall og forsøkene som prøves i rekkefølge til ett gir treff."""
 
-    for key, hints in [
+    key: str
+    lookups: Tuple[MetricLookup, ...] = field(default_factory=tuple)
+
+
+BRREG_METRIC_RULES: Tuple[MetricRule, ...] = (
+    MetricRule(
+        "eiendeler_UB",
+        (
+            MetricLookup(("sumEiendeler",)),
+            MetricLookup(("sumEgenkapitalOgGjeld",)),
+        ),
+    ),
+    MetricRule(
+        "egenkapital_UB",
         (
-            "driftsinntekter",
-            ["driftsinntekter", "sumDriftsinntekter", "salgsinntekter"],
+            MetricLookup(
+                ("sumEgenkapital",), ("EgenkapitalOgGjeld", "egenkapitalOgGjeld")
+            ),
+            MetricLookup(("sumEgenkapital",)),
         ),
-        ("ebit", ["driftsresultat", "ebit", "driftsresultatFoerFinans"]),
-        ("arsresultat", ["arsresultat", "resultat", "resultatEtterSkatt"]),
-    ]:
-        hit = find_first_by_exact_endkey(json_obj, hints, numbers=numbers)
-        mapped[key] = hit[1] if hit else None
+    ),
+    MetricRule("gjeld_UB", (MetricLookup(("sumGjeld",)),)),
+    MetricRule(
+        "driftsinntekter",
+        (MetricLookup(("driftsinntekter", "sumDriftsinntekter", "salgsinntekter")),),
+    ),
+    MetricRule(
+        "ebit",
+        (MetricLookup(("driftsresultat", "ebit", "driftsresultatFoerFinans")),),
+    ),
+    MetricRule(
+        "arsresultat",
+        (MetricLookup(("arsresultat", "resultat", "resultatEtterSkatt")),),
+    ),
+)
+
+
+def extract_metrics(
+    index: NumberIndex, rules: Sequence[MetricRule] = BRREG_METRIC_RULES
+) -> Dict[str, Optional[float]]:
+    """Henter alle nøkkeltall i ``rules`` fra en ferdig bygget indeks."""
+
+    mapped: Dict[str, Optional[float]] = {}
+    for rule in rules:
+        hit = None
+        for lookup in rule.lookups:
+            hit = index.find(lookup.prefer_keys, lookup.disallow_contains)
+            if hit is not None:
+                break
+        mapped[rule.key] = hit[1] if hit else None
     return mapped
 
 
+def map_brreg_metrics(json_obj: Dict[str, object]) -> Dict[str, Optional[float]]:
+    """Mapper regnskapsverdier til kjente nøkkeltall."""
+
+    return extract_metrics(NumberIndex.from_json(json_obj))
+
+
+def _regnskap_year(regnskap: Mapping[str, object]) -> Optional[int]:
+    period = regnskap.get("regnskapsperiode")
+    candidates: List[object] = []
+    if isinstance(period, Mapping):
+        candidates.extend([period.get("tilDato"), period.get("fraDato")])
+    candidates.extend([regnskap.get("regnskapsaar"), regnskap.get("aar")])
+    for candidate in candidates:
+        text = str(candidate or "").strip()
+        if len(text) >= 4 and text[:4].isdigit():
+            return int(text[:4])
+    return None
+
+
+def map_brreg_metrics_by_year(
+    json_obj: object, rules: Sequence[MetricRule] = BRREG_METRIC_RULES
+) -> Dict[int, Dict[str, Optional[float]]]:
+    """Mapper hvert regnskapsår i svaret fra Regnskapsregisteret for seg.
+
+    Svaret kan være én regnskapsoppstilling eller en liste med flere år.
+    Oppstillinger uten gjenkjennelig år hoppes over.
+    """
+
+    regnskaper = json_obj if isinstance(json_obj, list) else [json_obj]
+    by_year: Dict[int, Dict[str, Optional[float]]] = {}
+    for regnskap in regnskaper:
+        if not isinstance(regnskap, Mapping):
+            continue
+        year = _regnskap_year(regnskap)
+        if year is None or year in by_year:
+            continue
+        by_year[year] = extract_metrics(NumberIndex.from_json(regnskap), rules)
+    return by_year
+
+
+def brreg_metrics_frame(
+    json_obj: object, rules: Sequence[MetricRule] = BRREG_METRIC_RULES
+) -> "pd.DataFrame":
+    """Nøkkeltall fra Regnskapsregisteret med én rad per år (stigende)."""
+
+    by_year = map_brreg_metrics_by_year(json_obj, rules)
+    columns = [rule.key for rule in rules]
+    frame = pd.DataFrame.from_dict(by_year, orient="index", columns=columns)
+    frame.index.name = "År"
+    return frame.sort_index().astype(float)
+
+
 __all__ = [
+    "BRREG_METRIC_RULES",
+    "MetricLookup",
+    "MetricRule",
+    "NumberIndex",
+    "brreg_metrics_frame",
+    "extract_metrics",
     "fetch_brreg",
     "find_numbers",
     "find_first_by_exact_endkey",
     "map_brreg_metrics",
+    "map_brreg_metrics_by_year",
 ]
@@ -1,16 +1,21 @@
 """Samlemodul for generelle hjelpere."""
 
 from .formatting import format_currency, format_difference
-from .lazy_imports import lazy_import, lazy_pandas
+from .lazy_imports import lazy_import, lazy_numpy, lazy_pandas
 from .number_parsing import to_float
+from .prefix_index import PrefixSumIndex
+from .subset_sum import find_subset_sums
 from .xml_helpers import findall_any_namespace, text_or_none
 
 __all__ = [
     "format_currency",
     "format_difference",
     "lazy_import",
+    "lazy_numpy",
     "lazy_pandas",
     "to_float",
+    "PrefixSumIndex",
+    "find_subset_sums",
     "findall_any_namespace",
     "text_or_none",
 ]
@@ -37,6 +37,7 @@ class _LazyModule(ModuleType):
 
 
 _PANDAS_PROXY: Optional[_LazyModule] = None
+_NUMPY: Optional[Any] = None
 _LAZY_MODULES: Dict[str, _LazyModule] = {}
 
 
@@ -49,6 +50,22 @@ def lazy_pandas() -> "pd":
     return cast("pd", _PANDAS_PROXY)
 
 
+def lazy_numpy() -> Any:
+    """Importerer ``numpy`` ved første kall og returnerer selve modulen.
+
+    I motsetning til proxyen fra :func:`lazy_pandas` kalles denne inne i
+    funksjonene som trenger numpy, slik at tette løkker slipper oppslag via
+    proxyen.
+    """
+
+    global _NUMPY
+    if _NUMPY is None:
+        import numpy as _np  # type: ignore[import-not-found]
+
+        _NUMPY = cast(Any, _np)
+    return _NUMPY
+
+
 def lazy_import(module_name: str) -> ModuleType:
     """Returnerer en proxy som importerer modulen på første bruk."""
 
@@ -57,4 +74,4 @@ def lazy_import(module_name: str) -> ModuleType:
     return _LAZY_MODULES[module_name]
 
 
-__all__ = ["lazy_import", "lazy_pandas"]
+__all__ = ["lazy_import", "lazy_numpy", "lazy_pandas"]
@@ -0,0 +1,277 @@
+"""Søk etter kontokombinasjoner som summerer til et gitt beløp.
+
+Brukes til å forklare avvik mellom SAF-T og Brønnøysund: hvilke saldoer
+(alene eller sammen med noen få andre) utgjør differansen? Alle beløp regnes
+om til hele øre, slik at toleransen er eksakt og summer ikke får
+avrundingsfeil.
+
+Søket bruker sorterte verdier i stedet for å prøve alle kombinasjoner:
+
+* enkeltkontoer og par finnes med binærsøk (``searchsorted``) over hele
+  listen,
+* tripler låser én konto og søker par blant de resterende,
+* fire og fem kontoer bruker *meet in the middle* mot sorterte parsummer.
+
+Kombinasjoner med færre kontoer rangeres først, deretter etter avvik fra
+målet. Større kombinasjoner søkes bare når de mindre ikke gir nok treff, og
+hele søket avbrytes når tidsbudsjettet er brukt opp.
+"""
+
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass
+from typing import Any, List, Optional, Sequence, Set, Tuple
+
+from .lazy_imports import lazy_numpy
+
+__all__ = ["MAX_SUBSET_SIZE", "SubsetSumMatch", "find_subset_sums", "to_ore"]
+
+MAX_SUBSET_SIZE = 5
+# Øvre grense for hvor mange kandidater som vurderes per kombinasjonsstørrelse.
+_CANDIDATE_LIMIT = 50_000
+# Antall parsummer som slås opp samtidig i søket etter fire og fem kontoer.
+_PAIR_CHUNK = 16_384
+
+
+@dataclass(frozen=True)
+class SubsetSumMatch:
+    """Én kombinasjon. ``indices`` er posisjoner i verdilisten, stigende."""
+
+    indices: Tuple[int, ...]
+    total_ore: int
+    deviation_ore: int
+
+    @property
+    def size(self) -> int:
+        return len(self.indices)
+
+
+def to_ore(value: float) -> int:
+    """Runder et kronebeløp til hele øre."""
+
+    return int(round(float(value) * 100))
+
+
+def find_subset_sums(
+    values: Sequence[float],
+    target: float,
+    *,
+    tolerance_ore: int = 100,
+    max_size: int = 3,
+    top_k: int = 5,
+    either_sign: bool = False,
+    time_budget: Optional[float] = 0.5,
+) -> List[SubsetSumMatch]:
+    """Finner opptil ``top_k`` kombinasjoner av ``values`` som summerer til ``target``.
+
+    ``values`` og ``target`` oppgis i kroner, ``tolerance_ore`` i øre. Med
+    ``either_sign`` godtas også summer nær ``-target``. ``time_budget`` er
+    antall sekunder søket får bruke; ``None`` betyr ingen grense. Treffene
+    sorteres etter antall kontoer og deretter etter avvik fra målet.
+    """
+
+    if not 1 <= max_size <= MAX_SUBSET_SIZE:
+        raise ValueError(f"max_size må være mellom 1 og {MAX_SUBSET_SIZE}")
+    if top_k <= 0 or len(values) == 0:
+        return []
+
+    np = lazy_numpy()
+    amounts = np.rint(np.asarray(values, dtype=float) * 100).astype(np.int64)
+    target_ore = to_ore(target)
+    targets = [target_ore]
+    if either_sign and target_ore != 0:
+        targets.append(-target_ore)
+    deadline = None if time_budget is None else time.perf_counter() + time_budget
+
+    search = _SubsetSearch(amounts, targets, max(0, int(tolerance_ore)), deadline)
+    matches: List[SubsetSumMatch] = []
+    for size in range(1, min(max_size, len(values)) + 1):
+        found = search.run(size)
+        found.sort(key=lambda match: (match.deviation_ore, match.indices))
+        matches.extend(found)
+        if len(matches) >= top_k or search.expired():
+            break
+    return matches[:top_k]
+
+
+class _SubsetSearch:
+    """Søk over sorterte øreverdier for én kombinasjonsstørrelse om gangen."""
+
+    def __init__(
+        self,
+        amounts: Any,
+        targets: Sequence[int],
+        tolerance: int,
+        deadline: Optional[float],
+    ) -> None:
+        np = lazy_numpy()
+        self._order = np.argsort(amounts, kind="stable")
+        self._sorted = amounts[self._order]
+        self._targets = list(targets)
+        self._tolerance = tolerance
+        self._deadline = deadline
+        self._pairs: Optional[Tuple[Any, Any, Any]] = None
+
+    def expired(self) -> bool:
+        return self._deadline is not None and time.perf_counter() > self._deadline
+
+    def run(self, size: int) -> List[SubsetSumMatch]:
+        collector = _Collector(self._order, self._sorted, self._targets)
+        for target in self._targets:
+            if size == 1:
+                collector.add(self._singles(target))
+            elif size == 2:
+                collector.add(self._pairs_after(-1, target))
+            elif size == 3:
+                self._triples(target, collector)
+            else:
+                self._meet_in_the_middle(size, target, collector)
+            if collector.full() or self.expired():
+                break
+        return collector.matches()
+
+    # region søk per størrelse
+    def _singles(self, target: int) -> Any:
+        np = lazy_numpy()
+        left = np.searchsorted(self._sorted, target - self._tolerance, side="left")
+        right = np.searchsorted(self._sorted, target + self._tolerance, side="right")
+        return np.arange(left, right)[:, None]
+
+    def _pairs_after(self, first: int, target: int) -> Any:
+        """Par ``(j, k)`` med ``first < j < k`` og ``s[j] + s[k] ≈ target``."""
+
+        np = lazy_numpy()
+        values = self._sorted
+        start = first + 1
+        rest = values[start:]
+        left = np.searchsorted(values, target - rest - self._tolerance, side="left")
+        right = np.searchsorted(values, target - rest + self._tolerance, side="right")
+        positions = np.arange(start, len(values))
+        left = np.maximum(left, positions + 1)
+        rows, columns = _expand_ranges(left, right, _CANDIDATE_LIMIT)
+        return np.column_stack([positions[rows], columns])
+
+    def _triples(self, target: int, collector: "_Collector") -> None:
+        np = lazy_numpy()
+        for first in range(len(self._sorted) - 2):
+            pairs = self._pairs_after(first, target - int(self._sorted[first]))
+            if len(pairs):
+                collector.add(
+                    np.column_stack([np.full(len(pairs), first, dtype=np.int64), pairs])
+                )
+            if collector.full() or self.expired():
+                return
+
+    def _meet_in_the_middle(
+        self, size: int, target: int, collector: "_Collector"
+    ) -> None:
+        """Fire kontoer som to par, fem som én konto pluss to par."""
+
+        np = lazy_numpy()
+        pair_first, pair_second, pair_sums = self._pair_sums()
+        if size == 4:
+            leads: Sequence[int] = [-1]
+        else:
+            leads = range(len(self._sorted) - 4)
+        for lead in leads:
+            remaining = target - (int(self._sorted[lead]) if lead >= 0 else 0)
+            for chunk in range(0, len(pair_sums), _PAIR_CHUNK):
+                first = pair_first[chunk : chunk + _PAIR_CHUNK]
+                second = pair_second[chunk : chunk + _PAIR_CHUNK]
+                sums = pair_sums[chunk : chunk + _PAIR_CHUNK]
+                keep = first > lead
+                if not keep.any():
+                    continue
+                first, second, sums = first[keep], second[keep], sums[keep]
+                left = np.searchsorted(
+                    pair_sums, remaining - sums - self._tolerance, side="left"
+                )
+                right = np.searchsorted(
+                    pair_sums, remaining - sums + self._tolerance, side="right"
+                )
+                rows, others = _expand_ranges(left, right, _CANDIDATE_LIMIT)
+                # Det andre paret må ligge helt etter det første, slik at hver
+                # kombinasjon bare finnes én gang.
+                valid = pair_first[others] > second[rows]
+                rows, others = rows[valid], others[valid]
+                if len(rows):
+                    columns = [
+                        first[rows],
+                        second[rows],
+                        pair_first[others],
+                        pair_second[others],
+                    ]
+                    if lead >= 0:
+                        columns.insert(0, np.full(len(rows), lead, dtype=np.int64))
+                    collector.add(np.column_stack(columns))
+                if collector.full() or self.expired():
+                    return
+
+    # endregion
+
+    def _pair_sums(self) -> Tuple[Any, Any, Any]:
+        """Alle par ``i < j`` sortert etter sum, bygget én gang per søk."""
+
+        if self._pairs is None:
+            np = lazy_numpy()
+            first, second = np.triu_indices(len(self._sorted), k=1)
+            sums = self._sorted[first] + self._sorted[second]
+            order = np.argsort(sums, kind="stable")
+            self._pairs = (first[order], second[order], sums[order])
+        return self._pairs
+
+
+class _Collector:
+    """Samler treff som posisjoner i den sorterte listen og fjerner duplikater."""
+
+    def __init__(self, order: Any, sorted_amounts: Any, targets: Sequence[int]):
+        self._order = order
+        self._sorted = sorted_amounts
+        self._targets = list(targets)
+        self._seen: Set[Tuple[int, ...]] = set()
+        self._matches: List[SubsetSumMatch] = []
+
+    def full(self) -> bool:
+        return len(self._matches) >= _CANDIDATE_LIMIT
+
+    def add(self, combos: Any) -> None:
+        np = lazy_numpy()
+        if not len(combos):
+            return
+        totals = self._sorted[combos].sum(axis=1)
+        deviations = np.min(
+            np.abs(totals[:, None] - np.asarray(self._targets)[None, :]), axis=1
+        )
+        originals = np.sort(self._order[combos], axis=1)
+        for indices, total, deviation in zip(
+            originals.tolist(), totals.tolist(), deviations.tolist()
+        ):
+            key = tuple(indices)
+            if key in self._seen:
+                continue
+            self._seen.add(key)
+            self._matches.append(SubsetSumMatch(key, int(total), int(deviation)))
+
+    def matches(self) -> List[SubsetSumMatch]:
+        return self._matches
+
+
+def _expand_ranges(left: Any, right: Any, limit: int) -> Tuple[Any, Any]:
+    """Utvider intervallene ``[left[i], right[i])`` til par ``(i, posisjon)``.
+
+    Høyst ``limit`` par returneres; intervallene kuttes i rekkefølge.
+    """
+
+    np = lazy_numpy()
+    counts = np.maximum(right - left, 0)
+    ends = np.cumsum(counts)
+    counts = np.clip(limit - (ends - counts), 0, counts)
+    total = int(counts.sum())
+    if total == 0:
+        empty = np.zeros(0, dtype=np.int64)
+        return empty, empty
+    rows = np.repeat(np.arange(len(counts)), counts)
+    starts = np.cumsum(counts) - counts
+    offsets = np.arange(total) - np.repeat(starts, counts)
+    return rows, np.repeat(left, counts) + offsets
@@ -2,16 +2,17 @@
 
 from __future__ import annotations
 
-import json
 import logging
 import os
 import tempfile
 from dataclasses import dataclass
 from pathlib import Path
 from threading import Lock
-from typing import Dict, Optional
+from typing import Dict, Iterable, Optional, Tuple
 
-from .integrations.brreg_service import fetch_enhetsregister
+from .integrations.brreg_service import fetch_enhetsregister, fetch_many
+from .integrations.enhet_store import DEFAULT_TTL_SECONDS, EnhetStore
+from .integrations.lookup_cache import LookupCache
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -29,6 +30,10 @@ class IndustryClassification:
     source: str
 
 
+_CACHE_NAME = "brreg_cache.sqlite3"
+_LEGACY_CACHE_NAME = "brreg_cache.json"
+
+
 def _resolve_cache_path() -> Optional[Path]:
     candidates: list[Path] = []
     env_cache_dir = os.environ.get("NORDLYS_CACHE_DIR")
@@ -53,7 +58,7 @@ def _resolve_cache_path() -> Optional[Path]:
         except OSError:
             continue
         if os.access(resolved, os.W_OK):
-            return resolved / "brreg_cache.json"
+            return resolved / _CACHE_NAME
     _LOGGER.warning(
         "Fant ingen skrivbar katalog for bransjecache. Lagring er deaktivert."
     )
@@ -61,7 +66,13 @@ def _resolve_cache_path() -> Optional[Path]:
 
 
 CACHE_PATH: Optional[Path] = _resolve_cache_path()
+_CACHE_NAMESPACE = "enheter"
+_MEMORY_ENTRIES = 4_096
+# Hvor lenge en utløpt enhet kan brukes mens den hentes på nytt i bakgrunnen.
+_STALE_SECONDS = 7 * 24 * 60 * 60
 _CACHE_LOCK = Lock()
+_CACHE: Optional[LookupCache[Dict[str, object]]] = None
+_CACHE_OPENED_FOR: Optional[Path] = None
 
 
 def _normalize_orgnr(orgnr: str) -> str:
@@ -71,30 +82,44 @@ def _normalize_orgnr(orgnr: str) -> str:
     return digits
 
 
-def _load_cache() -> Dict[str, Dict[str, object]]:
-    if CACHE_PATH is None or not CACHE_PATH.exists():
-        return {}
-    with _CACHE_LOCK:
-        try:
-            with CACHE_PATH.open("r", encoding="utf-8") as fh:
-                data = json.load(fh)
-        except (OSError, json.JSONDecodeError):
-            return {}
-    if isinstance(data, dict):
-        return data  # type: ignore[return-value]
-    return {}
-
-
-def _save_cache(cache: Dict[str, Dict[str, object]]) -> None:
-    if CACHE_PATH is None:
-        return
+def _open_store(path: Optional[Path]) -> Optional[EnhetStore]:
+    """Åpner SQLite-lageret og migrerer en eventuell gammel JSON-fil."""
+
+    if path is None:
+        return None
+    try:
+        store = EnhetStore(path)
+    except Exception as exc:  # sqlite3.Error og OSError
+        _LOGGER.warning("Kunne ikke åpne bransjecache %s: %s", path, exc)
+        return None
+    migrated = store.migrate_json(path.with_name(_LEGACY_CACHE_NAME))
+    if migrated:
+        _LOGGER.info("Migrerte %s enheter fra JSON-bransjecache.", migrated)
+    return store
+
+
+def _get_cache() -> LookupCache[Dict[str, object]]:
+    """Cachen for enhetsdata, åpnet på nytt om :data:`CACHE_PATH` endres.
+
+    Uten skrivbar katalog brukes bare minnet.
+    """
+
+    global _CACHE, _CACHE_OPENED_FOR
+    path = CACHE_PATH
     with _CACHE_LOCK:
-        try:
-            with CACHE_PATH.open("w", encoding="utf-8") as fh:
-                json.dump(cache, fh, ensure_ascii=False, indent=2)
-        except OSError:
-            # Manglende skrive-tilgang skal ikke stoppe applikasjonen.
-            pass
+        if _CACHE is not None and _CACHE_OPENED_FOR == path:
+            return _CACHE
+        if _CACHE is not None and isinstance(_CACHE.persistent, EnhetStore):
+            _CACHE.persistent.close()
+        _CACHE = LookupCache(
+            _CACHE_NAMESPACE,
+            ttl_seconds=DEFAULT_TTL_SECONDS,
+            stale_seconds=_STALE_SECONDS,
+            max_entries=_MEMORY_ENTRIES,
+            persistent=_open_store(path),
+        )
+        _CACHE_OPENED_FOR = path
+        return _CACHE
 
 
 def _extract_sn2(naringskode: Optional[str]) -> Optional[str]:
@@ -263,15 +288,16 @@ def classify_from_orgnr(
     """Henter data fra Enhetsregisteret (med cache) og klassifiserer selskapet."""
 
     normalized = _normalize_orgnr(orgnr)
-    cache = _load_cache()
-    cached_entry = cache.get(normalized)
-    brreg_json: Optional[Dict[str, object]] = None
-    if isinstance(cached_entry, dict):
-        brreg_json = cached_entry
-    if brreg_json is None:
-        brreg_json = _fetch_enhetsregister(normalized)
-        cache[normalized] = brreg_json
-        _save_cache(cache)
+    cache = _get_cache()
+    try:
+        brreg_json = cache.get_or_load(
+            normalized, lambda: _fetch_enhetsregister(normalized)
+        ).value
+    except RuntimeError:
+        stale = cache.get(normalized, include_expired=True)
+        if stale is None:
+            raise
+        brreg_json = stale
     return classify_from_brreg_json(normalized, company_name, brreg_json)
 
 
@@ -288,13 +314,59 @@ def classify_from_saft_path(path: str | Path) -> IndustryClassification:
     return classify_from_orgnr(header.orgnr, header.company_name)
 
 
+def fetch_enheter_cached(
+    orgnrs: Iterable[str],
+    *,
+    snapshot_times: Optional[Dict[str, float]] = None,
+) -> Tuple[Dict[str, Dict[str, object]], Dict[str, str]]:
+    """Henter enhetsdata for mange organisasjonsnumre med felles cache.
+
+    Cachen leses og skrives bare én gang, og numre som mangler slås opp
+    samlet via :func:`fetch_many`. Returnerer (data per orgnr, feil per orgnr).
+    Numre som feilet midlertidig (tidsavbrudd, 429, serverfeil) er med i
+    ingen av dem, slik at de kan slås opp igjen senere.
+
+    Svar fra den lokale bulkindeksen lagres ikke i cachen. Gis
+    ``snapshot_times``, fylles den med indeksens importtidspunkt for disse.
+    """
+
+    data: Dict[str, Dict[str, object]] = {}
+    errors: Dict[str, str] = {}
+    wanted: list[str] = []
+    for orgnr in orgnrs:
+        try:
+            wanted.append(_normalize_orgnr(orgnr))
+        except ValueError as exc:
+            errors[str(orgnr)] = str(exc)
+    if not wanted:
+        return data, errors
+
+    cache = _get_cache()
+    data.update(cache.get_many(wanted))
+    missing = [orgnr for orgnr in dict.fromkeys(wanted) if orgnr not in data]
+    if not missing:
+        return data, errors
+
+    fetched: Dict[str, Dict[str, object]] = {}
+    for orgnr, result in fetch_many(missing).items():
+        if isinstance(result.data, dict) and result.snapshot_imported_at is not None:
+            data[orgnr] = result.data
+            if snapshot_times is not None:
+                snapshot_times[orgnr] = result.snapshot_imported_at
+        elif isinstance(result.data, dict):
+            fetched[orgnr] = result.data
+        elif not result.is_network_error:
+            errors[orgnr] = result.error_message or "Enhetsregisteret: ukjent feil."
+    data.update(fetched)
+    cache.put_many(fetched)
+    return data, errors
+
+
 def load_cached_brreg(orgnr: str) -> Optional[Dict[str, object]]:
-    """Returnerer enhetsdata fra cache dersom tilgjengelig."""
+    """Returnerer enhetsdata fra cache dersom tilgjengelig, også utløpt."""
 
     normalized = _normalize_orgnr(orgnr)
-    cache = _load_cache()
-    entry = cache.get(normalized)
-    return entry if isinstance(entry, dict) else None
+    return _get_cache().get(normalized, include_expired=True)
 
 
 __all__ = [
@@ -303,5 +375,6 @@ __all__ = [
     "classify_from_orgnr",
     "classify_from_saft_path",
     "classify_from_brreg_json",
+    "fetch_enheter_cached",
     "load_cached_brreg",
 ]
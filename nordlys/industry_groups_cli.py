@@ -8,6 +8,7 @@ from dataclasses import asdict
 from typing import Optional
 
 from .industry_groups import classify_from_orgnr, classify_from_saft_path
+from .integrations.enhet_bulk import import_bulk_file
 
 
 def main(argv: Optional[list[str]] = None) -> int:
@@ -17,14 +18,36 @@ def main(argv: Optional[list[str]] = None) -> int:
     parser.add_argument("--saft", help="Sti til SAF-T XML som skal analyseres")
     parser.add_argument("--orgnr", help="Organisasjonsnummer som skal slås opp")
     parser.add_argument("--navn", help="Overstyr firmanavn ved manuell klassifisering")
+    parser.add_argument(
+        "--importer-enhetsregister",
+        metavar="FIL",
+        help=(
+            "Importer nedlastet bulkfil fra Enhetsregisteret (JSON/CSV, gjerne .gz) "
+            "til lokal offline-indeks"
+        ),
+    )
+    parser.add_argument(
+        "--indeks",
+        metavar="STI",
+        help="Hvor offline-indeksen skal lagres (standard: Nordlys' cachekatalog)",
+    )
     args = parser.parse_args(argv)
 
+    if args.importer_enhetsregister:
+        count = import_bulk_file(
+            args.importer_enhetsregister,
+            target=args.indeks,
+            progress=lambda done: print(f"\r{done} enheter importert …", end=""),
+        )
+        print(f"\rImporterte {count} enheter fra Enhetsregisteret.")
+        return 0
+
     if args.saft:
         classification = classify_from_saft_path(args.saft)
     elif args.orgnr:
         classification = classify_from_orgnr(args.orgnr, args.navn)
     else:
-        parser.error("Du må enten oppgi --saft eller --orgnr.")
+        parser.error("Du må oppgi --saft, --orgnr eller --importer-enhetsregister.")
         return 2
 
     print(json.dumps(asdict(classification), ensure_ascii=False, indent=2))
@@ -1,34 +1,36 @@
-"""Håndtering av HTTP-cache og sessions for Brønnøysund-tjenestene."""
+"""Mellomlagring og sessions for Brønnøysund-tjenestene.
+
+HTTP-svar mellomlagres i navnerommet ``brreg_http`` i den felles
+:class:`~nordlys.integrations.lookup_cache.LookupCache`, med en begrenset
+LRU i minnet over en SQLite-fil i cachekatalogen.
+"""
 
 from __future__ import annotations
 
 import logging
 import os
+import sqlite3
 import tempfile
-import time
 from dataclasses import replace
 from pathlib import Path
-from typing import Any, Dict, Optional, Tuple
+from threading import Lock
+from typing import Any, Callable, Dict, Optional, Tuple
 
 import requests  # type: ignore[import-untyped, import-not-found]
 from requests.adapters import HTTPAdapter  # type: ignore[import-untyped, import-not-found]
 from urllib3.util.retry import Retry
 
 from .brreg_models import BrregServiceResult
-
-try:  # pragma: no cover - selve importen testes indirekte
-    import requests_cache  # type: ignore
-except ModuleNotFoundError:  # pragma: no cover - miljø uten requests-cache
-    requests_cache = None  # type: ignore[assignment]
-    REQUESTS_CACHE_AVAILABLE = False
-else:
-    REQUESTS_CACHE_AVAILABLE = True
+from .lookup_cache import LookupCache, SqliteTier
 
 __all__ = [
-    "REQUESTS_CACHE_AVAILABLE",
+    "cache_dir",
+    "cached_fetch",
     "get_session",
     "fallback_cache_get",
     "fallback_cache_set",
+    "HTTP_NAMESPACE",
+    "http_cache",
     "make_cache_key",
     "DEFAULT_TIMEOUT",
     "clear_fallback_cache",
@@ -39,13 +41,18 @@ _LOGGER = logging.getLogger(__name__)
 
 DEFAULT_TIMEOUT = 15
 _CACHE_TTL_SECONDS = 6 * 60 * 60  # 6 timer
-_CACHE_BASENAME = "brreg_http_cache"
+# Hvor lenge et utløpt svar kan brukes mens et nytt hentes i bakgrunnen.
+# Importen utvider vinduet med lookup_cache.allow_stale.
+_STALE_SECONDS = 24 * 60 * 60
+_MEMORY_ENTRIES = 2_048
+HTTP_NAMESPACE = "brreg_http"
+_CACHE_BASENAME = "nordlys_lookup_cache.sqlite3"
 _CACHE_DIR: Optional[Path] = None
 _CACHE_DIR_INITIALIZED = False
 _MEMORY_CACHE_WARNING_EMITTED = False
 _SESSION: Optional[requests.Session] = None
-_FALLBACK_CACHE: Dict[str, Tuple[float, BrregServiceResult]] = {}
-_FALLBACK_WARNING_EMITTED = False
+_HTTP_CACHE: Optional[LookupCache[BrregServiceResult]] = None
+_HTTP_CACHE_LOCK = Lock()
 
 
 def _candidate_cache_dirs() -> Tuple[Path, ...]:
@@ -89,50 +96,77 @@ def _get_cache_path() -> Optional[Path]:
     return _CACHE_DIR / _CACHE_BASENAME
 
 
+def cache_dir() -> Optional[Path]:
+    """Skrivbar katalog for Nordlys' lokale Brønnøysund-data, om en finnes."""
+
+    cache_path = _get_cache_path()
+    return cache_path.parent if cache_path is not None else None
+
+
 def get_session() -> requests.Session:
-    global _SESSION, _FALLBACK_WARNING_EMITTED, _MEMORY_CACHE_WARNING_EMITTED
+    global _SESSION
     if _SESSION is None:
-        if REQUESTS_CACHE_AVAILABLE and requests_cache is not None:
-            cache_kwargs: Dict[str, Any] = {
-                "backend": "sqlite",
-                "expire_after": _CACHE_TTL_SECONDS,
-            }
-            cache_path = _get_cache_path()
-            if cache_path is not None:
-                cache_kwargs["cache_name"] = str(cache_path)
-            else:
-                cache_kwargs["backend"] = "memory"
-                if not _MEMORY_CACHE_WARNING_EMITTED:
-                    _LOGGER.warning(
-                        "Fant ingen skrivbar katalog for Brønnøysund-cache. Bruker minne-cache."
-                    )
-                    _MEMORY_CACHE_WARNING_EMITTED = True
+        session = requests.Session()
+        adapter = _build_retry_adapter()
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        _SESSION = session
+    return _SESSION
+
+
+def http_cache() -> LookupCache[BrregServiceResult]:
+    """Cachen for HTTP-svar, bygget på nytt om cachekatalogen endres."""
+
+    global _HTTP_CACHE, _MEMORY_CACHE_WARNING_EMITTED
+    path = _get_cache_path()
+    with _HTTP_CACHE_LOCK:
+        current = _HTTP_CACHE
+        if current is not None and getattr(current.persistent, "path", None) == path:
+            return current
+        if current is not None and isinstance(current.persistent, SqliteTier):
+            current.persistent.close()
+        persistent: Optional[SqliteTier] = None
+        if path is not None:
             try:
-                session = requests_cache.CachedSession(**cache_kwargs)
-            except OSError:
-                _LOGGER.warning(
-                    "Kunne ikke initialisere disk-cache for Brønnøysund-oppslag. Faller tilbake til minne-cache."
-                )
-                session = requests_cache.CachedSession(
-                    backend="memory", expire_after=_CACHE_TTL_SECONDS
-                )
-            adapter = _build_retry_adapter()
-            session.mount("https://", adapter)
-            session.mount("http://", adapter)
-            _SESSION = session
-        else:
-            _SESSION = requests.Session()
-            if not _FALLBACK_WARNING_EMITTED:
+                persistent = SqliteTier(path, HTTP_NAMESPACE)
+            except sqlite3.Error:
                 _LOGGER.warning(
-                    "requests-cache er ikke installert. Nordlys kjører videre uten HTTP-cache, "
-                    "men vi anbefaler å installere pakken for bedre ytelse."
+                    "Kunne ikke åpne disk-cache for Brønnøysund-oppslag. Bruker minne-cache."
                 )
-                _FALLBACK_WARNING_EMITTED = True
-            adapter = _build_retry_adapter()
-            _SESSION.mount("https://", adapter)
-            _SESSION.mount("http://", adapter)
-    assert _SESSION is not None
-    return _SESSION
+        elif not _MEMORY_CACHE_WARNING_EMITTED:
+            _LOGGER.warning(
+                "Fant ingen skrivbar katalog for Brønnøysund-cache. Bruker minne-cache."
+            )
+            _MEMORY_CACHE_WARNING_EMITTED = True
+        _HTTP_CACHE = LookupCache(
+            HTTP_NAMESPACE,
+            ttl_seconds=_CACHE_TTL_SECONDS,
+            stale_seconds=_STALE_SECONDS,
+            max_entries=_MEMORY_ENTRIES,
+            persistent=persistent,
+            encode=_encode_result,
+            decode=_decode_result,
+        )
+        return _HTTP_CACHE
+
+
+def cached_fetch(
+    cache_key: str, loader: Callable[[], BrregServiceResult]
+) -> BrregServiceResult:
+    """Returnerer et mellomlagret svar, eller henter og lagrer et nytt.
+
+    Et utløpt svar brukes i inntil ett døgn (lenger i en
+    :func:`~nordlys.integrations.lookup_cache.allow_stale`-blokk) mens
+    ``loader`` kjøres i bakgrunnen, og merkes da med ``stale``. Midlertidige
+    feil (tidsavbrudd, 5xx, 429 osv.) lagres ikke.
+    """
+
+    cached = http_cache().get_or_load(
+        cache_key, loader, should_store=_should_cache_result
+    )
+    if cached.from_cache:
+        return replace(cached.value, from_cache=True, stale=cached.stale)
+    return cached.value
 
 
 def make_cache_key(url: str, list_policy: str) -> str:
@@ -140,13 +174,10 @@ def make_cache_key(url: str, list_policy: str) -> str:
 
 
 def fallback_cache_get(cache_key: str) -> Optional[BrregServiceResult]:
-    _prune_fallback_cache()
-    entry = _FALLBACK_CACHE.get(cache_key)
-    if not entry:
-        return None
-    _, result = entry
-    stored = replace(result, from_cache=True)
-    return stored
+    """Slår opp et gyldig svar i cachen uten å hente noe."""
+
+    result = http_cache().get(cache_key)
+    return replace(result, from_cache=True) if result is not None else None
 
 
 def _should_cache_result(result: BrregServiceResult) -> bool:
@@ -166,30 +197,29 @@ def _should_cache_result(result: BrregServiceResult) -> bool:
 
 
 def fallback_cache_set(cache_key: str, result: BrregServiceResult) -> None:
-    _prune_fallback_cache()
     if not _should_cache_result(result):
         return
-    _FALLBACK_CACHE[cache_key] = (
-        time.monotonic(),
-        replace(result, from_cache=False),
-    )
+    http_cache().put(cache_key, replace(result, from_cache=False))
 
 
-def _prune_fallback_cache(now: Optional[float] = None) -> None:
-    """Fjerner gamle oppføringer fra fallback-cachen."""
+def clear_fallback_cache() -> None:
+    """Tømmer både minnet og disk-cachen for HTTP-svar."""
 
-    current_time = time.monotonic() if now is None else now
-    expired = [
-        key
-        for key, (timestamp, _) in _FALLBACK_CACHE.items()
-        if current_time - timestamp > _CACHE_TTL_SECONDS
-    ]
-    for key in expired:
-        _FALLBACK_CACHE.pop(key, None)
+    http_cache().clear()
 
 
-def clear_fallback_cache() -> None:
-    _FALLBACK_CACHE.clear()
+def _encode_result(result: BrregServiceResult) -> Dict[str, Any]:
+    return {
+        "data": result.data,
+        "error_code": result.error_code,
+        "error_message": result.error_message,
+    }
+
+
+def _decode_result(raw: Dict[str, Any]) -> BrregServiceResult:
+    return BrregServiceResult(
+        raw.get("data"), raw.get("error_code"), raw.get("error_message"), False
+    )
 
 
 def set_session(session: Optional[requests.Session]) -> None:
@@ -198,13 +228,18 @@ def set_session(session: Optional[requests.Session]) -> None:
 
 
 def _build_retry_adapter() -> HTTPAdapter:
+    # 429 håndteres av brreg_client: pausen deles av alle oppslag og
+    # fetch_many prøver på nytt uten å holde på en av samtidighetsplassene.
+    # urllib3 prøver ellers 429 med Retry-After på nytt selv utenfor
+    # status_forcelist.
     retry = Retry(
         total=3,
         connect=3,
         read=3,
         status=3,
         backoff_factor=1.0,
-        status_forcelist=(429, 500, 502, 503, 504),
+        status_forcelist=(500, 502, 503, 504),
+        respect_retry_after_header=False,
         allowed_methods=("GET",),
     )
     return HTTPAdapter(max_retries=retry)
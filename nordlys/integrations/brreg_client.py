@@ -3,38 +3,99 @@
 from __future__ import annotations
 
 import logging
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
 from enum import Enum
-from typing import Any, Dict, Optional
+from typing import Any, Callable, Dict, Iterable, Optional, Sequence
 
 import requests  # type: ignore[import-untyped, import-not-found]
 
 from ..constants import BRREG_URL_TMPL, ENHETSREGISTER_URL_TMPL
 from .brreg_cache import (
     DEFAULT_TIMEOUT,
-    REQUESTS_CACHE_AVAILABLE,
-    fallback_cache_get,
-    fallback_cache_set,
+    HTTP_NAMESPACE,
+    cached_fetch,
     get_session,
     make_cache_key,
 )
 from .brreg_models import BrregServiceResult, CompanyStatus
+from .enhet_bulk import lookup_snapshot_many, snapshot_imported_at
+from .lookup_cache import current_stale_scope, note_stale
 
 __all__ = [
+    "SOURCE_ENHETSREGISTER",
+    "SOURCE_REGNSKAPSREGISTER",
+    "company_status_from_json",
     "fetch_regnskapsregister",
     "fetch_enhetsregister",
+    "fetch_many",
     "get_company_status",
 ]
 
 _LOGGER = logging.getLogger(__name__)
 
-_NETWORK_ERROR_CODES = {
-    "timeout",
-    "connection_error",
-    "rate_limited",
-    "server_error",
-    "http_error",
-    "request_error",
-}
+
+SOURCE_ENHETSREGISTER = "enhetsregisteret"
+SOURCE_REGNSKAPSREGISTER = "regnskapsregisteret"
+
+DEFAULT_MAX_CONCURRENCY = 8
+_RATE_LIMIT_BACKOFF_SECONDS = 1.0
+_RATE_LIMIT_MAX_BACKOFF_SECONDS = 60.0
+_RATE_LIMIT_MAX_ATTEMPTS = 4
+
+
+class _RateLimitGate:
+    """Felles pause for alle oppslag etter at tjenesten har svart 429.
+
+    Når én forespørsel blir strupet, venter alle påfølgende forespørsler til
+    pausen er over. Pausen dobles for hver 429 på rad og nullstilles ved
+    første vellykkede svar.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._open_at = 0.0
+        self._backoff = _RATE_LIMIT_BACKOFF_SECONDS
+
+    def wait(self) -> None:
+        while True:
+            with self._lock:
+                delay = self._open_at - time.monotonic()
+            if delay <= 0:
+                return
+            time.sleep(delay)
+
+    def trip(self, retry_after: Optional[float] = None) -> None:
+        with self._lock:
+            delay = retry_after if retry_after is not None else self._backoff
+            delay = min(max(delay, 0.0), _RATE_LIMIT_MAX_BACKOFF_SECONDS)
+            self._open_at = max(self._open_at, time.monotonic() + delay)
+            self._backoff = min(self._backoff * 2, _RATE_LIMIT_MAX_BACKOFF_SECONDS)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._backoff = _RATE_LIMIT_BACKOFF_SECONDS
+
+
+_RATE_LIMIT_GATE = _RateLimitGate()
+_CONCURRENCY = threading.BoundedSemaphore(DEFAULT_MAX_CONCURRENCY)
+_IN_FLIGHT: Dict[str, "Future[BrregServiceResult]"] = {}
+_IN_FLIGHT_LOCK = threading.Lock()
+
+
+def _parse_retry_after(response: Any) -> Optional[float]:
+    headers = getattr(response, "headers", None) or {}
+    try:
+        value = headers.get("Retry-After")
+    except AttributeError:
+        return None
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
 
 
 class _ListPolicy(str, Enum):
@@ -64,136 +125,163 @@ def _fetch_json(
     *,
     list_policy: _ListPolicy = _ListPolicy.DISALLOW,
 ) -> BrregServiceResult:
-    cache_key = make_cache_key(url, list_policy.value)
-    if not REQUESTS_CACHE_AVAILABLE:
-        cached_result = fallback_cache_get(cache_key)
-        if cached_result is not None:
-            return cached_result
-
-    def finalize(result: BrregServiceResult) -> BrregServiceResult:
-        if not REQUESTS_CACHE_AVAILABLE:
-            fallback_cache_set(cache_key, result)
-        return result
+    return cached_fetch(
+        make_cache_key(url, list_policy.value),
+        lambda: _request_json(url, source_label, list_policy=list_policy),
+    )
+
 
+def _request_json(
+    url: str,
+    source_label: str,
+    *,
+    list_policy: _ListPolicy = _ListPolicy.DISALLOW,
+) -> BrregServiceResult:
     session = get_session()
+    _RATE_LIMIT_GATE.wait()
     try:
-        response = session.get(
-            url,
-            headers={"Accept": "application/json"},
-            timeout=DEFAULT_TIMEOUT,
-        )
+        with _CONCURRENCY:
+            response = session.get(
+                url,
+                headers={"Accept": "application/json"},
+                timeout=DEFAULT_TIMEOUT,
+            )
     except requests.Timeout:
-        return finalize(
-            BrregServiceResult(None, "timeout", f"{source_label}: tidsavbrudd.", False)
+        return BrregServiceResult(
+            None, "timeout", f"{source_label}: tidsavbrudd.", False
         )
     except requests.ConnectionError as exc:
-        return finalize(
-            BrregServiceResult(
-                None,
-                "connection_error",
-                f"{source_label}: tilkoblingsfeil ({exc}).",
-                False,
-            )
+        return BrregServiceResult(
+            None,
+            "connection_error",
+            f"{source_label}: tilkoblingsfeil ({exc}).",
+            False,
         )
     except requests.RequestException as exc:
-        return finalize(
-            BrregServiceResult(
-                None,
-                "request_error",
-                f"{source_label}: uventet feil ({exc}).",
-                False,
-            )
+        return BrregServiceResult(
+            None,
+            "request_error",
+            f"{source_label}: uventet feil ({exc}).",
+            False,
         )
 
-    from_cache = bool(getattr(response, "from_cache", False))
-
     if response.status_code == 404:
-        return finalize(
-            BrregServiceResult(
-                None,
-                "not_found",
-                f"{source_label}: ingen treff for organisasjonsnummeret.",
-                from_cache,
-            )
+        return BrregServiceResult(
+            None,
+            "not_found",
+            f"{source_label}: ingen treff for organisasjonsnummeret.",
+            False,
         )
     if response.status_code == 429:
-        return finalize(
-            BrregServiceResult(
-                None,
-                "rate_limited",
-                f"{source_label}: for mange forespørsler (429).",
-                from_cache,
-            )
+        _RATE_LIMIT_GATE.trip(_parse_retry_after(response))
+        return BrregServiceResult(
+            None,
+            "rate_limited",
+            f"{source_label}: for mange forespørsler (429).",
+            False,
         )
+    _RATE_LIMIT_GATE.reset()
     if response.status_code >= 500:
-        return finalize(
-            BrregServiceResult(
-                None,
-                "server_error",
-                f"{source_label}: tjenesten svarte med {response.status_code}.",
-                from_cache,
-            )
+        return BrregServiceResult(
+            None,
+            "server_error",
+            f"{source_label}: tjenesten svarte med {response.status_code}.",
+            False,
         )
     try:
         response.raise_for_status()
     except requests.HTTPError:
-        return finalize(
-            BrregServiceResult(
-                None,
-                "http_error",
-                f"{source_label}: tjenesten svarte med {response.status_code}.",
-                from_cache,
-            )
+        return BrregServiceResult(
+            None,
+            "http_error",
+            f"{source_label}: tjenesten svarte med {response.status_code}.",
+            False,
         )
 
     try:
         payload = response.json()
     except ValueError as exc:
-        return finalize(
-            BrregServiceResult(
-                None,
-                "invalid_json",
-                f"{source_label}: ugyldig JSON ({exc}).",
-                from_cache,
-            )
+        return BrregServiceResult(
+            None,
+            "invalid_json",
+            f"{source_label}: ugyldig JSON ({exc}).",
+            False,
         )
 
     if isinstance(payload, list):
         if list_policy is _ListPolicy.FIRST_DICT:
             for element in payload:
                 if isinstance(element, dict):
-                    return finalize(BrregServiceResult(element, None, None, from_cache))
+                    return BrregServiceResult(element, None, None, False)
             if not payload:
-                return finalize(
-                    BrregServiceResult(
-                        None,
-                        "not_found",
-                        f"{source_label}: ingen treff for organisasjonsnummeret.",
-                        from_cache,
-                    )
-                )
-            return finalize(
-                BrregServiceResult(
+                return BrregServiceResult(
                     None,
-                    "invalid_json",
-                    f"{source_label}: uventet svarformat (liste).",
-                    from_cache,
+                    "not_found",
+                    f"{source_label}: ingen treff for organisasjonsnummeret.",
+                    False,
                 )
+            return BrregServiceResult(
+                None,
+                "invalid_json",
+                f"{source_label}: uventet svarformat (liste).",
+                False,
             )
         if list_policy is _ListPolicy.PASSTHROUGH:
-            return finalize(BrregServiceResult(payload, None, None, from_cache))
+            return BrregServiceResult(payload, None, None, False)
 
     if not isinstance(payload, dict):
-        return finalize(
-            BrregServiceResult(
-                None,
-                "invalid_json",
-                f"{source_label}: uventet svarformat.",
-                from_cache,
-            )
+        return BrregServiceResult(
+            None,
+            "invalid_json",
+            f"{source_label}: uventet svarformat.",
+            False,
         )
 
-    return finalize(BrregServiceResult(payload, None, None, from_cache))
+    return BrregServiceResult(payload, None, None, False)
+
+
+def _fetch_coalesced(
+    url: str,
+    source_label: str,
+    *,
+    list_policy: _ListPolicy = _ListPolicy.DISALLOW,
+) -> BrregServiceResult:
+    """Som :func:`_fetch_json`, men deler svaret med samtidige like oppslag.
+
+    Ber flere tråder om samme URL samtidig, gjøres bare én HTTP-forespørsel.
+    De andre venter på og får det samme resultatet. Bare oppslag med samme
+    foreldet-vindu deles, slik at et vanlig oppslag ikke får importens
+    eldre svar.
+    """
+
+    key = make_cache_key(url, list_policy.value)
+    scope = current_stale_scope(HTTP_NAMESPACE)
+    if scope is not None:
+        key = f"{key}::stale={scope.stale_seconds}"
+    with _IN_FLIGHT_LOCK:
+        pending = _IN_FLIGHT.get(key)
+        owner = pending is None
+        if owner:
+            pending = Future()
+            _IN_FLIGHT[key] = pending
+    assert pending is not None
+    if not owner:
+        shared = pending.result()
+        if shared.stale:
+            note_stale(HTTP_NAMESPACE)
+        return shared
+
+    try:
+        result = _fetch_json(url, source_label, list_policy=list_policy)
+    except BaseException as exc:
+        pending.set_exception(exc)
+        raise
+    else:
+        pending.set_result(result)
+        return result
+    finally:
+        with _IN_FLIGHT_LOCK:
+            _IN_FLIGHT.pop(key, None)
 
 
 def fetch_regnskapsregister(orgnr: str) -> BrregServiceResult:
@@ -204,18 +292,120 @@ def fetch_regnskapsregister(orgnr: str) -> BrregServiceResult:
     except ValueError as exc:
         return BrregServiceResult(None, "invalid_orgnr", str(exc), False)
     url = BRREG_URL_TMPL.format(orgnr=normalized)
-    return _fetch_json(url, "Regnskapsregisteret", list_policy=_ListPolicy.PASSTHROUGH)
+    return _fetch_coalesced(
+        url, "Regnskapsregisteret", list_policy=_ListPolicy.PASSTHROUGH
+    )
 
 
 def fetch_enhetsregister(orgnr: str) -> BrregServiceResult:
-    """Henter enhetsdata for et organisasjonsnummer."""
+    """Henter enhetsdata for et organisasjonsnummer.
+
+    En fersk bulkindeks besvarer oppslaget uten nett. En eldre indeks brukes
+    bare når oppslaget mot Enhetsregisteret feiler midlertidig.
+    """
 
     try:
         normalized = _normalize_orgnr(orgnr)
     except ValueError as exc:
         return BrregServiceResult(None, "invalid_orgnr", str(exc), False)
+    snapshot = _snapshot_results([normalized])
+    if normalized in snapshot:
+        return snapshot[normalized]
+    result = _fetch_enhetsregister_live(normalized)
+    if result.is_network_error:
+        return _snapshot_results([normalized], include_stale=True).get(
+            normalized, result
+        )
+    return result
+
+
+def _fetch_enhetsregister_live(normalized: str) -> BrregServiceResult:
     url = ENHETSREGISTER_URL_TMPL.format(orgnr=normalized)
-    return _fetch_json(url, "Enhetsregisteret", list_policy=_ListPolicy.FIRST_DICT)
+    return _fetch_coalesced(url, "Enhetsregisteret", list_policy=_ListPolicy.FIRST_DICT)
+
+
+def _snapshot_results(
+    orgnrs: Sequence[str], *, include_stale: bool = False
+) -> Dict[str, BrregServiceResult]:
+    found = lookup_snapshot_many(orgnrs, include_stale=include_stale)
+    if not found:
+        return {}
+    imported_at = snapshot_imported_at()
+    return {
+        orgnr: BrregServiceResult(data, None, None, True, imported_at)
+        for orgnr, data in found.items()
+    }
+
+
+_FETCHERS: Dict[str, Callable[[str], BrregServiceResult]] = {
+    SOURCE_ENHETSREGISTER: _fetch_enhetsregister_live,
+    SOURCE_REGNSKAPSREGISTER: fetch_regnskapsregister,
+}
+
+
+def fetch_many(
+    orgnrs: Iterable[str],
+    *,
+    source: str = SOURCE_ENHETSREGISTER,
+    max_workers: int = DEFAULT_MAX_CONCURRENCY,
+) -> Dict[str, BrregServiceResult]:
+    """Slår opp mange organisasjonsnumre parallelt.
+
+    Enhetsregisteret slås først opp i den lokale bulkindeksen når den er
+    fersk (se :mod:`nordlys.integrations.enhet_bulk`); bare numre som mangler
+    der hentes fra nettet. Feiler nettoppslaget midlertidig, brukes en eldre
+    indeks som reserve.
+
+    Nøklene i resultatet er normaliserte organisasjonsnumre (ugyldige numre
+    beholdes slik de ble gitt, med feilkoden ``invalid_orgnr``). Like numre
+    slås bare opp én gang, og oppslag som blir strupet (429) prøves på nytt
+    etter den felles pausen.
+    """
+
+    try:
+        fetcher = _FETCHERS[source]
+    except KeyError as exc:
+        raise ValueError(f"Ukjent Brønnøysund-kilde: {source}") from exc
+
+    results: Dict[str, BrregServiceResult] = {}
+    pending: list[str] = []
+    seen: set[str] = set()
+    for orgnr in orgnrs:
+        try:
+            normalized = _normalize_orgnr(orgnr)
+        except ValueError as exc:
+            results[str(orgnr)] = BrregServiceResult(
+                None, "invalid_orgnr", str(exc), False
+            )
+            continue
+        if normalized not in seen:
+            seen.add(normalized)
+            pending.append(normalized)
+    if pending and source == SOURCE_ENHETSREGISTER:
+        results.update(_snapshot_results(pending))
+        pending = [orgnr for orgnr in pending if orgnr not in results]
+    if not pending:
+        return results
+
+    def _fetch_with_retry(orgnr: str) -> BrregServiceResult:
+        result = fetcher(orgnr)
+        attempts = 1
+        while (
+            result.error_code == "rate_limited" and attempts < _RATE_LIMIT_MAX_ATTEMPTS
+        ):
+            attempts += 1
+            result = fetcher(orgnr)
+        return result
+
+    workers = max(1, min(max_workers, len(pending)))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for orgnr, result in zip(pending, executor.map(_fetch_with_retry, pending)):
+            results[orgnr] = result
+    if source == SOURCE_ENHETSREGISTER:
+        failed = [orgnr for orgnr in pending if results[orgnr].is_network_error]
+        if failed:
+            results.update(_snapshot_results(failed, include_stale=True))
+    return results
 
 
 def _normalize_orgnr(orgnr: str) -> str:
@@ -236,7 +426,7 @@ def get_company_status(orgnr: str) -> CompanyStatus:
     result = fetch_enhetsregister(normalized)
     if result.error_code:
         message = result.error_message or result.error_code
-        if result.error_code in _NETWORK_ERROR_CODES:
+        if result.is_network_error:
             _LOGGER.warning(
                 "Brreg-status: %s (orgnr=%s)",
                 message,
@@ -251,6 +441,12 @@ def get_company_status(orgnr: str) -> CompanyStatus:
     data: Dict[str, Any] = {}
     if isinstance(result.data, dict):
         data = result.data
+    return company_status_from_json(normalized, data)
+
+
+def company_status_from_json(orgnr: str, data: Dict[str, Any]) -> CompanyStatus:
+    """Tolker statusfeltene i et svar fra Enhetsregisteret."""
+
     konkurs = _interpret_bool(data.get("konkurs"))
     under_avvikling = _interpret_bool(data.get("underAvvikling"))
     under_tvangsopplosning = _interpret_bool(
@@ -265,7 +461,7 @@ def get_company_status(orgnr: str) -> CompanyStatus:
     mva_reg = _interpret_bool(data.get("registrertIMvaregisteret"))
 
     return CompanyStatus(
-        orgnr=normalized,
+        orgnr=orgnr,
         konkurs=konkurs,
         avvikling=avvikling,
         mva_reg=mva_reg,
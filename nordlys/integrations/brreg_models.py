@@ -9,7 +9,24 @@ JSONMapping = dict[str, Any]
 JSONList = list[Any]
 JSONPayload = JSONMapping | JSONList
 
-__all__ = ["BrregServiceResult", "CompanyStatus", "JSONPayload"]
+__all__ = [
+    "BrregServiceResult",
+    "CompanyStatus",
+    "JSONPayload",
+    "NETWORK_ERROR_CODES",
+]
+
+NETWORK_ERROR_CODES = frozenset(
+    {
+        "timeout",
+        "connection_error",
+        "rate_limited",
+        "server_error",
+        "http_error",
+        "request_error",
+    }
+)
+"""Feilkoder for oppslag som kan lykkes ved et nytt forsøk."""
 
 
 @dataclass
@@ -20,6 +37,16 @@ class BrregServiceResult:
     error_code: Optional[str]
     error_message: Optional[str]
     from_cache: bool
+    # Importtidspunktet (epoch) når svaret kom fra den lokale bulkindeksen.
+    snapshot_imported_at: Optional[float] = None
+    # Sann når et utløpt svar fra cachen ble brukt mens et nytt hentes.
+    stale: bool = False
+
+    @property
+    def is_network_error(self) -> bool:
+        """Sann når oppslaget feilet midlertidig og kan prøves igjen."""
+
+        return self.error_code in NETWORK_ERROR_CODES
 
 
 @dataclass
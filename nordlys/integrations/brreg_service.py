@@ -3,16 +3,26 @@
 from __future__ import annotations
 
 from .brreg_client import (
+    SOURCE_ENHETSREGISTER,
+    SOURCE_REGNSKAPSREGISTER,
+    company_status_from_json,
     fetch_enhetsregister,
+    fetch_many,
     fetch_regnskapsregister,
     get_company_status,
 )
 from .brreg_models import BrregServiceResult, CompanyStatus
+from .lookup_cache import cache_stats
 
 __all__ = [
     "BrregServiceResult",
     "CompanyStatus",
+    "SOURCE_ENHETSREGISTER",
+    "SOURCE_REGNSKAPSREGISTER",
+    "cache_stats",
+    "company_status_from_json",
     "fetch_enhetsregister",
+    "fetch_many",
     "fetch_regnskapsregister",
     "get_company_status",
 ]
@@ -0,0 +1,298 @@
+"""Import av Enhetsregisterets bulkfil til en lokal, offline indeks.
+
+Brønnøysundregistrene publiserer hele Enhetsregisteret som én stor JSON-
+eller CSV-fil (vanligvis gzip-komprimert). Filen leses strømmende, hver
+enhet kortes ned til feltene Nordlys bruker, og resultatet lagres i en
+SQLite-indeks med organisasjonsnummer som primærnøkkel. Oppslag mot
+indeksen trenger ikke nett.
+
+Indeksen brukes foran nettet bare mens importen er nyere enn
+:data:`SNAPSHOT_MAX_AGE_SECONDS`. En eldre indeks er bare en reserve når
+Enhetsregisteret ikke svarer, slik at konkurs og avvikling ikke skjules av en
+gammel kopi.
+"""
+
+from __future__ import annotations
+
+import csv
+import gzip
+import json
+import time
+from pathlib import Path
+from threading import Lock
+from typing import (
+    IO,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    Mapping,
+    Optional,
+    Tuple,
+    Union,
+)
+
+from .brreg_cache import cache_dir
+from .enhet_store import EnhetStore
+
+__all__ = [
+    "SNAPSHOT_MAX_AGE_SECONDS",
+    "SNAPSHOT_NAME",
+    "compact_enhet",
+    "get_snapshot",
+    "import_bulk_file",
+    "iter_bulk_records",
+    "lookup_snapshot",
+    "lookup_snapshot_many",
+    "snapshot_age_seconds",
+    "snapshot_imported_at",
+    "snapshot_path",
+]
+
+SNAPSHOT_NAME = "enhetsregister_snapshot.sqlite3"
+
+# Settes i tester eller av brukeren; ``None`` betyr standardplassering i cachen.
+SNAPSHOT_PATH: Optional[Path] = None
+
+# Brønnøysund publiserer bulkfilen daglig; en ukegammel kopi er god nok foran
+# nettet, eldre kopier brukes bare når oppslaget mot nettet feiler.
+SNAPSHOT_MAX_AGE_SECONDS = 7 * 24 * 60 * 60
+
+_BATCH_SIZE = 5_000
+_READ_SIZE = 1 << 20
+
+_KEPT_FIELDS = (
+    "organisasjonsnummer",
+    "navn",
+    "organisasjonsform",
+    "naeringskode1",
+    "konkurs",
+    "underAvvikling",
+    "underTvangsavviklingEllerTvangsoppløsning",
+    "registrertIMvaregisteret",
+    "slettedato",
+)
+# CSV-varianten bruker ASCII i kolonnenavnene.
+_FIELD_ALIASES = {
+    "underTvangsavviklingEllerTvangsopplosning": (
+        "underTvangsavviklingEllerTvangsoppløsning"
+    ),
+}
+
+_SNAPSHOT: Optional[EnhetStore] = None
+_SNAPSHOT_IMPORTED_AT: Optional[float] = None
+_SNAPSHOT_LOCK = Lock()
+
+ProgressCallback = Callable[[int], None]
+
+
+def snapshot_path() -> Optional[Path]:
+    """Plasseringen til den lokale indeksen (finnes ikke nødvendigvis)."""
+
+    if SNAPSHOT_PATH is not None:
+        return SNAPSHOT_PATH
+    directory = cache_dir()
+    return directory / SNAPSHOT_NAME if directory is not None else None
+
+
+def get_snapshot() -> Optional[EnhetStore]:
+    """Åpner indeksen hvis en bulkfil er importert, ellers ``None``."""
+
+    global _SNAPSHOT, _SNAPSHOT_IMPORTED_AT
+    path = snapshot_path()
+    if path is None or not path.exists():
+        return None
+    with _SNAPSHOT_LOCK:
+        if _SNAPSHOT is None or _SNAPSHOT.path != path:
+            if _SNAPSHOT is not None:
+                _SNAPSHOT.close()
+            _SNAPSHOT = EnhetStore(path, ttl_seconds=None)
+            _SNAPSHOT_IMPORTED_AT = _SNAPSHOT.latest_fetched_at()
+        return _SNAPSHOT
+
+
+def snapshot_imported_at() -> Optional[float]:
+    """Tidspunktet (epoch) den lokale indeksen ble importert, om den finnes."""
+
+    if get_snapshot() is None:
+        return None
+    return _SNAPSHOT_IMPORTED_AT
+
+
+def snapshot_age_seconds(now: Optional[float] = None) -> Optional[float]:
+    """Alderen på den lokale indeksen i sekunder, eller ``None`` uten indeks."""
+
+    imported_at = snapshot_imported_at()
+    if imported_at is None:
+        return None
+    return max(0.0, (time.time() if now is None else now) - imported_at)
+
+
+def lookup_snapshot(
+    orgnr: str, *, include_stale: bool = False
+) -> Optional[Dict[str, object]]:
+    """Slår opp ett normalisert organisasjonsnummer i den lokale indeksen.
+
+    Uten ``include_stale`` gir en indeks eldre enn
+    :data:`SNAPSHOT_MAX_AGE_SECONDS` ingen treff.
+    """
+
+    return lookup_snapshot_many([orgnr], include_stale=include_stale).get(orgnr)
+
+
+def lookup_snapshot_many(
+    orgnrs: Iterable[str], *, include_stale: bool = False
+) -> Dict[str, Dict[str, object]]:
+    """Slår opp mange normaliserte organisasjonsnumre i den lokale indeksen."""
+
+    snapshot = get_snapshot()
+    if snapshot is None:
+        return {}
+    if not include_stale:
+        age = snapshot_age_seconds()
+        if age is None or age > SNAPSHOT_MAX_AGE_SECONDS:
+            return {}
+    return snapshot.get_many(orgnrs)
+
+
+def compact_enhet(raw: Mapping[str, object]) -> Optional[Tuple[str, Dict[str, object]]]:
+    """Korter ned en enhet fra bulkfilen til feltene Nordlys bruker."""
+
+    orgnr = "".join(
+        ch for ch in str(raw.get("organisasjonsnummer") or "") if ch.isdigit()
+    )
+    if len(orgnr) != 9:
+        return None
+    compact: Dict[str, object] = {}
+    for key in _KEPT_FIELDS:
+        value = raw.get(key)
+        if isinstance(value, dict):
+            value = {k: v for k, v in value.items() if k in ("kode", "beskrivelse")}
+        if value not in (None, "", {}):
+            compact[key] = value
+    return orgnr, compact
+
+
+def iter_bulk_records(path: Union[str, Path]) -> Iterator[Dict[str, object]]:
+    """Leser enhetene i en bulkfil én og én (JSON eller CSV, ev. gzip)."""
+
+    source = Path(path)
+    suffixes = [suffix.lower() for suffix in source.suffixes]
+    opener = gzip.open if suffixes and suffixes[-1] == ".gz" else open
+    is_csv = ".csv" in suffixes
+    with opener(source, "rt", encoding="utf-8", newline="" if is_csv else None) as fh:
+        if is_csv:
+            yield from _iter_csv(fh)
+        else:
+            yield from _iter_json_array(fh)
+
+
+def import_bulk_file(
+    path: Union[str, Path],
+    *,
+    target: Optional[Union[str, Path]] = None,
+    progress: Optional[ProgressCallback] = None,
+) -> int:
+    """Importerer en bulkfil til indeksen og returnerer antall enheter.
+
+    Indeksen bygges i en midlertidig fil og byttes inn til slutt, slik at
+    oppslag underveis fortsatt bruker den forrige importen.
+    """
+
+    destination = Path(target) if target is not None else snapshot_path()
+    if destination is None:
+        raise RuntimeError("Fant ingen skrivbar katalog for Enhetsregister-indeksen.")
+    destination.parent.mkdir(parents=True, exist_ok=True)
+    staging = destination.with_name(destination.name + ".tmp")
+    staging.unlink(missing_ok=True)
+
+    imported_at = time.time()
+    store = EnhetStore(staging, ttl_seconds=None)
+    count = 0
+    batch: Dict[str, Dict[str, object]] = {}
+    try:
+        for raw in iter_bulk_records(path):
+            compacted = compact_enhet(raw)
+            if compacted is None:
+                continue
+            orgnr, data = compacted
+            batch[orgnr] = data
+            if len(batch) >= _BATCH_SIZE:
+                store.put_many(batch, fetched_at=imported_at)
+                count += len(batch)
+                batch = {}
+                if progress is not None:
+                    progress(count)
+        store.put_many(batch, fetched_at=imported_at)
+        count += len(batch)
+    finally:
+        store.close()
+
+    with _SNAPSHOT_LOCK:
+        global _SNAPSHOT, _SNAPSHOT_IMPORTED_AT
+        if _SNAPSHOT is not None and _SNAPSHOT.path == destination:
+            _SNAPSHOT.close()
+            _SNAPSHOT = None
+            _SNAPSHOT_IMPORTED_AT = None
+        for suffix in ("-wal", "-shm"):
+            Path(str(destination) + suffix).unlink(missing_ok=True)
+        staging.replace(destination)
+    if progress is not None:
+        progress(count)
+    return count
+
+
+def _iter_csv(fh: IO[str]) -> Iterator[Dict[str, object]]:
+    reader = csv.DictReader(fh)
+    for row in reader:
+        record: Dict[str, object] = {}
+        for column, value in row.items():
+            if column is None or value in (None, ""):
+                continue
+            head, _, tail = column.partition(".")
+            head = _FIELD_ALIASES.get(head, head)
+            if tail:
+                nested = record.setdefault(head, {})
+                if isinstance(nested, dict):
+                    nested[tail] = value
+            else:
+                record[head] = value
+        yield record
+
+
+def _iter_json_array(fh: IO[str]) -> Iterator[Dict[str, object]]:
+    """Strømmende lesing av en JSON-liste med objekter uten å laste hele filen."""
+
+    decoder = json.JSONDecoder()
+    buffer = ""
+    position = 0
+    started = False
+    eof = False
+    while True:
+        # Hopp over mellomrom, komma og åpnings-/sluttklamme mellom objektene.
+        while position < len(buffer) and buffer[position] in " \t\r\n,[]":
+            if buffer[position] == "[":
+                started = True
+            position += 1
+        if position >= len(buffer):
+            if eof:
+                return
+            buffer = fh.read(_READ_SIZE)
+            position = 0
+            eof = not buffer
+            continue
+        if not started:
+            raise ValueError("Bulkfilen er ikke en JSON-liste.")
+        try:
+            value, end = decoder.raw_decode(buffer, position)
+        except json.JSONDecodeError:
+            if eof:
+                raise
+            chunk = fh.read(_READ_SIZE)
+            eof = not chunk
+            buffer = buffer[position:] + chunk
+            position = 0
+            continue
+        position = end
+        if isinstance(value, dict):
+            yield value
@@ -0,0 +1,255 @@
+"""Lokal SQLite-lagring av enhetsdata fra Enhetsregisteret."""
+
+from __future__ import annotations
+
+import json
+import logging
+import sqlite3
+import time
+from pathlib import Path
+from threading import Lock
+from typing import Dict, Iterable, Mapping, Optional, Sequence, Tuple, Union
+
+__all__ = ["DEFAULT_TTL_SECONDS", "EnhetStore"]
+
+_LOGGER = logging.getLogger(__name__)
+
+DEFAULT_TTL_SECONDS = 30 * 24 * 60 * 60  # 30 dager
+
+# SQLite begrenser antall parametre per spørring; 500 er trygt på alle versjoner.
+_QUERY_CHUNK = 500
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS enheter (
+    orgnr TEXT PRIMARY KEY,
+    data TEXT NOT NULL,
+    fetched_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+
+class EnhetStore:
+    """Nøkkel-verdi-lager for enhetsdata med ett indeksert oppslag per orgnr.
+
+    Hver rad lagres og oppdateres for seg (upsert), slik at et nytt oppslag
+    ikke skriver hele cachen på nytt. Rader eldre enn ``ttl_seconds`` regnes
+    som utløpt og returneres ikke. ``ttl_seconds=None`` slår av utløp.
+    """
+
+    def __init__(
+        self,
+        path: Union[str, Path],
+        *,
+        ttl_seconds: Optional[float] = DEFAULT_TTL_SECONDS,
+    ) -> None:
+        self.path = Path(path)
+        self.ttl_seconds = ttl_seconds
+        self._lock = Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        with self._lock:
+            try:
+                self._conn.execute("PRAGMA journal_mode=WAL")
+            except sqlite3.DatabaseError:  # pragma: no cover - f.eks. nettverksdisk
+                pass
+            self._conn.executescript(_SCHEMA)
+            self._conn.commit()
+
+    def __len__(self) -> int:
+        with self._lock:
+            row = self._conn.execute("SELECT COUNT(*) FROM enheter").fetchone()
+        return int(row[0])
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def get(
+        self, orgnr: str, *, include_expired: bool = False
+    ) -> Optional[Dict[str, object]]:
+        """Returnerer lagret enhetsdata, eller ``None`` om den mangler/er utløpt.
+
+        ``include_expired`` gir også utløpte rader, nyttig som reserve når
+        Enhetsregisteret ikke svarer.
+        """
+
+        return self.get_many([orgnr], include_expired=include_expired).get(orgnr)
+
+    def get_many(
+        self, orgnrs: Iterable[str], *, include_expired: bool = False
+    ) -> Dict[str, Dict[str, object]]:
+        """Henter alle gyldige rader for organisasjonsnumrene i få spørringer."""
+
+        wanted = list(dict.fromkeys(orgnrs))
+        found: Dict[str, Dict[str, object]] = {}
+        oldest = float("-inf") if include_expired else self._oldest_valid()
+        with self._lock:
+            for start in range(0, len(wanted), _QUERY_CHUNK):
+                chunk = wanted[start : start + _QUERY_CHUNK]
+                placeholders = ",".join("?" * len(chunk))
+                rows = self._conn.execute(
+                    "SELECT orgnr, data FROM enheter "
+                    f"WHERE orgnr IN ({placeholders}) AND fetched_at >= ?",
+                    (*chunk, oldest),
+                ).fetchall()
+                for orgnr, raw in rows:
+                    data = _decode(raw)
+                    if data is not None:
+                        found[orgnr] = data
+        return found
+
+    def load_many(
+        self, orgnrs: Sequence[str]
+    ) -> Dict[str, Tuple[Dict[str, object], float]]:
+        """Henter rader med hentetidspunkt, uansett alder.
+
+        Gjør lageret til en varig lagring under
+        :class:`~nordlys.integrations.lookup_cache.LookupCache`, som selv
+        avgjør hva som er utløpt.
+        """
+
+        found: Dict[str, Tuple[Dict[str, object], float]] = {}
+        with self._lock:
+            for start in range(0, len(orgnrs), _QUERY_CHUNK):
+                chunk = list(orgnrs[start : start + _QUERY_CHUNK])
+                placeholders = ",".join("?" * len(chunk))
+                rows = self._conn.execute(
+                    "SELECT orgnr, data, fetched_at FROM enheter "
+                    f"WHERE orgnr IN ({placeholders})",
+                    chunk,
+                ).fetchall()
+                for orgnr, raw, fetched_at in rows:
+                    data = _decode(raw)
+                    if data is not None:
+                        found[orgnr] = (data, float(fetched_at))
+        return found
+
+    def latest_fetched_at(self) -> Optional[float]:
+        """Hentetidspunktet for den nyeste raden, eller ``None`` når lageret er tomt."""
+
+        with self._lock:
+            row = self._conn.execute("SELECT MAX(fetched_at) FROM enheter").fetchone()
+        return None if row is None or row[0] is None else float(row[0])
+
+    def put(
+        self,
+        orgnr: str,
+        data: Mapping[str, object],
+        *,
+        fetched_at: Optional[float] = None,
+    ) -> None:
+        self.put_many({orgnr: data}, fetched_at=fetched_at)
+
+    def put_many(
+        self,
+        items: Mapping[str, Mapping[str, object]],
+        *,
+        fetched_at: Optional[float] = None,
+    ) -> None:
+        """Lagrer eller oppdaterer mange rader i én transaksjon."""
+
+        if not items:
+            return
+        timestamp = time.time() if fetched_at is None else fetched_at
+        rows = [
+            (
+                orgnr,
+                json.dumps(data, ensure_ascii=False, separators=(",", ":")),
+                timestamp,
+            )
+            for orgnr, data in items.items()
+        ]
+        with self._lock:
+            self._conn.executemany(
+                "INSERT INTO enheter (orgnr, data, fetched_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(orgnr) DO UPDATE SET "
+                "data = excluded.data, fetched_at = excluded.fetched_at",
+                rows,
+            )
+            self._conn.commit()
+
+    def delete_many(self, orgnrs: Iterable[str]) -> None:
+        with self._lock:
+            self._conn.executemany(
+                "DELETE FROM enheter WHERE orgnr = ?", [(orgnr,) for orgnr in orgnrs]
+            )
+            self._conn.commit()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM enheter")
+            self._conn.commit()
+
+    def purge_expired(self) -> int:
+        """Sletter utløpte rader og returnerer antallet som ble fjernet."""
+
+        oldest = self._oldest_valid()
+        with self._lock:
+            cursor = self._conn.execute(
+                "DELETE FROM enheter WHERE fetched_at < ?", (oldest,)
+            )
+            self._conn.commit()
+        return int(cursor.rowcount)
+
+    def migrate_json(self, json_path: Union[str, Path]) -> int:
+        """Importerer en eldre JSON-cache én gang.
+
+        Radene får filens endringstid som hentetidspunkt, slik at TTL gjelder
+        som før. Returnerer antall importerte rader (0 om det allerede er gjort).
+        """
+
+        source = Path(json_path)
+        marker = f"migrated:{source.name}"
+        if self._meta(marker) is not None or not source.exists():
+            return 0
+        try:
+            with source.open("r", encoding="utf-8") as fh:
+                payload = json.load(fh)
+            fetched_at = source.stat().st_mtime
+        except (OSError, json.JSONDecodeError) as exc:
+            _LOGGER.warning("Kunne ikke migrere bransjecache fra %s: %s", source, exc)
+            return 0
+        items = (
+            {
+                str(orgnr): data
+                for orgnr, data in payload.items()
+                if isinstance(data, dict)
+            }
+            if isinstance(payload, dict)
+            else {}
+        )
+        self.put_many(items, fetched_at=fetched_at)
+        self._set_meta(marker, str(time.time()))
+        return len(items)
+
+    def _oldest_valid(self) -> float:
+        if self.ttl_seconds is None:
+            return float("-inf")
+        return time.time() - self.ttl_seconds
+
+    def _meta(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM meta WHERE key = ?", (key,)
+            ).fetchone()
+        return None if row is None else str(row[0])
+
+    def _set_meta(self, key: str, value: str) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO meta (key, value) VALUES (?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+                (key, value),
+            )
+            self._conn.commit()
+
+
+def _decode(raw: str) -> Optional[Dict[str, object]]:
+    try:
+        data = json.loads(raw)
+    except json.JSONDecodeError:
+        return None
+    return data if isinstance(data, dict) else None
@@ -0,0 +1,576 @@
+"""Felles to-nivå cache for eksterne oppslag.
+
+Hvert navnerom (f.eks. HTTP-svar fra Brønnøysund eller enhetsdata) får en
+begrenset LRU i minnet foran en valgfri varig lagring. Oppføringer eldre
+enn navnerommets TTL regnes som foreldet. Innenfor ``stale_seconds`` etter
+utløp returneres de likevel, mens en ny verdi hentes i bakgrunnen
+(stale-while-revalidate). Treff, bom og hentetid telles per navnerom og kan
+leses ut med :func:`cache_stats`.
+
+Innenfor en :func:`allow_stale`-blokk kan et navnerom bruke eldre verdier
+enn vanlig, og blokken får vite om noen av dens egne oppslag var foreldet.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import sqlite3
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from threading import Lock
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    FrozenSet,
+    Generic,
+    Iterable,
+    Iterator,
+    Mapping,
+    Optional,
+    Protocol,
+    Sequence,
+    Tuple,
+    TypeVar,
+    Union,
+)
+
+__all__ = [
+    "CacheStats",
+    "CachedValue",
+    "LookupCache",
+    "PersistentTier",
+    "SqliteTier",
+    "StaleScope",
+    "allow_stale",
+    "cache_stats",
+    "current_stale_scope",
+    "get_cache",
+    "note_stale",
+    "wait_for_refreshes",
+]
+
+_LOGGER = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# SQLite begrenser antall parametre per spørring; 500 er trygt på alle versjoner.
+_QUERY_CHUNK = 500
+_REFRESH_WORKERS = 2
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS lookup_cache (
+    namespace TEXT NOT NULL,
+    key TEXT NOT NULL,
+    value TEXT NOT NULL,
+    stored_at REAL NOT NULL,
+    PRIMARY KEY (namespace, key)
+);
+"""
+
+
+class PersistentTier(Protocol):
+    """Varig lagring under minnecachen. Verdiene må kunne JSON-serialiseres."""
+
+    def load_many(self, keys: Sequence[str]) -> Dict[str, Tuple[Any, float]]:
+        """Returnerer (verdi, lagringstidspunkt) for nøklene som finnes."""
+
+    def put_many(
+        self, items: Mapping[str, Any], *, fetched_at: Optional[float] = None
+    ) -> None: ...
+
+    def delete_many(self, keys: Iterable[str]) -> None: ...
+
+    def clear(self) -> None: ...
+
+
+@dataclass
+class CacheStats:
+    """Tellere for ett navnerom. ``load_seconds`` er samlet hentetid."""
+
+    hits: int = 0
+    stale_hits: int = 0
+    misses: int = 0
+    memory_hits: int = 0
+    persistent_hits: int = 0
+    evictions: int = 0
+    loads: int = 0
+    load_errors: int = 0
+    refreshes: int = 0
+    load_seconds: float = 0.0
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.stale_hits + self.misses
+        return (self.hits + self.stale_hits) / lookups if lookups else 0.0
+
+    @property
+    def mean_load_ms(self) -> float:
+        return 1000.0 * self.load_seconds / self.loads if self.loads else 0.0
+
+    def as_dict(self) -> Dict[str, float]:
+        data: Dict[str, float] = dict(asdict(self))
+        data["hit_rate"] = self.hit_rate
+        data["mean_load_ms"] = self.mean_load_ms
+        return data
+
+
+@dataclass(frozen=True)
+class CachedValue(Generic[T]):
+    """Resultat fra :meth:`LookupCache.get_or_load`."""
+
+    value: T
+    from_cache: bool
+    stale: bool = False
+
+
+@dataclass
+class StaleScope:
+    """Et utvidet foreldet-vindu for oppslagene i én :func:`allow_stale`-blokk.
+
+    ``stale`` settes når et av blokkens egne oppslag i ``namespaces`` fikk en
+    foreldet verdi. Oppslag i andre tråder eller blokker påvirker den ikke.
+    """
+
+    stale_seconds: float
+    namespaces: FrozenSet[str]
+    stale: bool = False
+
+    def covers(self, namespace: str) -> bool:
+        return namespace in self.namespaces
+
+
+_STALE_SCOPE: ContextVar[Optional[StaleScope]] = ContextVar(
+    "nordlys_stale_scope", default=None
+)
+
+
+@contextmanager
+def allow_stale(
+    stale_seconds: float, namespaces: Iterable[str]
+) -> Iterator[StaleScope]:
+    """Lar oppslag i navnerommene bruke inntil ``stale_seconds`` foreldede verdier.
+
+    Gjelder bare den gjeldende konteksten. Arbeid som sendes til en
+    trådpool må kjøres med ``contextvars.copy_context().run``.
+    """
+
+    scope = StaleScope(stale_seconds, frozenset(namespaces))
+    token = _STALE_SCOPE.set(scope)
+    try:
+        yield scope
+    finally:
+        _STALE_SCOPE.reset(token)
+
+
+def current_stale_scope(namespace: str) -> Optional[StaleScope]:
+    """Den aktive :class:`StaleScope` for navnerommet, om det finnes en."""
+
+    scope = _STALE_SCOPE.get()
+    return scope if scope is not None and scope.covers(namespace) else None
+
+
+def note_stale(namespace: str) -> None:
+    """Merker den aktive blokken som foreldet, f.eks. for et delt svar."""
+
+    scope = current_stale_scope(namespace)
+    if scope is not None:
+        scope.stale = True
+
+
+@dataclass
+class _Entry:
+    value: Any
+    stored_at: float
+
+
+_REGISTRY: Dict[str, "LookupCache[Any]"] = {}
+_REGISTRY_LOCK = Lock()
+_EXECUTOR: Optional[ThreadPoolExecutor] = None
+
+
+def _refresh_executor() -> ThreadPoolExecutor:
+    global _EXECUTOR
+    with _REGISTRY_LOCK:
+        if _EXECUTOR is None:
+            _EXECUTOR = ThreadPoolExecutor(
+                max_workers=_REFRESH_WORKERS, thread_name_prefix="nordlys-cache"
+            )
+        return _EXECUTOR
+
+
+def get_cache(namespace: str) -> Optional["LookupCache[Any]"]:
+    """Returnerer cachen som sist ble registrert for navnerommet."""
+
+    with _REGISTRY_LOCK:
+        return _REGISTRY.get(namespace)
+
+
+def cache_stats() -> Dict[str, Dict[str, float]]:
+    """Øyeblikksbilde av tellerne for alle registrerte navnerom."""
+
+    with _REGISTRY_LOCK:
+        caches = list(_REGISTRY.items())
+    return {namespace: cache.stats.as_dict() for namespace, cache in caches}
+
+
+def _caches(namespaces: Optional[Iterable[str]]) -> list["LookupCache[Any]"]:
+    with _REGISTRY_LOCK:
+        if namespaces is None:
+            return list(_REGISTRY.values())
+        return [_REGISTRY[name] for name in namespaces if name in _REGISTRY]
+
+
+def wait_for_refreshes(
+    namespaces: Optional[Iterable[str]] = None, timeout: Optional[float] = None
+) -> None:
+    """Venter på pågående bakgrunnsoppdateringer i navnerommene."""
+
+    for cache in _caches(namespaces):
+        cache.wait_for_refreshes(timeout)
+
+
+class LookupCache(Generic[T]):
+    """Begrenset LRU i minnet over en valgfri :class:`PersistentTier`.
+
+    ``ttl_seconds=None`` betyr at oppføringer aldri blir foreldet.
+    ``stale_seconds`` angir hvor lenge etter utløp en foreldet verdi kan
+    returneres mens den oppdateres i bakgrunnen (``None`` = ubegrenset, 0 =
+    aldri). ``encode``/``decode`` oversetter mellom verdier i minnet og
+    JSON-vennlige verdier i den varige lagringen.
+    """
+
+    def __init__(
+        self,
+        namespace: str,
+        *,
+        ttl_seconds: Optional[float],
+        max_entries: int = 1024,
+        stale_seconds: Optional[float] = 0.0,
+        persistent: Optional[PersistentTier] = None,
+        encode: Optional[Callable[[T], Any]] = None,
+        decode: Optional[Callable[[Any], T]] = None,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        if max_entries < 1:
+            raise ValueError("max_entries må være minst 1.")
+        self.namespace = namespace
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.stale_seconds = stale_seconds
+        self.persistent = persistent
+        self.clock = clock
+        self._encode = encode
+        self._decode = decode
+        self._memory: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._refreshing: Dict[str, "Future[None]"] = {}
+        self._stats = CacheStats()
+        self._lock = Lock()
+        with _REGISTRY_LOCK:
+            _REGISTRY[namespace] = self
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._memory)
+
+    @property
+    def stats(self) -> CacheStats:
+        with self._lock:
+            return CacheStats(**asdict(self._stats))
+
+    def reset_stats(self) -> None:
+        with self._lock:
+            self._stats = CacheStats()
+
+    def get(self, key: str, *, include_expired: bool = False) -> Optional[T]:
+        """Returnerer en gyldig verdi, eller ``None``.
+
+        ``include_expired`` gir også foreldede verdier, nyttig som reserve når
+        kilden ikke svarer.
+        """
+
+        return self.get_many([key], include_expired=include_expired).get(key)
+
+    def get_many(
+        self, keys: Iterable[str], *, include_expired: bool = False
+    ) -> Dict[str, T]:
+        """Slår opp mange nøkler med ett kall mot den varige lagringen."""
+
+        wanted = list(dict.fromkeys(keys))
+        entries = self._lookup(wanted)
+        now = self.clock()
+        found: Dict[str, T] = {}
+        with self._lock:
+            for key in wanted:
+                entry = entries.get(key)
+                if entry is not None and self._is_fresh(entry, now):
+                    self._stats.hits += 1
+                    found[key] = entry.value
+                elif entry is not None and include_expired:
+                    self._stats.stale_hits += 1
+                    found[key] = entry.value
+                else:
+                    self._stats.misses += 1
+        return found
+
+    def get_or_load(
+        self,
+        key: str,
+        loader: Callable[[], T],
+        *,
+        should_store: Optional[Callable[[T], bool]] = None,
+    ) -> CachedValue[T]:
+        """Returnerer verdien fra cachen eller henter den med ``loader``.
+
+        En foreldet verdi innenfor ``stale_seconds`` (eller vinduet til en
+        aktiv :func:`allow_stale`-blokk) returneres straks, og ``loader``
+        kjøres i bakgrunnen. Unntak fra ``loader`` sendes videre når det ikke
+        finnes noen brukbar verdi.
+        """
+
+        entry = self._lookup([key]).get(key)
+        now = self.clock()
+        scope = current_stale_scope(self.namespace)
+        with self._lock:
+            if entry is not None and self._is_fresh(entry, now):
+                self._stats.hits += 1
+                return CachedValue(entry.value, True)
+            serve_stale = entry is not None and self._within_stale_window(
+                entry, now, scope.stale_seconds if scope is not None else None
+            )
+            if serve_stale:
+                self._stats.stale_hits += 1
+            else:
+                self._stats.misses += 1
+        if entry is not None and serve_stale:
+            if scope is not None:
+                scope.stale = True
+            self._revalidate(key, loader, should_store)
+            return CachedValue(entry.value, True, stale=True)
+        return CachedValue(self._load(key, loader, should_store), False)
+
+    def put(self, key: str, value: T, *, stored_at: Optional[float] = None) -> None:
+        self.put_many({key: value}, stored_at=stored_at)
+
+    def put_many(
+        self, items: Mapping[str, T], *, stored_at: Optional[float] = None
+    ) -> None:
+        """Lagrer verdiene i minnet og i den varige lagringen."""
+
+        if not items:
+            return
+        timestamp = self.clock() if stored_at is None else stored_at
+        with self._lock:
+            for key, value in items.items():
+                self._remember(key, _Entry(value, timestamp))
+        if self.persistent is not None:
+            encode = self._encode
+            self.persistent.put_many(
+                {
+                    key: encode(value) if encode is not None else value
+                    for key, value in items.items()
+                },
+                fetched_at=timestamp,
+            )
+
+    def invalidate(self, key: str) -> None:
+        with self._lock:
+            self._memory.pop(key, None)
+        if self.persistent is not None:
+            self.persistent.delete_many([key])
+
+    def clear(self, *, persistent: bool = True) -> None:
+        """Tømmer minnet og, om ønsket, den varige lagringen."""
+
+        with self._lock:
+            self._memory.clear()
+        if persistent and self.persistent is not None:
+            self.persistent.clear()
+
+    def wait_for_refreshes(self, timeout: Optional[float] = None) -> None:
+        """Venter til pågående bakgrunnsoppdateringer er ferdige."""
+
+        with self._lock:
+            futures = list(self._refreshing.values())
+        if futures:
+            wait(futures, timeout=timeout)
+
+    def _lookup(self, keys: Sequence[str]) -> Dict[str, _Entry]:
+        found: Dict[str, _Entry] = {}
+        missing: list[str] = []
+        with self._lock:
+            for key in keys:
+                entry = self._memory.get(key)
+                if entry is None:
+                    missing.append(key)
+                    continue
+                self._memory.move_to_end(key)
+                self._stats.memory_hits += 1
+                found[key] = entry
+        if not missing or self.persistent is None:
+            return found
+        rows = self.persistent.load_many(missing)
+        if not rows:
+            return found
+        with self._lock:
+            for key, (raw, stored_at) in rows.items():
+                value = self._decode(raw) if self._decode is not None else raw
+                entry = _Entry(value, stored_at)
+                self._remember(key, entry)
+                self._stats.persistent_hits += 1
+                found[key] = entry
+        return found
+
+    def _load(
+        self,
+        key: str,
+        loader: Callable[[], T],
+        should_store: Optional[Callable[[T], bool]],
+    ) -> T:
+        started = time.perf_counter()
+        try:
+            value = loader()
+        except Exception:
+            with self._lock:
+                self._stats.loads += 1
+                self._stats.load_errors += 1
+                self._stats.load_seconds += time.perf_counter() - started
+            raise
+        with self._lock:
+            self._stats.loads += 1
+            self._stats.load_seconds += time.perf_counter() - started
+        if should_store is None or should_store(value):
+            self.put(key, value)
+        return value
+
+    def _revalidate(
+        self,
+        key: str,
+        loader: Callable[[], T],
+        should_store: Optional[Callable[[T], bool]],
+    ) -> None:
+        def _run() -> None:
+            try:
+                self._load(key, loader, should_store)
+            except Exception as exc:  # pragma: no cover - logges bare
+                _LOGGER.debug(
+                    "Bakgrunnsoppdatering av %s/%s feilet: %s",
+                    self.namespace,
+                    key,
+                    exc,
+                )
+            finally:
+                with self._lock:
+                    self._refreshing.pop(key, None)
+
+        executor = _refresh_executor()
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._stats.refreshes += 1
+            self._refreshing[key] = executor.submit(_run)
+
+    def _remember(self, key: str, entry: _Entry) -> None:
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+            self._stats.evictions += 1
+
+    def _is_fresh(self, entry: _Entry, now: float) -> bool:
+        return self.ttl_seconds is None or now - entry.stored_at <= self.ttl_seconds
+
+    def _within_stale_window(
+        self, entry: _Entry, now: float, extended: Optional[float] = None
+    ) -> bool:
+        if self.stale_seconds is None:
+            return True
+        assert self.ttl_seconds is not None
+        window = self.stale_seconds
+        if extended is not None:
+            window = max(window, extended)
+        return now - entry.stored_at <= self.ttl_seconds + window
+
+
+class SqliteTier:
+    """Varig lagring for ett navnerom i en delt SQLite-fil."""
+
+    def __init__(self, path: Union[str, Path], namespace: str) -> None:
+        self.path = Path(path)
+        self.namespace = namespace
+        self._lock = Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        with self._lock:
+            try:
+                self._conn.execute("PRAGMA journal_mode=WAL")
+            except sqlite3.DatabaseError:  # pragma: no cover - f.eks. nettverksdisk
+                pass
+            self._conn.executescript(_SCHEMA)
+            self._conn.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def load_many(self, keys: Sequence[str]) -> Dict[str, Tuple[Any, float]]:
+        found: Dict[str, Tuple[Any, float]] = {}
+        with self._lock:
+            for start in range(0, len(keys), _QUERY_CHUNK):
+                chunk = list(keys[start : start + _QUERY_CHUNK])
+                placeholders = ",".join("?" * len(chunk))
+                rows = self._conn.execute(
+                    "SELECT key, value, stored_at FROM lookup_cache "
+                    f"WHERE namespace = ? AND key IN ({placeholders})",
+                    (self.namespace, *chunk),
+                ).fetchall()
+                for key, raw, stored_at in rows:
+                    try:
+                        found[key] = (json.loads(raw), float(stored_at))
+                    except json.JSONDecodeError:
+                        continue
+        return found
+
+    def put_many(
+        self, items: Mapping[str, Any], *, fetched_at: Optional[float] = None
+    ) -> None:
+        if not items:
+            return
+        timestamp = time.time() if fetched_at is None else fetched_at
+        rows = [
+            (
+                self.namespace,
+                key,
+                json.dumps(value, ensure_ascii=False, separators=(",", ":")),
+                timestamp,
+            )
+            for key, value in items.items()
+        ]
+        with self._lock:
+            self._conn.executemany(
+                "INSERT INTO lookup_cache (namespace, key, value, stored_at) "
+                "VALUES (?, ?, ?, ?) ON CONFLICT(namespace, key) DO UPDATE SET "
+                "value = excluded.value, stored_at = excluded.stored_at",
+                rows,
+            )
+            self._conn.commit()
+
+    def delete_many(self, keys: Iterable[str]) -> None:
+        with self._lock:
+            self._conn.executemany(
+                "DELETE FROM lookup_cache WHERE namespace = ? AND key = ?",
+                [(self.namespace, key) for key in keys],
+            )
+            self._conn.commit()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute(
+                "DELETE FROM lookup_cache WHERE namespace = ?", (self.namespace,)
+            )
+            self._conn.commit()
@@ -3,9 +3,10 @@
 from __future__ import annotations
 
 import math
-from dataclasses import dataclass
-from datetime import datetime
-from typing import List, Optional, Sequence, Tuple
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
 
 import pandas as pd
 
@@ -58,37 +59,131 @@ class CapitalizationCandidate:
     description: Optional[str]
 
 
-def find_asset_accessions(vouchers: Sequence[CostVoucher]) -> List[AssetAccession]:
-    """Hent debetføringer på 11xx-12xx og fjern reverseringer før visning."""
+@dataclass(frozen=True)
+class AssetRegister:
+    """Samlet resultat fra anleggsregisteret for ett datasett."""
 
-    raw_entries: List[AssetAccession] = []
-    for voucher in vouchers:
-        supplier = (voucher.supplier_name or voucher.supplier_id or "—").strip()
-        document = (voucher.document_number or voucher.transaction_id or "—").strip()
+    accessions: List[AssetAccession]
+    capitalization_candidates: List[CapitalizationCandidate]
+    disposals: List[AssetMovement]
+
+
+@dataclass(frozen=True)
+class AssetRollForwardRow:
+    """Én konto i ett år i flerårig avstemming av driftsmidler.
+
+    ``other_movements`` er det som gjenstår av endringen etter tilganger,
+    typisk avskrivninger og avganger. ``opening_difference`` er IB minus
+    fjorårets UB, eller ``None`` når det ikke finnes et forrige år.
+    """
+
+    year: Optional[int]
+    account: str
+    name: str
+    opening_balance: float
+    additions: float
+    other_movements: float
+    closing_balance: float
+    opening_difference: Optional[float]
+
+
+REVERSAL_WINDOW_DAYS = 90
+"""Maks antall dager mellom en tilgang og reverseringen som matches mot den."""
+
+AssetRollForwardDataset = Tuple[
+    Optional[int], Optional[pd.DataFrame], Sequence[CostVoucher]
+]
+"""(år, saldobalanse, bilag) for ett år i den flerårige avstemmingen."""
+
+_ASSET_PREFIXES = ("11", "12")
+_CAPITALIZATION_PREFIX = "65"
+
+
+@dataclass
+class _LedgerEntry:
+    accession: AssetAccession
+    remaining: float
+
+
+@dataclass
+class _AccountState:
+    """Løpende tilstand for én anleggskonto."""
 
+    additions: List[_LedgerEntry] = field(default_factory=list)
+    reversals: List[_LedgerEntry] = field(default_factory=list)
+    open_additions: Dict[int, List[_LedgerEntry]] = field(default_factory=dict)
+    open_reversals: Dict[int, List[_LedgerEntry]] = field(default_factory=dict)
+
+
+class AssetLedger:
+    """Strømmer 11xx/12xx- og 65xx-linjer én gang og holder tilstand per konto.
+
+    Tilganger og reverseringer på samme konto matches fortløpende på likt
+    beløp innenfor :data:`REVERSAL_WINDOW_DAYS`. Reverseringer uten slik
+    match nettes til slutt mot kontoens gjenstående tilganger i rekkefølge.
+    Kostnadslinjer på 65xx over terskelen samles som aktiveringskandidater
+    i samme gjennomgang.
+    """
+
+    def __init__(
+        self,
+        *,
+        capitalization_threshold: float = 30_000.0,
+        reversal_window_days: Optional[int] = REVERSAL_WINDOW_DAYS,
+    ) -> None:
+        self._threshold = capitalization_threshold
+        self._window = (
+            timedelta(days=reversal_window_days)
+            if reversal_window_days is not None
+            else None
+        )
+        self._accounts: Dict[str, _AccountState] = {}
+        self._account_order: List[str] = []
+        self._candidates: List[CapitalizationCandidate] = []
+
+    def add_vouchers(self, vouchers: Iterable[CostVoucher]) -> "AssetLedger":
+        for voucher in vouchers:
+            self.add_voucher(voucher)
+        return self
+
+    def add_voucher(self, voucher: CostVoucher) -> None:
         per_account: dict[str, Tuple[float, Optional[str], Optional[str]]] = {}
+        expense_lines: list[tuple[VoucherLine, float]] = []
+        expense_total = 0.0
         for line in voucher.lines:
             normalized_account = _normalize_account(line.account)
-            if normalized_account is None or not normalized_account.startswith(
-                ("11", "12")
-            ):
+            if normalized_account is None:
                 continue
-
             line_amount = (line.debit or 0.0) - (line.credit or 0.0)
-            if normalized_account not in per_account:
+
+            if normalized_account.startswith(_CAPITALIZATION_PREFIX):
+                expense_total += line_amount
+                expense_lines.append((line, line_amount))
+                continue
+            if not normalized_account.startswith(_ASSET_PREFIXES):
+                continue
+
+            previous = per_account.get(normalized_account)
+            if previous is None:
                 per_account[normalized_account] = (
-                    0.0,
+                    line_amount,
                     line.account_name,
                     line.description,
                 )
-            previous_amount, account_name, description = per_account[normalized_account]
-            combined_amount = previous_amount + line_amount
+                continue
+            previous_amount, account_name, description = previous
             per_account[normalized_account] = (
-                combined_amount,
+                previous_amount + line_amount,
                 account_name or line.account_name,
                 description or line.description,
             )
 
+        if not per_account and not expense_lines:
+            return
+
+        supplier = (voucher.supplier_name or voucher.supplier_id or "—").strip()
+        document = (voucher.document_number or voucher.transaction_id or "—").strip()
+
         for account_number, (
             total_amount,
             account_name,
@@ -96,8 +191,7 @@ def find_asset_accessions(vouchers: Sequence[CostVoucher]) -> List[AssetAccessio
         ) in per_account.items():
             if math.isclose(total_amount, 0.0, abs_tol=0.01):
                 continue
-
-            raw_entries.append(
+            self._record(
                 AssetAccession(
                     date=voucher.transaction_date,
                     supplier=supplier or "—",
@@ -110,8 +204,189 @@ def find_asset_accessions(vouchers: Sequence[CostVoucher]) -> List[AssetAccessio
                 )
             )
 
-    cleaned = _remove_reversals(raw_entries)
-    return sorted(cleaned, key=_accession_sort_key)
+        if expense_lines and expense_total >= self._threshold:
+            for line, line_amount in expense_lines:
+                if line_amount <= 0:
+                    continue
+                self._candidates.append(
+                    CapitalizationCandidate(
+                        date=voucher.transaction_date,
+                        supplier=supplier or "—",
+                        document=document or "—",
+                        account=line.account or "—",
+                        amount=line_amount,
+                        description=line.description,
+                    )
+                )
+
+    def accessions(self) -> List[AssetAccession]:
+        """Tilganger etter at reverseringer er nettet bort."""
+
+        cleaned: List[AssetAccession] = []
+        for account in self._account_order:
+            state = self._accounts[account]
+            pool = sum(entry.remaining for entry in state.reversals)
+            for entry in state.additions:
+                remaining = entry.remaining
+                if remaining <= 0:
+                    continue
+                if pool > 0:
+                    if pool >= remaining - 0.01:
+                        pool = max(0.0, pool - remaining)
+                        continue
+                    remaining -= pool
+                    pool = 0.0
+                accession = entry.accession
+                cleaned.append(
+                    AssetAccession(
+                        date=accession.date,
+                        supplier=accession.supplier,
+                        document=accession.document,
+                        account=accession.account,
+                        account_name=accession.account_name,
+                        amount=round(remaining, 2),
+                        description=accession.description,
+                        comment=accession.comment,
+                    )
+                )
+        return sorted(cleaned, key=_accession_sort_key)
+
+    def capitalization_candidates(self) -> List[CapitalizationCandidate]:
+        return list(self._candidates)
+
+    def register(self, trial_balance: Optional[pd.DataFrame]) -> AssetRegister:
+        """Tilganger, aktiveringskandidater og mulige avganger samlet."""
+
+        return AssetRegister(
+            accessions=self.accessions(),
+            capitalization_candidates=self.capitalization_candidates(),
+            disposals=find_possible_disposals(trial_balance),
+        )
+
+    def _record(self, accession: AssetAccession) -> None:
+        state = self._accounts.get(accession.account)
+        if state is None:
+            state = self._accounts[accession.account] = _AccountState()
+            self._account_order.append(accession.account)
+
+        amount = accession.amount
+        cents = int(round(abs(amount) * 100))
+        entry = _LedgerEntry(accession=accession, remaining=abs(amount))
+        if amount > 0:
+            state.additions.append(entry)
+            counterpart = self._take_match(state.open_reversals, cents, accession)
+            if counterpart is None:
+                state.open_additions.setdefault(cents, []).append(entry)
+        else:
+            state.reversals.append(entry)
+            counterpart = self._take_match(state.open_additions, cents, accession)
+            if counterpart is None:
+                state.open_reversals.setdefault(cents, []).append(entry)
+        if counterpart is not None:
+            counterpart.remaining = 0.0
+            entry.remaining = 0.0
+
+    def _take_match(
+        self,
+        open_entries: Dict[int, List[_LedgerEntry]],
+        cents: int,
+        accession: AssetAccession,
+    ) -> Optional[_LedgerEntry]:
+        candidates = open_entries.get(cents)
+        if not candidates:
+            return None
+        for position, candidate in enumerate(candidates):
+            if self._within_window(candidate.accession.date, accession.date):
+                del candidates[position]
+                return candidate
+        return None
+
+    def _within_window(self, first: object, second: object) -> bool:
+        if self._window is None:
+            return True
+        first_date = _date_sort_key(first)
+        second_date = _date_sort_key(second)
+        if first_date == datetime.min or second_date == datetime.min:
+            return True
+        return abs(first_date - second_date) <= self._window
+
+
+def build_asset_register(
+    trial_balance: Optional[pd.DataFrame],
+    vouchers: Sequence[CostVoucher],
+    *,
+    threshold: float = 30_000.0,
+) -> AssetRegister:
+    """Kjører anleggsregisteret over bilagene og saldobalansen i ett pass."""
+
+    ledger = AssetLedger(capitalization_threshold=threshold)
+    ledger.add_vouchers(vouchers)
+    return ledger.register(trial_balance)
+
+
+def build_asset_roll_forward(
+    datasets: Sequence[AssetRollForwardDataset],
+) -> List[AssetRollForwardRow]:
+    """Ruller anleggskontoene fremover over flere innleste år.
+
+    ``datasets`` er (år, saldobalanse, bilag) i kronologisk rekkefølge.
+    """
+
+    rows: List[AssetRollForwardRow] = []
+    previous_closing: Optional[Dict[str, float]] = None
+    for year, trial_balance, vouchers in datasets:
+        balances: Dict[str, Tuple[str, float, float]] = {}
+        work = _prepare_asset_frame(trial_balance)
+        if work is not None:
+            for account, name, opening, closing in zip(
+                work["Konto"], work["Kontonavn"], work["IB_netto"], work["UB_netto"]
+            ):
+                _, previous_ib, previous_ub = balances.get(account, ("", 0.0, 0.0))
+                balances[account] = (
+                    str(name or "").strip(),
+                    previous_ib + float(opening),
+                    previous_ub + float(closing),
+                )
+
+        additions: Dict[str, float] = defaultdict(float)
+        names: Dict[str, str] = {}
+        for accession in AssetLedger().add_vouchers(vouchers).accessions():
+            additions[accession.account] += accession.amount
+            if accession.account_name and accession.account not in names:
+                names[accession.account] = accession.account_name
+
+        closing_by_account: Dict[str, float] = {}
+        for account in sorted(set(balances) | set(additions), key=_account_sort_key):
+            name, opening, closing = balances.get(
+                account, (names.get(account, ""), 0.0, 0.0)
+            )
+            added = round(additions.get(account, 0.0), 2)
+            opening_difference = (
+                round(opening - previous_closing.get(account, 0.0), 2)
+                if previous_closing is not None
+                else None
+            )
+            rows.append(
+                AssetRollForwardRow(
+                    year=year,
+                    account=account,
+                    name=name or names.get(account, ""),
+                    opening_balance=opening,
+                    additions=added,
+                    other_movements=round(closing - opening - added, 2),
+                    closing_balance=closing,
+                    opening_difference=opening_difference,
+                )
+            )
+            closing_by_account[account] = closing
+        previous_closing = closing_by_account
+    return rows
+
+
+def find_asset_accessions(vouchers: Sequence[CostVoucher]) -> List[AssetAccession]:
+    """Hent debetføringer på 11xx-12xx og fjern reverseringer før visning."""
+
+    return AssetLedger().add_vouchers(vouchers).accessions()
 
 
 def summarize_asset_accessions_by_account(
@@ -156,39 +431,8 @@ def find_capitalization_candidates(
 ) -> List[CapitalizationCandidate]:
     """Hent kostnadsbilag på 65xx over gitt terskel."""
 
-    candidates: List[CapitalizationCandidate] = []
-    for voucher in vouchers:
-        relevant_lines: list[tuple[VoucherLine, float]] = []
-        total_amount = 0.0
-        for line in voucher.lines:
-            normalized_account = _normalize_account(line.account)
-            if normalized_account is None or not normalized_account.startswith("65"):
-                continue
-
-            line_amount = (line.debit or 0.0) - (line.credit or 0.0)
-            total_amount += line_amount
-            relevant_lines.append((line, line_amount))
-
-        if total_amount < threshold:
-            continue
-
-        supplier = (voucher.supplier_name or voucher.supplier_id or "—").strip()
-        document = (voucher.document_number or voucher.transaction_id or "—").strip()
-        for line, line_amount in relevant_lines:
-            if line_amount <= 0:
-                continue
-
-            candidates.append(
-                CapitalizationCandidate(
-                    date=voucher.transaction_date,
-                    supplier=supplier or "—",
-                    document=document or "—",
-                    account=line.account or "—",
-                    amount=line_amount,
-                    description=line.description,
-                )
-            )
-    return candidates
+    ledger = AssetLedger(capitalization_threshold=threshold)
+    return ledger.add_vouchers(vouchers).capitalization_candidates()
 
 
 def _prepare_asset_frame(tb: Optional[pd.DataFrame]) -> Optional[pd.DataFrame]:
@@ -204,7 +448,7 @@ def _prepare_asset_frame(tb: Optional[pd.DataFrame]) -> Optional[pd.DataFrame]:
     work["IB_netto"] = pd.to_numeric(work["IB_netto"], errors="coerce").fillna(0.0)
     work["UB_netto"] = pd.to_numeric(work["UB_netto"], errors="coerce").fillna(0.0)
 
-    mask = work["Konto"].str.startswith(("11", "12"))
+    mask = work["Konto"].str.startswith(_ASSET_PREFIXES)
     filtered = work.loc[mask]
     if filtered.empty:
         return None
@@ -238,50 +482,6 @@ def _accession_sort_key(
     return account_key, date_value
 
 
-def _remove_reversals(entries: Sequence[AssetAccession]) -> List[AssetAccession]:
-    """Netter bort reverserte beløp per konto."""
-
-    cancellation_pool: dict[str, float] = {}
-    for entry in entries:
-        if entry.amount < 0:
-            account_key = entry.account
-            cancellation_pool[account_key] = cancellation_pool.get(
-                account_key, 0.0
-            ) + abs(entry.amount)
-
-    cleaned: List[AssetAccession] = []
-    for entry in entries:
-        if entry.amount <= 0:
-            continue
-
-        account_key = entry.account
-        available = cancellation_pool.get(account_key, 0.0)
-        remaining = entry.amount
-
-        if available > 0:
-            if available >= remaining - 0.01:
-                cancellation_pool[account_key] = max(0.0, available - remaining)
-                continue
-
-            remaining -= available
-            cancellation_pool[account_key] = 0.0
-
-        cleaned.append(
-            AssetAccession(
-                date=entry.date,
-                supplier=entry.supplier,
-                document=entry.document,
-                account=entry.account,
-                account_name=entry.account_name,
-                amount=round(remaining, 2),
-                description=entry.description,
-                comment=entry.comment,
-            )
-        )
-
-    return cleaned
-
-
 def _account_sort_key(account: str) -> Tuple[int, object]:
     normalized = _normalize_account(account) or ""
     if normalized.isdigit():
@@ -307,10 +507,17 @@ def _normalize_account(value: Optional[str]) -> Optional[str]:
 
 
 __all__ = [
+    "REVERSAL_WINDOW_DAYS",
+    "AssetLedger",
     "AssetMovement",
     "AssetAccession",
     "AssetAccessionSummary",
+    "AssetRegister",
+    "AssetRollForwardDataset",
+    "AssetRollForwardRow",
     "CapitalizationCandidate",
+    "build_asset_register",
+    "build_asset_roll_forward",
     "find_asset_accessions",
     "summarize_asset_accessions_by_account",
     "find_capitalization_candidates",
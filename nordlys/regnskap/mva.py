@@ -3,18 +3,48 @@
 from __future__ import annotations
 
 import math
-from collections import Counter, defaultdict
+from collections import defaultdict
 from dataclasses import dataclass, field
 from datetime import date
-from typing import Dict, List, Optional, Sequence
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Sequence, Tuple
 
+from ..helpers.lazy_imports import lazy_numpy, lazy_pandas
 from ..saft.models import CostVoucher
 
+if TYPE_CHECKING:  # pragma: no cover - kun for typekontroll
+    import pandas as pd
+
+pd = lazy_pandas()
+
 _MISSING_VAT_CODE = "Ingen"
 
+VAT_LEVEL_ACCOUNT = "konto"
+VAT_LEVEL_SUPPLIER = "konto_leverandor"
+VAT_LEVEL_MONTH = "konto_maned"
+VAT_LEVELS = (VAT_LEVEL_ACCOUNT, VAT_LEVEL_SUPPLIER, VAT_LEVEL_MONTH)
+
+_OBSERVATION_COLUMNS = (
+    "account",
+    "account_name",
+    "vat_code",
+    "voucher_number",
+    "transaction_id",
+    "transaction_date",
+    "supplier",
+    "period",
+    "amount",
+    "description",
+)
+
 __all__ = [
+    "VAT_LEVEL_ACCOUNT",
+    "VAT_LEVEL_SUPPLIER",
+    "VAT_LEVEL_MONTH",
+    "VAT_LEVELS",
+    "VatCodeProfile",
     "VatDeviation",
     "VatDeviationAccountSummary",
+    "build_vat_observations",
     "find_vat_deviations",
     "summarize_vat_deviations",
 ]
@@ -35,11 +65,14 @@ class VatDeviation:
     description: str
     expected_count: int
     total_count: int
+    level: str = VAT_LEVEL_ACCOUNT
+    dimension: str = ""
+    transaction_id: str = ""
 
 
 @dataclass(frozen=True)
 class VatDeviationAccountSummary:
-    """Summary per account for deviating VAT treatment."""
+    """Summary per account (and supplier or month) for deviating VAT treatment."""
 
     account: str
     account_name: str
@@ -48,6 +81,7 @@ class VatDeviationAccountSummary:
     deviation_amount: float
     expected_count: int
     total_count: int
+    dimension: str = ""
 
 
 @dataclass
@@ -58,99 +92,200 @@ class _LineAccumulator:
     amount: float = 0.0
 
 
-@dataclass(frozen=True)
-class _VoucherAccountVat:
-    account: str
-    account_name: str
-    observed_vat_code: str
-    voucher_number: str
-    transaction_date: Optional[date]
-    supplier: str
-    voucher_amount: float
-    description: str
+class VatCodeProfile:
+    """Columnar VAT observations with expected codes per account, supplier and month.
 
+    The profile is built once per voucher set, typically during import, and
+    kept with the dataset. Baselines for all levels are counted in one pass
+    over combined integer group keys and stored in a compact norm table.
+    Deviations for another ``minimum_observations`` are derived from the
+    cached counts without scanning the vouchers again.
+    """
 
-def find_vat_deviations(
-    vouchers: Sequence[CostVoucher], *, minimum_observations: int = 2
-) -> List[VatDeviation]:
-    """Find vouchers where VAT treatment deviates from the account norm."""
+    def __init__(self, observations: "pd.DataFrame") -> None:
+        self._observations = observations
+        self._group_ids, self._group_offsets, self._norm_table = _build_norm_table(
+            observations
+        )
+        self._deviation_cache: Dict[Tuple[str, int], List[VatDeviation]] = {}
 
-    effective_minimum = max(2, int(minimum_observations))
-    entries = _collect_voucher_account_entries(vouchers)
+    @classmethod
+    def from_vouchers(cls, vouchers: Sequence[CostVoucher]) -> "VatCodeProfile":
+        return cls(build_vat_observations(vouchers))
 
-    per_account: Dict[str, List[_VoucherAccountVat]] = defaultdict(list)
-    for entry in entries:
-        per_account[entry.account].append(entry)
+    def __len__(self) -> int:
+        return int(len(self._observations.index))
 
-    deviations: List[VatDeviation] = []
-    for account, account_entries in per_account.items():
-        if len(account_entries) < effective_minimum:
-            continue
+    @property
+    def observations(self) -> "pd.DataFrame":
+        """One row per voucher and account with the normalised VAT code."""
 
-        counts = Counter(entry.observed_vat_code for entry in account_entries)
-        if len(counts) < 2:
-            continue
+        return self._observations
 
-        ranked_codes = sorted(counts.items(), key=lambda item: (-item[1], item[0]))
-        expected_code, expected_count = ranked_codes[0]
-        second_count = ranked_codes[1][1]
-        if expected_count <= second_count:
-            continue
+    @property
+    def norm_table(self) -> "pd.DataFrame":
+        """Dominant code and counts for every group on every level."""
 
-        total_count = len(account_entries)
-        for entry in account_entries:
-            if entry.observed_vat_code == expected_code:
-                continue
-            deviations.append(
-                VatDeviation(
-                    account=account,
-                    account_name=entry.account_name,
-                    expected_vat_code=expected_code,
-                    observed_vat_code=entry.observed_vat_code,
-                    voucher_number=entry.voucher_number,
-                    transaction_date=entry.transaction_date,
-                    supplier=entry.supplier,
-                    voucher_amount=entry.voucher_amount,
-                    description=entry.description,
-                    expected_count=expected_count,
-                    total_count=total_count,
-                )
-            )
+        return self._norm_table
 
-    return sorted(deviations, key=_deviation_sort_key)
+    @property
+    def account_norms(self) -> "pd.DataFrame":
+        """Dominant code, its count and the runner-up count per account."""
 
+        return self.norms(VAT_LEVEL_ACCOUNT)
 
-def summarize_vat_deviations(
-    deviations: Sequence[VatDeviation],
-) -> List[VatDeviationAccountSummary]:
-    """Aggregate deviation rows to one summary per account."""
+    def norms(self, level: str) -> "pd.DataFrame":
+        """Norm rows for one level, indexed by account (and supplier/month)."""
 
-    grouped: Dict[tuple[str, str], List[VatDeviation]] = defaultdict(list)
-    for item in deviations:
-        grouped[(item.account, item.expected_vat_code)].append(item)
+        start, stop = self._level_slice(level)
+        table = self._norm_table.iloc[start:stop]
+        if level == VAT_LEVEL_ACCOUNT:
+            return table.drop(columns=["level", "dimension"]).set_index("account")
+        return table.drop(columns=["level"]).set_index(["account", "dimension"])
 
-    summaries: List[VatDeviationAccountSummary] = []
-    for (account, expected_vat_code), items in grouped.items():
-        first = items[0]
-        summaries.append(
-            VatDeviationAccountSummary(
+    def deviations(
+        self, minimum_observations: int = 2, *, level: str = VAT_LEVEL_ACCOUNT
+    ) -> List[VatDeviation]:
+        """Rows that deviate from the dominant code in their group."""
+
+        effective_minimum = max(2, int(minimum_observations))
+        cache_key = (level, effective_minimum)
+        cached = self._deviation_cache.get(cache_key)
+        if cached is None:
+            cached = self._compute_deviations(level, effective_minimum)
+            self._deviation_cache[cache_key] = cached
+        return list(cached)
+
+    def deviation_flags(self, minimum_observations: int = 2) -> "pd.DataFrame":
+        """One boolean column per level marking deviating observations."""
+
+        effective_minimum = max(2, int(minimum_observations))
+        return pd.DataFrame(
+            {
+                level: self._deviation_mask(level, effective_minimum)
+                for level in VAT_LEVELS
+            },
+            index=self._observations.index,
+        )
+
+    def _level_slice(self, level: str) -> Tuple[int, int]:
+        try:
+            position = VAT_LEVELS.index(level)
+        except ValueError as exc:
+            raise ValueError(f"Ukjent mva-nivå: {level}") from exc
+        return self._group_offsets[position], self._group_offsets[position + 1]
+
+    def _expected_codes(self, level: str, minimum_observations: int) -> Any:
+        """Expected category code per observation, or -1 without a clear norm."""
+
+        np = lazy_numpy()
+        start, stop = self._level_slice(level)
+        table = self._norm_table.iloc[start:stop]
+        eligible = (
+            (table["total_count"].to_numpy() >= minimum_observations)
+            & (table["code_count"].to_numpy() >= 2)
+            & (table["expected_count"].to_numpy() > table["second_count"].to_numpy())
+        )
+        expected_by_group = np.where(eligible, table["expected_code_id"].to_numpy(), -1)
+        group_ids = self._group_ids[level]
+        if not len(expected_by_group):
+            return np.full(len(group_ids), -1, dtype=np.int64)
+        return np.where(group_ids >= 0, expected_by_group[np.maximum(group_ids, 0)], -1)
+
+    def _deviation_mask(self, level: str, minimum_observations: int) -> Any:
+        expected = self._expected_codes(level, minimum_observations)
+        observed = self._observations["vat_code"].cat.codes.to_numpy()
+        return (expected >= 0) & (observed != expected)
+
+    def _compute_deviations(
+        self, level: str, minimum_observations: int
+    ) -> List[VatDeviation]:
+        if self._observations.empty:
+            return []
+        mask = self._deviation_mask(level, minimum_observations)
+        if not mask.any():
+            return []
+
+        start, _stop = self._level_slice(level)
+        table = self._norm_table
+        selected = self._observations.loc[mask]
+        norm_rows = self._group_ids[level][mask] + start
+        dimensions = (
+            [""] * len(norm_rows)
+            if level == VAT_LEVEL_ACCOUNT
+            else table["dimension"].to_numpy()[norm_rows].tolist()
+        )
+        deviations = [
+            VatDeviation(
                 account=account,
-                account_name=first.account_name,
+                account_name=account_name,
                 expected_vat_code=expected_vat_code,
-                deviation_count=len(items),
-                deviation_amount=sum(entry.voucher_amount for entry in items),
-                expected_count=first.expected_count,
-                total_count=first.total_count,
+                observed_vat_code=observed_vat_code,
+                voucher_number=voucher_number,
+                transaction_date=transaction_date,
+                supplier=supplier,
+                voucher_amount=amount,
+                description=description,
+                expected_count=expected_count,
+                total_count=total_count,
+                level=level,
+                dimension=dimension,
+                transaction_id=transaction_id,
             )
-        )
-
-    return sorted(summaries, key=lambda item: item.account)
-
+            for (
+                account,
+                account_name,
+                expected_vat_code,
+                observed_vat_code,
+                voucher_number,
+                transaction_date,
+                supplier,
+                amount,
+                description,
+                expected_count,
+                total_count,
+                dimension,
+                transaction_id,
+            ) in zip(
+                selected["account"].tolist(),
+                selected["account_name"].tolist(),
+                table["expected_vat_code"].to_numpy()[norm_rows].tolist(),
+                selected["vat_code"].astype(object).tolist(),
+                selected["voucher_number"].tolist(),
+                selected["transaction_date"].tolist(),
+                selected["supplier"].tolist(),
+                selected["amount"].astype(float).tolist(),
+                selected["description"].tolist(),
+                table["expected_count"].to_numpy()[norm_rows].astype(int).tolist(),
+                table["total_count"].to_numpy()[norm_rows].astype(int).tolist(),
+                dimensions,
+                selected["transaction_id"].tolist(),
+            )
+        ]
+        return sorted(deviations, key=_deviation_sort_key)
+
+
+def build_vat_observations(vouchers: Sequence[CostVoucher]) -> "pd.DataFrame":
+    """Collect one row per voucher and account with its VAT code set.
+
+    Multiple lines on the same account are merged. The normalised code set
+    is stored as a categorical with sorted categories.
+    """
+
+    columns: Dict[str, List[Any]] = {name: [] for name in _OBSERVATION_COLUMNS}
+    add_account = columns["account"].append
+    add_account_name = columns["account_name"].append
+    add_vat_code = columns["vat_code"].append
+    add_voucher_number = columns["voucher_number"].append
+    add_transaction_id = columns["transaction_id"].append
+    add_date = columns["transaction_date"].append
+    add_supplier = columns["supplier"].append
+    add_period = columns["period"].append
+    add_amount = columns["amount"].append
+    add_description = columns["description"].append
+    # Mva-koder gjentas i stor grad; normaliseringen gjøres én gang per råverdi.
+    vat_code_cache: Dict[Optional[str], set[str]] = {}
 
-def _collect_voucher_account_entries(
-    vouchers: Sequence[CostVoucher],
-) -> List[_VoucherAccountVat]:
-    entries: List[_VoucherAccountVat] = []
     for voucher in vouchers:
         per_account: Dict[str, _LineAccumulator] = {}
         for line in voucher.lines:
@@ -158,39 +293,239 @@ def _collect_voucher_account_entries(
             if not account:
                 continue
 
-            accumulator = per_account.setdefault(account, _LineAccumulator())
+            accumulator = per_account.get(account)
+            if accumulator is None:
+                accumulator = per_account[account] = _LineAccumulator()
             if not accumulator.account_name:
                 accumulator.account_name = _normalize_text(line.account_name)
             if not accumulator.description:
                 accumulator.description = _normalize_text(line.description)
-            accumulator.vat_codes.update(_normalize_vat_codes(line.vat_code))
+            codes = vat_code_cache.get(line.vat_code)
+            if codes is None:
+                codes = vat_code_cache[line.vat_code] = _normalize_vat_codes(
+                    line.vat_code
+                )
+            accumulator.vat_codes.update(codes)
             accumulator.amount += _safe_amount(line.debit) - _safe_amount(line.credit)
 
         if not per_account:
             continue
 
         voucher_number = _voucher_number(voucher)
+        transaction_id = _normalize_text(voucher.transaction_id)
         supplier = _voucher_supplier(voucher)
         voucher_description = _normalize_text(voucher.description)
+        transaction_date = voucher.transaction_date
+        period = (
+            f"{transaction_date.year:04d}-{transaction_date.month:02d}"
+            if transaction_date is not None
+            else None
+        )
 
         for account, accumulator in per_account.items():
-            observed_vat = " + ".join(sorted(accumulator.vat_codes))
-            account_name = accumulator.account_name or "Ukjent konto"
-            description = voucher_description or accumulator.description
-            account_amount = abs(accumulator.amount)
-            entries.append(
-                _VoucherAccountVat(
-                    account=account,
-                    account_name=account_name,
-                    observed_vat_code=observed_vat,
-                    voucher_number=voucher_number,
-                    transaction_date=voucher.transaction_date,
-                    supplier=supplier,
-                    voucher_amount=account_amount,
-                    description=description,
-                )
+            vat_codes = accumulator.vat_codes
+            add_account(account)
+            add_account_name(accumulator.account_name or "Ukjent konto")
+            add_vat_code(
+                next(iter(vat_codes))
+                if len(vat_codes) == 1
+                else " + ".join(sorted(vat_codes))
             )
-    return entries
+            add_voucher_number(voucher_number)
+            add_transaction_id(transaction_id)
+            add_date(transaction_date)
+            add_supplier(supplier)
+            add_period(period)
+            add_amount(abs(accumulator.amount))
+            add_description(voucher_description or accumulator.description)
+
+    vat_values = columns.pop("vat_code")
+    frame = pd.DataFrame(
+        {name: pd.Series(values, dtype=object) for name, values in columns.items()}
+    )
+    frame["amount"] = frame["amount"].astype(float)
+    frame.insert(
+        2,
+        "vat_code",
+        pd.Categorical(vat_values, categories=sorted(set(vat_values))),
+    )
+    return frame
+
+
+_NORM_COLUMNS = [
+    "level",
+    "account",
+    "dimension",
+    "expected_vat_code",
+    "expected_code_id",
+    "expected_count",
+    "second_count",
+    "total_count",
+    "code_count",
+]
+
+
+def _level_group_ids(
+    account_ids: Any, accounts: Any, dimension_ids: Any, dimensions: Any
+) -> Tuple[Any, Any, Any]:
+    """Dense group ids for (account, dimension); -1 where the dimension is missing."""
+
+    np = lazy_numpy()
+    width = max(len(dimensions), 1)
+    valid = dimension_ids >= 0
+    group_ids = np.full(len(account_ids), -1, dtype=np.int64)
+    combined = account_ids[valid].astype(np.int64) * width + dimension_ids[valid]
+    dense, uniques = pd.factorize(combined, sort=True)
+    group_ids[valid] = dense
+    uniques = np.asarray(uniques, dtype=np.int64)
+    return (
+        group_ids,
+        np.asarray(accounts, dtype=object)[uniques // width],
+        np.asarray(dimensions, dtype=object)[uniques % width],
+    )
+
+
+def _build_norm_table(
+    observations: "pd.DataFrame",
+) -> Tuple[Dict[str, Any], List[int], "pd.DataFrame"]:
+    """Count VAT codes for every level and group in one pass.
+
+    Each level gets dense group ids from combined integer keys (account ×
+    supplier, account × month). The ids are shifted into one shared id space
+    so that a single ``np.unique`` over ``group * n_codes + code`` counts all
+    levels at once.
+    """
+
+    np = lazy_numpy()
+    n_rows = len(observations.index)
+    if not n_rows:
+        empty = np.zeros(0, dtype=np.int64)
+        return (
+            {level: empty for level in VAT_LEVELS},
+            [0] * (len(VAT_LEVELS) + 1),
+            pd.DataFrame(columns=_NORM_COLUMNS),
+        )
+
+    account_ids, accounts = pd.factorize(observations["account"], sort=True)
+    supplier_ids, suppliers = pd.factorize(observations["supplier"], sort=True)
+    period_ids, periods = pd.factorize(observations["period"], sort=True)
+
+    level_groups = {
+        VAT_LEVEL_ACCOUNT: (
+            account_ids.astype(np.int64),
+            np.asarray(accounts, dtype=object),
+            np.full(len(accounts), "", dtype=object),
+        ),
+        VAT_LEVEL_SUPPLIER: _level_group_ids(
+            account_ids, accounts, supplier_ids, suppliers
+        ),
+        VAT_LEVEL_MONTH: _level_group_ids(account_ids, accounts, period_ids, periods),
+    }
+
+    offsets = [0]
+    for level in VAT_LEVELS:
+        offsets.append(offsets[-1] + len(level_groups[level][1]))
+    n_groups = offsets[-1]
+
+    categories = observations["vat_code"].cat.categories
+    n_codes = max(len(categories), 1)
+    code_ids = observations["vat_code"].cat.codes.to_numpy().astype(np.int64)
+
+    shared_ids = []
+    shared_codes = []
+    for position, level in enumerate(VAT_LEVELS):
+        group_ids = level_groups[level][0]
+        valid = group_ids >= 0
+        shared_ids.append(group_ids[valid] + offsets[position])
+        shared_codes.append(code_ids[valid])
+    keys, counts = np.unique(
+        np.concatenate(shared_ids) * n_codes + np.concatenate(shared_codes),
+        return_counts=True,
+    )
+    key_groups = keys // n_codes
+    key_codes = keys % n_codes
+
+    # Sorter på gruppe, deretter synkende antall og til slutt kode.
+    order = np.lexsort((key_codes, -counts, key_groups))
+    key_groups = key_groups[order]
+    key_codes = key_codes[order]
+    counts = counts[order]
+    is_first = np.ones(len(key_groups), dtype=bool)
+    is_first[1:] = key_groups[1:] != key_groups[:-1]
+    first_positions = np.flatnonzero(is_first)
+    second_positions = first_positions + 1
+    has_second = second_positions < len(key_groups)
+    has_second[has_second] = ~is_first[second_positions[has_second]]
+
+    expected_code_id = np.zeros(n_groups, dtype=np.int64)
+    expected_count = np.zeros(n_groups, dtype=np.int64)
+    second_count = np.zeros(n_groups, dtype=np.int64)
+    expected_code_id[key_groups[first_positions]] = key_codes[first_positions]
+    expected_count[key_groups[first_positions]] = counts[first_positions]
+    second_count[key_groups[first_positions[has_second]]] = counts[
+        second_positions[has_second]
+    ]
+    total_count = np.bincount(key_groups, weights=counts, minlength=n_groups)
+    code_count = np.bincount(key_groups, minlength=n_groups)
+
+    table = pd.DataFrame(
+        {
+            "level": pd.Categorical(
+                np.repeat(np.asarray(VAT_LEVELS, dtype=object), np.diff(offsets)),
+                categories=list(VAT_LEVELS),
+            ),
+            "account": np.concatenate([level_groups[level][1] for level in VAT_LEVELS]),
+            "dimension": np.concatenate(
+                [level_groups[level][2] for level in VAT_LEVELS]
+            ),
+            "expected_vat_code": np.asarray(categories, dtype=object)[expected_code_id],
+            "expected_code_id": expected_code_id,
+            "expected_count": expected_count,
+            "second_count": second_count,
+            "total_count": total_count.astype(np.int64),
+            "code_count": code_count.astype(np.int64),
+        },
+        columns=_NORM_COLUMNS,
+    )
+    group_ids = {level: level_groups[level][0] for level in VAT_LEVELS}
+    return group_ids, offsets, table
+
+
+def find_vat_deviations(
+    vouchers: Sequence[CostVoucher], *, minimum_observations: int = 2
+) -> List[VatDeviation]:
+    """Find vouchers where VAT treatment deviates from the account norm."""
+
+    profile = VatCodeProfile.from_vouchers(vouchers)
+    return profile.deviations(minimum_observations)
+
+
+def summarize_vat_deviations(
+    deviations: Sequence[VatDeviation],
+) -> List[VatDeviationAccountSummary]:
+    """Aggregate deviation rows to one summary per account."""
+
+    grouped: Dict[tuple[str, str, str], List[VatDeviation]] = defaultdict(list)
+    for item in deviations:
+        grouped[(item.account, item.dimension, item.expected_vat_code)].append(item)
+
+    summaries: List[VatDeviationAccountSummary] = []
+    for (account, dimension, expected_vat_code), items in grouped.items():
+        first = items[0]
+        summaries.append(
+            VatDeviationAccountSummary(
+                account=account,
+                account_name=first.account_name,
+                expected_vat_code=expected_vat_code,
+                deviation_count=len(items),
+                deviation_amount=sum(entry.voucher_amount for entry in items),
+                expected_count=first.expected_count,
+                total_count=first.total_count,
+                dimension=dimension,
+            )
+        )
+
+    return sorted(summaries, key=lambda item: (item.account, item.dimension))
 
 
 def _normalize_vat_codes(value: Optional[str]) -> set[str]:
@@ -3,10 +3,10 @@
 from __future__ import annotations
 
 import weakref
-from dataclasses import dataclass
 from typing import Callable, Iterable, Optional, TYPE_CHECKING
 
 from ..helpers.lazy_imports import lazy_pandas
+from ..helpers.prefix_index import PrefixSumIndex
 
 if TYPE_CHECKING:  # pragma: no cover - kun for typekontroll
     import pandas as pd
@@ -68,31 +68,24 @@ def prepare_regnskap_dataframe(df: "pd.DataFrame") -> "pd.DataFrame":
     return prepared
 
 
-@dataclass
-class _CachedColumn:
-    """Representerer en lagret kolonne sammen med dens numeriske verdier."""
-
-    source: "pd.Series"
-    numeric: "pd.Series"
-
-
 class _PrefixSumHelper:
-    """Håndterer caching av summeringer for kontoprefikser."""
+    """Håndterer caching av summeringer for kontoprefikser.
+
+    Kontonumrene sorteres én gang i en :class:`PrefixSumIndex`, og hver
+    kolonne legges inn som kumulativ sum første gang den etterspørres.
+    Deretter er hver prefikssum to binærsøk.
+    """
 
     __slots__ = (
-        "_konto_text",
-        "_column_cache",
+        "_prefix_index",
         "_index",
         "_zero_series",
-        "_mask_cache",
     )
 
     def __init__(self, konto_text: "pd.Series") -> None:
-        self._konto_text = konto_text
-        self._column_cache: dict[str, _CachedColumn] = {}
+        self._prefix_index = PrefixSumIndex(konto_text.to_numpy(dtype=str))
         self._index = konto_text.index
         self._zero_series: Optional["pd.Series"] = None
-        self._mask_cache: dict[tuple[str, ...], "pd.Series"] = {}
 
     def is_compatible(self, prepared: "pd.DataFrame") -> bool:
         return prepared.index.equals(self._index)
@@ -116,22 +109,12 @@ class _PrefixSumHelper:
         if not prefix_tuple:
             return 0.0
 
-        series = value_provider(column)
-
-        cached = self._column_cache.get(column)
-        if cached is None:
+        if not self._prefix_index.has_column(column):
+            series = value_provider(column)
             numeric = pd.to_numeric(series, errors="coerce").fillna(0.0)
-            cached = _CachedColumn(source=series, numeric=numeric)
-            self._column_cache[column] = cached
-
-        values = cached.numeric
-        mask = self._mask_cache.get(prefix_tuple)
-        if mask is None or not mask.index.equals(self._index):
-            mask = self._konto_text.str.startswith(prefix_tuple)
-            self._mask_cache[prefix_tuple] = mask
-        if not mask.any():
-            return 0.0
-        return float(values.loc[mask].sum())
+            self._prefix_index.add_column(column, numeric.to_numpy(dtype=float))
+
+        return self._prefix_index.column_sum(column, prefix_tuple)
 
 
 def sum_column_by_prefix(
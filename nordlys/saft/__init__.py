@@ -5,7 +5,19 @@ from __future__ import annotations
 from .entry_stream import check_trial_balance, iter_saft_entries
 from .header import SaftHeader, parse_saft_header
 from .masterfiles import CustomerInfo, SupplierInfo, parse_customers, parse_suppliers
-from .trial_balance_summary import ns4102_summary_from_tb, parse_saldobalanse
+from .report_mapping import (
+    NS4102_LINES,
+    AccountRange,
+    ReportLine,
+    compile_report_mapping,
+    load_report_mapping,
+)
+from .trial_balance_summary import (
+    ns4102_summaries_by_year,
+    ns4102_summary_from_tb,
+    parse_saldobalanse,
+    stack_saldobalanser,
+)
 from .validation import (
     SAFT_RESOURCE_DIR,
     XMLSCHEMA_AVAILABLE,
@@ -22,6 +34,13 @@ __all__ = [
     "parse_saft_header",
     "parse_saldobalanse",
     "ns4102_summary_from_tb",
+    "ns4102_summaries_by_year",
+    "stack_saldobalanser",
+    "NS4102_LINES",
+    "AccountRange",
+    "ReportLine",
+    "compile_report_mapping",
+    "load_report_mapping",
     "parse_customers",
     "parse_suppliers",
     "validate_saft_against_xsd",
@@ -0,0 +1,267 @@
+"""Konto-til-konto-flyt for hele datasettet som en glissen matrise."""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Sequence, Tuple
+
+from ..helpers.lazy_imports import lazy_numpy, lazy_pandas
+from .models import CostVoucher
+from .reporting_utils import _normalize_account_key
+
+if TYPE_CHECKING:  # pragma: no cover - kun for typekontroll
+    import pandas as pd
+
+__all__ = ["AccountFlowMatrix", "build_account_flow_matrix"]
+
+pd = lazy_pandas()
+
+_PREFIX_SENTINEL = "\uffff"
+
+
+@dataclass(frozen=True)
+class AccountFlowMatrix:
+    """Aggregert flyt fra kreditert til debitert konto på tvers av alle bilag.
+
+    Matrisen lagres i COO-form: ``sources[i]`` → ``targets[i]`` med beløp
+    ``amounts[i]`` og antall bilag ``voucher_counts[i]``. Radene er sortert
+    på (kilde, mål), og ``accounts`` er sortert slik at prefikssøk blir et
+    binærsøk.
+    """
+
+    accounts: Any
+    sources: Any
+    targets: Any
+    amounts: Any
+    voucher_counts: Any
+    target_order: Any
+
+    def __len__(self) -> int:
+        return int(self.sources.shape[0])
+
+    @property
+    def is_empty(self) -> bool:
+        return len(self) == 0
+
+    def account_index(self, account: str) -> Optional[int]:
+        """Returnerer posisjonen til kontoen i ``accounts``, eller ``None``."""
+
+        np = lazy_numpy()
+        key = _account_key(account)
+        if not key or not len(self.accounts):
+            return None
+        index = int(np.searchsorted(self.accounts, key))
+        if index < len(self.accounts) and self.accounts[index] == key:
+            return index
+        return None
+
+    def prefix_mask(self, prefixes: Sequence[str]) -> Any:
+        """Bool-maske over ``accounts`` for kontoer som starter med et prefiks."""
+
+        np = lazy_numpy()
+        mask = np.zeros(len(self.accounts), dtype=bool)
+        for prefix in prefixes:
+            key = _account_key(prefix)
+            if not key:
+                continue
+            left = int(np.searchsorted(self.accounts, key, side="left"))
+            right = int(
+                np.searchsorted(self.accounts, key + _PREFIX_SENTINEL, side="left")
+            )
+            mask[left:right] = True
+        return mask
+
+    def counter_accounts(self, account: str) -> List[str]:
+        """Alle kontoer som har flyt til eller fra ``account``."""
+
+        np = lazy_numpy()
+        index = self.account_index(account)
+        if index is None:
+            return []
+        out_left = int(np.searchsorted(self.sources, index, side="left"))
+        out_right = int(np.searchsorted(self.sources, index, side="right"))
+        by_target = self.targets[self.target_order]
+        in_left = int(np.searchsorted(by_target, index, side="left"))
+        in_right = int(np.searchsorted(by_target, index, side="right"))
+        related = np.union1d(
+            self.targets[out_left:out_right],
+            self.sources[self.target_order[in_left:in_right]],
+        )
+        related = related[related != index]
+        return [str(self.accounts[i]) for i in related]
+
+    def inflows(self, prefixes: Sequence[str]) -> Dict[str, float]:
+        """Beløp per kildekonto som fører inn på kontoer med gitte prefiks."""
+
+        return self._grouped_flows(prefixes, incoming=True)
+
+    def outflows(self, prefixes: Sequence[str]) -> Dict[str, float]:
+        """Beløp per målkonto som mottar fra kontoer med gitte prefiks."""
+
+        return self._grouped_flows(prefixes, incoming=False)
+
+    def flow_between(
+        self, from_prefixes: Sequence[str], to_prefixes: Sequence[str]
+    ) -> float:
+        """Summerer flyt fra én kontogruppe til en annen."""
+
+        from_mask = self.prefix_mask(from_prefixes)
+        to_mask = self.prefix_mask(to_prefixes)
+        selected = from_mask[self.sources] & to_mask[self.targets]
+        return round(float(self.amounts[selected].sum()), 2)
+
+    def rare_flows(
+        self, max_vouchers: int = 1, min_amount: float = 0.0
+    ) -> "pd.DataFrame":
+        """Kontokombinasjoner som bare forekommer i få bilag.
+
+        Slike sjeldne motposteringer er ofte verdt en nærmere titt i revisjonen.
+        """
+
+        frame = self.to_frame()
+        if frame.empty:
+            return frame
+        selected = (frame["Bilag"] <= max_vouchers) & (
+            frame["Beløp"].abs() >= min_amount
+        )
+        return (
+            frame.loc[selected]
+            .sort_values("Beløp", ascending=False, key=lambda s: s.abs())
+            .reset_index(drop=True)
+        )
+
+    def to_frame(self) -> "pd.DataFrame":
+        """Returnerer flyten som DataFrame med én rad per kontopar."""
+
+        return pd.DataFrame(
+            {
+                "Fra konto": self.accounts[self.sources].astype(object),
+                "Til konto": self.accounts[self.targets].astype(object),
+                "Beløp": self.amounts.round(2),
+                "Bilag": self.voucher_counts,
+            },
+            columns=["Fra konto", "Til konto", "Beløp", "Bilag"],
+        )
+
+    def _grouped_flows(
+        self, prefixes: Sequence[str], *, incoming: bool
+    ) -> Dict[str, float]:
+        np = lazy_numpy()
+        mask = self.prefix_mask(prefixes)
+        if incoming:
+            selected = mask[self.targets]
+            group = self.sources[selected]
+        else:
+            selected = mask[self.sources]
+            group = self.targets[selected]
+        totals = np.bincount(
+            group, weights=self.amounts[selected], minlength=len(self.accounts)
+        )
+        return {
+            str(self.accounts[i]): round(float(totals[i]), 2)
+            for i in np.flatnonzero(np.abs(totals) >= 0.005)
+        }
+
+
+def _account_key(account: object) -> str:
+    text = str(account).strip() if account is not None else ""
+    if not text or text == "—":
+        return ""
+    return _normalize_account_key(text) or text
+
+
+def _collect_lines(
+    vouchers: Sequence[CostVoucher],
+) -> Tuple[List[int], List[str], List[float]]:
+    voucher_ids: List[int] = []
+    accounts: List[str] = []
+    amounts: List[float] = []
+    for voucher_id, voucher in enumerate(vouchers):
+        for line in voucher.lines:
+            key = _account_key(line.account)
+            if not key:
+                continue
+            voucher_ids.append(voucher_id)
+            accounts.append(key)
+            amounts.append(float(line.debit) - float(line.credit))
+    return voucher_ids, accounts, amounts
+
+
+def build_account_flow_matrix(vouchers: Sequence[CostVoucher]) -> AccountFlowMatrix:
+    """Bygger flytmatrisen fra bilagene i ett datasett.
+
+    Linjene nettes per konto i hvert bilag. Krediterte kontoer fordeles så
+    på de debiterte kontoene i forhold til debetbeløpet, slik at summen av
+    flyten i et balansert bilag tilsvarer bilagets debetside.
+    """
+
+    np = lazy_numpy()
+    voucher_list, account_list, amount_list = _collect_lines(vouchers)
+    if not account_list:
+        empty_int = np.zeros(0, dtype=np.int64)
+        return AccountFlowMatrix(
+            accounts=np.array([], dtype=str),
+            sources=empty_int,
+            targets=empty_int,
+            amounts=np.zeros(0, dtype=float),
+            voucher_counts=empty_int,
+            target_order=empty_int,
+        )
+
+    accounts, account_codes = np.unique(np.array(account_list), return_inverse=True)
+    n_accounts = len(accounts)
+    voucher_ids = np.asarray(voucher_list, dtype=np.int64)
+    n_vouchers = int(voucher_ids.max()) + 1
+
+    # Netto per (bilag, konto); nøklene sorteres på bilag og deretter konto.
+    line_keys = voucher_ids * n_accounts + account_codes.astype(np.int64)
+    keys, inverse = np.unique(line_keys, return_inverse=True)
+    net = np.bincount(inverse, weights=np.asarray(amount_list, dtype=float))
+    key_vouchers = keys // n_accounts
+    key_accounts = keys % n_accounts
+
+    is_debit = net > 0
+    is_credit = net < 0
+    debit_vouchers = key_vouchers[is_debit]
+    debit_accounts = key_accounts[is_debit]
+    debit_amounts = net[is_debit]
+    credit_vouchers = key_vouchers[is_credit]
+    credit_accounts = key_accounts[is_credit]
+    credit_amounts = -net[is_credit]
+
+    debit_per_voucher = np.bincount(debit_vouchers, minlength=n_vouchers)
+    debit_total = np.bincount(
+        debit_vouchers, weights=debit_amounts, minlength=n_vouchers
+    )
+    debit_start = np.concatenate(([0], np.cumsum(debit_per_voucher)[:-1]))
+
+    # Kartesisk produkt av kredit- og debetlinjer innen hvert bilag.
+    repeats = debit_per_voucher[credit_vouchers]
+    pair_count = int(repeats.sum())
+    pair_credit = np.repeat(np.arange(len(credit_accounts)), repeats)
+    pair_offset = np.arange(pair_count) - np.repeat(
+        np.cumsum(repeats) - repeats, repeats
+    )
+    pair_debit = np.repeat(debit_start[credit_vouchers], repeats) + pair_offset
+    pair_voucher = credit_vouchers[pair_credit]
+    pair_amounts = (
+        credit_amounts[pair_credit]
+        * debit_amounts[pair_debit]
+        / debit_total[pair_voucher]
+    )
+
+    pair_keys = credit_accounts[pair_credit] * n_accounts + debit_accounts[pair_debit]
+    flow_keys, flow_inverse = np.unique(pair_keys, return_inverse=True)
+    flow_amounts = np.bincount(flow_inverse, weights=pair_amounts)
+    flow_counts = np.bincount(flow_inverse)
+    sources = flow_keys // n_accounts
+    targets = flow_keys % n_accounts
+
+    return AccountFlowMatrix(
+        accounts=accounts,
+        sources=sources,
+        targets=targets,
+        amounts=flow_amounts,
+        voucher_counts=flow_counts,
+        target_order=np.lexsort((sources, targets)),
+    )
@@ -3,20 +3,40 @@
 from __future__ import annotations
 
 from concurrent.futures import ThreadPoolExecutor
-from threading import Lock
+from contextvars import copy_context
 from dataclasses import dataclass
-from typing import Dict, Optional, Tuple, TYPE_CHECKING
+from itertools import chain
+from typing import (
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
+from typing import TYPE_CHECKING
 
 from ..brreg import fetch_brreg, map_brreg_metrics
 from ..industry_groups import (
     IndustryClassification,
     classify_from_brreg_json,
     classify_from_orgnr,
+    fetch_enheter_cached,
     load_cached_brreg,
 )
+from ..integrations.brreg_service import company_status_from_json
+from ..integrations.lookup_cache import (
+    LookupCache,
+    allow_stale,
+    wait_for_refreshes,
+)
 
 if TYPE_CHECKING:
     from ..saft import SaftHeader
+    from .masterfiles import CustomerInfo, SupplierInfo
 
 
 @dataclass
@@ -28,17 +48,63 @@ class BrregEnrichment:
     brreg_error: Optional[str]
     industry: Optional[IndustryClassification]
     industry_error: Optional[str]
+    # Sann når utløpte data fra cachen ble brukt mens nye hentes i bakgrunnen.
+    stale: bool = False
+
+
+@dataclass(frozen=True)
+class CounterpartyRegistryInfo:
+    """Registerdata for en kunde eller leverandør fra Enhetsregisteret."""
+
+    orgnr: str
+    name: Optional[str]
+    naringskode: Optional[str]
+    naring_description: Optional[str]
+    konkurs: Optional[bool]
+    avvikling: Optional[bool]
+    mva_reg: Optional[bool]
+    deleted: bool
+    error: Optional[str] = None
+    # Importtidspunkt (epoch) når dataene kom fra den lokale bulkindeksen.
+    snapshot_imported_at: Optional[float] = None
+
+    @property
+    def has_warning(self) -> bool:
+        """Sann når motparten er konkurs, under avvikling eller slettet."""
+
+        return bool(self.konkurs or self.avvikling or self.deleted)
+
+    @property
+    def warning_text(self) -> str:
+        """Kort statustekst for visning, tom når motparten er i orden."""
+
+        parts = []
+        if self.konkurs:
+            parts.append("Konkurs")
+        if self.avvikling:
+            parts.append("Under avvikling")
+        if self.deleted:
+            parts.append("Slettet")
+        return ", ".join(parts)
+
 
+# Navnerommene enrichment leser fra, se :mod:`nordlys.integrations.lookup_cache`.
+_REFRESH_NAMESPACES = ("brreg_http", "enheter")
+# Under import godtas inntil 30 dager gamle svar, slik at importen nesten
+# aldri venter på nettet. Vanlige oppslag bruker navnerommenes egne vinduer.
+_IMPORT_STALE_SECONDS = 30 * 24 * 60 * 60
+_REFRESH_TIMEOUT_SECONDS = 60.0
 
-_ENRICHMENT_CACHE: Dict[str, BrregEnrichment] = {}
-_CACHE_LOCK = Lock()
+# Bare i minnet: de underliggende svarene ligger allerede i den varige cachen.
+_ENRICHMENT_CACHE: LookupCache[BrregEnrichment] = LookupCache(
+    "brreg_enrichment", ttl_seconds=6 * 60 * 60, max_entries=64
+)
 
 
 def _clear_enrichment_cache() -> None:
     """Tømmer cache. Eksponert for tester."""
 
-    with _CACHE_LOCK:
-        _ENRICHMENT_CACHE.clear()
+    _ENRICHMENT_CACHE.clear()
 
 
 def _normalize_orgnr(orgnr: str) -> str:
@@ -74,21 +140,22 @@ def enrich_from_header(header: Optional["SaftHeader"]) -> BrregEnrichment:
             industry_error=message,
         )
 
-    with _CACHE_LOCK:
-        cached = _ENRICHMENT_CACHE.get(orgnr)
+    cached = _ENRICHMENT_CACHE.get(orgnr)
     if cached:
         return cached
 
-    with ThreadPoolExecutor(max_workers=2) as executor:
-        brreg_future = executor.submit(fetch_brreg, orgnr)
-        industry_future = executor.submit(
-            classify_from_orgnr, orgnr, header.company_name
-        )
+    with allow_stale(_IMPORT_STALE_SECONDS, _REFRESH_NAMESPACES) as scope:
+        # Hver oppgave får sin egen kopi av konteksten, og dermed av scope.
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            brreg_future = executor.submit(copy_context().run, fetch_brreg, orgnr)
+            industry_future = executor.submit(
+                copy_context().run, classify_from_orgnr, orgnr, header.company_name
+            )
 
-        brreg_json, brreg_error = _resolve_brreg_future(brreg_future)
-        industry, industry_error = _resolve_industry_future(
-            industry_future, orgnr, header.company_name
-        )
+            brreg_json, brreg_error = _resolve_brreg_future(brreg_future)
+            industry, industry_error = _resolve_industry_future(
+                industry_future, orgnr, header.company_name
+            )
 
     brreg_map = map_brreg_metrics(brreg_json) if brreg_json else None
     result = BrregEnrichment(
@@ -97,14 +164,159 @@ def enrich_from_header(header: Optional["SaftHeader"]) -> BrregEnrichment:
         brreg_error=brreg_error,
         industry=industry,
         industry_error=industry_error,
+        stale=scope.stale,
     )
 
-    with _CACHE_LOCK:
-        _ENRICHMENT_CACHE[orgnr] = result
+    _ENRICHMENT_CACHE.put(orgnr, result)
 
     return result
 
 
+def refresh_enrichment(
+    headers: Sequence["SaftHeader"],
+    progress_callback: Optional[Callable[[int, str], None]] = None,
+) -> Dict[str, Optional[BrregEnrichment]]:
+    """Venter på bakgrunnsoppdateringene og bygger enrichment på nytt.
+
+    Brukes etter en import der :attr:`BrregEnrichment.stale` var sann.
+    Returnerer ferske resultater per organisasjonsnummer, og ``None`` for
+    selskaper der oppdateringen feilet (dataene er fortsatt utløpt).
+    """
+
+    if progress_callback is not None:
+        progress_callback(0, "Oppdaterer Brønnøysund-data i bakgrunnen …")
+    wait_for_refreshes(_REFRESH_NAMESPACES, timeout=_REFRESH_TIMEOUT_SECONDS)
+    refreshed: Dict[str, Optional[BrregEnrichment]] = {}
+    for header in headers:
+        try:
+            orgnr = _normalize_orgnr(header.orgnr or "")
+        except ValueError:
+            continue
+        if orgnr in refreshed:
+            continue
+        _ENRICHMENT_CACHE.invalidate(orgnr)
+        result = enrich_from_header(header)
+        refreshed[orgnr] = None if result.stale else result
+    if progress_callback is not None:
+        progress_callback(100, "Brønnøysund-data oppdatert.")
+    return refreshed
+
+
+def counterparty_orgnrs(
+    customers: Iterable["CustomerInfo"], suppliers: Iterable["SupplierInfo"]
+) -> List[str]:
+    """Unike, gyldige organisasjonsnumre fra kunde- og leverandørregisteret."""
+
+    seen: Dict[str, None] = {}
+    parties: Iterable[Union["CustomerInfo", "SupplierInfo"]] = chain(
+        customers, suppliers
+    )
+    for info in parties:
+        if not info.registration_number:
+            continue
+        try:
+            seen.setdefault(_normalize_orgnr(info.registration_number), None)
+        except ValueError:
+            continue
+    return list(seen)
+
+
+def enrich_counterparties(
+    orgnrs: Iterable[str],
+    progress_callback: Optional[Callable[[int, str], None]] = None,
+) -> Dict[str, CounterpartyRegistryInfo]:
+    """Henter status og næringskode for mange motparter i én batch.
+
+    Svar fra Enhetsregisteret lagres i den lokale bransjecachen, slik at
+    senere importer av samme kunder og leverandører ikke går mot nettet.
+    Motparter der oppslaget feilet midlertidig er ikke med i resultatet og
+    kan slås opp igjen senere; bare varige feil (f.eks. ingen treff) lagres.
+    Data fra den lokale bulkindeksen merkes med indeksens importtidspunkt.
+    """
+
+    wanted = list(dict.fromkeys(orgnrs))
+    if progress_callback is not None:
+        progress_callback(0, f"Slår opp {len(wanted)} motparter i Brønnøysund …")
+    snapshot_times: Dict[str, float] = {}
+    data, errors = fetch_enheter_cached(wanted, snapshot_times=snapshot_times)
+
+    registry: Dict[str, CounterpartyRegistryInfo] = {}
+    for orgnr, payload in data.items():
+        registry[orgnr] = _registry_info_from_json(
+            orgnr, payload, snapshot_times.get(orgnr)
+        )
+    for orgnr, message in errors.items():
+        registry.setdefault(
+            orgnr,
+            CounterpartyRegistryInfo(
+                orgnr=orgnr,
+                name=None,
+                naringskode=None,
+                naring_description=None,
+                konkurs=None,
+                avvikling=None,
+                mva_reg=None,
+                deleted=False,
+                error=message,
+            ),
+        )
+    if progress_callback is not None:
+        progress_callback(100, "Motparter oppdatert fra Brønnøysund.")
+    return registry
+
+
+def annotate_counterparties(
+    customers: Iterable["CustomerInfo"],
+    suppliers: Iterable["SupplierInfo"],
+    registry: Mapping[str, CounterpartyRegistryInfo],
+) -> int:
+    """Kobler registerdata til kunder og leverandører. Returnerer antall treff."""
+
+    matched = 0
+    parties: Iterable[Union["CustomerInfo", "SupplierInfo"]] = chain(
+        customers, suppliers
+    )
+    for info in parties:
+        if not info.registration_number:
+            continue
+        try:
+            orgnr = _normalize_orgnr(info.registration_number)
+        except ValueError:
+            continue
+        entry = registry.get(orgnr)
+        if entry is None:
+            continue
+        info.registry = entry
+        matched += 1
+    return matched
+
+
+def _registry_info_from_json(
+    orgnr: str,
+    payload: Dict[str, object],
+    snapshot_imported_at: Optional[float] = None,
+) -> CounterpartyRegistryInfo:
+    status = company_status_from_json(orgnr, payload)
+    naringskode = None
+    description = None
+    nk_data = payload.get("naeringskode1")
+    if isinstance(nk_data, dict):
+        naringskode = str(nk_data.get("kode") or "").strip() or None
+        description = str(nk_data.get("beskrivelse") or "").strip() or None
+    name = payload.get("navn")
+    return CounterpartyRegistryInfo(
+        orgnr=orgnr,
+        name=str(name).strip() if name else None,
+        naringskode=naringskode,
+        naring_description=description,
+        konkurs=status.konkurs,
+        avvikling=status.avvikling,
+        mva_reg=status.mva_reg,
+        deleted=bool(payload.get("slettedato")),
+        snapshot_imported_at=snapshot_imported_at,
+    )
+
+
 def _resolve_brreg_future(future) -> Tuple[Optional[Dict[str, object]], Optional[str]]:
     try:
         fetched_json, fetch_error = future.result()
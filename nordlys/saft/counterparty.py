@@ -0,0 +1,99 @@
+"""Felles oppslag av kunde og leverandør per bilag i SAF-T."""
+
+from __future__ import annotations
+
+import xml.etree.ElementTree as ET
+from collections import Counter
+from dataclasses import dataclass
+from threading import Lock
+from typing import Dict, Iterable, Optional
+
+from .entry_helpers import resolve_tx_customer_id, resolve_tx_supplier_id
+from .xml_helpers import NamespaceMap
+
+__all__ = ["CounterpartyResolution", "CounterpartyResolver"]
+
+
+@dataclass(frozen=True)
+class CounterpartyResolution:
+    """Kunde- og leverandør-ID for ett bilag, med kilden til hvert treff."""
+
+    customer_id: Optional[str]
+    supplier_id: Optional[str]
+    customer_source: Optional[str]
+    supplier_source: Optional[str]
+
+
+class CounterpartyResolver:
+    """Slår opp motpart én gang per bilag og deler svaret mellom analysene.
+
+    Resultatet lagres per ``Transaction``-element, slik at kundesalg,
+    kostnadsbilag og bilagslisten ikke kjører fallback-kjeden hver for seg.
+    ``stats`` teller hvor ofte hver strategi ga treff.
+    """
+
+    def __init__(self, ns: NamespaceMap) -> None:
+        self._ns = ns
+        self._cache: Dict[ET.Element, CounterpartyResolution] = {}
+        self._stats: Counter[str] = Counter()
+        self._lock = Lock()
+
+    def resolve(
+        self,
+        transaction: ET.Element,
+        *,
+        lines: Optional[Iterable[ET.Element]] = None,
+    ) -> CounterpartyResolution:
+        """Returnerer motpart for bilaget, beregnet ved første forespørsel."""
+
+        cached = self._cache.get(transaction)
+        if cached is not None:
+            with self._lock:
+                self._stats["cache_treff"] += 1
+            return cached
+
+        lines_list = list(lines) if lines is not None else None
+        customer_id, customer_source = resolve_tx_customer_id(
+            transaction, self._ns, lines=lines_list
+        )
+        supplier_id, supplier_source = resolve_tx_supplier_id(
+            transaction, self._ns, lines=lines_list
+        )
+        resolution = CounterpartyResolution(
+            customer_id=customer_id,
+            supplier_id=supplier_id,
+            customer_source=customer_source,
+            supplier_source=supplier_source,
+        )
+        with self._lock:
+            existing = self._cache.setdefault(transaction, resolution)
+            if existing is resolution:
+                self._stats[f"kunde:{customer_source or 'ingen'}"] += 1
+                self._stats[f"leverandør:{supplier_source or 'ingen'}"] += 1
+        return existing
+
+    def customer_id(
+        self,
+        transaction: ET.Element,
+        *,
+        lines: Optional[Iterable[ET.Element]] = None,
+    ) -> Optional[str]:
+        return self.resolve(transaction, lines=lines).customer_id
+
+    def supplier_id(
+        self,
+        transaction: ET.Element,
+        *,
+        lines: Optional[Iterable[ET.Element]] = None,
+    ) -> Optional[str]:
+        return self.resolve(transaction, lines=lines).supplier_id
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        """Antall bilag per kilde, samt ``cache_treff`` for gjenbrukte svar."""
+
+        with self._lock:
+            return dict(self._stats)
+
+    def __len__(self) -> int:
+        return len(self._cache)
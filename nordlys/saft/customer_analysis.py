@@ -8,6 +8,7 @@ from typing import Dict, List, MutableMapping, Optional, Tuple, TYPE_CHECKING
 import xml.etree.ElementTree as ET
 
 from ..helpers.lazy_imports import lazy_import, lazy_pandas
+from .counterparty import CounterpartyResolver
 from .dates import parse_saft_date
 
 if TYPE_CHECKING:
@@ -34,6 +35,7 @@ class CustomerSupplierAnalysis:
     receivable_analysis: Optional["saft_customers.ReceivablePostingAnalysis"] = None
     analysis_start_date: Optional[date] = None
     analysis_end_date: Optional[date] = None
+    counterparty_stats: Dict[str, int] = field(default_factory=dict)
 
 
 def determine_analysis_year(
@@ -92,6 +94,7 @@ def build_customer_supplier_analysis(
     cost_vouchers: List["saft_customers.CostVoucher"] = []
     all_vouchers: List["saft_customers.CostVoucher"] = []
     credit_notes: Optional["pd.DataFrame"] = None
+    counterparties = CounterpartyResolver(ns)
 
     period_start = _parse_date(header.period_start) if header else None
     period_end = _parse_date(header.period_end) if header else None
@@ -116,6 +119,7 @@ def build_customer_supplier_analysis(
                     date_from=effective_start,
                     date_to=effective_end,
                     parent_map=parent_map,
+                    counterparties=counterparties,
                 )
             )
             cost_vouchers = saft_customers.extract_cost_vouchers(
@@ -124,6 +128,7 @@ def build_customer_supplier_analysis(
                 date_from=effective_start,
                 date_to=effective_end,
                 parent_map=parent_map,
+                counterparties=counterparties,
             )
             all_vouchers = saft_customers.extract_all_vouchers(
                 root,
@@ -131,6 +136,7 @@ def build_customer_supplier_analysis(
                 date_from=effective_start,
                 date_to=effective_end,
                 parent_map=parent_map,
+                counterparties=counterparties,
             )
         elif analysis_year is not None:
             customer_sales, supplier_purchases = (
@@ -139,6 +145,7 @@ def build_customer_supplier_analysis(
                     ns,
                     year=analysis_year,
                     parent_map=parent_map,
+                    counterparties=counterparties,
                 )
             )
             cost_vouchers = saft_customers.extract_cost_vouchers(
@@ -146,12 +153,14 @@ def build_customer_supplier_analysis(
                 ns,
                 year=analysis_year,
                 parent_map=parent_map,
+                counterparties=counterparties,
             )
             all_vouchers = saft_customers.extract_all_vouchers(
                 root,
                 ns,
                 year=analysis_year,
                 parent_map=parent_map,
+                counterparties=counterparties,
             )
         credit_notes = saft_customers.extract_credit_notes(
             root, ns, months=(1, 2), year=analysis_year
@@ -165,6 +174,7 @@ def build_customer_supplier_analysis(
                 ns,
                 year=analysis_year,
                 parent_map=parent_map,
+                counterparties=counterparties,
             )
         )
         cost_vouchers = saft_customers.extract_cost_vouchers(
@@ -172,12 +182,14 @@ def build_customer_supplier_analysis(
             ns,
             year=analysis_year,
             parent_map=parent_map,
+            counterparties=counterparties,
         )
         all_vouchers = saft_customers.extract_all_vouchers(
             root,
             ns,
             year=analysis_year,
             parent_map=parent_map,
+            counterparties=counterparties,
         )
         credit_notes = saft_customers.extract_credit_notes(
             root, ns, months=(1, 2), year=analysis_year
@@ -206,6 +218,7 @@ def build_customer_supplier_analysis(
         sales_ar_correlation=sales_ar_correlation,
         analysis_start_date=effective_start,
         analysis_end_date=effective_end,
+        counterparty_stats=counterparties.stats,
     )
 
 
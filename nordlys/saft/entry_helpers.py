@@ -5,7 +5,7 @@ from __future__ import annotations
 import xml.etree.ElementTree as ET
 from decimal import Decimal, InvalidOperation
 from pathlib import Path
-from typing import Iterable, Optional
+from typing import Iterable, List, Optional, Tuple
 
 from .xml_helpers import _clean_text, _find, _findall, NamespaceMap
 
@@ -13,9 +13,20 @@ __all__ = [
     "get_amount",
     "get_tx_customer_id",
     "get_tx_supplier_id",
+    "resolve_tx_customer_id",
+    "resolve_tx_supplier_id",
     "_parse_amount_element",
 ]
 
+#: Kilder for kunde-/leverandør-ID, i prioritert rekkefølge.
+SOURCE_LEDGER_LINE = "reskontrolinje"
+SOURCE_LINE = "linje"
+SOURCE_DIMENSIONS = "dimensjon"
+SOURCE_ANALYSIS = "analyse"
+SOURCE_TRANSACTION = "bilag"
+
+ResolvedId = Tuple[Optional[str], Optional[str]]
+
 
 def _to_decimal(value: str) -> Decimal:
     text = "".join(ch for ch in value if not ch.isspace())
@@ -84,23 +95,33 @@ def _analysis_customer_id(line: ET.Element, ns: NamespaceMap) -> Optional[str]:
     return None
 
 
-def get_tx_customer_id(
+def _as_line_list(
+    transaction: ET.Element,
+    ns: NamespaceMap,
+    lines: Optional[Iterable[ET.Element]],
+) -> List[ET.Element]:
+    if lines is None:
+        return list(_findall(transaction, "n1:Line", ns))
+    if isinstance(lines, list):
+        return lines
+    return list(lines)
+
+
+def resolve_tx_customer_id(
     transaction: ET.Element,
     ns: NamespaceMap,
     *,
     lines: Optional[Iterable[ET.Element]] = None,
-) -> Optional[str]:
-    """Henter kunde-ID for en transaksjon med flere fallback-strategier."""
+) -> ResolvedId:
+    """Henter kunde-ID for en transaksjon sammen med kilden som ga treff.
 
-    if lines is None:
-        lines_seq = list(_findall(transaction, "n1:Line", ns))
-    elif isinstance(lines, list):
-        lines_seq = lines
-    else:
-        lines_seq = list(lines)
+    Kilden er en av ``SOURCE_*``-konstantene, eller ``None`` når ingen
+    strategi fant en kunde.
+    """
 
+    lines_seq = _as_line_list(transaction, ns, lines)
     if not lines_seq:
-        return None
+        return None, None
 
     first_customer_id: Optional[str] = None
     first_dimensions_id: Optional[str] = None
@@ -113,7 +134,7 @@ def get_tx_customer_id(
         if _account_startswith(line, "15", ns):
             line_customer_id = _line_customer_id(line, ns)
             if line_customer_id:
-                return line_customer_id
+                return line_customer_id, SOURCE_LEDGER_LINE
 
         if have_all_non_priority_ids:
             continue
@@ -141,11 +162,11 @@ def get_tx_customer_id(
         )
 
     if first_customer_id:
-        return first_customer_id
+        return first_customer_id, SOURCE_LINE
     if first_dimensions_id:
-        return first_dimensions_id
+        return first_dimensions_id, SOURCE_DIMENSIONS
     if first_analysis_id:
-        return first_analysis_id
+        return first_analysis_id, SOURCE_ANALYSIS
 
     fallback_paths = (
         "n1:CustomerInfo/n1:CustomerID",
@@ -156,9 +177,20 @@ def get_tx_customer_id(
         element = _find(transaction, path, ns)
         customer_id = _clean_text(element.text if element is not None else None)
         if customer_id:
-            return customer_id
+            return customer_id, SOURCE_TRANSACTION
 
-    return None
+    return None, None
+
+
+def get_tx_customer_id(
+    transaction: ET.Element,
+    ns: NamespaceMap,
+    *,
+    lines: Optional[Iterable[ET.Element]] = None,
+) -> Optional[str]:
+    """Henter kunde-ID for en transaksjon med flere fallback-strategier."""
+
+    return resolve_tx_customer_id(transaction, ns, lines=lines)[0]
 
 
 def _line_supplier_id(line: ET.Element, ns: NamespaceMap) -> Optional[str]:
@@ -198,23 +230,17 @@ def _analysis_supplier_id(line: ET.Element, ns: NamespaceMap) -> Optional[str]:
     return None
 
 
-def get_tx_supplier_id(
+def resolve_tx_supplier_id(
     transaction: ET.Element,
     ns: NamespaceMap,
     *,
     lines: Optional[Iterable[ET.Element]] = None,
-) -> Optional[str]:
-    """Henter leverandør-ID for en transaksjon med flere fallback-strategier."""
-
-    if lines is None:
-        lines_seq = list(_findall(transaction, "n1:Line", ns))
-    elif isinstance(lines, list):
-        lines_seq = lines
-    else:
-        lines_seq = list(lines)
+) -> ResolvedId:
+    """Henter leverandør-ID for en transaksjon sammen med kilden som ga treff."""
 
+    lines_seq = _as_line_list(transaction, ns, lines)
     if not lines_seq:
-        return None
+        return None, None
 
     first_supplier_id: Optional[str] = None
     first_dimensions_id: Optional[str] = None
@@ -227,7 +253,7 @@ def get_tx_supplier_id(
         if _account_startswith(line, "24", ns):
             line_supplier_id = _line_supplier_id(line, ns)
             if line_supplier_id:
-                return line_supplier_id
+                return line_supplier_id, SOURCE_LEDGER_LINE
 
         if have_all_non_priority_ids:
             continue
@@ -255,19 +281,30 @@ def get_tx_supplier_id(
         )
 
     if first_supplier_id:
-        return first_supplier_id
+        return first_supplier_id, SOURCE_LINE
     if first_dimensions_id:
-        return first_dimensions_id
+        return first_dimensions_id, SOURCE_DIMENSIONS
     if first_analysis_id:
-        return first_analysis_id
+        return first_analysis_id, SOURCE_ANALYSIS
 
     supplier_info = _find(transaction, "n1:SupplierInfo/n1:SupplierID", ns)
     if supplier_info is not None:
         supplier_id = _clean_text(supplier_info.text)
         if supplier_id:
-            return supplier_id
+            return supplier_id, SOURCE_TRANSACTION
 
-    return None
+    return None, None
+
+
+def get_tx_supplier_id(
+    transaction: ET.Element,
+    ns: NamespaceMap,
+    *,
+    lines: Optional[Iterable[ET.Element]] = None,
+) -> Optional[str]:
+    """Henter leverandør-ID for en transaksjon med flere fallback-strategier."""
+
+    return resolve_tx_supplier_id(transaction, ns, lines=lines)[0]
 
 
 def _sourceline(element: Optional[ET.Element]) -> Optional[int]:
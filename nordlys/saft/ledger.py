@@ -2,23 +2,51 @@
 
 from __future__ import annotations
 
-from dataclasses import dataclass
+from dataclasses import dataclass, fields
 from datetime import date
-from typing import Iterable, List, Mapping, Sequence
-
+from operator import attrgetter
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Dict,
+    Iterable,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+    Tuple,
+)
+
+from ..helpers.lazy_imports import lazy_numpy, lazy_pandas
 from .models import CostVoucher
 
+if TYPE_CHECKING:  # pragma: no cover - kun for typekontroll
+    from .ledger_index import LedgerIndex
+
 __all__ = [
     "LedgerRow",
+    "LedgerTable",
     "LedgerVoucherKey",
     "StatementRow",
     "build_ledger_rows",
+    "build_ledger_table",
     "filter_ledger_rows",
     "voucher_key_for_row",
     "rows_for_voucher",
     "build_statement_rows",
 ]
 
+pd = lazy_pandas()
+
+_ACCOUNT_NAME = attrgetter("account_name")
+_DESCRIPTION = attrgetter("description")
+_VAT_CODE = attrgetter("vat_code")
+_DEBIT = attrgetter("debit")
+_CREDIT = attrgetter("credit")
+
+# Manglende dato vises som «—» og sorteres etter alle datoer.
+_MISSING_ORDINAL = 2**62
+
 
 @dataclass(frozen=True)
 class LedgerRow:
@@ -63,55 +91,224 @@ class StatementRow:
     source: LedgerRow | None
 
 
-def build_ledger_rows(vouchers: Sequence[CostVoucher]) -> List[LedgerRow]:
-    """Bygger en flat liste med posteringer fra alle bilag."""
+@dataclass(frozen=True, eq=False)
+class LedgerTable:
+    """Hovedboklinjer lagret kolonnevis i NumPy-arrayer.
+
+    Tekstkolonnene er objekt-arrayer med ferdig rensede verdier, beløpene er
+    flyttall, og ``date_ordinal`` er datoen som ordinal (manglende dato
+    sorteres sist). ``voucher`` er en kode som er lik for alle linjer med
+    samme bilagsnøkkel (dato, bilagsnr og transaksjons-ID).
+    :class:`LedgerRow`-objekter lages først når noen ber om enkeltlinjer.
+    """
+
+    dato: Any
+    date_ordinal: Any
+    bilagsnr: Any
+    transaksjons_id: Any
+    konto: Any
+    kontonavn: Any
+    bilagstype: Any
+    beskrivelse: Any
+    motkontoer: Any
+    mva: Any
+    mva_belop: Any
+    debet: Any
+    kredit: Any
+    voucher: Any
+
+    def __len__(self) -> int:
+        return int(self.konto.shape[0])
+
+    @property
+    def amounts(self) -> Any:
+        return self.debet - self.kredit
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[LedgerRow]) -> "LedgerTable":
+        """Bygger en tabell fra eksisterende linjer, i samme rekkefølge."""
+
+        np = lazy_numpy()
+        row_buffer = list(rows)
+        columns = {
+            name: [getattr(row, name) for row in row_buffer] for name in _ROW_FIELDS
+        }
+        voucher_codes: Dict[Tuple[str, str, str], int] = {}
+        codes = [
+            voucher_codes.setdefault(key, len(voucher_codes))
+            for key in zip(
+                columns["dato"], columns["bilagsnr"], columns["transaksjons_id"]
+            )
+        ]
+        ordinals = [_date_ordinal_from_text(text) for text in columns["dato"]]
+        return cls._from_columns(
+            columns,
+            np.asarray(ordinals, dtype=np.int64),
+            np.asarray(codes, dtype=np.int64),
+        )
+
+    @classmethod
+    def _from_columns(
+        cls, columns: Mapping[str, Sequence[Any]], ordinals: Any, vouchers: Any
+    ) -> "LedgerTable":
+        np = lazy_numpy()
+        arrays: Dict[str, Any] = {}
+        for name in _ROW_FIELDS:
+            dtype = float if name in _AMOUNT_FIELDS else object
+            values = np.empty(len(columns[name]), dtype=dtype)
+            values[:] = columns[name]
+            arrays[name] = values
+        return cls(**arrays, date_ordinal=ordinals, voucher=vouchers)
+
+    def take(self, offsets: Any) -> "LedgerTable":
+        """Returnerer en ny tabell med linjene i ``offsets`` eller en boolsk maske."""
+
+        np = lazy_numpy()
+        index = np.asarray(offsets)
+        if index.dtype == bool:
+            index = np.flatnonzero(index)
+        index = index.astype(np.intp, copy=False)
+        return LedgerTable(
+            **{name: getattr(self, name)[index] for name in _COLUMN_FIELDS}
+        )
+
+    def sort_order(self) -> Any:
+        """Permutasjon som sorterer på dato, bilagsnr, transaksjons-ID og konto.
 
-    rows: List[LedgerRow] = []
+        Tekst erstattes av rangen i sortert rekkefølge, slik at hele
+        sorteringen blir én ``np.lexsort`` over heltall.
+        """
+
+        np = lazy_numpy()
+        if len(self) == 0:
+            return np.arange(0, dtype=np.intp)
+        # Dato, bilagsnr og transaksjons-ID er like for alle linjer i et bilag,
+        # så bilagene rangeres én gang og linjene arver rangen.
+        codes, first, inverse = np.unique(
+            self.voucher, return_index=True, return_inverse=True
+        )
+        voucher_keys = zip(
+            self.date_ordinal[first].tolist(),
+            self.bilagsnr[first].tolist(),
+            self.transaksjons_id[first].tolist(),
+        )
+        voucher_order = sorted(range(len(codes)), key=list(voucher_keys).__getitem__)
+        voucher_rank = np.empty(len(codes), dtype=np.int64)
+        voucher_rank[voucher_order] = np.arange(len(codes))
+        return np.lexsort((_text_rank(self.konto), voucher_rank[inverse]))
+
+    def row(self, offset: int) -> LedgerRow:
+        return self.rows([offset])[0]
+
+    def rows(self, offsets: Any = None) -> List[LedgerRow]:
+        """Lager :class:`LedgerRow` for alle linjer eller for ``offsets``."""
+
+        table = self if offsets is None else self.take(offsets)
+        columns = [getattr(table, name).tolist() for name in _ROW_FIELDS]
+        return [LedgerRow(*values) for values in zip(*columns)]
+
+    def voucher_offsets(self, offset: int) -> Any:
+        """Alle linjer som hører til samme bilag som linjen ``offset``."""
+
+        np = lazy_numpy()
+        return np.flatnonzero(self.voucher == self.voucher[offset])
+
+
+_ROW_FIELDS = tuple(field.name for field in fields(LedgerRow))
+_AMOUNT_FIELDS = frozenset({"mva_belop", "debet", "kredit"})
+_COLUMN_FIELDS = tuple(field.name for field in fields(LedgerTable))
+
+
+def build_ledger_table(vouchers: Sequence[CostVoucher]) -> LedgerTable:
+    """Bygger hovedboken kolonnevis, sortert på dato, bilag og konto.
+
+    Bilagsfeltene og motkontoene beregnes én gang per bilag; per linje
+    hentes bare linjens egne felter.
+    """
+
+    np = lazy_numpy()
+    columns: Dict[str, List[Any]] = {name: [] for name in _ROW_FIELDS}
+    voucher_ordinals: List[int] = []
+    voucher_codes: List[int] = []
+    line_counts: List[int] = []
+    voucher_keys: Dict[Tuple[str, str, str], int] = {}
+
+    dato_col = columns["dato"]
+    bilagsnr_col = columns["bilagsnr"]
+    transaksjons_col = columns["transaksjons_id"]
+    bilagstype_col = columns["bilagstype"]
+    konto_col = columns["konto"]
+    kontonavn_col = columns["kontonavn"]
+    beskrivelse_col = columns["beskrivelse"]
+    motkonto_col = columns["motkontoer"]
+    mva_col = columns["mva"]
+    debet_col = columns["debet"]
+    kredit_col = columns["kredit"]
 
     for voucher in vouchers:
+        lines = voucher.lines
+        if not lines:
+            continue
         dato = _format_date(voucher.transaction_date)
         bilagsnr = _clean_text(voucher.document_number, fallback="—")
         transaksjons_id = _clean_text(voucher.transaction_id, fallback="—")
         bilagstype = _clean_text(voucher.description, fallback="Ukjent bilagstype")
 
-        accounts = [line.account.strip() for line in voucher.lines if line.account]
-        unique_accounts = sorted({account for account in accounts if account})
-
-        for line in voucher.lines:
-            konto = _clean_text(line.account, fallback="—")
-            kontonavn = _clean_text(line.account_name, fallback="—")
-            beskrivelse = _clean_text(line.description, fallback="—")
-            mva = _clean_text(line.vat_code, fallback="")
-
-            motkontoer = [acc for acc in unique_accounts if acc != konto]
-            motkonto_txt = ", ".join(motkontoer) if motkontoer else "—"
-
-            line_amount = float(line.debit) - float(line.credit)
-            mva_belop = line_amount if mva else 0.0
-
-            rows.append(
-                LedgerRow(
-                    dato=dato,
-                    bilagsnr=bilagsnr,
-                    transaksjons_id=transaksjons_id,
-                    konto=konto,
-                    kontonavn=kontonavn,
-                    bilagstype=bilagstype,
-                    beskrivelse=beskrivelse,
-                    motkontoer=motkonto_txt,
-                    mva=mva,
-                    mva_belop=mva_belop,
-                    debet=float(line.debit),
-                    kredit=float(line.credit),
-                )
-            )
+        count = len(lines)
+        dato_col.extend([dato] * count)
+        bilagsnr_col.extend([bilagsnr] * count)
+        transaksjons_col.extend([transaksjons_id] * count)
+        bilagstype_col.extend([bilagstype] * count)
+        line_counts.append(count)
+        voucher_ordinals.append(_date_ordinal(voucher.transaction_date))
+        key = (dato, bilagsnr, transaksjons_id)
+        voucher_codes.append(voucher_keys.setdefault(key, len(voucher_keys)))
+
+        raw_accounts = [line.account for line in lines]
+        konto_col.extend(raw_accounts)
+        motkonto_col.extend(_motkontoer(raw_accounts))
+        kontonavn_col.extend(map(_ACCOUNT_NAME, lines))
+        beskrivelse_col.extend(map(_DESCRIPTION, lines))
+        mva_col.extend(map(_VAT_CODE, lines))
+        debet_col.extend(map(_DEBIT, lines))
+        kredit_col.extend(map(_CREDIT, lines))
+
+    # Tekstfeltene renses per unike verdi i stedet for per linje.
+    columns["konto"] = _clean_column(konto_col, fallback="—")
+    columns["kontonavn"] = _clean_column(kontonavn_col, fallback="—")
+    columns["beskrivelse"] = _clean_column(beskrivelse_col, fallback="—")
+    columns["mva"] = _clean_column(mva_col, fallback="")
+    columns["mva_belop"] = [0.0] * len(konto_col)
+    counts = np.asarray(line_counts, dtype=np.int64)
+    table = LedgerTable._from_columns(
+        columns,
+        np.repeat(np.asarray(voucher_ordinals, dtype=np.int64), counts),
+        np.repeat(np.asarray(voucher_codes, dtype=np.int64), counts),
+    )
+    has_vat = table.mva != ""
+    table.mva_belop[has_vat] = table.amounts[has_vat]
+    return table.take(table.sort_order())
 
-    rows.sort(key=lambda row: (row.dato, row.bilagsnr, row.transaksjons_id, row.konto))
-    return rows
 
+def build_ledger_rows(vouchers: Sequence[CostVoucher]) -> List[LedgerRow]:
+    """Bygger en flat liste med posteringer fra alle bilag."""
+
+    return build_ledger_table(vouchers).rows()
+
+
+def filter_ledger_rows(
+    rows: Iterable[LedgerRow] | "LedgerIndex", query: str
+) -> List[LedgerRow]:
+    """Filtrerer hovedboklinjer på kontonummer eller kontonavn.
+
+    Med en :class:`~nordlys.saft.ledger_index.LedgerIndex` brukes indeksene i
+    stedet for å gå gjennom alle linjene.
+    """
+
+    from .ledger_index import LedgerIndex
 
-def filter_ledger_rows(rows: Iterable[LedgerRow], query: str) -> List[LedgerRow]:
-    """Filtrerer hovedboklinjer på kontonummer eller kontonavn."""
+    if isinstance(rows, LedgerIndex):
+        return rows.filter(query)
 
     cleaned = query.strip()
     if not cleaned:
@@ -147,35 +344,47 @@ def voucher_key_for_row(row: LedgerRow) -> LedgerVoucherKey:
 
 
 def rows_for_voucher(
-    rows: Iterable[LedgerRow], selected_row: LedgerRow
+    rows: Iterable[LedgerRow] | LedgerTable, selected_row: LedgerRow
 ) -> List[LedgerRow]:
     """Returnerer alle linjer som tilhører samme bilag som valgt rad."""
 
+    if isinstance(rows, LedgerTable):
+        np = lazy_numpy()
+        mask = (
+            (rows.dato == selected_row.dato)
+            & (rows.bilagsnr == selected_row.bilagsnr)
+            & (rows.transaksjons_id == selected_row.transaksjons_id)
+        )
+        return rows.rows(np.flatnonzero(mask))
+
     selected_key = voucher_key_for_row(selected_row)
     return [row for row in rows if voucher_key_for_row(row) == selected_key]
 
 
 def build_statement_rows(
-    rows: Sequence[LedgerRow],
+    rows: Sequence[LedgerRow] | LedgerTable,
     account_balances: Mapping[str, tuple[float, float]] | None = None,
 ) -> List[StatementRow]:
-    """Bygger kontoutskrift-rader med IB i start og UB i slutt."""
+    """Bygger kontoutskrift-rader med IB i start og UB i slutt.
 
-    if not rows:
+    Løpende saldo regnes ut med én kumulativ sum over beløpskolonnen.
+    """
+
+    np = lazy_numpy()
+    table = rows if isinstance(rows, LedgerTable) else LedgerTable.from_rows(rows)
+    if len(table) == 0:
         return []
 
-    sorted_rows = sorted(
-        rows,
-        key=lambda row: (row.dato, row.bilagsnr, row.transaksjons_id, row.konto),
-    )
-    year = _year_from_date(sorted_rows[0].dato)
+    table = table.take(table.sort_order())
+    year = _year_from_date(str(table.dato[0]))
     opening_date = f"{year}-01-01" if year is not None else "—"
     closing_date = f"{year}-12-31" if year is not None else "—"
 
     account_keys = sorted(
-        {row.konto for row in sorted_rows if row.konto and row.konto != "—"}
+        {account for account in table.konto.tolist() if account and account != "—"}
     )
 
+    amounts = table.amounts
     opening_balance = 0.0
     closing_balance = 0.0
     if account_balances and account_keys:
@@ -186,9 +395,11 @@ def build_statement_rows(
             opening_balance += float(balances[0])
             closing_balance += float(balances[1])
     else:
-        movements = sum(float(row.debet) - float(row.kredit) for row in sorted_rows)
-        opening_balance = 0.0
-        closing_balance = movements
+        closing_balance = float(np.cumsum(amounts)[-1])
+
+    # Summeres fortløpende fra IB, i samme rekkefølge som linjene vises.
+    running = np.cumsum(np.concatenate(([opening_balance], amounts)))[1:]
+    bilag = np.where(table.bilagsnr != "—", table.bilagsnr, table.transaksjons_id)
 
     statement: List[StatementRow] = [
         StatementRow(
@@ -204,27 +415,23 @@ def build_statement_rows(
             source=None,
         )
     ]
-
-    running_balance = opening_balance
-    for row in sorted_rows:
-        amount = float(row.debet) - float(row.kredit)
-        running_balance += amount
-        bilag = row.bilagsnr if row.bilagsnr != "—" else row.transaksjons_id
-        statement.append(
-            StatementRow(
-                dato=row.dato,
-                bilag=bilag,
-                bilagstype=row.bilagstype,
-                tekst=row.beskrivelse,
-                beskrivelse=row.kontonavn,
-                mva=row.mva,
-                mva_belop=row.mva_belop,
-                belop=amount,
-                akkumulert_belop=running_balance,
-                source=row,
-            )
+    statement.extend(
+        StatementRow(
+            dato=source.dato,
+            bilag=bilag_text,
+            bilagstype=source.bilagstype,
+            tekst=source.beskrivelse,
+            beskrivelse=source.kontonavn,
+            mva=source.mva,
+            mva_belop=source.mva_belop,
+            belop=amount,
+            akkumulert_belop=running_balance,
+            source=source,
         )
-
+        for source, bilag_text, amount, running_balance in zip(
+            table.rows(), bilag.tolist(), amounts.tolist(), running.tolist()
+        )
+    )
     statement.append(
         StatementRow(
             dato=closing_date,
@@ -248,6 +455,52 @@ def _format_date(value: date | None) -> str:
     return value.isoformat()
 
 
+def _date_ordinal(value: date | None) -> int:
+    if value is None:
+        return _MISSING_ORDINAL
+    return value.toordinal()
+
+
+def _date_ordinal_from_text(text: str) -> int:
+    try:
+        return date.fromisoformat(text).toordinal()
+    except (TypeError, ValueError):
+        return _MISSING_ORDINAL
+
+
+def _motkontoer(raw_accounts: Sequence[Optional[str]]) -> List[str]:
+    """Motkontoene for hver linje i ett bilag, beregnet én gang per konto."""
+
+    unique_accounts = sorted(
+        {account.strip() for account in raw_accounts if account and account.strip()}
+    )
+    by_account: Dict[Optional[str], str] = {}
+    for raw_account in set(raw_accounts):
+        konto = _clean_text(raw_account, fallback="—")
+        motkontoer = [account for account in unique_accounts if account != konto]
+        by_account[raw_account] = ", ".join(motkontoer) if motkontoer else "—"
+    return [by_account[raw_account] for raw_account in raw_accounts]
+
+
+def _clean_column(values: Sequence[Any], *, fallback: str) -> Any:
+    np = lazy_numpy()
+    raw = np.empty(len(values), dtype=object)
+    raw[:] = values
+    codes, uniques = pd.factorize(raw)
+    # Siste plass brukes for manglende verdier, som får kode -1.
+    cleaned = np.empty(len(uniques) + 1, dtype=object)
+    cleaned[:-1] = [_clean_text(value, fallback=fallback) for value in uniques]
+    cleaned[-1] = fallback
+    return cleaned[codes]
+
+
+def _text_rank(values: Any) -> Any:
+    """Erstatter tekst med rangen i sortert rekkefølge."""
+
+    codes, _uniques = pd.factorize(values, sort=True)
+    return codes
+
+
 def _year_from_date(value: str) -> int | None:
     if len(value) < 4:
         return None
@@ -0,0 +1,232 @@
+"""Søkeindekser for hovedboken.
+
+Indeksen bygges én gang per datasett, samtidig med hovedboklinjene, slik at
+søk på konto, kontoprefiks, bilag og tekst ikke trenger å gå gjennom alle
+linjene for hvert tastetrykk.
+"""
+
+from __future__ import annotations
+
+from bisect import bisect_left
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+)
+
+from ..helpers.lazy_imports import lazy_numpy, lazy_pandas
+from .ledger import LedgerRow, LedgerTable
+
+__all__ = ["LedgerIndex"]
+
+pd = lazy_pandas()
+
+# Sorteres etter alle sifre, slik at ``prefiks + _PREFIX_SENTINEL`` markerer
+# slutten av prefiksområdet.
+_PREFIX_SENTINEL = "\uffff"
+_NGRAM = 3
+
+
+def _digits(text: str) -> str:
+    return "".join(char for char in text if char.isdigit())
+
+
+def _ngrams(text: str) -> Set[str]:
+    return {text[start : start + _NGRAM] for start in range(len(text) - _NGRAM + 1)}
+
+
+class _TextIndex:
+    """Delstrengsøk i tekster via et trigram-oppslag over unike tekster.
+
+    Hovedboken har langt færre unike kontonavn og beskrivelser enn linjer,
+    så både trigrammene og etterkontrollen arbeider på de unike tekstene.
+    """
+
+    def __init__(self) -> None:
+        self._texts: List[str] = []
+        self._text_ids: Dict[str, int] = {}
+        self._grams: Dict[str, Set[int]] = {}
+
+    def add(self, text: str) -> int:
+        lowered = text.lower()
+        text_id = self._text_ids.get(lowered)
+        if text_id is None:
+            text_id = len(self._texts)
+            self._text_ids[lowered] = text_id
+            self._texts.append(lowered)
+            for gram in _ngrams(lowered):
+                self._grams.setdefault(gram, set()).add(text_id)
+        return text_id
+
+    def matching_ids(self, needle: str) -> List[int]:
+        """Returnerer id-ene til tekstene som inneholder ``needle``."""
+
+        lowered = needle.lower()
+        if len(lowered) < _NGRAM:
+            candidates: Iterable[int] = range(len(self._texts))
+        else:
+            postings = sorted(
+                (self._grams.get(gram, set()) for gram in _ngrams(lowered)), key=len
+            )
+            if not postings[0]:
+                return []
+            candidates = set(postings[0]).intersection(*postings[1:])
+        return [text_id for text_id in candidates if lowered in self._texts[text_id]]
+
+
+class LedgerIndex:
+    """Oppslag i hovedboklinjer på konto, bilag og tekst.
+
+    Indeksene lagrer radposisjoner i en :class:`~nordlys.saft.ledger.LedgerTable`
+    og bygges med grupperinger over hele kolonner. Alle oppslag returnerer
+    linjer i samme rekkefølge som i hovedboken.
+    """
+
+    def __init__(self, ledger: LedgerTable | Sequence[LedgerRow]) -> None:
+        np = lazy_numpy()
+        table = (
+            ledger if isinstance(ledger, LedgerTable) else LedgerTable.from_rows(ledger)
+        )
+        self._table = table
+        self._by_account = _group_offsets(table.konto)
+
+        by_voucher = _group_offsets(table.bilagsnr, str.lower)
+        for key, offsets in _group_offsets(table.transaksjons_id, str.lower).items():
+            existing = by_voucher.get(key)
+            by_voucher[key] = (
+                offsets if existing is None else np.union1d(existing, offsets)
+            )
+        self._by_voucher = by_voucher
+
+        self._prefix_keys: List[Tuple[str, str]] = sorted(
+            (_digits(account), account) for account in self._by_account
+        )
+        self._names, self._name_rows = _build_text_index(table.kontonavn)
+        self._descriptions, self._description_rows = _build_text_index(
+            table.beskrivelse
+        )
+
+    def __len__(self) -> int:
+        return len(self._table)
+
+    @property
+    def table(self) -> LedgerTable:
+        return self._table
+
+    @property
+    def accounts(self) -> List[str]:
+        return [account for _digits_key, account in self._prefix_keys]
+
+    def has_account(self, account: str) -> bool:
+        return account in self._by_account
+
+    def account_rows(self, accounts: str | Iterable[str]) -> List[LedgerRow]:
+        """Linjene for én eller flere kontoer (eksakt kontonummer)."""
+
+        wanted = [accounts] if isinstance(accounts, str) else list(accounts)
+        return self._take(
+            [
+                self._by_account[account]
+                for account in wanted
+                if account in self._by_account
+            ]
+        )
+
+    def accounts_with_prefix(self, prefix: str) -> List[str]:
+        """Kontoer der sifrene i kontonummeret starter med sifrene i ``prefix``."""
+
+        digits = _digits(prefix)
+        if not digits:
+            return []
+        start = bisect_left(self._prefix_keys, (digits,))
+        stop = bisect_left(self._prefix_keys, (digits + _PREFIX_SENTINEL,))
+        return [account for _digits_key, account in self._prefix_keys[start:stop]]
+
+    def voucher_rows(self, query: str) -> List[LedgerRow]:
+        """Linjer der bilagsnummer eller transaksjons-ID er lik ``query``."""
+
+        offsets = self._by_voucher.get(query.strip().lower())
+        return self._take([] if offsets is None else [offsets])
+
+    def text_rows(self, query: str) -> List[LedgerRow]:
+        """Linjer der kontonavn eller beskrivelse inneholder ``query``."""
+
+        cleaned = query.strip()
+        if not cleaned:
+            return []
+        parts = [
+            self._name_rows[name_id] for name_id in self._names.matching_ids(cleaned)
+        ]
+        parts.extend(
+            self._description_rows[description_id]
+            for description_id in self._descriptions.matching_ids(cleaned)
+        )
+        return self._take(parts)
+
+    def filter(self, query: str) -> List[LedgerRow]:
+        """Samme treff som :func:`~nordlys.saft.ledger.filter_ledger_rows`."""
+
+        cleaned = query.strip()
+        if not cleaned:
+            return []
+        lowered = cleaned.lower()
+        if _digits(cleaned):
+            accounts = self.accounts_with_prefix(cleaned)
+        else:
+            accounts = [
+                account for account in self._by_account if lowered in account.lower()
+            ]
+        parts = [self._by_account[account] for account in accounts]
+        parts.extend(
+            self._name_rows[name_id] for name_id in self._names.matching_ids(cleaned)
+        )
+        return self._take(parts)
+
+    def _take(self, parts: Sequence[Any]) -> List[LedgerRow]:
+        """Slår sammen radposisjoner, fjerner duplikater og lager linjene."""
+
+        np = lazy_numpy()
+        if not parts:
+            return []
+        offsets = parts[0] if len(parts) == 1 else np.unique(np.concatenate(parts))
+        return self._table.rows(offsets)
+
+
+def _group_offsets(
+    values: Any, normalize: Optional[Callable[[str], str]] = None
+) -> Dict[str, Any]:
+    """Grupperer radposisjoner per verdi. Posisjonene er stigende i hver gruppe."""
+
+    np = lazy_numpy()
+    if len(values) == 0:
+        return {}
+    codes, uniques = pd.factorize(values)
+    keys = list(uniques)
+    if normalize is not None:
+        normalized = np.empty(len(keys), dtype=object)
+        normalized[:] = [normalize(key) for key in keys]
+        remap, normalized_uniques = pd.factorize(normalized)
+        codes = remap[codes]
+        keys = list(normalized_uniques)
+    order = np.argsort(codes, kind="stable")
+    counts = np.bincount(codes, minlength=len(keys))
+    return dict(zip(keys, np.split(order, np.cumsum(counts)[:-1])))
+
+
+def _build_text_index(values: Any) -> Tuple[_TextIndex, Dict[int, Any]]:
+    np = lazy_numpy()
+    text_index = _TextIndex()
+    parts: Dict[int, List[Any]] = {}
+    for text, offsets in _group_offsets(values).items():
+        parts.setdefault(text_index.add(text), []).append(offsets)
+    rows = {
+        text_id: chunks[0] if len(chunks) == 1 else np.sort(np.concatenate(chunks))
+        for text_id, chunks in parts.items()
+    }
+    return text_index, rows
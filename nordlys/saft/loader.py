@@ -36,11 +36,13 @@ if TYPE_CHECKING:
 
     from .. import saft
     from .. import saft_customers
+    from ..regnskap import mva
     from .trial_balance import TrialBalanceResult
 else:
     pd = lazy_pandas()
     saft = lazy_import("nordlys.saft")
     saft_customers = lazy_import("nordlys.saft_customers")
+    mva = lazy_import("nordlys.regnskap.mva")
 
 
 @dataclass
@@ -70,6 +72,9 @@ class SaftLoadResult:
     brreg_error: Optional[str] = None
     industry: Optional[IndustryClassification] = None
     industry_error: Optional[str] = None
+    brreg_stale: bool = False
+    counterparty_stats: Dict[str, int] = field(default_factory=dict)
+    vat_profile: Optional["mva.VatCodeProfile"] = None
 
 
 @dataclass
@@ -267,6 +272,14 @@ def load_saft_file(
         all_vouchers = analysis.all_vouchers
         credit_notes = analysis.credit_notes
         sales_ar_correlation = analysis.sales_ar_correlation
+        if analysis.counterparty_stats:
+            _LOGGER.debug(
+                "Motpartsoppslag for %s: %s", file_name, analysis.counterparty_stats
+            )
+
+        vat_profile_future = executor.submit(
+            mva.VatCodeProfile.from_vouchers, all_vouchers
+        )
 
         _report_progress(50, f"Analyserer kunder og leverandører for {file_name}")
 
@@ -294,6 +307,7 @@ def load_saft_file(
         trial_balance, trial_balance_error = _resolve_trial_balance(
             futures.trial_balance
         )
+        vat_profile = vat_profile_future.result()
 
     if validation is None:
         raise RuntimeError("Validering av SAF-T kunne ikke fullføres.")
@@ -327,6 +341,9 @@ def load_saft_file(
         brreg_error=enrichment.brreg_error,
         industry=enrichment.industry,
         industry_error=enrichment.industry_error,
+        brreg_stale=enrichment.stale,
+        counterparty_stats=analysis.counterparty_stats,
+        vat_profile=vat_profile,
     )
 
 
@@ -3,12 +3,15 @@
 from __future__ import annotations
 
 import xml.etree.ElementTree as ET
-from dataclasses import dataclass
-from typing import Dict
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Dict, Optional
 
 from ..constants import NS
 from ..helpers import text_or_none
 
+if TYPE_CHECKING:  # pragma: no cover - kun for typekontroll
+    from .brreg_enrichment import CounterpartyRegistryInfo
+
 __all__ = [
     "CustomerInfo",
     "SupplierInfo",
@@ -24,6 +27,10 @@ class CustomerInfo:
     customer_id: str
     customer_number: str
     name: str
+    registration_number: Optional[str] = None
+    registry: Optional["CounterpartyRegistryInfo"] = field(
+        default=None, compare=False, repr=False
+    )
 
 
 @dataclass
@@ -33,6 +40,10 @@ class SupplierInfo:
     supplier_id: str
     supplier_number: str
     name: str
+    registration_number: Optional[str] = None
+    registry: Optional["CounterpartyRegistryInfo"] = field(
+        default=None, compare=False, repr=False
+    )
 
 
 def parse_customers(root: ET.Element) -> Dict[str, CustomerInfo]:
@@ -61,6 +72,7 @@ def parse_customers(root: ET.Element) -> Dict[str, CustomerInfo]:
             customer_id=cid,
             customer_number=number or cid,
             name=name,
+            registration_number=_registration_number(element),
         )
     return customers
 
@@ -92,5 +104,12 @@ def parse_suppliers(root: ET.Element) -> Dict[str, SupplierInfo]:
             supplier_id=sid,
             supplier_number=number or sid,
             name=name,
+            registration_number=_registration_number(element),
         )
     return suppliers
+
+
+def _registration_number(element: ET.Element) -> Optional[str]:
+    return text_or_none(element.find("n1:RegistrationNumber", NS)) or text_or_none(
+        element.find("n1:TaxRegistration/n1:TaxRegistrationNumber", NS)
+    )
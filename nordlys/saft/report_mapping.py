@@ -0,0 +1,291 @@
+"""Deklarativ kobling mellom rapportlinjer og kontointervaller.
+
+NS4102-sammendraget beskrives som en tabell av :class:`ReportLine`. Hver
+linje er en vektet sum av kontointervaller og/eller andre linjer. Tabellen
+kompileres til én aggregeringsmatrise over kontoene i saldobalansen, slik at
+alle nøkkeltall for alle år beregnes med én matrisemultiplikasjon.
+"""
+
+from __future__ import annotations
+
+import json
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, List, Mapping, Sequence, Tuple, Union
+
+from ..helpers.lazy_imports import lazy_numpy
+from ..helpers.prefix_index import PrefixSumIndex
+
+__all__ = [
+    "BASIS_ENDRING",
+    "BASIS_UB",
+    "BASIS_UB_DEBET",
+    "BASIS_UB_KREDIT",
+    "AccountRange",
+    "ReportLine",
+    "AggregationMatrix",
+    "NS4102_LINES",
+    "compile_report_mapping",
+    "load_report_mapping",
+]
+
+
+BASIS_ENDRING = "endring"
+BASIS_UB = "UB"
+BASIS_UB_DEBET = "UB_debet"
+BASIS_UB_KREDIT = "UB_kredit"
+
+_BASES = (BASIS_ENDRING, BASIS_UB, BASIS_UB_DEBET, BASIS_UB_KREDIT)
+
+
+@dataclass(frozen=True)
+class AccountRange:
+    """Et lukket kontointervall med grunnlag og fortegn.
+
+    ``basis`` angir hvilken verdi som summeres per konto: årets bevegelse
+    (``endring``), utgående saldo (``UB``) eller bare debet-/kreditdelen av
+    utgående saldo (``UB_debet``/``UB_kredit``, begge positive).
+    """
+
+    start: int
+    stop: int
+    basis: str = BASIS_ENDRING
+    weight: float = 1.0
+
+
+@dataclass(frozen=True)
+class ReportLine:
+    """Én rapportlinje bygget av kontointervaller og andre linjer."""
+
+    key: str
+    ranges: Tuple[AccountRange, ...] = ()
+    terms: Tuple[Tuple[str, float], ...] = ()
+
+
+def _rng(start: int, stop: int, weight: float = 1.0) -> AccountRange:
+    return AccountRange(start, stop, BASIS_ENDRING, weight)
+
+
+def _ub(start: int, stop: int, weight: float = 1.0) -> AccountRange:
+    return AccountRange(start, stop, BASIS_UB, weight)
+
+
+NS4102_LINES: Tuple[ReportLine, ...] = (
+    ReportLine("driftsinntekter", terms=(("sum_inntekter", 1.0),)),
+    ReportLine("sum_inntekter", ranges=(_rng(3000, 3999, -1.0),)),
+    ReportLine(
+        "salgsinntekter", terms=(("sum_inntekter", 1.0), ("annen_inntekt", -1.0))
+    ),
+    ReportLine(
+        "annen_inntekt", ranges=(_rng(3800, 3899, -1.0), _rng(3900, 3999, -1.0))
+    ),
+    ReportLine("varekostnad", ranges=(_rng(4000, 4999),)),
+    ReportLine("lonn", ranges=(_rng(5000, 5999),)),
+    ReportLine("avskrivninger", ranges=(_rng(6000, 6099),)),
+    ReportLine("andre_drift", ranges=(_rng(6100, 6999),)),
+    ReportLine("annen_kost", ranges=(_rng(7000, 7999),)),
+    ReportLine("finansinntekter", ranges=(_rng(8000, 8099, -1.0),)),
+    ReportLine("finanskostnader", ranges=(_rng(8100, 8199),)),
+    ReportLine(
+        "ebitda",
+        terms=(
+            ("driftsinntekter", 1.0),
+            ("varekostnad", -1.0),
+            ("lonn", -1.0),
+            ("andre_drift", -1.0),
+        ),
+    ),
+    ReportLine("ebit", terms=(("ebitda", 1.0), ("avskrivninger", -1.0))),
+    ReportLine("finans_netto", ranges=(_rng(8000, 8299, -1.0), _rng(8400, 8899, -1.0))),
+    ReportLine("skattekostnad", ranges=(_rng(8300, 8399),)),
+    ReportLine("ebt", terms=(("ebit", 1.0), ("finans_netto", 1.0))),
+    ReportLine(
+        "resultat_for_skatt",
+        terms=(
+            ("driftsinntekter", 1.0),
+            ("varekostnad", -1.0),
+            ("lonn", -1.0),
+            ("avskrivninger", -1.0),
+            ("andre_drift", -1.0),
+            ("annen_kost", -1.0),
+            ("finansinntekter", 1.0),
+            ("finanskostnader", -1.0),
+        ),
+    ),
+    ReportLine("arsresultat", terms=(("ebt", 1.0), ("skattekostnad", -1.0))),
+    ReportLine(
+        "eiendeler_UB", terms=(("anleggsmidler_UB", 1.0), ("omlopsmidler_UB", 1.0))
+    ),
+    ReportLine("anleggsmidler_UB", ranges=(_ub(1000, 1399),)),
+    ReportLine("omlopsmidler_UB", ranges=(_ub(1400, 1999),)),
+    ReportLine("varelager_UB", ranges=(_ub(1400, 1499),)),
+    ReportLine("kundefordringer_UB", ranges=(_ub(1500, 1599),)),
+    ReportLine("kontanter_og_bank_UB", ranges=(_ub(1900, 1999),)),
+    ReportLine("egenkapital_UB", ranges=(_ub(2000, 2099, -1.0),)),
+    ReportLine(
+        "gjeld_UB",
+        terms=(("gjeld_UB_brreg", 1.0), ("liab_debet_21xx_29xx", -1.0)),
+    ),
+    ReportLine("kortsiktig_gjeld_UB", ranges=(_ub(2400, 2999, -1.0),)),
+    ReportLine("leverandorgjeld_UB", ranges=(_ub(2400, 2499, -1.0),)),
+    ReportLine(
+        "balanse_diff",
+        terms=(("eiendeler_UB", 1.0), ("egenkapital_UB", -1.0), ("gjeld_UB", -1.0)),
+    ),
+    ReportLine(
+        "eiendeler_UB_brreg",
+        terms=(("eiendeler_UB", 1.0), ("liab_debet_21xx_29xx", 1.0)),
+    ),
+    ReportLine(
+        "gjeld_UB_brreg",
+        ranges=(AccountRange(2100, 2999, BASIS_UB_KREDIT),),
+    ),
+    ReportLine(
+        "balanse_diff_brreg",
+        terms=(
+            ("eiendeler_UB_brreg", 1.0),
+            ("egenkapital_UB", -1.0),
+            ("gjeld_UB_brreg", -1.0),
+        ),
+    ),
+    ReportLine(
+        "liab_debet_21xx_29xx",
+        ranges=(AccountRange(2100, 2999, BASIS_UB_DEBET),),
+    ),
+)
+
+
+@dataclass(frozen=True)
+class AggregationMatrix:
+    """Kompilert kobling for et bestemt sett med kontoer.
+
+    ``matrix`` har én rad per linje og én kolonne per (grunnlag, konto), i
+    rekkefølgen gitt av grunnlagene og kontoene kompileringen ble gjort for.
+    """
+
+    keys: Tuple[str, ...]
+    matrix: Any
+
+    def apply(self, ib_values: Any, ub_values: Any) -> Dict[str, Any]:
+        """Beregner alle linjer for én eller flere perioder.
+
+        ``ib_values`` og ``ub_values`` har én rad per konto og én kolonne per
+        periode. Hver verdi i resultatet er en vektor med én verdi per periode.
+        """
+
+        np = lazy_numpy()
+        ib = np.asarray(ib_values, dtype=float)
+        ub = np.asarray(ub_values, dtype=float)
+        stacked = np.vstack(
+            [ub - ib, ub, np.where(ub > 0, ub, 0.0), -np.where(ub < 0, ub, 0.0)]
+        )
+        result = self.matrix @ stacked
+        return {key: result[row] for row, key in enumerate(self.keys)}
+
+
+def compile_report_mapping(
+    lines: Sequence[ReportLine], konto_values: Sequence[int]
+) -> AggregationMatrix:
+    """Kompilerer rapportlinjene til en aggregeringsmatrise over kontoene.
+
+    Linjer kan referere til hverandre i vilkårlig rekkefølge, men ikke i
+    sirkel. Resultatet gjenbrukes for samme linjer og kontoer, slik at
+    gjentatte oppsummeringer av samme saldobalanse ikke kompilerer på nytt.
+    """
+
+    np = lazy_numpy()
+    accounts = tuple(int(konto) for konto in np.asarray(konto_values).tolist())
+    return _compile_cached(tuple(lines), accounts)
+
+
+@lru_cache(maxsize=32)
+def _compile_cached(
+    lines: Tuple[ReportLine, ...], konto_values: Tuple[int, ...]
+) -> AggregationMatrix:
+    np = lazy_numpy()
+    accounts = np.asarray(konto_values, dtype=np.int64)
+    n_accounts = int(accounts.shape[0])
+    index = PrefixSumIndex(accounts)
+    by_key = {line.key: line for line in lines}
+    rows: Dict[str, Any] = {}
+
+    def _row(key: str, path: Tuple[str, ...]) -> Any:
+        cached = rows.get(key)
+        if cached is not None:
+            return cached
+        if key in path:
+            raise ValueError(f"Sirkulær referanse i rapportlinjer: {key}")
+        line = by_key.get(key)
+        if line is None:
+            raise ValueError(f"Ukjent rapportlinje: {key}")
+        row = np.zeros(len(_BASES) * n_accounts, dtype=float)
+        for account_range in line.ranges:
+            try:
+                basis_offset = _BASES.index(account_range.basis) * n_accounts
+            except ValueError as exc:
+                raise ValueError(
+                    f"Ukjent grunnlag for {key}: {account_range.basis}"
+                ) from exc
+            positions = index.range_positions(account_range.start, account_range.stop)
+            row[basis_offset + positions] += account_range.weight
+        for term_key, weight in line.terms:
+            row = row + weight * _row(term_key, path + (key,))
+        rows[key] = row
+        return row
+
+    keys = tuple(line.key for line in lines)
+    matrix = (
+        np.vstack([_row(key, ()) for key in keys])
+        if keys
+        else np.zeros((0, len(_BASES) * n_accounts))
+    )
+    # Matrisen deles mellom kall via hurtigbufferen.
+    matrix.setflags(write=False)
+    return AggregationMatrix(keys=keys, matrix=matrix)
+
+
+def load_report_mapping(
+    source: Union[str, Path, Mapping[str, Any]],
+) -> Tuple[ReportLine, ...]:
+    """Leser en egendefinert kobling fra JSON-fil eller ferdig innlest dict.
+
+    Formatet er ``{"lines": [{"key": ..., "ranges": [{"start": 3000,
+    "stop": 3999, "basis": "endring", "weight": -1}], "terms": [{"line":
+    "annen", "weight": 1}]}]}``. Brukes for kunder med avvikende kontoplan.
+    """
+
+    if isinstance(source, Mapping):
+        data: Any = source
+    else:
+        with Path(source).open("r", encoding="utf-8") as fh:
+            data = json.load(fh)
+
+    raw_lines = data.get("lines") if isinstance(data, Mapping) else None
+    if not isinstance(raw_lines, list):
+        raise ValueError("Koblingen må ha en liste med 'lines'.")
+
+    lines: List[ReportLine] = []
+    for raw in raw_lines:
+        try:
+            key = str(raw["key"])
+            ranges = tuple(
+                AccountRange(
+                    start=int(item["start"]),
+                    stop=int(item["stop"]),
+                    basis=str(item.get("basis", BASIS_ENDRING)),
+                    weight=float(item.get("weight", 1.0)),
+                )
+                for item in raw.get("ranges", ())
+            )
+            terms = tuple(
+                (str(item["line"]), float(item.get("weight", 1.0)))
+                for item in raw.get("terms", ())
+            )
+        except (KeyError, TypeError, ValueError, AttributeError) as exc:
+            raise ValueError(f"Ugyldig rapportlinje i koblingen: {raw!r}") from exc
+        for account_range in ranges:
+            if account_range.basis not in _BASES:
+                raise ValueError(f"Ukjent grunnlag for {key}: {account_range.basis}")
+        lines.append(ReportLine(key=key, ranges=ranges, terms=terms))
+    return tuple(lines)
@@ -6,7 +6,8 @@ import xml.etree.ElementTree as ET
 from decimal import Decimal
 from typing import Dict, List, Optional, Sequence
 
-from .entry_helpers import get_amount, get_tx_customer_id, get_tx_supplier_id
+from .counterparty import CounterpartyResolver
+from .entry_helpers import get_amount
 from .models import CostVoucher, VoucherLine
 from .name_lookup import build_customer_name_map, build_supplier_name_map
 from .reporting_utils import (
@@ -75,6 +76,7 @@ def extract_cost_vouchers(
     date_from: Optional[object] = None,
     date_to: Optional[object] = None,
     parent_map: Optional[Dict[ET.Element, Optional[ET.Element]]] = None,
+    counterparties: Optional[CounterpartyResolver] = None,
 ) -> List[CostVoucher]:
     """Henter kostnadsbilag med leverandørtilknytning fra SAF-T."""
 
@@ -83,6 +85,8 @@ def extract_cost_vouchers(
     use_range = start_date is not None or end_date is not None
     if not use_range and year is None:
         raise ValueError("Angi enten year eller date_from/date_to.")
+    if counterparties is None:
+        counterparties = CounterpartyResolver(ns)
 
     supplier_names = build_supplier_name_map(root, ns, parent_map=parent_map)
     account_names = build_account_name_map(root, ns)
@@ -115,7 +119,7 @@ def extract_cost_vouchers(
         if not lines:
             continue
 
-        supplier_id = get_tx_supplier_id(transaction, ns, lines=lines)
+        supplier_id = counterparties.supplier_id(transaction, lines=lines)
         if not supplier_id:
             continue
 
@@ -204,6 +208,7 @@ def extract_all_vouchers(
     date_from: Optional[object] = None,
     date_to: Optional[object] = None,
     parent_map: Optional[Dict[ET.Element, Optional[ET.Element]]] = None,
+    counterparties: Optional[CounterpartyResolver] = None,
 ) -> List[CostVoucher]:
     """Henter alle bilag i valgt periode/år med linjer og mva-koder."""
 
@@ -212,6 +217,8 @@ def extract_all_vouchers(
     use_range = start_date is not None or end_date is not None
     if not use_range and year is None:
         raise ValueError("Angi enten year eller date_from/date_to.")
+    if counterparties is None:
+        counterparties = CounterpartyResolver(ns)
 
     supplier_names = build_supplier_name_map(root, ns, parent_map=parent_map)
     customer_names = build_customer_name_map(root, ns, parent_map=parent_map)
@@ -245,8 +252,9 @@ def extract_all_vouchers(
         if not lines:
             continue
 
-        supplier_id = get_tx_supplier_id(transaction, ns, lines=lines)
-        customer_id = get_tx_customer_id(transaction, ns, lines=lines)
+        counterparty = counterparties.resolve(transaction, lines=lines)
+        supplier_id = counterparty.supplier_id
+        customer_id = counterparty.customer_id
         counterparty_id = supplier_id or customer_id
         counterparty_name = None
         if supplier_id:
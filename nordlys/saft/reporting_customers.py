@@ -9,8 +9,9 @@ from datetime import date
 from decimal import ROUND_HALF_UP, Decimal
 from typing import Dict, List, Optional, Sequence, Tuple, TYPE_CHECKING
 
+from .counterparty import CounterpartyResolver
 from .customer_buckets import DESCRIPTION_BUCKET_MAP
-from .entry_helpers import get_amount, get_tx_customer_id, get_tx_supplier_id
+from .entry_helpers import get_amount
 from .name_lookup import (
     build_customer_name_map,
     build_parent_map,
@@ -321,10 +322,11 @@ def _resolve_transaction_customer(
     lines: List[ET.Element],
     scope: TransactionScope,
     description_customer_map: Dict[str, str],
+    counterparties: CounterpartyResolver,
 ) -> Optional[str]:
     """Finn best mulig CustomerID for bilaget."""
 
-    transaction_customer_id = get_tx_customer_id(transaction, ns, lines=lines)
+    transaction_customer_id = counterparties.customer_id(transaction, lines=lines)
     if transaction_customer_id:
         return transaction_customer_id
     return _lookup_description_customer(
@@ -343,6 +345,7 @@ def _aggregate_transaction_lines(
     description_customer_map: Dict[str, str],
     scope: TransactionScope,
     transaction_customer_id: Optional[str],
+    counterparties: CounterpartyResolver,
 ) -> TransactionLineAggregation:
     """Samler opp summer per bilag før fordeling av mva."""
 
@@ -394,8 +397,8 @@ def _aggregate_transaction_lines(
                             description_customer_map,
                         )
                 if fallback_customer_id is None:
-                    fallback_customer_id = get_tx_customer_id(
-                        transaction, ns, lines=lines
+                    fallback_customer_id = counterparties.customer_id(
+                        transaction, lines=lines
                     )
                 customer_id = fallback_customer_id
             if not customer_id:
@@ -536,9 +539,13 @@ def _compute_customer_sales_map(
     year: Optional[int],
     last_period: Optional[int],
     include_suppliers: bool = False,
+    counterparties: Optional[CounterpartyResolver] = None,
 ) -> Tuple[Dict[str, Decimal], Dict[str, int], Dict[str, Decimal], Dict[str, int]]:
     """Returnerer netto salg per kunde og (valgfritt) kostnader per leverandør."""
 
+    if counterparties is None:
+        counterparties = CounterpartyResolver(ns)
+
     customer_totals: Dict[str, Decimal] = defaultdict(lambda: Decimal("0"))
     customer_counts: Dict[str, int] = defaultdict(int)
     supplier_totals: Dict[str, Decimal] = (
@@ -570,6 +577,7 @@ def _compute_customer_sales_map(
             lines_list,
             scope,
             description_customer_map,
+            counterparties,
         )
         aggregation = _aggregate_transaction_lines(
             transaction,
@@ -579,10 +587,11 @@ def _compute_customer_sales_map(
             description_customer_map=description_customer_map,
             scope=scope,
             transaction_customer_id=transaction_customer_id,
+            counterparties=counterparties,
         )
 
         if include_suppliers and aggregation.has_purchase:
-            supplier_id = get_tx_supplier_id(transaction, ns, lines=lines_list)
+            supplier_id = counterparties.supplier_id(transaction, lines=lines_list)
             if supplier_id:
                 supplier_totals[supplier_id] += aggregation.purchase_total
                 supplier_counts[supplier_id] += 1
@@ -621,6 +630,7 @@ def compute_customer_supplier_totals(
     date_from: Optional[object] = None,
     date_to: Optional[object] = None,
     parent_map: Optional[Dict[ET.Element, Optional[ET.Element]]] = None,
+    counterparties: Optional[CounterpartyResolver] = None,
 ) -> Tuple["pd.DataFrame", "pd.DataFrame"]:
     """Beregner kundesalg og leverandørkjøp i ett pass gjennom transaksjonene."""
 
@@ -648,6 +658,7 @@ def compute_customer_supplier_totals(
         year=year,
         last_period=last_period if not use_range else None,
         include_suppliers=True,
+        counterparties=counterparties,
     )
 
     lookup_map = parent_map
@@ -724,6 +735,7 @@ def compute_sales_per_customer(
     last_period: Optional[int] = None,
     date_from: Optional[object] = None,
     date_to: Optional[object] = None,
+    counterparties: Optional[CounterpartyResolver] = None,
 ) -> "pd.DataFrame":
     """Beregner netto omsetning per kunde basert på konto 1500 og mva-linjer."""
 
@@ -745,6 +757,7 @@ def compute_sales_per_customer(
         end_date=end_date,
         year=year,
         last_period=last_period if not use_range else None,
+        counterparties=counterparties,
     )
 
     if not totals:
@@ -780,6 +793,7 @@ def compute_purchases_per_supplier(
     year: Optional[int] = None,
     date_from: Optional[object] = None,
     date_to: Optional[object] = None,
+    counterparties: Optional[CounterpartyResolver] = None,
 ) -> "pd.DataFrame":
     """Beregner innkjøp eksklusiv mva per leverandør basert på kostnadskonti."""
 
@@ -794,6 +808,8 @@ def compute_purchases_per_supplier(
     elif year is None:
         raise ValueError("Angi enten year eller date_from/date_to.")
 
+    if counterparties is None:
+        counterparties = CounterpartyResolver(ns)
     totals: Dict[str, Decimal] = defaultdict(lambda: Decimal("0"))
     counts: Dict[str, int] = defaultdict(int)
 
@@ -813,11 +829,11 @@ def compute_purchases_per_supplier(
         elif year is not None and tx_date.year != year:
             continue
 
-        supplier_id = get_tx_supplier_id(transaction, ns)
+        lines = list(_findall(transaction, "n1:Line", ns))
+        supplier_id = counterparties.supplier_id(transaction, lines=lines)
         if not supplier_id:
             continue
 
-        lines = _findall(transaction, "n1:Line", ns)
         transaction_total = Decimal("0")
         has_cost = False
         for line in lines:
@@ -0,0 +1,641 @@
+"""Overføring av importresultater mellom prosesser via delt minne.
+
+Når en SAF-T-fil leses i en egen prosess, skal ``SaftLoadResult`` tilbake til
+GUI-prosessen uten at DataFrames og bilag serialiseres med ``pickle``.
+Produsenten skriver kolonnene til en minnetilordnet fil (i ``/dev/shm`` der
+den finnes) og sender bare en liten beskrivelse; mottakeren tilordner filen
+og bygger visninger rett over minnet.
+
+Filer brukes i stedet for ``multiprocessing.shared_memory`` fordi et
+navngitt segment på Windows forsvinner når siste håndtak lukkes. Produsenten
+kan da avslutte før mottakeren har åpnet segmentet.
+
+Importen kjører foreløpig i tråder, så modulen er ikke i bruk før lesingen
+flyttes til egne prosesser.
+
+* Numeriske kolonner og datoer blir *zero-copy* numpy-visninger.
+* Tekstkolonner lagres som koder pluss én UTF-8-blokk med de unike
+  verdiene, og kodes tilbake ved mottak.
+* Øvrige kolonner (blandede typer o.l.) legges i segmentet som ``pickle``.
+* Bilag og bilagslinjer sendes som to kolonnetabeller og gjenoppbygges
+  ved mottak.
+
+Mottakeren eier segmentene: :meth:`SharedSegment.release` frigir minnet når
+datasettet byttes ut eller lukkes.
+"""
+
+from __future__ import annotations
+
+import atexit
+import dataclasses
+import getpass
+import mmap
+import os
+import pickle
+import tempfile
+import time
+import uuid
+from dataclasses import dataclass
+from datetime import date
+from pathlib import Path
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Dict,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+)
+
+from ..helpers.lazy_imports import lazy_numpy, lazy_pandas
+from .models import CostVoucher, VoucherLine
+
+if TYPE_CHECKING:  # pragma: no cover - kun for typekontroll
+    import pandas as pd
+
+    from .loader import SaftLoadResult
+
+__all__ = [
+    "SharedFrame",
+    "SharedLoadResult",
+    "SharedSegment",
+    "attach_result",
+    "share_frame",
+    "share_result",
+]
+
+pd = lazy_pandas()
+
+# Kolonner starter på en cachelinje, slik at visningene blir justert.
+_ALIGNMENT = 64
+_ARRAY_KINDS = frozenset("biufcmM")
+_VOUCHER_FIELDS = tuple(
+    item.name for item in dataclasses.fields(CostVoucher) if item.name != "lines"
+)
+_LINE_FIELDS = tuple(item.name for item in dataclasses.fields(VoucherLine))
+_LINE_COUNT = "line_count"
+_DATE_FIELD = "transaction_date"
+
+_SEGMENT_PREFIX = "nordlys_segments"
+# Segmenter eldre enn dette er etterlatt av en prosess som ble avbrutt.
+_ORPHAN_SECONDS = 24 * 60 * 60
+_SEGMENT_DIR: Optional[Path] = None
+
+# Segmenter som fortsatt hadde visninger i bruk da de ble frigitt.
+_PENDING_CLOSE: List["SharedSegment"] = []
+
+
+@dataclass(frozen=True)
+class _ColumnSpec:
+    """Hvor én kolonne ligger i segmentet og hvordan den leses tilbake.
+
+    ``kind`` er ``"array"`` (rå numpy-data), ``"text"`` (koder pluss unike
+    tekster) eller ``"pickle"``. For tekst peker ``offset`` på kodene,
+    ``text_offset`` på forskyvningstabellen og ``blob_offset`` på UTF-8-blokken.
+    """
+
+    kind: str
+    dtype: Any
+    offset: int
+    nbytes: int
+    text_offset: int = 0
+    text_count: int = 0
+    text_nbytes: int = 0
+    blob_offset: int = 0
+    codes_dtype: Any = None
+    na_value: Any = None
+
+
+@dataclass(frozen=True)
+class SharedFrame:
+    """Beskrivelse av en DataFrame i delt minne. Liten og billig å pickle."""
+
+    # Full sti til segmentfilen.
+    segment: str
+    rows: int
+    columns: Any
+    specs: Tuple[_ColumnSpec, ...]
+    index: Optional[_ColumnSpec] = None
+
+    def attach(self) -> Tuple["pd.DataFrame", "SharedSegment"]:
+        """Åpner segmentet og bygger DataFrame-en over det delte minnet."""
+
+        handle = SharedSegment.open(self.segment)
+        try:
+            frame = self._build(handle.buffer)
+        except Exception:
+            handle.release()
+            raise
+        return frame, handle
+
+    def discard(self) -> None:
+        """Frigir segmentet uten å lese det, f.eks. når overføringen avbrytes."""
+
+        _unlink(self.segment)
+
+    def _build(self, buffer: memoryview) -> "pd.DataFrame":
+        columns = {
+            position: _read_column(buffer, spec, self.rows)
+            for position, spec in enumerate(self.specs)
+        }
+        frame = pd.DataFrame(columns, index=pd.RangeIndex(self.rows), copy=False)
+        frame.columns = self.columns
+        if self.index is not None:
+            frame.index = _read_pickle(buffer, self.index)
+        return frame
+
+
+class SharedSegment:
+    """Mottakerens eierskap til ett delt minnesegment."""
+
+    def __init__(self, path: str, mapped: mmap.mmap) -> None:
+        self._path = path
+        self._mmap = mapped
+        self._buffer = memoryview(mapped)
+        self._released = False
+
+    @classmethod
+    def open(cls, path: str) -> "SharedSegment":
+        """Tilordner segmentfilen. Filhåndtaket trengs ikke etterpå."""
+
+        with open(path, "r+b") as fh:
+            mapped = mmap.mmap(fh.fileno(), 0)
+        return cls(path, mapped)
+
+    @property
+    def name(self) -> str:
+        return self._path
+
+    @property
+    def buffer(self) -> memoryview:
+        return self._buffer
+
+    @property
+    def released(self) -> bool:
+        return self._released
+
+    @property
+    def closed(self) -> bool:
+        return self._mmap.closed
+
+    def release(self) -> None:
+        """Fjerner segmentet. Minnet frigis når siste visning er borte.
+
+        På POSIX forsvinner filnavnet straks. Windows sletter ikke en fil som
+        er tilordnet, så der slettes den når tilordningen er lukket.
+        """
+
+        if self._released:
+            return
+        self._released = True
+        _unlink(self._path)
+        _close_when_unused(self)
+
+    def _try_close(self) -> bool:
+        try:
+            self._buffer.release()
+            # Feiler så lenge numpy-visninger holder på minnet.
+            self._mmap.close()
+        except BufferError:
+            return False
+        _unlink(self._path)
+        return True
+
+
+@dataclass(frozen=True)
+class _SharedVouchers:
+    vouchers: SharedFrame
+    lines: SharedFrame
+
+
+@dataclass(frozen=True)
+class SharedLoadResult:
+    """Et ``SaftLoadResult`` klart for overføring til en annen prosess.
+
+    ``result`` har DataFrames erstattet med :class:`SharedFrame` og tomme
+    bilagslister. Kostnadsbilagene er som regel et utvalg av alle bilag og
+    sendes da bare som posisjoner i ``all_vouchers``.
+    """
+
+    result: "SaftLoadResult"
+    all_vouchers: Optional[_SharedVouchers] = None
+    cost_vouchers: Optional[_SharedVouchers] = None
+    cost_positions: Optional[SharedFrame] = None
+
+    @property
+    def file_path(self) -> str:
+        return self.result.file_path
+
+
+def share_frame(frame: "pd.DataFrame") -> SharedFrame:
+    """Skriver ``frame`` til et nytt segment og returnerer beskrivelsen.
+
+    Produsenten holder ikke noe håndtak åpent; segmentfilen lever til
+    mottakeren kaller :meth:`SharedSegment.release`, også om produsenten
+    avslutter først.
+    """
+
+    layout = _Layout()
+    specs = tuple(
+        _layout_column(layout, frame.iloc[:, position])
+        for position in range(frame.shape[1])
+    )
+    index_spec = None
+    if not _is_default_index(frame.index):
+        index_spec = _layout_pickle(layout, frame.index)
+    name = layout.write()
+    return SharedFrame(name, len(frame), frame.columns, specs, index_spec)
+
+
+def share_result(result: "SaftLoadResult") -> SharedLoadResult:
+    """Flytter DataFrames og bilag i ``result`` over i delt minne."""
+
+    created: List[SharedFrame] = []
+
+    def _share(frame: "pd.DataFrame") -> SharedFrame:
+        shared = share_frame(frame)
+        created.append(shared)
+        return shared
+
+    try:
+        shipped = _replace_frames(result, _share)
+        all_vouchers = list(result.all_vouchers)
+        cost_vouchers = list(result.cost_vouchers)
+        shared_all = _share_vouchers(all_vouchers, _share) if all_vouchers else None
+        shared_cost = None
+        cost_positions = None
+        if cost_vouchers:
+            positions = _subset_positions(cost_vouchers, all_vouchers)
+            if positions is None:
+                shared_cost = _share_vouchers(cost_vouchers, _share)
+            else:
+                cost_positions = _share(pd.DataFrame({"position": positions}))
+    except BaseException:
+        for shared in created:
+            shared.discard()
+        raise
+    shipped = dataclasses.replace(shipped, all_vouchers=[], cost_vouchers=[])
+    return SharedLoadResult(shipped, shared_all, shared_cost, cost_positions)
+
+
+def attach_result(
+    shared: SharedLoadResult,
+) -> Tuple["SaftLoadResult", List[SharedSegment]]:
+    """Gjenoppbygger resultatet. Segmentene må frigis når det er ferdig brukt.
+
+    Bilagssegmentene frigis her, siden bilagene bygges som vanlige objekter.
+    """
+
+    segments: List[SharedSegment] = []
+
+    def _attach(handle: SharedFrame) -> "pd.DataFrame":
+        frame, segment = handle.attach()
+        segments.append(segment)
+        return frame
+
+    try:
+        result = _replace_frames(shared.result, _attach, SharedFrame)
+        all_vouchers = (
+            _attach_vouchers(shared.all_vouchers) if shared.all_vouchers else []
+        )
+        if shared.cost_positions is not None:
+            frame, segment = shared.cost_positions.attach()
+            positions = frame["position"].tolist()
+            del frame
+            segment.release()
+            cost_vouchers = [all_vouchers[position] for position in positions]
+        elif shared.cost_vouchers is not None:
+            cost_vouchers = _attach_vouchers(shared.cost_vouchers)
+        else:
+            cost_vouchers = []
+    except BaseException:
+        for segment in segments:
+            segment.release()
+        raise
+    result = dataclasses.replace(
+        result, all_vouchers=all_vouchers, cost_vouchers=cost_vouchers
+    )
+    return result, segments
+
+
+# region kolonner
+
+
+class _Layout:
+    """Samler kolonnedata med justerte posisjoner før segmentet opprettes."""
+
+    def __init__(self) -> None:
+        self.size = 0
+        self._chunks: List[Tuple[int, Any]] = []
+
+    def add(self, payload: Any) -> int:
+        np = lazy_numpy()
+        data = (
+            np.frombuffer(payload, dtype=np.uint8)
+            if isinstance(payload, bytes)
+            else np.ascontiguousarray(payload).reshape(-1).view(np.uint8)
+        )
+        offset = -(-self.size // _ALIGNMENT) * _ALIGNMENT
+        self._chunks.append((offset, data))
+        self.size = offset + len(data)
+        return offset
+
+    def write(self) -> str:
+        path = str(_segment_dir() / f"{uuid.uuid4().hex}.seg")
+        try:
+            with open(path, "xb") as fh:
+                fh.truncate(max(self.size, 1))
+                for offset, data in self._chunks:
+                    fh.seek(offset)
+                    fh.write(data)
+        except BaseException:
+            _unlink(path)
+            raise
+        return path
+
+
+def _layout_column(layout: _Layout, series: "pd.Series") -> _ColumnSpec:
+    np = lazy_numpy()
+    dtype = series.dtype
+    if isinstance(dtype, np.dtype) and dtype.kind in _ARRAY_KINDS:
+        values = series.to_numpy(copy=False)
+        offset = layout.add(values)
+        return _ColumnSpec("array", dtype, offset, values.nbytes)
+    if _is_text(series):
+        return _layout_text(layout, series)
+    return _layout_pickle(layout, series.array)
+
+
+def _is_text(series: "pd.Series") -> bool:
+    if not (series.dtype == object or isinstance(series.dtype, pd.StringDtype)):
+        return False
+    return pd.api.types.infer_dtype(series, skipna=True) in {"string", "empty"}
+
+
+def _layout_text(layout: _Layout, series: "pd.Series") -> _ColumnSpec:
+    np = lazy_numpy()
+    codes, uniques = pd.factorize(series, use_na_sentinel=True)
+    encoded = [str(value).encode("utf-8") for value in uniques]
+    ends = np.cumsum([len(item) for item in encoded], dtype=np.int64)
+    bounds = np.concatenate([np.zeros(1, dtype=np.int64), ends])
+    blob = b"".join(encoded)
+    codes = codes.astype(np.int32 if len(encoded) < 2**31 else np.int64, copy=False)
+    offset = layout.add(codes)
+    text_offset = layout.add(bounds)
+    blob_offset = layout.add(blob)
+    if isinstance(series.dtype, pd.StringDtype):
+        na_value = series.dtype.na_value
+    else:
+        missing = series[series.isna()]
+        na_value = missing.iloc[0] if len(missing) else None
+    return _ColumnSpec(
+        "text",
+        series.dtype,
+        offset,
+        codes.nbytes,
+        text_offset=text_offset,
+        text_count=len(encoded),
+        text_nbytes=len(blob),
+        blob_offset=blob_offset,
+        codes_dtype=codes.dtype,
+        na_value=na_value,
+    )
+
+
+def _layout_pickle(layout: _Layout, value: Any) -> _ColumnSpec:
+    payload = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+    offset = layout.add(payload)
+    return _ColumnSpec("pickle", None, offset, len(payload))
+
+
+def _view(buffer: memoryview, dtype: Any, count: int, offset: int) -> Any:
+    """Skrivbar numpy-visning over segmentet.
+
+    ``frombuffer`` holder på bufferen, slik at segmentet ikke kan lukkes
+    (og minnet forsvinne) mens visningen finnes.
+    """
+
+    np = lazy_numpy()
+    view = np.frombuffer(buffer, dtype=dtype, count=count, offset=offset)
+    view.flags.writeable = True
+    return view
+
+
+def _read_column(buffer: memoryview, spec: _ColumnSpec, rows: int) -> Any:
+    if spec.kind == "array":
+        return _view(buffer, spec.dtype, rows, spec.offset)
+    if spec.kind == "text":
+        return _read_text(buffer, spec, rows)
+    return _read_pickle(buffer, spec)
+
+
+def _read_text(buffer: memoryview, spec: _ColumnSpec, rows: int) -> Any:
+    np = lazy_numpy()
+    codes = _view(buffer, spec.codes_dtype, rows, spec.offset)
+    bounds = _view(buffer, np.int64, spec.text_count + 1, spec.text_offset).tolist()
+    with buffer[spec.blob_offset : spec.blob_offset + spec.text_nbytes] as view:
+        blob = bytes(view)
+    # Siste plass er markøren for manglende verdier (kode -1).
+    uniques = np.empty(spec.text_count + 1, dtype=object)
+    uniques[: spec.text_count] = [
+        blob[start:end].decode("utf-8") for start, end in zip(bounds, bounds[1:])
+    ]
+    uniques[spec.text_count] = spec.na_value
+    # Som Series, slik at DataFrame-en ikke tolker objektkolonner som tekst-dtype.
+    return pd.Series(uniques[codes], dtype=spec.dtype, copy=False)
+
+
+def _read_pickle(buffer: memoryview, spec: _ColumnSpec) -> Any:
+    with buffer[spec.offset : spec.offset + spec.nbytes] as payload:
+        return pickle.loads(payload)
+
+
+def _is_default_index(index: "pd.Index") -> bool:
+    return (
+        isinstance(index, pd.RangeIndex)
+        and index.start == 0
+        and index.step == 1
+        and index.name is None
+    )
+
+
+# endregion
+
+# region resultat og bilag
+
+
+def _replace_frames(
+    item: Any, convert: Callable[[Any], Any], source: Any = None
+) -> Any:
+    """Bytter ut DataFrames i ``item`` og dataklassene det inneholder."""
+
+    source_type = pd.DataFrame if source is None else source
+    changes: Dict[str, Any] = {}
+    for item_field in dataclasses.fields(item):
+        if not item_field.init:
+            continue
+        value = getattr(item, item_field.name)
+        if isinstance(value, source_type):
+            changes[item_field.name] = convert(value)
+        elif dataclasses.is_dataclass(value) and not isinstance(value, type):
+            nested = _replace_frames(value, convert, source)
+            if nested is not value:
+                changes[item_field.name] = nested
+    if not changes:
+        return item
+    return dataclasses.replace(item, **changes)
+
+
+def _subset_positions(
+    subset: Sequence[CostVoucher], vouchers: Sequence[CostVoucher]
+) -> Optional[List[int]]:
+    """Posisjonene til ``subset`` i ``vouchers``, eller ``None`` om noen mangler."""
+
+    positions_by_id = {
+        id(voucher): position for position, voucher in enumerate(vouchers)
+    }
+    positions: List[int] = []
+    for voucher in subset:
+        position = positions_by_id.get(id(voucher))
+        if position is None:
+            return None
+        positions.append(position)
+    return positions
+
+
+def _share_vouchers(
+    vouchers: Sequence[CostVoucher], share: Callable[["pd.DataFrame"], SharedFrame]
+) -> _SharedVouchers:
+    np = lazy_numpy()
+    header: Dict[str, Any] = {}
+    for name in _VOUCHER_FIELDS:
+        values = [getattr(voucher, name) for voucher in vouchers]
+        if name == _DATE_FIELD:
+            header[name] = np.array(
+                [0 if value is None else value.toordinal() for value in values],
+                dtype=np.int64,
+            )
+        elif name == "amount":
+            header[name] = np.asarray(values, dtype=float)
+        else:
+            header[name] = pd.Series(values, dtype=object)
+    header[_LINE_COUNT] = np.array(
+        [len(voucher.lines) for voucher in vouchers], dtype=np.int64
+    )
+    lines = [line for voucher in vouchers for line in voucher.lines]
+    line_columns: Dict[str, Any] = {}
+    for name in _LINE_FIELDS:
+        values = [getattr(line, name) for line in lines]
+        if name in {"debit", "credit"}:
+            line_columns[name] = np.asarray(values, dtype=float)
+        else:
+            line_columns[name] = pd.Series(values, dtype=object)
+    return _SharedVouchers(
+        share(pd.DataFrame(header)), share(pd.DataFrame(line_columns))
+    )
+
+
+def _attach_vouchers(shared: _SharedVouchers) -> List[CostVoucher]:
+    header, header_segment = shared.vouchers.attach()
+    line_frame, line_segment = shared.lines.attach()
+    try:
+        line_values = [line_frame[name].tolist() for name in _LINE_FIELDS]
+        lines = [VoucherLine(*values) for values in zip(*line_values)]
+        header_values = [header[name].tolist() for name in _VOUCHER_FIELDS]
+        counts = header[_LINE_COUNT].tolist()
+    finally:
+        del header, line_frame
+        header_segment.release()
+        line_segment.release()
+
+    date_position = _VOUCHER_FIELDS.index(_DATE_FIELD)
+    header_values[date_position] = _dates_from_ordinals(header_values[date_position])
+    vouchers: List[CostVoucher] = []
+    start = 0
+    for values, count in zip(zip(*header_values), counts):
+        fields = dict(zip(_VOUCHER_FIELDS, values))
+        vouchers.append(CostVoucher(**fields, lines=lines[start : start + count]))
+        start += count
+    return vouchers
+
+
+def _dates_from_ordinals(ordinals: Sequence[int]) -> List[Optional[date]]:
+    """Gjør ordinaltall om til datoer; 0 betyr manglende dato."""
+
+    dates: Dict[int, Optional[date]] = {0: None}
+    converted: List[Optional[date]] = []
+    for ordinal in ordinals:
+        value = dates.get(ordinal)
+        if value is None and ordinal not in dates:
+            value = date.fromordinal(ordinal)
+            dates[ordinal] = value
+        converted.append(value)
+    return converted
+
+
+# endregion
+
+# region segmenter
+
+
+def _segment_dir() -> Path:
+    """Katalogen for segmentfiler, i RAM (``/dev/shm``) der det går."""
+
+    global _SEGMENT_DIR
+    if _SEGMENT_DIR is None:
+        base = Path("/dev/shm")
+        if not (base.is_dir() and os.access(base, os.W_OK)):
+            base = Path(tempfile.gettempdir())
+        try:
+            owner = getpass.getuser()
+        except Exception:  # pragma: no cover - plattformavhengig
+            owner = "felles"
+        directory = base / f"{_SEGMENT_PREFIX}_{owner}"
+        directory.mkdir(mode=0o700, parents=True, exist_ok=True)
+        _remove_orphans(directory)
+        _SEGMENT_DIR = directory
+    return _SEGMENT_DIR
+
+
+def _remove_orphans(directory: Path) -> None:
+    """Sletter segmenter som en avbrutt prosess aldri fikk frigitt."""
+
+    cutoff = time.time() - _ORPHAN_SECONDS
+    for entry in directory.glob("*.seg"):
+        try:
+            if entry.stat().st_mtime < cutoff:
+                entry.unlink()
+        except OSError:
+            continue
+
+
+def _unlink(path: str) -> None:
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+    except PermissionError:
+        # Windows: filen er fortsatt tilordnet og slettes når den lukkes.
+        pass
+
+
+def _close_when_unused(segment: SharedSegment) -> None:
+    """Lukker segmentet, eller venter til visningene over det er borte."""
+
+    _retry_pending_close()
+    if not segment._try_close():
+        _PENDING_CLOSE.append(segment)
+
+
+def _retry_pending_close() -> None:
+    for segment in list(_PENDING_CLOSE):
+        if segment._try_close():
+            _PENDING_CLOSE.remove(segment)
+
+
+atexit.register(_retry_pending_close)
+
+
+# endregion
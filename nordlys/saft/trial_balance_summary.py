@@ -4,29 +4,23 @@ from __future__ import annotations
 
 import re
 import xml.etree.ElementTree as ET
-from typing import TYPE_CHECKING, Any, Dict, List, Optional, cast
+from typing import TYPE_CHECKING, Any, Dict, Hashable, List, Mapping, Optional, Sequence
 
 from ..constants import NS
 from ..helpers import lazy_pandas, text_or_none, to_float
+from .report_mapping import NS4102_LINES, ReportLine, compile_report_mapping
 
 if TYPE_CHECKING:  # pragma: no cover - kun for typekontroll
     import pandas as pd
 
-__all__ = ["parse_saldobalanse", "ns4102_summary_from_tb"]
+__all__ = [
+    "parse_saldobalanse",
+    "ns4102_summary_from_tb",
+    "ns4102_summaries_by_year",
+    "stack_saldobalanser",
+]
 
 pd = lazy_pandas()
-_NUMPY: Optional[Any] = None
-
-
-def _lazy_numpy() -> Any:
-    """Laster ``numpy`` først når funksjoner som trenger det kjøres."""
-
-    global _NUMPY
-    if _NUMPY is None:
-        import numpy as _np  # type: ignore[import-not-found]
-
-        _NUMPY = cast(Any, _np)
-    return _NUMPY
 
 
 def parse_saldobalanse(root: ET.Element) -> "pd.DataFrame":
@@ -107,156 +101,142 @@ def parse_saldobalanse(root: ET.Element) -> "pd.DataFrame":
     return pd.DataFrame(data, columns=list(data.keys()))
 
 
-def ns4102_summary_from_tb(df: "pd.DataFrame") -> Dict[str, float]:
-    """Utleder nøkkeltall basert på saldobalansen."""
+_EMPTY_SUMMARY_KEYS = (
+    "driftsinntekter",
+    "sum_inntekter",
+    "salgsinntekter",
+    "annen_inntekt",
+    "varekostnad",
+    "lonn",
+    "avskrivninger",
+    "andre_drift",
+    "annen_kost",
+    "finansinntekter",
+    "finanskostnader",
+    "ebitda",
+    "ebit",
+    "finans_netto",
+    "skattekostnad",
+    "ebt",
+    "resultat_for_skatt",
+    "arsresultat",
+    "eiendeler_UB",
+    "egenkapital_UB",
+    "gjeld_UB",
+    "balanse_diff",
+    "eiendeler_UB_brreg",
+    "gjeld_UB_brreg",
+    "balanse_diff_brreg",
+    "liab_debet_21xx_29xx",
+)
+
+
+def _summary_arrays(
+    konto_values: Any,
+    ib_values: Any,
+    ub_values: Any,
+    lines: Sequence[ReportLine] = NS4102_LINES,
+) -> Dict[str, Any]:
+    """Beregner nøkkeltall for én eller flere kolonner samtidig.
+
+    ``ib_values`` og ``ub_values`` har én rad per konto og én kolonne per
+    periode. Alle verdier i resultatet er vektorer med én verdi per kolonne.
+    """
+
+    aggregation = compile_report_mapping(lines, konto_values)
+    return aggregation.apply(ib_values, ub_values)
+
+
+def _empty_keys(lines: Optional[Sequence[ReportLine]]) -> List[str]:
+    if lines is None:
+        return list(_EMPTY_SUMMARY_KEYS)
+    return [line.key for line in lines]
+
+
+def ns4102_summary_from_tb(
+    df: "pd.DataFrame", *, lines: Optional[Sequence[ReportLine]] = None
+) -> Dict[str, float]:
+    """Utleder nøkkeltall basert på saldobalansen.
+
+    ``lines`` kan erstatte standardkoblingen :data:`NS4102_LINES` for kunder
+    med avvikende kontoplan.
+    """
 
     mask = df["Konto_int"].notna()
     if not mask.any():
-        return {
-            "driftsinntekter": 0.0,
-            "sum_inntekter": 0.0,
-            "salgsinntekter": 0.0,
-            "annen_inntekt": 0.0,
-            "varekostnad": 0.0,
-            "lonn": 0.0,
-            "avskrivninger": 0.0,
-            "andre_drift": 0.0,
-            "annen_kost": 0.0,
-            "finansinntekter": 0.0,
-            "finanskostnader": 0.0,
-            "ebitda": 0.0,
-            "ebit": 0.0,
-            "finans_netto": 0.0,
-            "skattekostnad": 0.0,
-            "ebt": 0.0,
-            "resultat_for_skatt": 0.0,
-            "arsresultat": 0.0,
-            "eiendeler_UB": 0.0,
-            "egenkapital_UB": 0.0,
-            "gjeld_UB": 0.0,
-            "balanse_diff": 0.0,
-            "eiendeler_UB_brreg": 0.0,
-            "gjeld_UB_brreg": 0.0,
-            "balanse_diff_brreg": 0.0,
-            "liab_debet_21xx_29xx": 0.0,
-        }
+        return {key: 0.0 for key in _empty_keys(lines)}
 
     subset = df.loc[mask]
-    np = _lazy_numpy()
-
     konto_values = subset["Konto_int"].astype(int).to_numpy()
-    order = np.argsort(konto_values)
-    konto_sorted = konto_values[order]
-
-    ib_debet = subset["IB Debet"].fillna(0.0).to_numpy()
-    ib_kredit = subset["IB Kredit"].fillna(0.0).to_numpy()
-    ub_debet = subset["UB Debet"].fillna(0.0).to_numpy()
-    ub_kredit = subset["UB Kredit"].fillna(0.0).to_numpy()
-
-    ib_values = ib_debet - ib_kredit
-    ub_values = ub_debet - ub_kredit
-    end_values = ub_values - ib_values
-
-    end_sorted = end_values[order]
-    ub_sorted = ub_values[order]
-
-    end_prefix = np.cumsum(end_sorted)
-    ub_prefix = np.cumsum(ub_sorted)
-
-    def _sum_with_prefix(prefix: Any, start: int, stop: int) -> float:
-        left = int(np.searchsorted(konto_sorted, start, side="left"))
-        right = int(np.searchsorted(konto_sorted, stop, side="right")) - 1
-        if left > right:
-            return 0.0
-        total = prefix[right]
-        if left > 0:
-            total -= prefix[left - 1]
-        return float(total)
-
-    def sum_end(start: int, stop: int) -> float:
-        return _sum_with_prefix(end_prefix, start, stop)
-
-    def sum_ub(start: int, stop: int) -> float:
-        return _sum_with_prefix(ub_prefix, start, stop)
-
-    sum_salg_total = -sum_end(3000, 3999)
-    annen_inntekt = -(sum_end(3800, 3899) + sum_end(3900, 3999))
-    salgsinntekter = sum_salg_total - annen_inntekt
-    driftsinntekter = sum_salg_total
-    varekostnad = sum_end(4000, 4999)
-    lonn = sum_end(5000, 5999)
-    avskr = sum_end(6000, 6099)
-    andre_drift = sum_end(6100, 6999)
-    annen_kost = sum_end(7000, 7999)
-    ebitda = driftsinntekter - (varekostnad + lonn + andre_drift)
-    ebit = ebitda - avskr
-    finansinntekter = -sum_end(8000, 8099)
-    finanskostnader = sum_end(8100, 8199)
-    finans = -(sum_end(8000, 8299) + sum_end(8400, 8899))
-    skatt = sum_end(8300, 8399)
-    ebt = ebit + finans
-    resultat_for_skatt = (
-        driftsinntekter
-        - varekostnad
-        - lonn
-        - avskr
-        - andre_drift
-        - annen_kost
-        + finansinntekter
-        - finanskostnader
+    ib_values = (
+        subset["IB Debet"].fillna(0.0).to_numpy()
+        - subset["IB Kredit"].fillna(0.0).to_numpy()
     )
-    arsresultat = ebt - skatt
-    anlegg_UB = sum_ub(1000, 1399)
-    omlop_UB = sum_ub(1400, 1999)
-    varelager_UB = sum_ub(1400, 1499)
-    kundefordringer_UB = sum_ub(1500, 1599)
-    kontanter_bank_UB = sum_ub(1900, 1999)
-    eiendeler_netto = anlegg_UB + omlop_UB
-    egenkap_UB = -sum_ub(2000, 2099)
-    liab_mask = (konto_values >= 2100) & (konto_values <= 2999)
-    liab_values = ub_values[liab_mask]
-    liab_kreditt = float(-liab_values[liab_values < 0].sum())
-    liab_debet = float(liab_values[liab_values > 0].sum())
-    gjeld_netto = liab_kreditt - liab_debet
-    kortsiktig_gjeld_UB = -sum_ub(2400, 2999)
-    leverandorgjeld_UB = -sum_ub(2400, 2499)
-    balanse_diff_netto = eiendeler_netto - (egenkap_UB + gjeld_netto)
-    eiendeler_brreg = eiendeler_netto + liab_debet
-    gjeld_brreg = liab_kreditt
-    balanse_diff_brreg = eiendeler_brreg - (egenkap_UB + gjeld_brreg)
-
-    return {
-        "driftsinntekter": driftsinntekter,
-        "sum_inntekter": sum_salg_total,
-        "salgsinntekter": salgsinntekter,
-        "annen_inntekt": annen_inntekt,
-        "varekostnad": varekostnad,
-        "lonn": lonn,
-        "avskrivninger": avskr,
-        "andre_drift": andre_drift,
-        "annen_kost": annen_kost,
-        "finansinntekter": finansinntekter,
-        "finanskostnader": finanskostnader,
-        "ebitda": ebitda,
-        "ebit": ebit,
-        "finans_netto": finans,
-        "skattekostnad": skatt,
-        "ebt": ebt,
-        "resultat_for_skatt": resultat_for_skatt,
-        "arsresultat": arsresultat,
-        "eiendeler_UB": eiendeler_netto,
-        "anleggsmidler_UB": anlegg_UB,
-        "omlopsmidler_UB": omlop_UB,
-        "varelager_UB": varelager_UB,
-        "kundefordringer_UB": kundefordringer_UB,
-        "kontanter_og_bank_UB": kontanter_bank_UB,
-        "egenkapital_UB": egenkap_UB,
-        "gjeld_UB": gjeld_netto,
-        "kortsiktig_gjeld_UB": kortsiktig_gjeld_UB,
-        "leverandorgjeld_UB": leverandorgjeld_UB,
-        "balanse_diff": balanse_diff_netto,
-        "eiendeler_UB_brreg": eiendeler_brreg,
-        "gjeld_UB_brreg": gjeld_brreg,
-        "balanse_diff_brreg": balanse_diff_brreg,
-        "liab_debet_21xx_29xx": float(liab_debet),
-    }
+    ub_values = (
+        subset["UB Debet"].fillna(0.0).to_numpy()
+        - subset["UB Kredit"].fillna(0.0).to_numpy()
+    )
+    arrays = _summary_arrays(
+        konto_values,
+        ib_values.reshape(-1, 1),
+        ub_values.reshape(-1, 1),
+        lines or NS4102_LINES,
+    )
+    return {key: float(values[0]) for key, values in arrays.items()}
+
+
+def stack_saldobalanser(frames: Mapping[Hashable, "pd.DataFrame"]) -> "pd.DataFrame":
+    """Stabler saldobalanser fra flere datasett i én tabell med kolonnen ``År``.
+
+    Nøkkelen i ``frames`` (typisk år eller datasettnøkkel) havner i ``År``.
+    """
+
+    if not frames:
+        return pd.DataFrame(columns=["År"])
+    stacked = pd.concat(
+        list(frames.values()), keys=list(frames.keys()), names=["År", None]
+    )
+    return stacked.reset_index(level=0).reset_index(drop=True)
+
+
+def ns4102_summaries_by_year(
+    frames: Mapping[Hashable, "pd.DataFrame"],
+    *,
+    lines: Optional[Sequence[ReportLine]] = None,
+) -> "pd.DataFrame":
+    """Beregner NS4102-sammendrag for alle datasett i ett vektorisert pass.
+
+    Returnerer én rad per nøkkel i ``frames`` (i samme rekkefølge) og én
+    kolonne per nøkkeltall. Alle år aggregeres med samme kompilerte matrise.
+    """
+
+    keys = list(frames.keys())
+    stacked = stack_saldobalanser(frames)
+    if stacked.empty or "Konto_int" not in stacked:
+        return pd.DataFrame(0.0, index=keys, columns=_empty_keys(lines))
+
+    stacked = stacked.loc[stacked["Konto_int"].notna()]
+    netto = pd.DataFrame(
+        {
+            "År": stacked["År"],
+            "Konto_int": stacked["Konto_int"].astype(int),
+            "IB": stacked["IB Debet"].fillna(0.0) - stacked["IB Kredit"].fillna(0.0),
+            "UB": stacked["UB Debet"].fillna(0.0) - stacked["UB Kredit"].fillna(0.0),
+        }
+    )
+    pivot = netto.pivot_table(
+        index="Konto_int",
+        columns="År",
+        values=["IB", "UB"],
+        aggfunc="sum",
+        fill_value=0.0,
+    )
+    ib_matrix = pivot["IB"].reindex(columns=keys, fill_value=0.0)
+    ub_matrix = pivot["UB"].reindex(columns=keys, fill_value=0.0)
+    arrays = _summary_arrays(
+        pivot.index.to_numpy(),
+        ib_matrix.to_numpy(dtype=float),
+        ub_matrix.to_numpy(dtype=float),
+        lines or NS4102_LINES,
+    )
+    return pd.DataFrame(arrays, index=keys)
@@ -6,9 +6,11 @@ from typing import TYPE_CHECKING, Callable, Dict, List, Optional, Sequence, Tupl
 
 from PySide6.QtWidgets import QStatusBar, QWidget
 
+from ...core.task_runner import TaskRunner
 from ..config import REVISION_TASKS
 from ..data_manager import SaftAnalytics, SaftDatasetStore
 from ..header_bar import HeaderBar
+from ..page_models import PageModelPipeline
 from ..page_state_handler import ComparisonRows, PageStateHandler
 from .analytics import AnalyticsEventHandler
 from .context import ControllerContext
@@ -49,11 +51,16 @@ class SaftDataController:
         parent: QWidget,
         schedule_responsive_update: Callable[[], None],
         update_header_fields: Callable[[], None],
+        task_runner: Optional[TaskRunner] = None,
     ) -> None:
+        model_pipeline = (
+            PageModelPipeline(task_runner, parent) if task_runner is not None else None
+        )
         self._pages = PageStateHandler(
             dataset_store,
             REVISION_TASKS,
             schedule_responsive_update,
+            model_pipeline,
         )
         self._context = ControllerContext(
             dataset_store=dataset_store,
@@ -177,6 +184,9 @@ class SaftDataController:
     def apply_page_state(self, key: str, widget: QWidget) -> None:
         self._pages.apply_page_state(key, widget)
 
+    def on_page_shown(self, key: str, widget: QWidget) -> None:
+        self._pages.on_page_shown(key, widget)
+
     # region Import og datasett
     def set_loading_state(
         self, loading: bool, status_message: Optional[str] = None
@@ -192,6 +202,12 @@ class SaftDataController:
     def activate_dataset(self, key: str, *, log_event: bool = False) -> None:
         self._dataset_flow.activate_dataset(key, log_event=log_event)
 
+    def apply_brreg_refresh(self, changed_keys: Sequence[str]) -> None:
+        self._dataset_flow.apply_brreg_refresh(changed_keys)
+
+    def apply_counterparty_registry(self) -> None:
+        self._dataset_flow.apply_counterparty_registry()
+
     def update_comparison_tables(
         self,
         rows: Optional[ComparisonRows],
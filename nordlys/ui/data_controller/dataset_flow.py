@@ -8,7 +8,6 @@ from typing import TYPE_CHECKING, List, Optional, Sequence, Tuple
 
 from PySide6.QtWidgets import QMessageBox
 
-from ...saft.periods import format_header_period
 from ...helpers.formatting import format_currency
 from ..page_state_handler import ComparisonRows
 from .context import ControllerContext
@@ -34,6 +33,7 @@ class DatasetFlowController:
             return
 
         store.apply_batch(results)
+        self._context.pages.invalidate_pages()
         self._update_dataset_selector()
 
         default_key = store.select_default_key()
@@ -62,6 +62,43 @@ class DatasetFlowController:
                 label = store.dataset_label(current_result)
                 self._messenger.log_import_event(f"Viser datasett: {label}")
 
+    def apply_brreg_refresh(self, changed_keys: Sequence[str]) -> None:
+        """Viser ferskere Brønnøysund-data som kom etter importen."""
+
+        store = self._context.dataset_store
+        pages = self._context.pages
+        result = store.current_result
+        if result is None or store.current_key not in changed_keys:
+            return
+        if pages.vesentlig_page:
+            pages.vesentlig_page.update_summary(
+                store.saft_summary,
+                industry=store.industry,
+                industry_error=store.industry_error,
+            )
+        self._process_brreg_result(result)
+        self._context.status_bar.showMessage(
+            "Brønnøysund-data er oppdatert i bakgrunnen."
+        )
+
+    def apply_counterparty_registry(self) -> None:
+        """Viser registervarsler for motparter som ble slått opp etter importen."""
+
+        store = self._context.dataset_store
+        pages = self._context.pages
+        if store.current_result is None:
+            return
+        if pages.sales_ar_page:
+            pages.sales_ar_page.set_registry_warnings(
+                store.counterparty_warning_rows(),
+                store.counterparty_snapshot_imported_at(),
+            )
+        if pages.purchases_ap_page:
+            pages.purchases_ap_page.set_registry_warnings(
+                store.counterparty_warning_rows(suppliers=True),
+                store.counterparty_snapshot_imported_at(suppliers=True),
+            )
+
     def update_comparison_tables(
         self,
         rows: Optional[ComparisonRows],
@@ -90,16 +127,9 @@ class DatasetFlowController:
         if saft_df is None:
             saft_df = result.dataframe
         self._context.update_header_fields()
-        if pages.saldobalanse_page:
-            pages.saldobalanse_page.set_dataframe(saft_df)
-        if pages.hovedbok_page:
-            pages.hovedbok_page.set_account_balances(saft_df)
-            pages.hovedbok_page.set_vouchers(store.all_vouchers)
         pages.clear_comparison_tables()
-        if pages.dashboard_page:
-            pages.dashboard_page.update_summary(
-                store.saft_summary, len(store.cost_vouchers)
-            )
+
+        from ...saft.periods import format_header_period
 
         header = store.header
         company = header.company_name if header else None
@@ -196,51 +226,8 @@ class DatasetFlowController:
         if pages.import_page:
             pages.import_page.update_trial_balance_status(trial_message)
 
-        if pages.sales_ar_page:
-            pages.sales_ar_page.set_controls_enabled(store.has_customer_data)
-            pages.sales_ar_page.update_sales_reconciliation(
-                store.customer_sales_total,
-                store.sales_account_total,
-            )
-            pages.sales_ar_page.clear_top_customers()
-            pages.sales_ar_page.set_credit_notes(
-                store.credit_note_rows(), store.credit_note_monthly_summary()
-            )
-            pages.sales_ar_page.set_sales_correlation(
-                store.sales_with_receivable_total,
-                store.sales_without_receivable_total,
-                store.sales_without_receivable_rows(),
-                store.receivable_sales_counter_total,
-            )
-            pages.sales_ar_page.set_receivable_overview(
-                store.receivable_analysis,
-                store.receivable_unclassified_rows(),
-            )
-            pages.sales_ar_page.set_bank_overview(
-                store.bank_analysis, store.bank_mismatch_rows()
-            )
-        if pages.purchases_ap_page:
-            pages.purchases_ap_page.set_controls_enabled(store.has_supplier_data)
-            pages.purchases_ap_page.clear_top_suppliers()
-        if pages.cost_review_page:
-            pages.cost_review_page.set_vouchers(store.cost_vouchers)
-        if pages.fixed_assets_page:
-            pages.fixed_assets_page.update_data(store.saft_df, store.cost_vouchers)
-        if pages.mva_page:
-            pages.mva_page.set_vouchers(store.all_vouchers)
-
-        if pages.vesentlig_page:
-            pages.vesentlig_page.update_summary(
-                store.saft_summary,
-                industry=store.industry,
-                industry_error=store.industry_error,
-            )
-        fiscal_year = store.current_year_text
-        if pages.regnskap_page:
-            pages.regnskap_page.set_dataframe(saft_df, fiscal_year)
-            pages.regnskap_page.set_summary_history(store.recent_summaries())
-        if pages.sammenstilling_page:
-            pages.sammenstilling_page.set_dataframe(saft_df, fiscal_year)
+        # Sidene fylles først når de vises; bare den synlige oppdateres nå.
+        pages.mark_dataset_changed()
         brreg_status = self._process_brreg_result(result)
 
         self._context.header_bar.set_export_enabled(True)
@@ -278,6 +265,7 @@ class DatasetFlowController:
             pages.import_page.reset_errors()
 
         pages.clear_comparison_tables()
+        pages.invalidate_pages()
 
         if pages.dashboard_page:
             pages.dashboard_page.update_summary(None, 0)
@@ -305,9 +293,12 @@ class DatasetFlowController:
             pages.sales_ar_page.clear_credit_notes()
             pages.sales_ar_page.clear_receivable_overview()
             pages.sales_ar_page.set_bank_overview(None, [])
+            pages.sales_ar_page.set_counter_account_flows([], [])
+            pages.sales_ar_page.set_registry_warnings([])
         if pages.purchases_ap_page:
             pages.purchases_ap_page.set_controls_enabled(False)
             pages.purchases_ap_page.clear_top_suppliers()
+            pages.purchases_ap_page.set_registry_warnings([])
         if pages.cost_review_page:
             pages.cost_review_page.set_vouchers([])
         if pages.fixed_assets_page:
@@ -367,12 +358,7 @@ class DatasetFlowController:
             messenger.log_import_event(message)
             return message
 
-        comparison_result = self.build_brreg_comparison_rows()
-        if comparison_result is None:
-            self.update_comparison_tables(None, None)
-        else:
-            rows, suggestions = comparison_result
-            self.update_comparison_tables(rows, suggestions)
+        pages.refresh_comparison_tables()
         message = "Regnskapsregister: import vellykket."
         if pages.import_page:
             pages.import_page.update_brreg_status(message)
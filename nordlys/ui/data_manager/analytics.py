@@ -2,10 +2,16 @@
 
 from __future__ import annotations
 
-from typing import List, Tuple
+from typing import TYPE_CHECKING, Callable, List, Optional, Tuple
 
+from ...helpers.lazy_imports import lazy_pandas
 from .dataset_store import SaftDatasetStore
 
+if TYPE_CHECKING:
+    import pandas as pd
+else:
+    pd = lazy_pandas()
+
 __all__ = ["DataUnavailableError", "SaftAnalytics"]
 
 
@@ -25,30 +31,21 @@ class SaftAnalytics:
             raise DataUnavailableError(
                 "Fant ingen inntektslinjer på 3xxx-konti i SAF-T-filen."
             )
-        data = sales.sort_values("Omsetning eks mva", ascending=False).head(topn)
-        rows: List[Tuple[str, str, int, float]] = []
-        for _, row in data.iterrows():
-            number = row.get("Kundenr")
-            number_text = self._store.normalize_customer_key(number)
-            if not number_text and isinstance(number, str):
-                number_text = number.strip() or None
-            name = row.get("Kundenavn") or self._store.lookup_customer_name(
-                number, number
-            )
-            count_val = row.get("Transaksjoner", 0)
-            try:
-                count_int = int(count_val)
-            except (TypeError, ValueError):
-                count_int = 0
-            rows.append(
-                (
-                    number_text or "—",
-                    (name or "").strip() or "—",
-                    count_int,
-                    self._store.safe_float(row.get("Omsetning eks mva")),
-                )
+        return list(
+            self._store.cached_view(
+                "top_customers",
+                lambda: self._top_rows(
+                    sales,
+                    number_column="Kundenr",
+                    name_column="Kundenavn",
+                    amount_column="Omsetning eks mva",
+                    topn=topn,
+                    normalize=self._store.normalize_customer_key,
+                    lookup_name=self._store.lookup_customer_name,
+                ),
+                topn,
             )
-        return rows
+        )
 
     def top_suppliers(self, topn: int) -> List[Tuple[str, str, int, float]]:
         purchases = self._store.supplier_purchases
@@ -56,19 +53,58 @@ class SaftAnalytics:
             raise DataUnavailableError(
                 "Fant ingen innkjøpslinjer på kostnadskonti (4xxx–8xxx) i SAF-T-filen."
             )
-        data = purchases.sort_values("Innkjøp eks mva", ascending=False).head(topn)
+        return list(
+            self._store.cached_view(
+                "top_suppliers",
+                lambda: self._top_rows(
+                    purchases,
+                    number_column="Leverandørnr",
+                    name_column="Leverandørnavn",
+                    amount_column="Innkjøp eks mva",
+                    topn=topn,
+                    normalize=self._store.normalize_supplier_key,
+                    lookup_name=self._store.lookup_supplier_name,
+                ),
+                topn,
+            )
+        )
+
+    @staticmethod
+    def _top_rows(
+        data: "pd.DataFrame",
+        *,
+        number_column: str,
+        name_column: str,
+        amount_column: str,
+        topn: int,
+        normalize: Callable[[object], Optional[str]],
+        lookup_name: Callable[[object, object], Optional[str]],
+    ) -> Tuple[Tuple[str, str, int, float], ...]:
+        """Bygger visningsrader for de største motpartene kolonne for kolonne."""
+
+        top = data.sort_values(amount_column, ascending=False).head(topn)
+        size = len(top.index)
+
+        def _column(name: str) -> List[object]:
+            if name not in top.columns:
+                return [None] * size
+            return top[name].tolist()
+
+        amounts = pd.to_numeric(top[amount_column], errors="coerce").astype(float)
         rows: List[Tuple[str, str, int, float]] = []
-        for _, row in data.iterrows():
-            number = row.get("Leverandørnr")
-            number_text = self._store.normalize_supplier_key(number)
+        for number, name, count_val, amount in zip(
+            _column(number_column),
+            _column(name_column),
+            _column("Transaksjoner"),
+            amounts.fillna(0.0).tolist(),
+        ):
+            number_text = normalize(number)
             if not number_text and isinstance(number, str):
                 number_text = number.strip() or None
-            name = row.get("Leverandørnavn") or self._store.lookup_supplier_name(
-                number, number
-            )
-            count_val = row.get("Transaksjoner", 0)
+            if not isinstance(name, str) or not name:
+                name = lookup_name(number, number)
             try:
-                count_int = int(count_val)
+                count_int = int(count_val) if count_val is not None else 0
             except (TypeError, ValueError):
                 count_int = 0
             rows.append(
@@ -76,7 +112,7 @@ class SaftAnalytics:
                     number_text or "—",
                     (name or "").strip() or "—",
                     count_int,
-                    self._store.safe_float(row.get("Innkjøp eks mva")),
+                    amount,
                 )
             )
-        return rows
+        return tuple(rows)
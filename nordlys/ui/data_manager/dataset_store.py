@@ -4,20 +4,72 @@ from __future__ import annotations
 
 from dataclasses import dataclass
 from datetime import date, datetime
-from typing import TYPE_CHECKING, Dict, List, Optional, Sequence, Tuple
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Dict,
+    Hashable,
+    Iterable,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+    Tuple,
+    TypeVar,
+)
 
-from ...industry_groups import IndustryClassification
 from ...helpers.lazy_imports import lazy_import, lazy_pandas
+from .party_registry import PartyRegistry
 
 if TYPE_CHECKING:
+    from ...industry_groups import IndustryClassification
+    from ...regnskap.driftsmidler import AssetRollForwardDataset, AssetRollForwardRow
+    from ...regnskap.mva import VatCodeProfile
+    from ...saft import SaftHeader
+    from ...saft.brreg_enrichment import BrregEnrichment, CounterpartyRegistryInfo
+    from ...saft.account_flows import AccountFlowMatrix
     from ...saft.loader import SaftLoadResult
+    from ...saft.shared_transport import SharedLoadResult, SharedSegment
 
 pd = lazy_pandas()
 saft = lazy_import("nordlys.saft")
 saft_customers = lazy_import("nordlys.saft_customers")
+account_flows = lazy_import("nordlys.saft.account_flows")
+mva = lazy_import("nordlys.regnskap.mva")
+driftsmidler = lazy_import("nordlys.regnskap.driftsmidler")
+brreg_enrichment = lazy_import("nordlys.saft.brreg_enrichment")
+brreg = lazy_import("nordlys.brreg")
+shared_transport = lazy_import("nordlys.saft.shared_transport")
 
 __all__ = ["DatasetMetadata", "SaftDatasetStore", "SummarySnapshot"]
 
+_T = TypeVar("_T")
+
+_MONTH_NAMES = (
+    "Januar",
+    "Februar",
+    "Mars",
+    "April",
+    "Mai",
+    "Juni",
+    "Juli",
+    "August",
+    "September",
+    "Oktober",
+    "November",
+    "Desember",
+)
+
+# (visningsnavn, nøkkel i SAF-T-sammendraget, nøkkel fra Regnskapsregisteret)
+_BRREG_COMPARISON_FIELDS = (
+    ("Driftsinntekter", "driftsinntekter", "driftsinntekter"),
+    ("Årsresultat", "arsresultat", "arsresultat"),
+    ("Eiendeler", "eiendeler_UB_brreg", "eiendeler_UB"),
+    ("Egenkapital", "egenkapital_UB", "egenkapital_UB"),
+    ("Gjeld", "gjeld_UB_brreg", "gjeld_UB"),
+)
+
 
 @dataclass(frozen=True)
 class DatasetMetadata:
@@ -35,6 +87,7 @@ class SummarySnapshot:
     summary: Dict[str, float]
     year: Optional[int]
     is_current: bool
+    key: Optional[str] = None
 
 
 class SaftDatasetStore:
@@ -48,6 +101,12 @@ class SaftDatasetStore:
         self._order: List[str] = []
         self._current_key: Optional[str] = None
         self._current_result: Optional[SaftLoadResult] = None
+        self._multi_year_summaries: Optional[pd.DataFrame] = None
+        self._counterparty_registry: Dict[str, "CounterpartyRegistryInfo"] = {}
+        # Ferdige visningsrader per (datasettnøkkel, visning, parametre).
+        self._derived_views: Dict[Tuple[str, str, Tuple[Hashable, ...]], Any] = {}
+        # Delte minnesegmenter bak resultater som kom fra importprosesser.
+        self._shared_segments: Dict[str, List["SharedSegment"]] = {}
 
         self._saft_df: Optional[pd.DataFrame] = None
         self._saft_summary: Optional[Dict[str, float]] = None
@@ -55,12 +114,26 @@ class SaftDatasetStore:
         self._validation_result: Optional["saft.SaftValidationResult"] = None
         self._current_file: Optional[str] = None
 
-        self._customers: Dict[str, "saft.CustomerInfo"] = {}
-        self._cust_name_by_nr: Dict[str, str] = {}
-        self._cust_id_to_nr: Dict[str, str] = {}
-        self._suppliers: Dict[str, "saft.SupplierInfo"] = {}
-        self._sup_name_by_nr: Dict[str, str] = {}
-        self._sup_id_to_nr: Dict[str, str] = {}
+        # Kunder og leverandører deles mellom årene i selskapet; feltene under
+        # peker på (delte, skrivebeskyttede) tabeller for aktivt datasett.
+        self._customer_registry = PartyRegistry(
+            id_attr="customer_id",
+            number_attr="customer_number",
+            factory=_customer_info,
+            normalize=self.normalize_customer_key,
+        )
+        self._supplier_registry = PartyRegistry(
+            id_attr="supplier_id",
+            number_attr="supplier_number",
+            factory=_supplier_info,
+            normalize=self.normalize_supplier_key,
+        )
+        self._customers: Mapping[str, "saft.CustomerInfo"] = {}
+        self._cust_name_by_nr: Mapping[str, str] = {}
+        self._cust_id_to_nr: Mapping[str, str] = {}
+        self._suppliers: Mapping[str, "saft.SupplierInfo"] = {}
+        self._sup_name_by_nr: Mapping[str, str] = {}
+        self._sup_id_to_nr: Mapping[str, str] = {}
         self._customer_sales: Optional[pd.DataFrame] = None
         self._supplier_purchases: Optional[pd.DataFrame] = None
         self._credit_notes: Optional[pd.DataFrame] = None
@@ -73,6 +146,8 @@ class SaftDatasetStore:
         self._bank_analysis: Optional["saft_customers.BankPostingAnalysis"] = None
         self._cost_vouchers: List["saft_customers.CostVoucher"] = []
         self._all_vouchers: List["saft_customers.CostVoucher"] = []
+        self._account_flows: Optional["AccountFlowMatrix"] = None
+        self._vat_profile: Optional["VatCodeProfile"] = None
         self._trial_balance: Optional[Dict[str, object]] = None
         self._trial_balance_error: Optional[str] = None
         self._trial_balance_checked: bool = False
@@ -83,18 +158,28 @@ class SaftDatasetStore:
         self._brreg_map: Optional[Dict[str, Optional[float]]] = None
 
     # region Offentlige API-er
-    def apply_batch(self, results: Sequence[SaftLoadResult]) -> None:
-        """Lagrer resultatene fra SAF-T-importen i intern struktur."""
+    def apply_batch(
+        self, results: Sequence[SaftLoadResult | "SharedLoadResult"]
+    ) -> None:
+        """Lagrer resultatene fra SAF-T-importen i intern struktur.
+
+        Resultater som er sendt fra en importprosess via delt minne, kobles
+        til segmentene her. Datasettet holder på segmentene til det byttes
+        ut eller nullstilles.
+        """
 
         if not results:
             self.reset()
             return
 
+        results, segments = self._receive_results(results)
         incoming_orgnrs = {
             self._resolve_dataset_orgnr(res) for res in results if res is not None
         }
         unique_orgnrs = {orgnr for orgnr in incoming_orgnrs if orgnr}
         if len(unique_orgnrs) > 1:
+            for received in segments.values():
+                self._release_segments(received)
             raise ValueError(
                 "Får ikke laste flere selskaper samtidig. Velg filer fra ett selskap."
             )
@@ -118,6 +203,13 @@ class SaftDatasetStore:
 
         next_position = (max(self._positions.values()) + 1) if self._positions else 0
         for res in results:
+            if self._results.get(res.file_path) is not res:
+                self._drop_derived_views(res.file_path)
+                self._customer_registry.forget(res.file_path)
+                self._supplier_registry.forget(res.file_path)
+                self._release_segments(self._shared_segments.pop(res.file_path, []))
+            if res.file_path in segments:
+                self._shared_segments[res.file_path] = segments[res.file_path]
             if res.file_path not in self._positions:
                 self._positions[res.file_path] = next_position
                 next_position += 1
@@ -127,6 +219,14 @@ class SaftDatasetStore:
             self._orgnrs[res.file_path] = self._resolve_dataset_orgnr(res)
 
         self._order = self._sorted_dataset_keys()
+        self._multi_year_summaries = None
+        if self._counterparty_registry:
+            for res in results:
+                brreg_enrichment.annotate_counterparties(
+                    res.customers.values(),
+                    res.suppliers.values(),
+                    self._counterparty_registry,
+                )
         self._current_key = None
         self._current_result = None
         self._clear_active_dataset()
@@ -139,10 +239,37 @@ class SaftDatasetStore:
         self._years = {}
         self._orgnrs = {}
         self._order = []
+        self._multi_year_summaries = None
+        self._counterparty_registry = {}
+        self._derived_views = {}
+        for received in self._shared_segments.values():
+            self._release_segments(received)
+        self._shared_segments = {}
+        self._customer_registry.clear()
+        self._supplier_registry.clear()
         self._current_key = None
         self._current_result = None
         self._clear_active_dataset()
 
+    def cached_view(
+        self, name: str, builder: Callable[[], _T], *params: Hashable
+    ) -> _T:
+        """Bygger en avledet visning én gang per datasett og parametre.
+
+        Resultatet huskes til datasettet byttes ut ved en ny import. Uten
+        aktivt datasett bygges visningen hver gang.
+        """
+
+        key = self._current_key
+        if key is None:
+            return builder()
+        cache_key = (key, name, params)
+        if cache_key in self._derived_views:
+            return self._derived_views[cache_key]
+        value = builder()
+        self._derived_views[cache_key] = value
+        return value
+
     def activate(self, key: str) -> bool:
         """Aktiverer et datasett og forbereder hjelpe-tabeller."""
 
@@ -164,15 +291,15 @@ class SaftDatasetStore:
         self._industry = result.industry
         self._industry_error = result.industry_error
         self._brreg_json = result.brreg_json
-        self._brreg_map = result.brreg_map
+        self._brreg_map = self._brreg_map_for_year(result, self._years.get(key))
 
         previous_df = previous_result.dataframe if previous_result is not None else None
         self._saft_df = self._prepare_dataframe_with_previous(
             result.dataframe, previous_df
         )
 
-        self._ingest_customers(result.customers)
-        self._ingest_suppliers(result.suppliers)
+        self._ingest_customers(result.customers, key)
+        self._ingest_suppliers(result.suppliers, key)
         self._customer_sales = self._prepare_customer_sales(result.customer_sales)
         self._supplier_purchases = self._prepare_supplier_purchases(
             result.supplier_purchases
@@ -187,6 +314,8 @@ class SaftDatasetStore:
             if getattr(result, "all_vouchers", None) is not None
             else list(result.cost_vouchers)
         )
+        self._account_flows = None
+        self._vat_profile = getattr(result, "vat_profile", None)
         self._trial_balance = result.trial_balance
         self._trial_balance_error = result.trial_balance_error
         self._trial_balance_checked = bool(
@@ -291,6 +420,52 @@ class SaftDatasetStore:
     def all_vouchers(self) -> List["saft_customers.CostVoucher"]:
         return self._all_vouchers
 
+    @property
+    def account_flows(self) -> "AccountFlowMatrix":
+        """Konto-til-konto-flyt for aktivt datasett, bygget ved første bruk."""
+
+        if self._account_flows is None:
+            self._account_flows = account_flows.build_account_flow_matrix(
+                self._all_vouchers
+            )
+        return self._account_flows
+
+    def counter_account_flow_rows(
+        self, prefixes: Tuple[str, ...]
+    ) -> List[Tuple[str, float, float]]:
+        """Motkontoer for kontogruppen, hentet fra flytmatrisen.
+
+        Hver rad er ``(motkonto, ført inn, ført ut)``: beløp motkontoen har
+        tilført kontogruppen (debet på gruppen) og mottatt fra den (kredit på
+        gruppen). Størst samlet bevegelse kommer først.
+        """
+
+        if not self._all_vouchers:
+            return []
+        return list(
+            self.cached_view(
+                "counter_account_flows",
+                lambda: _counter_flow_rows(self.account_flows, prefixes),
+                prefixes,
+            )
+        )
+
+    @property
+    def cached_vat_profile(self) -> Optional["VatCodeProfile"]:
+        """Mva-profilen hvis den allerede finnes, uten å bygge den."""
+
+        return self._vat_profile
+
+    @property
+    def vat_profile(self) -> "VatCodeProfile":
+        """Mva-profil for aktivt datasett; bygges fra bilagene om importen manglet den."""
+
+        if self._vat_profile is None:
+            self._vat_profile = mva.VatCodeProfile.from_vouchers(self._all_vouchers)
+            if self._current_result is not None:
+                self._current_result.vat_profile = self._vat_profile
+        return self._vat_profile
+
     @property
     def trial_balance(self) -> Optional[Dict[str, object]]:
         return self._trial_balance
@@ -411,6 +586,7 @@ class SaftDatasetStore:
                 summary=result.summary,
                 year=self._years.get(key),
                 is_current=(key == self._current_key),
+                key=key,
             )
             collected.append(snapshot)
             if len(collected) >= limit:
@@ -419,6 +595,221 @@ class SaftDatasetStore:
         collected.reverse()
         return collected
 
+    def multi_year_trial_balance(self) -> pd.DataFrame:
+        """Saldobalansene for alle datasett stablet med datasettnøkkel i ``År``."""
+
+        return saft.stack_saldobalanser(self._dataframes_in_order())
+
+    def multi_year_summaries(self) -> pd.DataFrame:
+        """NS4102-sammendrag for alle innleste år, beregnet i ett samlet pass.
+
+        Radene følger ``dataset_order`` og er indeksert på datasettnøkkel.
+        Resultatet gjenbrukes til neste import eller nullstilling.
+        """
+
+        if self._multi_year_summaries is None:
+            self._multi_year_summaries = saft.ns4102_summaries_by_year(
+                self._dataframes_in_order()
+            )
+        return self._multi_year_summaries
+
+    @property
+    def counterparty_registry(self) -> Dict[str, "CounterpartyRegistryInfo"]:
+        return dict(self._counterparty_registry)
+
+    def pending_counterparty_orgnrs(self) -> List[str]:
+        """Organisasjonsnumre for kunder og leverandører som ikke er slått opp."""
+
+        orgnrs = brreg_enrichment.counterparty_orgnrs(
+            (info for res in self._results.values() for info in res.customers.values()),
+            (info for res in self._results.values() for info in res.suppliers.values()),
+        )
+        return [orgnr for orgnr in orgnrs if orgnr not in self._counterparty_registry]
+
+    def apply_counterparty_registry(
+        self, registry: Dict[str, "CounterpartyRegistryInfo"]
+    ) -> int:
+        """Kobler registerdata til alle innleste kunder og leverandører.
+
+        Returnerer antall kunder og leverandører som fikk registerdata.
+        """
+
+        self._counterparty_registry.update(registry)
+        matched = 0
+        for res in self._results.values():
+            matched += brreg_enrichment.annotate_counterparties(
+                res.customers.values(),
+                res.suppliers.values(),
+                self._counterparty_registry,
+            )
+        return matched
+
+    def counterparty_warning_rows(
+        self, *, suppliers: bool = False
+    ) -> List[Tuple[str, str, str, str]]:
+        """(nr, navn, orgnr, status) for kunder eller leverandører i aktivt
+        datasett som er konkurs, under avvikling eller slettet."""
+
+        return sorted(
+            (number, name, entry.orgnr, entry.warning_text)
+            for number, name, entry in self._counterparty_entries(suppliers)
+            if entry.has_warning
+        )
+
+    def counterparty_snapshot_imported_at(
+        self, *, suppliers: bool = False
+    ) -> Optional[float]:
+        """Eldste importtidspunkt for registerdata fra den lokale bulkindeksen.
+
+        ``None`` når ingen motparter i aktivt datasett fikk status derfra.
+        """
+
+        times = [
+            entry.snapshot_imported_at
+            for _, _, entry in self._counterparty_entries(suppliers)
+            if entry.snapshot_imported_at is not None
+        ]
+        return min(times) if times else None
+
+    def _counterparty_entries(
+        self, suppliers: bool
+    ) -> List[Tuple[str, str, "CounterpartyRegistryInfo"]]:
+        result = self._current_result
+        if result is None:
+            return []
+        parties = (
+            [
+                (info.supplier_number, info.name, info.registry)
+                for info in result.suppliers.values()
+            ]
+            if suppliers
+            else [
+                (info.customer_number, info.name, info.registry)
+                for info in result.customers.values()
+            ]
+        )
+        return [
+            (number, name, entry)
+            for number, name, entry in parties
+            if entry is not None
+        ]
+
+    def stale_brreg_headers(self) -> List["SaftHeader"]:
+        """Hodene til datasett der Brønnøysund-data kom fra en utløpt cache."""
+
+        headers: Dict[str, "SaftHeader"] = {}
+        for key, res in self._results.items():
+            orgnr = self._orgnrs.get(key)
+            if res.brreg_stale and res.header is not None and orgnr:
+                headers.setdefault(orgnr, res.header)
+        return list(headers.values())
+
+    def apply_brreg_refresh(
+        self, refreshed: Mapping[str, Optional["BrregEnrichment"]]
+    ) -> List[str]:
+        """Erstatter utløpte Brønnøysund-data med ferske resultater.
+
+        ``refreshed`` er nøklet på organisasjonsnummer. Returnerer nøklene til
+        datasettene der dataene faktisk endret seg; det aktive datasettet
+        oppdateres med en gang. ``None`` betyr at oppdateringen feilet: de
+        utløpte dataene beholdes, men datasettet regnes ikke lenger som
+        ventende, slik at det først prøves igjen ved neste import.
+        """
+
+        changed: List[str] = []
+        for key, res in self._results.items():
+            orgnr = self._orgnrs.get(key) or ""
+            if orgnr not in refreshed:
+                continue
+            res.brreg_stale = False
+            enrichment = refreshed[orgnr]
+            if enrichment is None:
+                continue
+            if (
+                res.brreg_json == enrichment.brreg_json
+                and res.industry == enrichment.industry
+            ):
+                continue
+            res.brreg_json = enrichment.brreg_json
+            res.brreg_map = enrichment.brreg_map
+            res.brreg_error = enrichment.brreg_error
+            res.industry = enrichment.industry
+            res.industry_error = enrichment.industry_error
+            changed.append(key)
+        current = self._current_result
+        if current is not None and self._current_key in changed:
+            self._industry = current.industry
+            self._industry_error = current.industry_error
+            self._brreg_json = current.brreg_json
+            self._brreg_map = self._brreg_map_for_year(
+                current, self._years.get(self._current_key or "")
+            )
+        return changed
+
+    def brreg_metrics_by_year(self) -> pd.DataFrame:
+        """Nøkkeltall fra Regnskapsregisteret med én rad per regnskapsår."""
+
+        if self._brreg_json is None:
+            return pd.DataFrame()
+        return brreg.brreg_metrics_frame(self._brreg_json)
+
+    def brreg_year_comparison(self) -> pd.DataFrame:
+        """SAF-T mot Regnskapsregisteret for alle innleste år som finnes i begge.
+
+        Én rad per (år, felt) med kolonnene ``År``, ``Felt``, ``SAF-T``,
+        ``Brreg`` og ``Avvik``. Har flere datasett samme år, brukes det aktive
+        datasettet, ellers det siste i rekkefølgen.
+        """
+
+        columns = ["År", "Felt", "SAF-T", "Brreg", "Avvik"]
+        brreg_frame = self.brreg_metrics_by_year()
+        summaries = self.multi_year_summaries()
+        if brreg_frame.empty or summaries.empty:
+            return pd.DataFrame(columns=columns)
+
+        rows = []
+        for year, key in self._dataset_key_per_year(summaries.index).items():
+            if year not in brreg_frame.index:
+                continue
+            for label, saft_key, brreg_key in _BRREG_COMPARISON_FIELDS:
+                saft_value = summaries.at[key, saft_key]
+                brreg_value = brreg_frame.at[year, brreg_key]
+                rows.append(
+                    (year, label, saft_value, brreg_value, saft_value - brreg_value)
+                )
+        return pd.DataFrame(rows, columns=columns)
+
+    def _dataset_key_per_year(self, keys: Iterable[str]) -> Dict[int, str]:
+        positions = {key: index for index, key in enumerate(self._order)}
+        chosen: Dict[int, str] = {}
+        for key in sorted(keys, key=lambda item: positions.get(item, -1)):
+            year = self._years.get(key)
+            if year is None:
+                continue
+            # Det aktive datasettet beholdes; ellers vinner det siste.
+            if year in chosen and chosen[year] == self._current_key:
+                continue
+            chosen[year] = key
+        return dict(sorted(chosen.items()))
+
+    def asset_roll_forward_datasets(self) -> List["AssetRollForwardDataset"]:
+        """(år, saldobalanse, bilag) for alle innleste datasett i rekkefølge."""
+
+        datasets: List["AssetRollForwardDataset"] = []
+        for key in self._order:
+            result = self._results.get(key)
+            if result is None:
+                continue
+            datasets.append(
+                (self._years.get(key), result.dataframe, result.cost_vouchers)
+            )
+        return datasets
+
+    def asset_roll_forward(self) -> List["AssetRollForwardRow"]:
+        """Flerårig avstemming av 11xx/12xx over alle innleste datasett."""
+
+        return driftsmidler.build_asset_roll_forward(self.asset_roll_forward_datasets())
+
     # endregion
 
     # region Delte hjelpefunksjoner
@@ -476,74 +867,28 @@ class SaftDatasetStore:
             return 0.0
 
     def credit_note_rows(self) -> List[Tuple[str, str, str, str, float]]:
-        if self._credit_notes is None or self._credit_notes.empty:
+        credit_notes = self._credit_notes
+        if credit_notes is None or credit_notes.empty:
             return []
-
-        rows: List[Tuple[str, str, str, str, str, float]] = []
-        for _, row in self._credit_notes.iterrows():
-            date_value = row.get("Dato")
-            if isinstance(date_value, datetime):
-                date_text = date_value.strftime("%d.%m.%Y")
-            elif isinstance(date_value, date):
-                date_text = date_value.strftime("%d.%m.%Y")
-            elif date_value:
-                date_text = str(date_value)
-            else:
-                date_text = "—"
-
-            rows.append(
-                (
-                    date_text,
-                    str(row.get("Bilagsnr", "—")),
-                    str(row.get("Beskrivelse", "—")),
-                    str(row.get("Kontoer", "—")),
-                    self.safe_float(row.get("Beløp")),
-                )
+        return list(
+            self.cached_view(
+                "credit_note_rows",
+                lambda: _posting_rows(
+                    credit_notes, ("Bilagsnr", "Beskrivelse", "Kontoer"), ("Beløp",)
+                ),
             )
-        return rows
+        )
 
     def credit_note_monthly_summary(self) -> List[Tuple[str, int, float]]:
-        if self._credit_notes is None or self._credit_notes.empty:
+        credit_notes = self._credit_notes
+        if credit_notes is None or credit_notes.empty:
             return []
-
-        month_totals: Dict[int, Tuple[int, float]] = {}
-        for _, row in self._credit_notes.iterrows():
-            date_value = row.get("Dato")
-            if isinstance(date_value, (datetime, date)):
-                month = date_value.month
-            else:
-                continue
-
-            count, amount = month_totals.get(month, (0, 0.0))
-            month_totals[month] = (
-                count + 1,
-                amount + self.safe_float(row.get("Beløp")),
+        return list(
+            self.cached_view(
+                "credit_note_monthly_summary",
+                lambda: _monthly_summary(credit_notes),
             )
-
-        month_names = [
-            "Januar",
-            "Februar",
-            "Mars",
-            "April",
-            "Mai",
-            "Juni",
-            "Juli",
-            "August",
-            "September",
-            "Oktober",
-            "November",
-            "Desember",
-        ]
-
-        rows: List[Tuple[str, int, float]] = []
-        for month in range(1, 13):
-            totals = month_totals.get(month)
-            if totals:
-                name = month_names[month - 1]
-                count, amount = totals
-                rows.append((name, count, round(amount, 2)))
-
-        return rows
+        )
 
     @property
     def sales_with_receivable_total(self) -> Optional[float]:
@@ -576,31 +921,16 @@ class SaftDatasetStore:
         missing_sales = correlation.missing_sales
         if missing_sales is None or missing_sales.empty:
             return []
-
-        rows: List[Tuple[str, str, str, str, float]] = []
-        for _, row in missing_sales.iterrows():
-            date_value = row.get("Dato")
-            if isinstance(date_value, datetime):
-                date_text = date_value.strftime("%d.%m.%Y")
-            elif isinstance(date_value, date):
-                date_text = date_value.strftime("%d.%m.%Y")
-            elif date_value:
-                date_text = str(date_value)
-            else:
-                date_text = "—"
-
-            rows.append(
-                (
-                    date_text,
-                    str(row.get("Bilagsnr", "—")),
-                    str(row.get("Beskrivelse", "—")),
-                    str(row.get("Kontoer", "—")),
-                    str(row.get("Motkontoer", "—")),
-                    self.safe_float(row.get("Beløp")),
-                )
+        return list(
+            self.cached_view(
+                "sales_without_receivable_rows",
+                lambda: _posting_rows(
+                    missing_sales,
+                    ("Bilagsnr", "Beskrivelse", "Kontoer", "Motkontoer"),
+                    ("Beløp",),
+                ),
             )
-
-        return rows
+        )
 
     @property
     def receivable_analysis(
@@ -622,33 +952,17 @@ class SaftDatasetStore:
         df = analysis.mismatched_rows
         if df is None or df.empty:
             return []
-
-        rows: List[Tuple[str, str, str, float, float, float, str, str]] = []
-        for _, row in df.iterrows():
-            date_value = row.get("Dato")
-            if isinstance(date_value, datetime):
-                date_text = date_value.strftime("%d.%m.%Y")
-            elif isinstance(date_value, date):
-                date_text = date_value.strftime("%d.%m.%Y")
-            elif date_value:
-                date_text = str(date_value)
-            else:
-                date_text = "—"
-
-            rows.append(
-                (
-                    date_text,
-                    str(row.get("Bilagsnr", "—")),
-                    str(row.get("Beskrivelse", "—")),
-                    self.safe_float(row.get("Bank")),
-                    self.safe_float(row.get("Kundefordringer")),
-                    self.safe_float(row.get("Differanse")),
-                    str(row.get("Bankkontoer", "—")),
-                    str(row.get("Kundefordringskontoer", "—")),
-                )
+        return list(
+            self.cached_view(
+                "bank_mismatch_rows",
+                lambda: _posting_rows(
+                    df,
+                    ("Bilagsnr", "Beskrivelse"),
+                    ("Bank", "Kundefordringer", "Differanse"),
+                    ("Bankkontoer", "Kundefordringskontoer"),
+                ),
             )
-
-        return rows
+        )
 
     def receivable_unclassified_rows(
         self,
@@ -660,35 +974,69 @@ class SaftDatasetStore:
         df = analysis.unclassified_rows
         if df is None or df.empty:
             return []
-
-        rows: List[Tuple[str, str, str, str, str, float]] = []
-        for _, row in df.iterrows():
-            date_value = row.get("Dato")
-            if isinstance(date_value, datetime):
-                date_text = date_value.strftime("%d.%m.%Y")
-            elif isinstance(date_value, date):
-                date_text = date_value.strftime("%d.%m.%Y")
-            elif date_value:
-                date_text = str(date_value)
-            else:
-                date_text = "—"
-
-            rows.append(
-                (
-                    date_text,
-                    str(row.get("Bilagsnr", "—")),
-                    str(row.get("Beskrivelse", "—")),
-                    str(row.get("Kontoer", "—")),
-                    str(row.get("Motkontoer", "—")),
-                    self.safe_float(row.get("Beløp")),
-                )
+        return list(
+            self.cached_view(
+                "receivable_unclassified_rows",
+                lambda: _posting_rows(
+                    df,
+                    ("Bilagsnr", "Beskrivelse", "Kontoer", "Motkontoer"),
+                    ("Beløp",),
+                ),
             )
-
-        return rows
+        )
 
     # endregion
 
     # region Interne hjelpere
+    @staticmethod
+    def _receive_results(
+        results: Sequence[SaftLoadResult | "SharedLoadResult"],
+    ) -> Tuple[List[SaftLoadResult], Dict[str, List["SharedSegment"]]]:
+        """Gjenoppbygger resultater som kom via delt minne."""
+
+        received: List[SaftLoadResult] = []
+        segments: Dict[str, List["SharedSegment"]] = {}
+        try:
+            for res in results:
+                if isinstance(res, shared_transport.SharedLoadResult):
+                    res, res_segments = shared_transport.attach_result(res)
+                    segments[res.file_path] = res_segments
+                received.append(res)
+        except Exception:
+            for res_segments in segments.values():
+                SaftDatasetStore._release_segments(res_segments)
+            raise
+        return received, segments
+
+    @staticmethod
+    def _release_segments(segments: Sequence["SharedSegment"]) -> None:
+        for segment in segments:
+            segment.release()
+
+    def _drop_derived_views(self, dataset_key: str) -> None:
+        stale = [key for key in self._derived_views if key[0] == dataset_key]
+        for key in stale:
+            del self._derived_views[key]
+
+    @staticmethod
+    def _brreg_map_for_year(
+        result: SaftLoadResult, year: Optional[int]
+    ) -> Optional[Dict[str, Optional[float]]]:
+        """Velger Regnskapsregisterets tall for samme år som datasettet."""
+
+        if year is not None and isinstance(result.brreg_json, list):
+            by_year = brreg.map_brreg_metrics_by_year(result.brreg_json)
+            if year in by_year:
+                return by_year[year]
+        return result.brreg_map
+
+    def _dataframes_in_order(self) -> Dict[str, pd.DataFrame]:
+        return {
+            key: self._results[key].dataframe
+            for key in self._order
+            if key in self._results and self._results[key].dataframe is not None
+        }
+
     def _clear_active_dataset(self) -> None:
         self._saft_df = None
         self._saft_summary = None
@@ -709,6 +1057,8 @@ class SaftDatasetStore:
         self._bank_analysis = None
         self._cost_vouchers = []
         self._all_vouchers = []
+        self._account_flows = None
+        self._vat_profile = None
         self._trial_balance = None
         self._trial_balance_error = None
         self._trial_balance_checked = False
@@ -891,113 +1241,27 @@ class SaftDatasetStore:
         text = str(value).strip()
         return text or None
 
-    def _ingest_customers(self, customers: Dict[str, "saft.CustomerInfo"]) -> None:
-        self._customers = {}
-        self._cust_name_by_nr = {}
-        self._cust_id_to_nr = {}
-        for info in customers.values():
-            name = (info.name or "").strip()
-            raw_id = info.customer_id
-            raw_number = info.customer_number or info.customer_id
-            norm_id = self.normalize_customer_key(raw_id)
-            norm_number = self.normalize_customer_key(raw_number)
-            resolved_number = (
-                norm_number or norm_id or self.normalize_customer_key(raw_id)
-            )
-            if (
-                not resolved_number
-                and isinstance(raw_number, str)
-                and raw_number.strip()
-            ):
-                resolved_number = raw_number.strip()
-            if not resolved_number and isinstance(raw_id, str) and raw_id.strip():
-                resolved_number = raw_id.strip()
-
-            customer_key = norm_id or (
-                raw_id.strip() if isinstance(raw_id, str) and raw_id.strip() else None
-            )
-            if customer_key:
-                self._customers[customer_key] = saft.CustomerInfo(
-                    customer_id=customer_key,
-                    customer_number=resolved_number or customer_key,
-                    name=name,
-                )
-
-            keys = {raw_id, norm_id, raw_number, norm_number, resolved_number}
-            keys = {key for key in keys if isinstance(key, str) and key}
-
-            if resolved_number:
-                norm_resolved = self.normalize_customer_key(resolved_number)
-                all_number_keys = set(keys)
-                if norm_resolved:
-                    all_number_keys.add(norm_resolved)
-                all_number_keys.add(resolved_number)
-                for key in all_number_keys:
-                    norm_key = self.normalize_customer_key(key)
-                    if norm_key:
-                        self._cust_id_to_nr[norm_key] = resolved_number
-                    self._cust_id_to_nr[key] = resolved_number
-
-            if name:
-                for key in keys:
-                    norm_key = self.normalize_customer_key(key)
-                    if norm_key:
-                        self._cust_name_by_nr[norm_key] = name
-                    self._cust_name_by_nr[key] = name
-
-    def _ingest_suppliers(self, suppliers: Dict[str, "saft.SupplierInfo"]) -> None:
-        self._suppliers = {}
-        self._sup_name_by_nr = {}
-        self._sup_id_to_nr = {}
-        for info in suppliers.values():
-            name = (info.name or "").strip()
-            raw_id = info.supplier_id
-            raw_number = info.supplier_number or info.supplier_id
-            norm_id = self.normalize_supplier_key(raw_id)
-            norm_number = self.normalize_supplier_key(raw_number)
-            resolved_number = (
-                norm_number or norm_id or self.normalize_supplier_key(raw_id)
-            )
-            if (
-                not resolved_number
-                and isinstance(raw_number, str)
-                and raw_number.strip()
-            ):
-                resolved_number = raw_number.strip()
-            if not resolved_number and isinstance(raw_id, str) and raw_id.strip():
-                resolved_number = raw_id.strip()
-
-            supplier_key = norm_id or (
-                raw_id.strip() if isinstance(raw_id, str) and raw_id.strip() else None
-            )
-            if supplier_key:
-                self._suppliers[supplier_key] = saft.SupplierInfo(
-                    supplier_id=supplier_key,
-                    supplier_number=resolved_number or supplier_key,
-                    name=name,
-                )
-
-            keys = {raw_id, norm_id, raw_number, norm_number, resolved_number}
-            keys = {key for key in keys if isinstance(key, str) and key}
-
-            if resolved_number:
-                norm_resolved = self.normalize_supplier_key(resolved_number)
-                all_number_keys = set(keys)
-                if norm_resolved:
-                    all_number_keys.add(norm_resolved)
-                all_number_keys.add(resolved_number)
-                for key in all_number_keys:
-                    norm_key = self.normalize_supplier_key(key)
-                    if norm_key:
-                        self._sup_id_to_nr[norm_key] = resolved_number
-                    self._sup_id_to_nr[key] = resolved_number
-
-            if name:
-                for key in keys:
-                    norm_key = self.normalize_supplier_key(key)
-                    if norm_key:
-                        self._sup_name_by_nr[norm_key] = name
-                    self._sup_name_by_nr[key] = name
+    def _ingest_customers(
+        self,
+        customers: Dict[str, "saft.CustomerInfo"],
+        dataset_key: Optional[str] = None,
+    ) -> None:
+        key = dataset_key or self._current_key or ""
+        lookup = self._customer_registry.lookup(key, customers)
+        self._customers = lookup.parties
+        self._cust_name_by_nr = lookup.name_by_number
+        self._cust_id_to_nr = lookup.id_to_number
+
+    def _ingest_suppliers(
+        self,
+        suppliers: Dict[str, "saft.SupplierInfo"],
+        dataset_key: Optional[str] = None,
+    ) -> None:
+        key = dataset_key or self._current_key or ""
+        lookup = self._supplier_registry.lookup(key, suppliers)
+        self._suppliers = lookup.parties
+        self._sup_name_by_nr = lookup.name_by_number
+        self._sup_id_to_nr = lookup.id_to_number
 
     def _build_augmented_summary(
         self,
@@ -1042,3 +1306,86 @@ class SaftDatasetStore:
             return None
 
     # endregion
+
+
+def _customer_info(customer_id: str, number: str, name: str) -> "saft.CustomerInfo":
+    return saft.CustomerInfo(customer_id=customer_id, customer_number=number, name=name)
+
+
+def _supplier_info(supplier_id: str, number: str, name: str) -> "saft.SupplierInfo":
+    return saft.SupplierInfo(supplier_id=supplier_id, supplier_number=number, name=name)
+
+
+def _date_text(value: object) -> str:
+    if value is pd.NaT:
+        return "—"
+    if isinstance(value, (datetime, date)):
+        return value.strftime("%d.%m.%Y")
+    if value:
+        return str(value)
+    return "—"
+
+
+def _text_column(df: "pd.DataFrame", column: str) -> List[str]:
+    if column not in df.columns:
+        return ["—"] * len(df.index)
+    return [str(value) for value in df[column].tolist()]
+
+
+def _float_column(df: "pd.DataFrame", column: str) -> List[float]:
+    if column not in df.columns:
+        return [0.0] * len(df.index)
+    numeric = pd.to_numeric(df[column], errors="coerce").astype(float)
+    return numeric.fillna(0.0).tolist()
+
+
+def _counter_flow_rows(
+    matrix: "AccountFlowMatrix", prefixes: Tuple[str, ...]
+) -> List[Tuple[str, float, float]]:
+    inflows = matrix.inflows(prefixes)
+    outflows = matrix.outflows(prefixes)
+    counter_accounts = {
+        account for account in (*inflows, *outflows) if not account.startswith(prefixes)
+    }
+    rows = [
+        (account, inflows.get(account, 0.0), outflows.get(account, 0.0))
+        for account in counter_accounts
+    ]
+    rows.sort(key=lambda row: (-(abs(row[1]) + abs(row[2])), row[0]))
+    return rows
+
+
+def _posting_rows(
+    df: "pd.DataFrame",
+    text_columns: Sequence[str],
+    amount_columns: Sequence[str],
+    trailing_text_columns: Sequence[str] = (),
+) -> Tuple[Tuple[object, ...], ...]:
+    """Gjør en posteringstabell om til visningsrader kolonne for kolonne.
+
+    Radene består av dato, tekstkolonnene, beløpskolonnene og til slutt de
+    avsluttende tekstkolonnene.
+    """
+
+    dates = df["Dato"].tolist() if "Dato" in df.columns else [None] * len(df.index)
+    columns: List[List[object]] = [[_date_text(value) for value in dates]]
+    columns.extend(_text_column(df, column) for column in text_columns)
+    columns.extend(_float_column(df, column) for column in amount_columns)
+    columns.extend(_text_column(df, column) for column in trailing_text_columns)
+    return tuple(zip(*columns))
+
+
+def _monthly_summary(df: "pd.DataFrame") -> Tuple[Tuple[str, int, float], ...]:
+    if "Dato" not in df.columns:
+        return ()
+    month_totals: Dict[int, Tuple[int, float]] = {}
+    for value, amount in zip(df["Dato"].tolist(), _float_column(df, "Beløp")):
+        if value is pd.NaT or not isinstance(value, (datetime, date)):
+            continue
+        count, total = month_totals.get(value.month, (0, 0.0))
+        month_totals[value.month] = (count + 1, total + amount)
+    return tuple(
+        (_MONTH_NAMES[month - 1], count, round(total, 2))
+        for month, (count, total) in sorted(month_totals.items())
+        if 1 <= month <= 12
+    )
@@ -0,0 +1,161 @@
+"""Felles kunde- og leverandørregister for alle datasett i ett selskap.
+
+Når brukeren bytter mellom år i samme selskap, er kunde- og
+leverandørlistene stort sett de samme. Registeret tolker hver unike
+masterfilpost én gang og deler resultatet mellom årene: like poster gir samme
+``CustomerInfo``/``SupplierInfo``-objekt, og år med identiske lister får
+samme ferdige oppslagstabeller.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Hashable, Mapping, Optional, Tuple
+
+__all__ = ["PartyLookup", "PartyRegistry"]
+
+# (rå id, rå nummer, navn) slik posten står i masterfilen.
+_RecordKey = Tuple[Hashable, Hashable, str]
+
+
+@dataclass(frozen=True)
+class PartyLookup:
+    """Oppslagstabellene for kunder eller leverandører i ett datasett.
+
+    Tabellene kan deles mellom flere datasett og skal ikke endres.
+    """
+
+    parties: Mapping[str, Any] = field(default_factory=dict)
+    name_by_number: Mapping[str, str] = field(default_factory=dict)
+    id_to_number: Mapping[str, str] = field(default_factory=dict)
+
+
+@dataclass(frozen=True)
+class _ResolvedParty:
+    key: Optional[str]
+    info: Any
+    id_to_number: Dict[str, str]
+    name_by_number: Dict[str, str]
+
+
+class PartyRegistry:
+    """Tolker og deler kunde- eller leverandørposter på tvers av år.
+
+    ``id_attr`` og ``number_attr`` er feltnavnene på masterfilpostene
+    (f.eks. ``customer_id``/``customer_number``), og ``factory`` lager den
+    normaliserte posten med argumentene ``(id, nummer, navn)``.
+    """
+
+    def __init__(
+        self,
+        *,
+        id_attr: str,
+        number_attr: str,
+        factory: Callable[[str, str, str], Any],
+        normalize: Callable[[object], Optional[str]],
+    ) -> None:
+        self._id_attr = id_attr
+        self._number_attr = number_attr
+        self._factory = factory
+        self._normalize = normalize
+        self._records: Dict[_RecordKey, _ResolvedParty] = {}
+        self._by_signature: Dict[Tuple[_RecordKey, ...], PartyLookup] = {}
+        self._by_dataset: Dict[str, Tuple[Mapping[str, Any], PartyLookup]] = {}
+
+    def __len__(self) -> int:
+        """Antall unike masterfilposter registeret har tolket."""
+
+        return len(self._records)
+
+    def lookup(self, dataset_key: str, parties: Mapping[str, Any]) -> PartyLookup:
+        """Oppslagstabellene for datasettets poster, gjenbrukt der det går."""
+
+        cached = self._by_dataset.get(dataset_key)
+        if cached is not None and cached[0] is parties:
+            return cached[1]
+
+        record_keys = tuple(self._record_key(info) for info in parties.values())
+        lookup = self._by_signature.get(record_keys)
+        if lookup is None:
+            lookup = self._build_lookup(record_keys, parties.values())
+            self._by_signature[record_keys] = lookup
+        self._by_dataset[dataset_key] = (parties, lookup)
+        return lookup
+
+    def forget(self, dataset_key: str) -> None:
+        """Glemmer datasettet, f.eks. når det erstattes av en ny import."""
+
+        self._by_dataset.pop(dataset_key, None)
+
+    def clear(self) -> None:
+        self._records = {}
+        self._by_signature = {}
+        self._by_dataset = {}
+
+    def _record_key(self, info: Any) -> _RecordKey:
+        return (
+            getattr(info, self._id_attr),
+            getattr(info, self._number_attr),
+            (info.name or "").strip(),
+        )
+
+    def _build_lookup(
+        self, record_keys: Tuple[_RecordKey, ...], infos: Any
+    ) -> PartyLookup:
+        parties: Dict[str, Any] = {}
+        name_by_number: Dict[str, str] = {}
+        id_to_number: Dict[str, str] = {}
+        for record_key, info in zip(record_keys, infos):
+            resolved = self._records.get(record_key)
+            if resolved is None:
+                resolved = self._resolve(info)
+                self._records[record_key] = resolved
+            if resolved.key:
+                parties[resolved.key] = resolved.info
+            id_to_number.update(resolved.id_to_number)
+            name_by_number.update(resolved.name_by_number)
+        return PartyLookup(parties, name_by_number, id_to_number)
+
+    def _resolve(self, info: Any) -> _ResolvedParty:
+        normalize = self._normalize
+        name = (info.name or "").strip()
+        raw_id = getattr(info, self._id_attr)
+        raw_number = getattr(info, self._number_attr) or raw_id
+        norm_id = normalize(raw_id)
+        norm_number = normalize(raw_number)
+        resolved_number = norm_number or norm_id or normalize(raw_id)
+        if not resolved_number and isinstance(raw_number, str) and raw_number.strip():
+            resolved_number = raw_number.strip()
+        if not resolved_number and isinstance(raw_id, str) and raw_id.strip():
+            resolved_number = raw_id.strip()
+
+        key = norm_id or (
+            raw_id.strip() if isinstance(raw_id, str) and raw_id.strip() else None
+        )
+        party = self._factory(key, resolved_number or key, name) if key else None
+
+        keys = {raw_id, norm_id, raw_number, norm_number, resolved_number}
+        keys = {item for item in keys if isinstance(item, str) and item}
+
+        id_to_number: Dict[str, str] = {}
+        if resolved_number:
+            number_keys = set(keys)
+            norm_resolved = normalize(resolved_number)
+            if norm_resolved:
+                number_keys.add(norm_resolved)
+            number_keys.add(resolved_number)
+            for item in number_keys:
+                norm_item = normalize(item)
+                if norm_item:
+                    id_to_number[norm_item] = resolved_number
+                id_to_number[item] = resolved_number
+
+        name_by_number: Dict[str, str] = {}
+        if name:
+            for item in keys:
+                norm_item = normalize(item)
+                if norm_item:
+                    name_by_number[norm_item] = name
+                name_by_number[item] = name
+
+        return _ResolvedParty(key, party, id_to_number, name_by_number)
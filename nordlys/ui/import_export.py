@@ -6,7 +6,7 @@ from dataclasses import dataclass, field
 from pathlib import Path
 from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Sequence, cast
 
-from PySide6.QtCore import QObject, Slot
+from PySide6.QtCore import QObject, Signal, Slot
 from PySide6.QtWidgets import QFileDialog, QLabel, QMessageBox, QProgressBar, QWidget
 
 from ..core.task_runner import TaskRunner
@@ -19,6 +19,7 @@ if TYPE_CHECKING:
 
 
 saft_loader = lazy_import("nordlys.saft.loader")
+brreg_enrichment = lazy_import("nordlys.saft.brreg_enrichment")
 
 
 @dataclass
@@ -54,6 +55,11 @@ class ImportTaskState:
 class ImportExportController(QObject):
     """Håndterer import og eksport av SAF-T-data i bakgrunnen."""
 
+    # Sendes med nøklene til datasettene som fikk ferskere Brønnøysund-data.
+    sig_brreg_refreshed = Signal(object)
+    # Sendes når kunder og leverandører har fått registerdata.
+    sig_counterparties_enriched = Signal()
+
     def __init__(
         self,
         parent: QWidget,
@@ -80,6 +86,10 @@ class ImportExportController(QObject):
 
         self._progress_display = ImportProgressDisplay(parent)
         self._task_state = ImportTaskState()
+        self._enrichment_task_id: Optional[str] = None
+        # Motparter som er forsøkt slått opp siden forrige import.
+        self._enrichment_attempted: set[str] = set()
+        self._brreg_refresh_task_id: Optional[str] = None
 
         self._task_runner.sig_started.connect(self._on_task_started)
         self._task_runner.sig_progress.connect(self._on_task_progress)
@@ -209,6 +219,12 @@ class ImportExportController(QObject):
 
     @Slot(str, object)
     def _on_task_done(self, task_id: str, result: object) -> None:
+        if task_id == self._enrichment_task_id:
+            self._handle_enrichment_finished(result)
+            return
+        if task_id == self._brreg_refresh_task_id:
+            self._handle_brreg_refresh_finished(result)
+            return
         if not self._task_state.is_current(task_id):
             return
         task_type = self._task_state.meta.get("type")
@@ -219,6 +235,20 @@ class ImportExportController(QObject):
 
     @Slot(str, str)
     def _on_task_error(self, task_id: str, exc_str: str) -> None:
+        if task_id == self._enrichment_task_id:
+            self._enrichment_task_id = None
+            self._log_import_event(
+                "Kunne ikke hente motparter fra Brønnøysund: "
+                f"{self._format_task_error(exc_str)}"
+            )
+            return
+        if task_id == self._brreg_refresh_task_id:
+            self._brreg_refresh_task_id = None
+            self._log_import_event(
+                "Kunne ikke oppdatere Brønnøysund-data: "
+                f"{self._format_task_error(exc_str)}"
+            )
+            return
         if not self._task_state.is_current(task_id):
             return
         message = self._format_task_error(exc_str)
@@ -236,6 +266,67 @@ class ImportExportController(QObject):
             return
 
         self._finalize_loading()
+        self._start_counterparty_enrichment()
+        self._start_brreg_refresh()
+
+    def _start_counterparty_enrichment(self, *, retry_failed: bool = True) -> None:
+        """Slår opp kunder og leverandører i Brønnøysund etter importen.
+
+        Motparter som feilet midlertidig prøves igjen ved neste import, ikke
+        rett etter et oppslag som nettopp feilet.
+        """
+
+        if retry_failed:
+            self._enrichment_attempted.clear()
+        if self._enrichment_task_id is not None:
+            return
+        orgnrs = [
+            orgnr
+            for orgnr in self._dataset_store.pending_counterparty_orgnrs()
+            if orgnr not in self._enrichment_attempted
+        ]
+        if not orgnrs:
+            return
+        self._enrichment_attempted.update(orgnrs)
+        self._enrichment_task_id = self._task_runner.run(
+            brreg_enrichment.enrich_counterparties,
+            orgnrs,
+            description="Henter motparter fra Brønnøysund",
+        )
+
+    def _handle_enrichment_finished(self, result: object) -> None:
+        self._enrichment_task_id = None
+        if not isinstance(result, dict):
+            return
+        matched = self._dataset_store.apply_counterparty_registry(result)
+        self._log_import_event(
+            f"Brønnøysund-data hentet for {matched} kunder og leverandører."
+        )
+        self.sig_counterparties_enriched.emit()
+        # Nye importer kan ha kommet til mens oppslaget pågikk.
+        self._start_counterparty_enrichment(retry_failed=False)
+
+    def _start_brreg_refresh(self) -> None:
+        """Henter ferske Brønnøysund-data når importen brukte utløpt cache."""
+
+        if self._brreg_refresh_task_id is not None:
+            return
+        headers = self._dataset_store.stale_brreg_headers()
+        if not headers:
+            return
+        self._brreg_refresh_task_id = self._task_runner.run(
+            brreg_enrichment.refresh_enrichment,
+            headers,
+            description="Oppdaterer Brønnøysund-data",
+        )
+
+    def _handle_brreg_refresh_finished(self, result: object) -> None:
+        self._brreg_refresh_task_id = None
+        if isinstance(result, dict):
+            changed = self._dataset_store.apply_brreg_refresh(result)
+            if changed:
+                self.sig_brreg_refreshed.emit(changed)
+        self._start_brreg_refresh()
 
     # endregion
 
@@ -1,5 +1,6 @@
 """Moduler for tabellmodeller og lignende UI-hjelpere."""
 
+from .columnar_table_model import ColumnarTableModel
 from .saft_table_model import SaftTableCell, SaftTableModel, SaftTableSource
 
-__all__ = ["SaftTableCell", "SaftTableModel", "SaftTableSource"]
+__all__ = ["ColumnarTableModel", "SaftTableCell", "SaftTableModel", "SaftTableSource"]
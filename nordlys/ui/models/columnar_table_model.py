@@ -0,0 +1,433 @@
+"""Kolonnebasert tabellmodell for store lister.
+
+Verdiene lagres kolonnevis slik de kommer fra en DataFrame eller en radliste,
+og formateres først når en celle vises. Sortering skjer ved å bygge en
+permutasjon av radindeksene, slik at selve dataene aldri flyttes.
+"""
+
+from __future__ import annotations
+
+import math
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Iterable,
+    List,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+)
+
+from PySide6.QtCore import QAbstractTableModel, QModelIndex, QObject, Qt
+from PySide6.QtGui import QFont
+
+from ...helpers.lazy_imports import lazy_import
+
+if TYPE_CHECKING:  # pragma: no cover - kun for typekontroll
+    import numpy as np
+    import pandas as pd
+else:  # pragma: no cover - importeres ved første sortering
+    np = lazy_import("numpy")
+
+__all__ = ["ColumnarTableModel"]
+
+CellFormatter = Callable[[Any, bool], str]
+
+_NUMERIC_ALIGNMENT = Qt.AlignHCenter | Qt.AlignVCenter
+_TEXT_ALIGNMENT = Qt.AlignLeft | Qt.AlignVCenter
+
+
+def _default_formatter(value: Any, _money: bool) -> str:
+    return "" if value is None else str(value)
+
+
+def _is_number(value: Any) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _same_column(before: List[Any], after: List[Any]) -> bool:
+    try:
+        return bool(before == after)
+    except (TypeError, ValueError):
+        # F.eks. pandas.NA, som ikke kan brukes i en sannhetsverdi.
+        return False
+
+
+def _same_value(before: Any, after: Any) -> bool:
+    if before is after:
+        return True
+    if _is_missing(before) and _is_missing(after):
+        return True
+    try:
+        return bool(before == after) and type(before) is type(after)
+    except (TypeError, ValueError):
+        return False
+
+
+def _is_missing(value: Any) -> bool:
+    if value is None:
+        return True
+    if isinstance(value, float):
+        return math.isnan(value)
+    # pandas.NA og NaT er ikke like seg selv, på samme måte som NaN.
+    try:
+        return bool(value != value)
+    except (TypeError, ValueError):
+        return False
+
+
+class ColumnarTableModel(QAbstractTableModel):
+    """Skrivebeskyttet tabellmodell som formaterer celler ved behov.
+
+    Modellen viser ``window_size`` rader om gangen og henter flere når visningen
+    ruller mot slutten (``canFetchMore``/``fetchMore``), på samme måte som
+    :class:`~nordlys.ui.models.saft_table_model.SaftTableModel`.
+    """
+
+    def __init__(
+        self,
+        parent: Optional[QObject] = None,
+        *,
+        formatter: Optional[CellFormatter] = None,
+        window_size: int = 500,
+    ) -> None:
+        super().__init__(parent)
+        self._formatter: CellFormatter = formatter or _default_formatter
+        self._headers: List[str] = []
+        self._columns: List[List[Any]] = []
+        self._row_count = 0
+        self._order: Optional[List[int]] = None
+        self._loaded = 0
+        self._window_size = 1
+        self._money_cols: Set[int] = set()
+        self._bold_rows: Set[int] = set()
+        self._bold_font: Optional[QFont] = None
+        self._sort_column = -1
+        self._sort_order = Qt.AscendingOrder
+        self.set_window_size(window_size)
+
+    # region Offentlig API
+    def set_window_size(self, size: int) -> None:
+        """Angir hvor mange rader som lastes per "vindus"-operasjon."""
+
+        if size <= 0:
+            raise ValueError("Vindusstørrelse må være større enn null")
+        self._window_size = size
+
+    def set_rows(
+        self,
+        headers: Sequence[str],
+        rows: Iterable[Sequence[Any]],
+        *,
+        money_cols: Optional[Iterable[int]] = None,
+    ) -> None:
+        """Viser en radliste. Rader med for få verdier fylles ut med ``None``."""
+
+        width = len(headers)
+        row_buffer = list(rows)
+        if row_buffer and all(len(row) == width for row in row_buffer):
+            columns = [list(column) for column in zip(*row_buffer)]
+        else:
+            columns = [
+                [row[index] if index < len(row) else None for row in row_buffer]
+                for index in range(width)
+            ]
+        self.set_columns(headers, columns, money_cols=money_cols)
+
+    def set_dataframe(
+        self,
+        df: "pd.DataFrame",
+        *,
+        money_cols: Optional[Iterable[int]] = None,
+    ) -> None:
+        """Viser en DataFrame uten å gå via rader."""
+
+        headers = [str(column) for column in df.columns]
+        columns = [df.iloc[:, index].tolist() for index in range(len(headers))]
+        self.set_columns(headers, columns, money_cols=money_cols)
+
+    def set_columns(
+        self,
+        headers: Sequence[str],
+        columns: Sequence[Sequence[Any]],
+        *,
+        money_cols: Optional[Iterable[int]] = None,
+    ) -> None:
+        """Viser kolonnevise data. Alle kolonner må ha samme lengde."""
+
+        lengths = {len(column) for column in columns}
+        if len(lengths) > 1:
+            raise ValueError("Alle kolonner må ha like mange verdier")
+        row_count = next(iter(lengths), 0)
+        header_texts = [str(header) for header in headers]
+        new_columns = [list(column) for column in columns]
+        while len(new_columns) < len(header_texts):
+            new_columns.append([None] * row_count)
+        money = set(money_cols or ())
+        if (
+            header_texts == self._headers
+            and row_count == self._row_count
+            and money == self._money_cols
+            and self._update_in_place(new_columns)
+        ):
+            return
+
+        self.beginResetModel()
+        self._headers = header_texts
+        self._columns = new_columns
+        self._row_count = row_count
+        self._money_cols = money
+        self._bold_rows = set()
+        self._order = None
+        self._loaded = min(self._row_count, self._window_size)
+        if self._sort_column >= 0:
+            self._order = self._sort_permutation(self._sort_column, self._sort_order)
+        self.endResetModel()
+
+    def set_headers(self, headers: Sequence[str]) -> None:
+        """Setter kolonneoverskrifter og fjerner alle rader."""
+
+        self.set_columns(headers, [[] for _ in headers])
+
+    def clear(self) -> None:
+        """Fjerner alle rader, men beholder kolonneoverskriftene."""
+
+        self.set_headers(self._headers)
+
+    def headers(self) -> List[str]:
+        return list(self._headers)
+
+    def total_row_count(self) -> int:
+        """Antall rader i datasettet, uavhengig av hvor mange som er lastet."""
+
+        return self._row_count
+
+    def set_bold_rows(self, rows: Iterable[int]) -> None:
+        """Markerer rader (indekser i kildedataene) med fet skrift."""
+
+        self._bold_rows = set(rows)
+        if self._loaded:
+            self.dataChanged.emit(
+                self.index(0, 0),
+                self.index(self._loaded - 1, max(0, len(self._headers) - 1)),
+                [Qt.FontRole],
+            )
+
+    def source_row(self, row: int) -> int:
+        """Oversetter en synlig rad til indeksen i kildedataene."""
+
+        if self._order is None:
+            return row
+        return self._order[row]
+
+    def value(self, row: int, column: int) -> Any:
+        """Returnerer den uformaterte verdien for en synlig rad."""
+
+        return self._columns[column][self.source_row(row)]
+
+    def row_values(self, row: int) -> Tuple[Any, ...]:
+        source = self.source_row(row)
+        return tuple(column[source] for column in self._columns)
+
+    def sample_rows(self, limit: int) -> List[int]:
+        """Returnerer opptil ``limit`` jevnt fordelte synlige rader."""
+
+        if self._row_count <= 0 or limit <= 0:
+            return []
+        if self._row_count <= limit:
+            return list(range(self._row_count))
+        step = self._row_count / limit
+        return sorted({int(index * step) for index in range(limit)})
+
+    def display_text(self, row: int, column: int) -> str:
+        return self._formatter(self.value(row, column), column in self._money_cols)
+
+    def fetch_all(self) -> None:
+        """Laster alle rader, f.eks. før eksport eller "merk alt"."""
+
+        remaining = self._row_count - self._loaded
+        if remaining > 0:
+            self._fetch(remaining)
+
+    # endregion
+
+    # region QAbstractTableModel
+    def rowCount(self, parent: QModelIndex = QModelIndex()) -> int:  # type: ignore[override]
+        if parent.isValid():
+            return 0
+        return self._loaded
+
+    def columnCount(self, parent: QModelIndex = QModelIndex()) -> int:  # type: ignore[override]
+        if parent.isValid():
+            return 0
+        return len(self._headers)
+
+    def data(self, index: QModelIndex, role: int = Qt.DisplayRole) -> Any:  # type: ignore[override]
+        if not index.isValid():
+            return None
+        row = index.row()
+        column = index.column()
+        if row >= self._loaded or column >= len(self._headers):
+            return None
+        if role == Qt.DisplayRole:
+            return self.display_text(row, column)
+        if role == Qt.UserRole:
+            value = self.value(row, column)
+            if _is_number(value):
+                return float(value)
+            return None
+        if role == Qt.TextAlignmentRole:
+            if column in self._money_cols or _is_number(self.value(row, column)):
+                return int(_NUMERIC_ALIGNMENT)
+            return int(_TEXT_ALIGNMENT)
+        if role == Qt.FontRole and self._bold_rows:
+            if self.source_row(row) in self._bold_rows:
+                return self._bold()
+        return None
+
+    def headerData(  # type: ignore[override]
+        self, section: int, orientation: Qt.Orientation, role: int = Qt.DisplayRole
+    ) -> Any:
+        if role != Qt.DisplayRole:
+            return None
+        if orientation == Qt.Horizontal:
+            if 0 <= section < len(self._headers):
+                return self._headers[section]
+            return None
+        return str(section + 1)
+
+    def flags(self, index: QModelIndex) -> Qt.ItemFlags:  # type: ignore[override]
+        if not index.isValid():
+            return Qt.NoItemFlags
+        return Qt.ItemIsEnabled | Qt.ItemIsSelectable
+
+    def canFetchMore(self, parent: QModelIndex = QModelIndex()) -> bool:  # type: ignore[override]
+        if parent.isValid():
+            return False
+        return self._loaded < self._row_count
+
+    def fetchMore(self, parent: QModelIndex = QModelIndex()) -> None:  # type: ignore[override]
+        if parent.isValid():
+            return
+        self._fetch(self._window_size)
+
+    def sort(  # type: ignore[override]
+        self, column: int, order: Qt.SortOrder = Qt.AscendingOrder
+    ) -> None:
+        if not 0 <= column < len(self._headers):
+            return
+        self.beginResetModel()
+        self._sort_column = column
+        self._sort_order = order
+        self._order = self._sort_permutation(column, order)
+        self.endResetModel()
+
+    # endregion
+
+    # region interne hjelpere
+    def _fetch(self, count: int) -> int:
+        remaining = self._row_count - self._loaded
+        count = min(count, remaining)
+        if count <= 0:
+            return 0
+        first = self._loaded
+        self.beginInsertRows(QModelIndex(), first, first + count - 1)
+        self._loaded += count
+        self.endInsertRows()
+        return count
+
+    def _update_in_place(self, columns: List[List[Any]]) -> bool:
+        """Bytter verdiene uten å nullstille modellen når formen er uendret.
+
+        Visningen beholder rulleposisjon, lastede rader og sortering, og får
+        bare beskjed om cellene som faktisk er endret. Returnerer ``False``
+        om en ny sortering ville gitt en annen rekkefølge; da må modellen
+        nullstilles.
+        """
+
+        changed_rows: Set[int] = set()
+        changed_columns: List[int] = []
+        for index, (old, new) in enumerate(zip(self._columns, columns)):
+            if _same_column(old, new):
+                continue
+            rows = [
+                row
+                for row, (before, after) in enumerate(zip(old, new))
+                if not _same_value(before, after)
+            ]
+            if rows:
+                changed_rows.update(rows)
+                changed_columns.append(index)
+
+        if changed_rows and self._sort_column >= 0:
+            new_order = self._sort_permutation(
+                self._sort_column, self._sort_order, columns
+            )
+            if new_order != self._order:
+                return False
+
+        self._columns = columns
+        visible: Set[int] = set()
+        if changed_rows:
+            order = self._order
+            visible = (
+                changed_rows
+                if order is None
+                else {
+                    position
+                    for position, row in enumerate(order)
+                    if row in changed_rows
+                }
+            )
+        if self._bold_rows:
+            # Fet skrift hører til forrige utfylling og fjernes.
+            self._bold_rows = set()
+            visible = set(range(self._loaded))
+            changed_columns = list(range(len(self._headers)))
+        visible = {row for row in visible if row < self._loaded}
+        if visible and changed_columns:
+            self.dataChanged.emit(
+                self.index(min(visible), min(changed_columns)),
+                self.index(max(visible), max(changed_columns)),
+            )
+        return True
+
+    def _bold(self) -> QFont:
+        if self._bold_font is None:
+            font = QFont()
+            font.setBold(True)
+            self._bold_font = font
+        return self._bold_font
+
+    def _sort_permutation(
+        self,
+        column: int,
+        order: Qt.SortOrder,
+        columns: Optional[List[List[Any]]] = None,
+    ) -> Optional[List[int]]:
+        source = self._columns if columns is None else columns
+        values = source[column] if column < len(source) else []
+        if not values:
+            return None
+        descending = order == Qt.DescendingOrder
+        missing = [index for index, value in enumerate(values) if _is_missing(value)]
+        if len(missing) == len(values):
+            return None
+        if all(_is_number(value) or _is_missing(value) for value in values):
+            numeric = np.array(
+                [math.nan if _is_missing(value) else value for value in values],
+                dtype=float,
+            )
+            # NaN havner sist i begge retninger fordi -NaN fortsatt er NaN.
+            keys = -numeric if descending else numeric
+            return np.argsort(keys, kind="stable").tolist()
+
+        missing_set = set(missing)
+        present = [index for index in range(len(values)) if index not in missing_set]
+        text_keys = [str(value).casefold() for value in values]
+        present.sort(key=text_keys.__getitem__, reverse=descending)
+        return present + missing
+
+    # endregion
@@ -2,6 +2,7 @@
 
 from __future__ import annotations
 
+import sys
 from collections import deque
 from dataclasses import dataclass
 from typing import Any, Callable, Deque, Iterable, Iterator, Mapping, Optional, Sequence
@@ -9,11 +10,6 @@ from typing import Any, Callable, Deque, Iterable, Iterator, Mapping, Optional,
 from PySide6.QtCore import QAbstractTableModel, QModelIndex, Qt
 from PySide6.QtGui import QBrush
 
-try:  # pragma: no cover - valgfri avhengighet
-    import pandas as pd  # type: ignore
-except Exception:  # pragma: no cover - pandas er valgfritt
-    pd = None  # type: ignore
-
 
 @dataclass
 class SaftTableCell:
@@ -229,7 +225,10 @@ class SaftTableModel(QAbstractTableModel):
     ) -> tuple[Iterator[Any], Sequence[str]]:
         columns_hint: Sequence[str] = []
 
-        if pd is not None and isinstance(source, pd.DataFrame):  # type: ignore[arg-type]
+        # En DataFrame kan bare finnes om pandas allerede er lastet, så
+        # modulen trenger ikke importere pandas selv.
+        pd = sys.modules.get("pandas")
+        if pd is not None and isinstance(source, pd.DataFrame):
             columns_hint = [str(col) for col in source.columns]
             iterator = (tuple(row) for row in source.itertuples(index=False, name=None))
         elif isinstance(source, SaftTableSource):
@@ -3,7 +3,16 @@
 from __future__ import annotations
 
 import math
-from typing import Iterable, Optional, Sequence
+from typing import TYPE_CHECKING, Iterable, Mapping, Optional, Sequence
+
+from ..helpers.lazy_imports import lazy_pandas
+
+if TYPE_CHECKING:  # pragma: no cover - kun for typekontroll
+    import pandas as pd
+
+pd = lazy_pandas()
+
+REVENUE_KEYS = ("salgsinntekter", "sum_inntekter", "driftsinntekter")
 
 __all__ = [
     "standard_deviation",
@@ -11,6 +20,9 @@ __all__ = [
     "normal_variation_text",
     "deviation_assessment",
     "assessment_level",
+    "summaries_frame",
+    "revenue_share_frame",
+    "share_statistics",
 ]
 
 
@@ -87,3 +99,87 @@ def assessment_level(text: str) -> Optional[str]:
     if text.startswith("Uvanlig avvik"):
         return "unusual"
     return None
+
+
+def summaries_frame(
+    summaries: Sequence[Mapping[str, object]],
+    index: Optional[Sequence[object]] = None,
+) -> "pd.DataFrame":
+    """Samler sammendrag for flere år i én tabell med ett år per rad.
+
+    Verdier som ikke er endelige tall blir ``NaN``.
+    """
+
+    frame = pd.DataFrame(list(summaries), index=index)
+    if frame.empty:
+        return frame
+    frame = frame.apply(pd.to_numeric, errors="coerce").astype(float)
+    return frame.where(frame.abs() != math.inf)
+
+
+def revenue_share_frame(
+    summaries: "pd.DataFrame",
+    keys: Sequence[str],
+    revenue_keys: Sequence[str] = REVENUE_KEYS,
+) -> "pd.DataFrame":
+    """Beregner andel av omsetning i prosent for alle år og linjer samtidig.
+
+    Omsetningen hentes fra første nøkkel i ``revenue_keys`` som har en verdi
+    forskjellig fra null.
+    """
+
+    revenue = pd.Series(float("nan"), index=summaries.index)
+    for key in revenue_keys:
+        if key not in summaries:
+            continue
+        candidate = summaries[key]
+        usable = revenue.isna() & candidate.notna() & (candidate != 0)
+        revenue = revenue.where(~usable, candidate)
+    revenue = revenue.where(revenue.abs() >= 1e-6)
+    numerators = summaries.reindex(columns=list(keys))
+    return numerators.div(revenue, axis=0) * 100
+
+
+def share_statistics(shares: "pd.DataFrame") -> "pd.DataFrame":
+    """Gjennomsnitt, standardavvik og vurdering per linje i én operasjon.
+
+    ``shares`` har ett år per rad i kronologisk rekkefølge, der siste rad er
+    året som vurderes. Historikken er alle tidligere rader, slik som i
+    :func:`standard_deviation_without_current`.
+    """
+
+    columns = ["Gjennomsnitt", "Standardavvik", "Normal variasjon", "Vurdering"]
+    if len(shares.index) <= 1:
+        return pd.DataFrame(
+            {
+                "Gjennomsnitt": None,
+                "Standardavvik": None,
+                "Normal variasjon": "—",
+                "Vurdering": "—",
+            },
+            index=shares.columns,
+            columns=columns,
+            dtype=object,
+        )
+
+    history = shares.iloc[:-1]
+    current = shares.iloc[-1]
+    average = history.mean(axis=0)
+    std_dev = history.std(axis=0, ddof=0).where(history.count(axis=0) >= 2)
+
+    def _optional(value: object) -> Optional[float]:
+        return None if pd.isna(value) else float(value)
+
+    rows = []
+    for line in shares.columns:
+        avg_value = _optional(average[line])
+        std_value = _optional(std_dev[line])
+        rows.append(
+            (
+                avg_value,
+                std_value,
+                normal_variation_text(avg_value, std_value),
+                deviation_assessment(_optional(current[line]), avg_value, std_value),
+            )
+        )
+    return pd.DataFrame(rows, index=shares.columns, columns=columns, dtype=object)
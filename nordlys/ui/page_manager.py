@@ -15,10 +15,12 @@ class PageManager:
         owner: Any,
         stack: QStackedWidget,
         apply_page_state: Callable[[str, QWidget], None],
+        page_shown: Optional[Callable[[str, QWidget], None]] = None,
     ) -> None:
         self._owner = owner
         self._stack = stack
         self._apply_page_state = apply_page_state
+        self._page_shown = page_shown
         self._page_map: Dict[str, QWidget] = {}
         self._page_factories: Dict[str, Callable[[], QWidget]] = {}
         self._page_attributes: Dict[str, str] = {}
@@ -52,6 +54,17 @@ class PageManager:
             return widget
         return self._materialize_page(key)
 
+    def show_page(self, key: str) -> Optional[QWidget]:
+        """Viser siden i stacken og gir beskjed om at den er synlig."""
+
+        widget = self.ensure_page(key)
+        if widget is None:
+            return None
+        self._stack.setCurrentWidget(widget)
+        if self._page_shown is not None:
+            self._page_shown(key, widget)
+        return widget
+
     def _materialize_page(self, key: str) -> Optional[QWidget]:
         factory = self._page_factories.get(key)
         if factory is None:
@@ -0,0 +1,130 @@
+"""Beregning av sidemodeller i bakgrunnen.
+
+Sider med tung forberedelse oppgir en ren beregningsfunksjon
+(``compute_model``) som bygger en uforanderlig visningsmodell fra data i
+datasettet, og en ``apply_model`` som viser modellen. Beregningen kjøres via
+:class:`~nordlys.core.task_runner.TaskRunner`, mens ``apply_model`` kjøres i
+ett kort steg på GUI-tråden når resultatet er klart.
+"""
+
+from __future__ import annotations
+
+import logging
+from dataclasses import dataclass, field
+from threading import Event
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from PySide6.QtCore import QObject, Slot
+
+from ..core.task_runner import TaskRunner
+
+__all__ = ["PageModelPipeline"]
+
+_LOGGER = logging.getLogger(__name__)
+
+# Returneres fra bakgrunnstråden når beregningen ble avbrutt før start.
+_CANCELLED = object()
+
+
+@dataclass
+class _PendingModel:
+    key: str
+    apply: Callable[[Any], None]
+    on_error: Optional[Callable[[str], None]]
+    cancelled: Event = field(default_factory=Event)
+
+
+class PageModelPipeline(QObject):
+    """Kjører sidenes beregningsfunksjoner og leverer modellene til sidene.
+
+    Hver side har høyst én aktiv beregning. En ny beregning for samme side,
+    eller :meth:`cancel_all` når datasettet byttes, avbryter den forrige:
+    beregninger som ikke har startet, hoppes over, og resultater som kommer
+    etter avbrudd, forkastes.
+    """
+
+    def __init__(self, task_runner: TaskRunner, parent: Optional[QObject] = None):
+        super().__init__(parent)
+        self._task_runner = task_runner
+        self._pending: Dict[str, _PendingModel] = {}
+        self._active: Dict[str, str] = {}
+        task_runner.sig_done.connect(self._on_task_done)
+        task_runner.sig_error.connect(self._on_task_error)
+
+    def submit(
+        self,
+        key: str,
+        compute: Callable[..., Any],
+        args: Sequence[Any],
+        apply: Callable[[Any], None],
+        *,
+        on_error: Optional[Callable[[str], None]] = None,
+    ) -> str:
+        """Starter beregningen for siden ``key`` og avbryter en tidligere."""
+
+        self.cancel(key)
+        pending = _PendingModel(key=key, apply=apply, on_error=on_error)
+        task_id = self._task_runner.run(
+            _compute_unless_cancelled,
+            compute,
+            tuple(args),
+            pending.cancelled,
+            description=f"Beregner {key}",
+        )
+        self._pending[task_id] = pending
+        self._active[key] = task_id
+        return task_id
+
+    def is_pending(self, key: str) -> bool:
+        return key in self._active
+
+    def cancel(self, key: str) -> bool:
+        """Avbryter aktiv beregning for siden. Returnerer om noe ble avbrutt."""
+
+        task_id = self._active.pop(key, None)
+        if task_id is None:
+            return False
+        pending = self._pending.pop(task_id, None)
+        if pending is not None:
+            pending.cancelled.set()
+        return True
+
+    def cancel_all(self) -> List[str]:
+        """Avbryter alle aktive beregninger og returnerer sidene det gjaldt."""
+
+        keys = list(self._active)
+        for key in keys:
+            self.cancel(key)
+        return keys
+
+    @Slot(str, object)
+    def _on_task_done(self, task_id: str, result: object) -> None:
+        pending = self._take(task_id)
+        if pending is None or result is _CANCELLED:
+            return
+        pending.apply(result)
+
+    @Slot(str, str)
+    def _on_task_error(self, task_id: str, exc_str: str) -> None:
+        pending = self._take(task_id)
+        if pending is None:
+            return
+        _LOGGER.warning("Kunne ikke beregne %s: %s", pending.key, exc_str)
+        if pending.on_error is not None:
+            pending.on_error(exc_str)
+
+    def _take(self, task_id: str) -> Optional[_PendingModel]:
+        pending = self._pending.pop(task_id, None)
+        if pending is None or pending.cancelled.is_set():
+            return None
+        if self._active.get(pending.key) == task_id:
+            del self._active[pending.key]
+        return pending
+
+
+def _compute_unless_cancelled(
+    compute: Callable[..., Any], args: Sequence[Any], cancelled: Event
+) -> Any:
+    if cancelled.is_set():
+        return _CANCELLED
+    return compute(*args)
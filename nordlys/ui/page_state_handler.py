@@ -3,37 +3,66 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import Callable, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
-
-import pandas as pd
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+    Tuple,
+)
 
 from PySide6.QtWidgets import QWidget
 
 from ..helpers.formatting import format_currency
-from .pages import (
-    ComparisonPage,
-    RegnskapsanalysePage,
-    SammenstillingsanalysePage,
-    SummaryPage,
-)
-from .pages.dashboard_page import DashboardPage
-from .pages.dataframe_page import DataFramePage
-from .pages.import_page import ImportPage
-from .pages.hovedbok_page import HovedbokPage
-from .pages.revision_pages import (
-    ChecklistPage,
-    CostVoucherReviewPage,
-    FixedAssetsPage,
-    MvaDeviationPage,
-    PurchasesApPage,
-    SalesArPage,
-)
+from ..helpers.lazy_imports import lazy_pandas
+from ..helpers.subset_sum import find_subset_sums
+from . import pages
 from .data_manager import SaftDatasetStore
+from .page_models import PageModelPipeline
+
+if TYPE_CHECKING:  # pragma: no cover - kun for typekontroll
+    import pandas as pd
+
+    from .pages import (
+        ComparisonPage,
+        CostVoucherReviewPage,
+        DashboardPage,
+        DataFramePage,
+        FixedAssetsPage,
+        HovedbokPage,
+        ImportPage,
+        MvaDeviationPage,
+        PurchasesApPage,
+        RegnskapsanalysePage,
+        SalesArPage,
+        SammenstillingsanalysePage,
+        SummaryPage,
+    )
+else:
+    pd = lazy_pandas()
 
 
 ComparisonRow = Tuple[str, Optional[float], Optional[float], Optional[float]]
 ComparisonRows = Sequence[ComparisonRow]
 
+# Sammenligningen vises på flere sider og beregnes derfor under egen nøkkel.
+_COMPARISON_MODEL_KEY = "brreg_comparison"
+
+# Forslag til kontoer som forklarer avvik mot Brønnøysund.
+_MATCH_TOLERANCE_ORE = 100
+_MAX_MATCH_SIZE = 3
+_MAX_MATCHES = 5
+_MATCH_TIME_BUDGET = 0.5
+
+# Kontogrupper som motkontoene på salgssiden vises for.
+_RECEIVABLE_PREFIXES = ("1500",)
+_BANK_PREFIXES = ("19", "2380")
+
 
 @dataclass(frozen=True)
 class BalanceEntry:
@@ -51,10 +80,13 @@ class PageStateHandler:
         dataset_store: SaftDatasetStore,
         revision_tasks: Mapping[str, Sequence[str]],
         schedule_responsive_update: Callable[[], None],
+        model_pipeline: Optional[PageModelPipeline] = None,
     ) -> None:
         self._dataset_store = dataset_store
         self._revision_tasks = revision_tasks
         self._schedule_responsive_update = schedule_responsive_update
+        # Uten pipeline beregnes sidemodellene direkte (f.eks. i tester).
+        self._model_pipeline = model_pipeline
 
         self.import_page: Optional[ImportPage] = None
         self.dashboard_page: Optional[DashboardPage] = None
@@ -74,97 +106,245 @@ class PageStateHandler:
         self._latest_comparison_rows: Optional[List[ComparisonRow]] = None
         self._latest_comparison_suggestions: Optional[List[str]] = None
 
+        # Hvilken (datasettnøkkel, generasjon) hver side sist ble fylt for.
+        self._pages_by_key: Dict[str, QWidget] = {}
+        self._page_versions: Dict[str, Tuple[Optional[str], int]] = {}
+        self._generation = 0
+        # Ferdige sidemodeller per (side, datasettnøkkel) i gjeldende
+        # generasjon, slik at A → B → A viser A uten å beregne den på nytt.
+        self._page_models: Dict[Tuple[str, str], Any] = {}
+        self._visible_page: Optional[str] = None
+
     def apply_page_state(self, key: str, widget: QWidget) -> None:
-        """Lagrer referansen og oppdaterer siden med eksisterende data."""
+        """Lagrer referansen og fyller siden med data for aktivt datasett."""
+
+        self._register_page(key, widget)
+        self._populate_page(key, widget)
+        self._schedule_responsive_update()
+
+    def mark_dataset_changed(self) -> None:
+        """Varsler sidene om at et annet datasett er aktivt.
+
+        Bare den synlige siden fylles med en gang; de andre fylles først når
+        de vises (se :meth:`on_page_shown`). En side som allerede viser
+        datasettnøkkelen, fylles ikke på nytt.
+        """
+
+        self._cancel_page_models()
+        key = self._visible_page
+        widget = self._pages_by_key.get(key) if key is not None else None
+        if key is not None and widget is not None:
+            self.on_page_shown(key, widget)
+
+    def invalidate_pages(self) -> None:
+        """Glemmer hva sidene viser, f.eks. når en ny import erstatter data."""
+
+        self._generation += 1
+        self._page_models.clear()
+        self._cancel_page_models()
+
+    def on_page_shown(self, key: str, widget: QWidget) -> None:
+        """Kalles når en side vises; fyller den bare om dataene er endret."""
+
+        self._visible_page = key
+        if self._page_versions.get(key) == self._data_version():
+            return
+        self._populate_page(key, widget)
+        self._schedule_responsive_update()
+
+    def _data_version(self) -> Tuple[Optional[str], int]:
+        return self._dataset_store.current_key, self._generation
+
+    def _run_page_model(
+        self,
+        key: str,
+        compute: Callable[..., Any],
+        args: Sequence[Any],
+        apply: Callable[[Any], None],
+    ) -> None:
+        """Beregner sidemodellen i bakgrunnen og viser den på GUI-tråden.
+
+        En modell som allerede er beregnet for aktivt datasett, vises med en
+        gang. Sider med egne innstillinger (f.eks. mva-terskel) sjekker selv
+        i ``apply_model`` om modellen passer.
+        """
+
+        dataset_key = self._dataset_store.current_key
+        if dataset_key is None:
+            keep = apply
+        else:
+            model_key = (key, dataset_key)
+            cached = self._page_models.get(model_key)
+            if cached is not None:
+                apply(cached)
+                return
+
+            def keep(model: Any) -> None:
+                self._page_models[model_key] = model
+                apply(model)
+
+        if self._model_pipeline is None:
+            keep(compute(*args))
+            return
+
+        def _forget_version(_error: str) -> None:
+            self._page_versions.pop(key, None)
+
+        self._model_pipeline.submit(key, compute, args, keep, on_error=_forget_version)
 
-        if key == "import" and isinstance(widget, ImportPage):
+    def _cancel_page_models(self) -> None:
+        if self._model_pipeline is None:
+            return
+        for key in self._model_pipeline.cancel_all():
+            # Siden fikk aldri modellen og må beregnes på nytt neste gang.
+            self._page_versions.pop(key, None)
+
+    def _register_page(self, key: str, widget: QWidget) -> None:
+        self._pages_by_key[key] = widget
+        if key == "import" and isinstance(widget, pages.ImportPage):
             self.import_page = widget
         if key in self._revision_tasks:
             self.revision_pages[key] = widget
-        if key == "dashboard" and isinstance(widget, DashboardPage):
+        if key == "dashboard" and isinstance(widget, pages.DashboardPage):
             self.dashboard_page = widget
-            widget.update_summary(self._dataset_store.saft_summary)
-        elif key == "plan.saldobalanse" and isinstance(widget, DataFramePage):
+        elif key == "plan.saldobalanse" and isinstance(widget, pages.DataFramePage):
             self.saldobalanse_page = widget
-            widget.set_dataframe(self._dataset_store.saft_df)
-        elif key == "plan.hovedbok" and isinstance(widget, HovedbokPage):
+        elif key == "plan.hovedbok" and isinstance(widget, pages.HovedbokPage):
             self.hovedbok_page = widget
-            widget.set_account_balances(self._dataset_store.saft_df)
-            widget.set_vouchers(self._dataset_store.all_vouchers)
-        elif key == "plan.kontroll" and isinstance(widget, ComparisonPage):
+        elif key == "plan.kontroll" and isinstance(widget, pages.ComparisonPage):
             self.kontroll_page = widget
+        elif key == "plan.regnskapsanalyse" and isinstance(
+            widget, pages.RegnskapsanalysePage
+        ):
+            self.regnskap_page = widget
+        elif key == "plan.vesentlighet" and isinstance(widget, pages.SummaryPage):
+            self.vesentlig_page = widget
+        elif key == "plan.sammenstilling" and isinstance(
+            widget, pages.SammenstillingsanalysePage
+        ):
+            self.sammenstilling_page = widget
+        elif key == "rev.salg" and isinstance(widget, pages.SalesArPage):
+            self.sales_ar_page = widget
+            widget.set_checklist_items(self._revision_tasks.get("rev.salg", []))
+        elif key == "rev.innkjop" and isinstance(widget, pages.PurchasesApPage):
+            self.purchases_ap_page = widget
+        elif key == "rev.kostnad" and isinstance(widget, pages.CostVoucherReviewPage):
+            self.cost_review_page = widget
+        elif key == "rev.driftsmidler" and isinstance(widget, pages.FixedAssetsPage):
+            self.fixed_assets_page = widget
+        elif key == "rev.mva" and isinstance(widget, pages.MvaDeviationPage):
+            self.mva_page = widget
+        elif key in self._revision_tasks and isinstance(widget, pages.ChecklistPage):
+            widget.set_items(list(self._revision_tasks.get(key, [])))
+
+    def _populate_page(self, key: str, widget: QWidget) -> None:
+        """Fyller siden fra datasettet og husker hvilken versjon den viser."""
+
+        store = self._dataset_store
+        if key == "dashboard" and isinstance(widget, pages.DashboardPage):
+            widget.update_summary(store.saft_summary, len(store.cost_vouchers))
+        elif key == "plan.saldobalanse" and isinstance(widget, pages.DataFramePage):
+            widget.set_dataframe(store.saft_df)
+        elif key == "plan.hovedbok" and isinstance(widget, pages.HovedbokPage):
+            self._run_page_model(
+                key,
+                widget.compute_model,
+                (store.saft_df, store.all_vouchers),
+                widget.apply_model,
+            )
+        elif key == "plan.kontroll" and isinstance(widget, pages.ComparisonPage):
             widget.update_comparison(self._latest_comparison_rows)
             widget.update_suggestions(self._latest_comparison_suggestions)
+            widget.update_year_comparison(store.brreg_year_comparison())
         elif key == "plan.regnskapsanalyse" and isinstance(
-            widget, RegnskapsanalysePage
+            widget, pages.RegnskapsanalysePage
         ):
-            self.regnskap_page = widget
-            widget.set_dataframe(
-                self._dataset_store.saft_df, self._dataset_store.current_year_text
+            self._run_page_model(
+                key,
+                widget.compute_model,
+                (store.saft_df, store.current_year_text),
+                widget.apply_model,
+            )
+            widget.set_summary_history(
+                store.recent_summaries(), store.multi_year_summaries()
             )
-            widget.set_summary_history(self._dataset_store.recent_summaries())
             widget.update_comparison(self._latest_comparison_rows)
-        elif key == "plan.vesentlighet" and isinstance(widget, SummaryPage):
-            self.vesentlig_page = widget
+        elif key == "plan.vesentlighet" and isinstance(widget, pages.SummaryPage):
             widget.update_summary(
-                self._dataset_store.saft_summary,
-                industry=self._dataset_store.industry,
-                industry_error=self._dataset_store.industry_error,
+                store.saft_summary,
+                industry=store.industry,
+                industry_error=store.industry_error,
             )
         elif key == "plan.sammenstilling" and isinstance(
-            widget, SammenstillingsanalysePage
+            widget, pages.SammenstillingsanalysePage
         ):
-            self.sammenstilling_page = widget
-            widget.set_dataframe(
-                self._dataset_store.saft_df, self._dataset_store.current_year_text
-            )
-        elif key == "rev.salg" and isinstance(widget, SalesArPage):
-            self.sales_ar_page = widget
-            widget.set_checklist_items(self._revision_tasks.get("rev.salg", []))
-            widget.set_controls_enabled(self._dataset_store.has_customer_data)
+            widget.set_dataframe(store.saft_df, store.current_year_text)
+        elif key == "rev.salg" and isinstance(widget, pages.SalesArPage):
+            widget.set_controls_enabled(store.has_customer_data)
             widget.update_sales_reconciliation(
-                self._dataset_store.customer_sales_total,
-                self._dataset_store.sales_account_total,
+                store.customer_sales_total,
+                store.sales_account_total,
+            )
+            widget.clear_top_customers()
+            widget.set_registry_warnings(
+                store.counterparty_warning_rows(),
+                store.counterparty_snapshot_imported_at(),
             )
-            if not self._dataset_store.has_customer_data:
-                widget.clear_top_customers()
             widget.set_credit_notes(
-                self._dataset_store.credit_note_rows(),
-                self._dataset_store.credit_note_monthly_summary(),
+                store.credit_note_rows(),
+                store.credit_note_monthly_summary(),
             )
             widget.set_sales_correlation(
-                self._dataset_store.sales_with_receivable_total,
-                self._dataset_store.sales_without_receivable_total,
-                self._dataset_store.sales_without_receivable_rows(),
-                self._dataset_store.receivable_sales_counter_total,
+                store.sales_with_receivable_total,
+                store.sales_without_receivable_total,
+                store.sales_without_receivable_rows(),
+                store.receivable_sales_counter_total,
             )
             widget.set_receivable_overview(
-                self._dataset_store.receivable_analysis,
-                self._dataset_store.receivable_unclassified_rows(),
+                store.receivable_analysis,
+                store.receivable_unclassified_rows(),
             )
             widget.set_bank_overview(
-                self._dataset_store.bank_analysis,
-                self._dataset_store.bank_mismatch_rows(),
+                store.bank_analysis,
+                store.bank_mismatch_rows(),
             )
-        elif key == "rev.innkjop" and isinstance(widget, PurchasesApPage):
-            self.purchases_ap_page = widget
-            widget.set_controls_enabled(self._dataset_store.has_supplier_data)
-            if not self._dataset_store.has_supplier_data:
-                widget.clear_top_suppliers()
-        elif key == "rev.kostnad" and isinstance(widget, CostVoucherReviewPage):
-            self.cost_review_page = widget
-            widget.set_vouchers(self._dataset_store.cost_vouchers)
-        elif key == "rev.driftsmidler" and isinstance(widget, FixedAssetsPage):
-            self.fixed_assets_page = widget
-            widget.update_data(
-                self._dataset_store.saft_df, self._dataset_store.cost_vouchers
+            widget.set_counter_account_flows(
+                store.counter_account_flow_rows(_RECEIVABLE_PREFIXES),
+                store.counter_account_flow_rows(_BANK_PREFIXES),
             )
-        elif key == "rev.mva" and isinstance(widget, MvaDeviationPage):
-            self.mva_page = widget
-            widget.set_vouchers(self._dataset_store.all_vouchers)
-        elif key in self._revision_tasks and isinstance(widget, ChecklistPage):
-            widget.set_items(list(self._revision_tasks.get(key, [])))
-        self._schedule_responsive_update()
+        elif key == "rev.innkjop" and isinstance(widget, pages.PurchasesApPage):
+            widget.set_controls_enabled(store.has_supplier_data)
+            widget.clear_top_suppliers()
+            widget.set_registry_warnings(
+                store.counterparty_warning_rows(suppliers=True),
+                store.counterparty_snapshot_imported_at(suppliers=True),
+            )
+        elif key == "rev.kostnad" and isinstance(widget, pages.CostVoucherReviewPage):
+            widget.set_vouchers(store.cost_vouchers)
+        elif key == "rev.driftsmidler" and isinstance(widget, pages.FixedAssetsPage):
+            self._run_page_model(
+                key,
+                widget.compute_model,
+                (
+                    store.saft_df,
+                    store.cost_vouchers,
+                    store.asset_roll_forward_datasets(),
+                ),
+                widget.apply_model,
+            )
+        elif key == "rev.mva" and isinstance(widget, pages.MvaDeviationPage):
+            self._run_page_model(
+                key,
+                widget.compute_model,
+                (
+                    store.all_vouchers,
+                    store.cached_vat_profile,
+                    widget.min_observations(),
+                    widget.level(),
+                ),
+                widget.apply_model,
+            )
+        self._page_versions[key] = self._data_version()
 
     def update_comparison_tables(
         self,
@@ -178,12 +358,32 @@ class PageStateHandler:
         if self.kontroll_page:
             self.kontroll_page.update_comparison(rows)
             self.kontroll_page.update_suggestions(self._latest_comparison_suggestions)
+            self.kontroll_page.update_year_comparison(
+                self._dataset_store.brreg_year_comparison()
+            )
         if self.regnskap_page:
             self.regnskap_page.update_comparison(rows)
 
     def clear_comparison_tables(self) -> None:
         self.update_comparison_tables(None, None)
 
+    def refresh_comparison_tables(self) -> None:
+        """Bygger sammenligningen mot Brønnøysund i bakgrunnen og viser den."""
+
+        summary = self._dataset_store.saft_summary
+        brreg_map = self._dataset_store.brreg_map
+        if not summary or not brreg_map:
+            if self._model_pipeline is not None:
+                self._model_pipeline.cancel(_COMPARISON_MODEL_KEY)
+            self.update_comparison_tables(None, None)
+            return
+        self._run_page_model(
+            _COMPARISON_MODEL_KEY,
+            self.compute_brreg_comparison,
+            (summary, brreg_map, self._dataset_store.saft_df),
+            self._apply_comparison,
+        )
+
     def build_brreg_comparison_rows(
         self,
     ) -> Optional[Tuple[List[ComparisonRow], List[str]]]:
@@ -191,6 +391,17 @@ class PageStateHandler:
         brreg_map = self._dataset_store.brreg_map
         if not summary or not brreg_map:
             return None
+        return self.compute_brreg_comparison(
+            summary, brreg_map, self._dataset_store.saft_df
+        )
+
+    def compute_brreg_comparison(
+        self,
+        summary: Mapping[str, Optional[float]],
+        brreg_map: Mapping[str, Optional[float]],
+        saft_df: Optional[pd.DataFrame],
+    ) -> Tuple[List[ComparisonRow], List[str]]:
+        """Sammenligner SAF-T mot Brønnøysund uten å røre sidene (trådsikker)."""
 
         base_rows: List[Tuple[str, Optional[float], Optional[float], Optional[float]]]
         base_rows = [
@@ -219,7 +430,7 @@ class PageStateHandler:
         for label, saf_value, brreg_value, _ in base_rows:
             diff = self._safe_difference(saf_value, brreg_value)
             if diff is not None and abs(diff) > 2:
-                matches = self._find_balance_matches(diff)
+                matches = self._find_balance_matches(diff, saft_df)
                 if matches:
                     suggestions.extend(
                         self._format_match_suggestions(
@@ -234,6 +445,10 @@ class PageStateHandler:
 
         return comparison_rows, suggestions
 
+    def _apply_comparison(self, result: Tuple[List[ComparisonRow], List[str]]) -> None:
+        rows, suggestions = result
+        self.update_comparison_tables(rows, suggestions)
+
     def _safe_difference(
         self, saf_value: Optional[float], brreg_value: Optional[float]
     ) -> Optional[float]:
@@ -244,8 +459,9 @@ class PageStateHandler:
         except (TypeError, ValueError):
             return None
 
-    def _find_balance_matches(self, target: float) -> List[List[BalanceEntry]]:
-        df = self._dataset_store.saft_df
+    def _find_balance_matches(
+        self, target: float, df: Optional[pd.DataFrame]
+    ) -> List[List[BalanceEntry]]:
         if df is None or df.empty:
             return []
 
@@ -283,35 +499,27 @@ class PageStateHandler:
     def _search_matches(
         self, entries: Sequence[BalanceEntry], target: float
     ) -> List[List[BalanceEntry]]:
-        tolerance = 1.0
         matches: List[List[BalanceEntry]] = []
         seen: set[Tuple[int, Tuple[Tuple[str, str], ...]]] = set()
-        limited_entries = list(entries)[:120]
-
-        def _consider(combo: Sequence[BalanceEntry]) -> None:
-            total = sum(entry.value for entry in combo)
-            if not self._is_close(total, target, tolerance):
-                return
+        # Samme konto kan forekomme flere ganger i saldobalansen; det gir like
+        # forslag som bare skal vises én gang. Det hentes derfor litt ekstra.
+        found = find_subset_sums(
+            [entry.value for entry in entries],
+            target,
+            tolerance_ore=_MATCH_TOLERANCE_ORE,
+            max_size=_MAX_MATCH_SIZE,
+            top_k=_MAX_MATCHES * 2,
+            either_sign=True,
+            time_budget=_MATCH_TIME_BUDGET,
+        )
+        for match in found:
+            combo = [entries[index] for index in match.indices]
             key = (len(combo), tuple(sorted((e.account, e.column) for e in combo)))
             if key in seen:
-                return
+                continue
             seen.add(key)
-            matches.append(list(combo))
-
-        for entry in limited_entries:
-            _consider([entry])
-
-        for i in range(len(limited_entries)):
-            for j in range(i + 1, len(limited_entries)):
-                _consider([limited_entries[i], limited_entries[j]])
-
-        triple_entries = limited_entries[:40]
-        for i in range(len(triple_entries)):
-            for j in range(i + 1, len(triple_entries)):
-                for k in range(j + 1, len(triple_entries)):
-                    _consider([triple_entries[i], triple_entries[j], triple_entries[k]])
-
-        return matches[:5]
+            matches.append(combo)
+        return matches[:_MAX_MATCHES]
 
     def _balance_series(self, df: pd.DataFrame) -> Iterable[Tuple[str, pd.Series]]:
         seen: set[str] = set()
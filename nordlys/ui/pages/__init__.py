@@ -1,21 +1,32 @@
-"""Sider for Nordlys-grensesnittet."""
-
-from .comparison_page import ComparisonPage
-from .regnskapsanalyse_page import RegnskapsanalysePage
-from .sammenstilling_page import SammenstillingsanalysePage
-from .summary_page import SummaryPage
-from .dashboard_page import DashboardPage
-from .dataframe_page import DataFramePage, standard_tb_frame
-from .import_page import ImportPage
-from .hovedbok_page import HovedbokPage
-from .revision_pages import (
-    ChecklistPage,
-    CostVoucherReviewPage,
-    MvaDeviationPage,
-    PurchasesApPage,
-    SalesArPage,
-    VoucherReviewResult,
-)
+"""Sider for Nordlys-grensesnittet.
+
+Sidemodulene lastes først når en side brukes, slik at oppstarten ikke betaler
+for sider brukeren ikke har åpnet (se ``PageRegistry``).
+"""
+
+from __future__ import annotations
+
+from importlib import import_module
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:  # pragma: no cover - kun for typekontroll
+    from .comparison_page import ComparisonPage
+    from .dashboard_page import DashboardPage
+    from .dataframe_page import DataFramePage, standard_tb_frame
+    from .hovedbok_page import HovedbokPage
+    from .import_page import ImportPage
+    from .regnskapsanalyse_page import RegnskapsanalysePage
+    from .revision_pages import (
+        ChecklistPage,
+        CostVoucherReviewPage,
+        FixedAssetsPage,
+        MvaDeviationPage,
+        PurchasesApPage,
+        SalesArPage,
+        VoucherReviewResult,
+    )
+    from .sammenstilling_page import SammenstillingsanalysePage
+    from .summary_page import SummaryPage
 
 __all__ = [
     "ComparisonPage",
@@ -29,8 +40,43 @@ __all__ = [
     "HovedbokPage",
     "ChecklistPage",
     "CostVoucherReviewPage",
+    "FixedAssetsPage",
     "MvaDeviationPage",
     "PurchasesApPage",
     "SalesArPage",
     "VoucherReviewResult",
 ]
+
+_MODULE_MAP = {
+    "ComparisonPage": "comparison_page",
+    "RegnskapsanalysePage": "regnskapsanalyse_page",
+    "SammenstillingsanalysePage": "sammenstilling_page",
+    "SummaryPage": "summary_page",
+    "DashboardPage": "dashboard_page",
+    "DataFramePage": "dataframe_page",
+    "standard_tb_frame": "dataframe_page",
+    "ImportPage": "import_page",
+    "HovedbokPage": "hovedbok_page",
+    "ChecklistPage": "revision_pages",
+    "CostVoucherReviewPage": "revision_pages",
+    "FixedAssetsPage": "revision_pages",
+    "MvaDeviationPage": "revision_pages",
+    "PurchasesApPage": "revision_pages",
+    "SalesArPage": "revision_pages",
+    "VoucherReviewResult": "revision_pages",
+}
+
+
+def __getattr__(name: str) -> Any:
+    """Last sidemodulen først når klassen faktisk brukes."""
+
+    module_name = _MODULE_MAP.get(name)
+    if module_name is None:
+        raise AttributeError(f"module 'nordlys.ui.pages' has no attribute {name!r}")
+    value = getattr(import_module(f"{__name__}.{module_name}"), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted(set(__all__ + list(globals().keys())))
@@ -2,18 +2,23 @@
 
 from __future__ import annotations
 
-from typing import Optional, Sequence, Tuple
+from typing import TYPE_CHECKING, Optional, Sequence, Tuple
 
 from PySide6.QtCore import Qt
 from PySide6.QtGui import QBrush, QColor
 from PySide6.QtWidgets import QLabel, QTableWidgetItem, QVBoxLayout, QWidget
 
 from ...helpers.formatting import format_currency, format_difference
-from ..tables import apply_compact_row_heights, create_table_widget
+from ..tables import apply_compact_row_heights, create_table_widget, populate_table
 from ..widgets import CardFrame
 
+if TYPE_CHECKING:  # pragma: no cover - kun for typekontroll
+    import pandas as pd
+
 __all__ = ["ComparisonPage"]
 
+_YEAR_COMPARISON_HEADERS = ["År", "Felt", "SAF-T", "Brreg", "Avvik"]
+
 
 class ComparisonPage(QWidget):
     """Sammenstilling mellom SAF-T og Regnskapsregisteret."""
@@ -43,6 +48,16 @@ class ComparisonPage(QWidget):
         )
         self.card.add_widget(self.table)
         layout.addWidget(self.card)
+        self.year_card = CardFrame(
+            "Avvik per år",
+            "SAF-T mot Regnskapsregisteret for alle innleste år med tall i begge.",
+        )
+        self.year_table = create_table_widget()
+        self.year_table.setColumnCount(len(_YEAR_COMPARISON_HEADERS))
+        self.year_table.setHorizontalHeaderLabels(_YEAR_COMPARISON_HEADERS)
+        self.year_card.add_widget(self.year_table)
+        self.year_card.hide()
+        layout.addWidget(self.year_card)
         self.suggestion_card = CardFrame(
             "Mulige forklaringer",
             (
@@ -97,6 +112,24 @@ class ComparisonPage(QWidget):
             self.table.resizeColumnsToContents()
             apply_compact_row_heights(self.table)
 
+    def update_year_comparison(self, comparison: Optional["pd.DataFrame"]) -> None:
+        """Viser flerårig sammenligning fra ``brreg_year_comparison``."""
+
+        if comparison is None or comparison.empty:
+            self.year_table.setRowCount(0)
+            self.year_card.hide()
+            return
+        rows = [
+            (str(year), label, saft_value, brreg_value, difference)
+            for year, label, saft_value, brreg_value, difference in comparison[
+                _YEAR_COMPARISON_HEADERS
+            ].itertuples(index=False, name=None)
+        ]
+        populate_table(
+            self.year_table, _YEAR_COMPARISON_HEADERS, rows, money_cols={2, 3, 4}
+        )
+        self.year_card.show()
+
     def update_suggestions(self, suggestions: Optional[Sequence[str]]) -> None:
         if not suggestions:
             self.suggestion_label.setText(
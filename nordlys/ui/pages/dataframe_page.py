@@ -11,7 +11,7 @@ from PySide6.QtWidgets import (
 )
 
 from ...helpers.lazy_imports import lazy_pandas
-from ..tables import create_table_widget, populate_table
+from ..tables import create_table_view, populate_dataframe
 from ..widgets import CardFrame, EmptyStateWidget
 
 if TYPE_CHECKING:  # pragma: no cover
@@ -46,8 +46,11 @@ class DataFramePage(QWidget):
             "Ingen data å vise ennå",
             "Importer en SAF-T-fil eller velg et annet datasett for å fylle tabellen.",
         )
-        self.table = create_table_widget()
-        self.table.horizontalHeader().setSectionResizeMode(header_mode)
+        self.table = create_table_view()
+        # ResizeToContents ville målt hver celle; visningen anslår i stedet
+        # bredder fra et utvalg rader.
+        if header_mode != QHeaderView.ResizeToContents:
+            self.table.horizontalHeader().setSectionResizeMode(header_mode)
         self.table.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
         self.table.hide()
         self.empty_state.show()
@@ -75,7 +78,6 @@ class DataFramePage(QWidget):
 
         self._frame_builder = frame_builder
         self._money_columns = tuple(money_columns or [])
-        self._auto_resize_columns = header_mode == QHeaderView.ResizeToContents
 
     def set_dataframe(self, df: Optional[pd.DataFrame]) -> None:
         if df is None or df.empty:
@@ -89,15 +91,10 @@ class DataFramePage(QWidget):
             work = self._frame_builder(df)
 
         columns = list(work.columns)
-        rows = [
-            tuple(work.iloc[i][column] for column in columns) for i in range(len(work))
-        ]
         money_idx = {
             columns.index(col) for col in self._money_columns if col in columns
         }
-        populate_table(self.table, columns, rows, money_cols=money_idx)
-        if self._auto_resize_columns:
-            self.table.resizeColumnsToContents()
+        populate_dataframe(self.table, work, money_cols=money_idx)
         self.table.show()
         self.empty_state.hide()
 
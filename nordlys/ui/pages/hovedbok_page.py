@@ -2,16 +2,16 @@
 
 from __future__ import annotations
 
-from typing import Dict, List, Sequence, TYPE_CHECKING, Tuple
+from dataclasses import dataclass
+from typing import Dict, List, Mapping, Optional, Sequence, TYPE_CHECKING, Tuple
 
-from PySide6.QtCore import Qt
+from PySide6.QtCore import QModelIndex, Qt, QTimer
 from PySide6.QtWidgets import (
     QAbstractItemView,
     QDialog,
     QDialogButtonBox,
     QFrame,
     QHBoxLayout,
-    QHeaderView,
     QLabel,
     QLineEdit,
     QPushButton,
@@ -25,19 +25,29 @@ from ...helpers.lazy_imports import lazy_pandas
 from ...saft.ledger import (
     LedgerRow,
     StatementRow,
-    build_ledger_rows,
+    build_ledger_table,
     build_statement_rows,
     rows_for_voucher,
 )
+from ...saft.ledger_index import LedgerIndex
 from ...saft.models import CostVoucher
-from ..tables import create_table_widget, format_money_norwegian, populate_table
+from ..tables import create_table_view, format_money_norwegian, populate_table
 
 if TYPE_CHECKING:  # pragma: no cover
     import pandas as pd
 else:  # pragma: no cover
     pd = lazy_pandas()
 
-__all__ = ["HovedbokPage"]
+__all__ = ["HovedbokModel", "HovedbokPage"]
+
+
+@dataclass(frozen=True)
+class HovedbokModel:
+    """Ferdig beregnede data for hovedboksiden."""
+
+    account_balances: Mapping[str, Tuple[float, float]]
+    account_names: Mapping[str, str]
+    index: LedgerIndex
 
 
 class HovedbokPage(QWidget):
@@ -46,11 +56,11 @@ class HovedbokPage(QWidget):
     def __init__(self) -> None:
         super().__init__()
 
-        self._all_rows: List[LedgerRow] = []
+        self._index = LedgerIndex(())
         self._statement_rows: List[StatementRow] = []
         self._table_source_rows: List[LedgerRow | None] = []
-        self._account_balances: Dict[str, Tuple[float, float]] = {}
-        self._account_names: Dict[str, str] = {}
+        self._account_balances: Mapping[str, Tuple[float, float]] = {}
+        self._account_names: Mapping[str, str] = {}
 
         layout = QVBoxLayout(self)
         layout.setContentsMargins(0, 0, 0, 0)
@@ -77,6 +87,14 @@ class HovedbokPage(QWidget):
         self.voucher_search_input.returnPressed.connect(self.apply_filter)
         controls.addWidget(self.voucher_search_input, 2)
 
+        # Søk mens brukeren skriver, men vent til tastingen tar en pause.
+        self._search_timer = QTimer(self)
+        self._search_timer.setSingleShot(True)
+        self._search_timer.setInterval(150)
+        self._search_timer.timeout.connect(self.apply_filter)
+        self.search_input.textChanged.connect(self._schedule_filter)
+        self.voucher_search_input.textChanged.connect(self._schedule_filter)
+
         self.search_button = QPushButton("Søk")
         self.search_button.clicked.connect(self.apply_filter)
 
@@ -119,13 +137,14 @@ class HovedbokPage(QWidget):
 
         self.result_stack.addWidget(empty_widget)
 
-        self.table = create_table_widget()
-        self.table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeToContents)
+        self.table = create_table_view()
         self.table.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
         self.table.setSortingEnabled(False)
         self.table.setSelectionMode(QAbstractItemView.ExtendedSelection)
-        self.table.cellDoubleClicked.connect(self._open_voucher_dialog)
-        self.table.itemSelectionChanged.connect(self._update_selection_summary)
+        self.table.doubleClicked.connect(self._on_table_double_clicked)
+        self.table.selectionModel().selectionChanged.connect(
+            lambda *_args: self._update_selection_summary()
+        )
         self.result_stack.addWidget(self.table)
 
         self.selection_summary_label = QLabel("")
@@ -135,45 +154,44 @@ class HovedbokPage(QWidget):
         self.result_stack.setCurrentWidget(empty_widget)
         layout.addWidget(self.result_panel, 1)
 
-    def set_account_balances(self, df: "pd.DataFrame | None") -> None:
-        """Lagrer IB/UB og navn per konto fra saldobalansen."""
+    @staticmethod
+    def compute_model(
+        df: Optional["pd.DataFrame"], vouchers: Sequence[CostVoucher]
+    ) -> HovedbokModel:
+        """Bygger saldoer og føringer uten å røre widgeten (trådsikker)."""
 
-        self._account_balances = {}
-        self._account_names = {}
-        if df is None or df.empty or "Konto" not in df.columns:
-            return
+        balances, names = _collect_account_balances(df)
+        index = LedgerIndex(build_ledger_table(vouchers))
+        return HovedbokModel(balances, names, index)
 
-        ib_series = self._net_series(df, "IB")
-        ub_series = self._net_series(df, "UB")
+    def apply_model(self, model: HovedbokModel) -> None:
+        """Viser en ferdig beregnet modell."""
 
-        for idx in df.index:
-            raw = df.at[idx, "Konto"]
-            if raw is None or pd.isna(raw):
-                continue
-            account = str(raw).strip()
-            if not account:
-                continue
+        self._account_balances = model.account_balances
+        self._account_names = model.account_names
+        self._index = model.index
+        self._clear_results()
 
-            ib = float(ib_series.get(idx, 0.0))
-            ub = float(ub_series.get(idx, 0.0))
-            self._account_balances[account] = (ib, ub)
+    def set_account_balances(self, df: "pd.DataFrame | None") -> None:
+        """Lagrer IB/UB og navn per konto fra saldobalansen."""
 
-            account_name = ""
-            if "Kontonavn" in df.columns:
-                raw_name = df.at[idx, "Kontonavn"]
-                if raw_name is not None and not pd.isna(raw_name):
-                    account_name = str(raw_name).strip()
-            self._account_names[account] = account_name
+        self._account_balances, self._account_names = _collect_account_balances(df)
 
     def set_vouchers(self, vouchers: Sequence[CostVoucher]) -> None:
         """Lagrer bilag, men viser ikke føringer før brukeren søker."""
 
-        self._all_rows = build_ledger_rows(vouchers)
+        self._index = LedgerIndex(build_ledger_table(vouchers))
         self._clear_results()
 
     def apply_filter(self) -> None:
-        """Filtrerer tabellen basert på konto og/eller bilag."""
+        """Filtrerer tabellen basert på konto og/eller bilag.
+
+        Kontofeltet godtar et kontonummer, starten av et kontonummer (f.eks.
+        «19» for alle 19xx-kontoer i saldobalansen) eller tekst som søkes i
+        kontonavn og beskrivelser. Alle oppslag går via hovedbokindeksen.
+        """
 
+        self._search_timer.stop()
         account_query = self.search_input.text().strip()
         voucher_query = self.voucher_search_input.text().strip().lower()
 
@@ -182,40 +200,74 @@ class HovedbokPage(QWidget):
             self.status_label.setText("Søk på konto eller bilag for å vise føringer.")
             return
 
-        rows = self._all_rows
+        rows: Sequence[LedgerRow] = ()
+        text_search = False
         if account_query:
-            if account_query not in self._account_balances:
-                self._clear_results()
-                self.account_name_label.setText("")
-                self.status_label.setText(f"Konto ikke finnes: {account_query}")
-                return
-
-            rows = [row for row in rows if row.konto == account_query]
-            account_name = self._account_names.get(account_query, "")
-            if account_name:
-                self.account_name_label.setText(
-                    f"Konto: {account_query} – {account_name}"
-                )
+            if account_query in self._account_balances:
+                rows = self._index.account_rows(account_query)
+                account_name = self._account_names.get(account_query, "")
+                if account_name:
+                    self.account_name_label.setText(
+                        f"Konto: {account_query} – {account_name}"
+                    )
+                else:
+                    self.account_name_label.setText(f"Konto: {account_query}")
             else:
-                self.account_name_label.setText(f"Konto: {account_query}")
+                prefix_accounts = self._balance_accounts_with_prefix(account_query)
+                text_search = not prefix_accounts and not any(
+                    char.isdigit() for char in account_query
+                )
+                if prefix_accounts:
+                    rows = self._index.account_rows(prefix_accounts)
+                    self.account_name_label.setText(
+                        f"Kontoer som starter på {account_query}: "
+                        f"{len(prefix_accounts)} kontoer"
+                    )
+                elif text_search:
+                    rows = self._index.text_rows(account_query)
+                    self.account_name_label.setText(f"Tekstsøk: {account_query}")
+                if not prefix_accounts and not (text_search and rows):
+                    self._clear_results()
+                    self.account_name_label.setText("")
+                    self.status_label.setText(f"Konto ikke finnes: {account_query}")
+                    return
         else:
             self.account_name_label.setText("")
 
         if voucher_query:
-            rows = [
-                row
-                for row in rows
-                if voucher_query == row.bilagsnr.lower()
-                or voucher_query == row.transaksjons_id.lower()
-            ]
+            if account_query:
+                rows = [
+                    row
+                    for row in rows
+                    if voucher_query == row.bilagsnr.lower()
+                    or voucher_query == row.transaksjons_id.lower()
+                ]
+            else:
+                rows = self._index.voucher_rows(voucher_query)
 
         self._render_rows(
-            rows, account_query=account_query, voucher_query=voucher_query
+            rows,
+            account_query=account_query,
+            voucher_query=voucher_query,
+            as_statement=not (voucher_query or text_search),
         )
 
+    def _schedule_filter(self, _text: str = "") -> None:
+        self._search_timer.start()
+
+    def _balance_accounts_with_prefix(self, query: str) -> List[str]:
+        if not query.isdigit():
+            return []
+        return [
+            account
+            for account in self._index.accounts_with_prefix(query)
+            if account in self._account_balances
+        ]
+
     def _reset_filter(self) -> None:
         self.search_input.clear()
         self.voucher_search_input.clear()
+        self._search_timer.stop()
         self.account_name_label.setText("")
         self._clear_results()
         self.status_label.setText("Søk på konto eller bilag for å vise føringer.")
@@ -228,10 +280,7 @@ class HovedbokPage(QWidget):
         self.result_stack.setCurrentIndex(0)
 
     def _selection_amount_columns(self) -> tuple[int, ...]:
-        headers = [
-            self.table.horizontalHeaderItem(index).text()
-            for index in range(self.table.columnCount())
-        ]
+        headers = self.table.data_model().headers()
         if "Beløp" in headers:
             return (headers.index("Beløp"),)
         if "Debet" in headers and "Kredit" in headers:
@@ -254,20 +303,15 @@ class HovedbokPage(QWidget):
             self.selection_summary_label.setText("")
             return
 
+        model = self.table.data_model()
         values: dict[int, float] = {column: 0.0 for column in amount_columns}
         for row_index in selected_rows:
             for column_index in amount_columns:
-                item = self.table.item(row_index, column_index)
-                if item is None:
-                    continue
-                numeric_value = item.data(Qt.UserRole)
+                numeric_value = model.index(row_index, column_index).data(Qt.UserRole)
                 if isinstance(numeric_value, float):
                     values[column_index] += numeric_value
 
-        headers = [
-            self.table.horizontalHeaderItem(index).text()
-            for index in range(self.table.columnCount())
-        ]
+        headers = model.headers()
         summary_parts = [
             f"{headers[column]}: {format_money_norwegian(values[column])}"
             for column in amount_columns
@@ -282,8 +326,9 @@ class HovedbokPage(QWidget):
         *,
         account_query: str,
         voucher_query: str,
+        as_statement: bool,
     ) -> None:
-        if not self._all_rows:
+        if not len(self._index):
             self._clear_results()
             self.status_label.setText("Ingen føringer lastet inn.")
             return
@@ -304,10 +349,10 @@ class HovedbokPage(QWidget):
                 )
             return
 
-        if voucher_query:
-            self._render_voucher_rows(rows)
-        else:
+        if as_statement:
             self._render_statement_rows(rows)
+        else:
+            self._render_voucher_rows(rows)
 
         self.result_stack.setCurrentWidget(self.table)
         self.status_label.setText(f"Viser {len(rows)} føringer.")
@@ -374,25 +419,28 @@ class HovedbokPage(QWidget):
         populate_table(self.table, columns, table_rows, money_cols=(5, 6, 7))
 
     def _mark_balance_rows_bold(self) -> None:
-        for row_idx, row in enumerate(self._statement_rows):
-            if row.source is not None:
-                continue
-            for col_idx in range(self.table.columnCount()):
-                item = self.table.item(row_idx, col_idx)
-                if item is None:
-                    continue
-                font = item.font()
-                font.setBold(True)
-                item.setFont(font)
+        self.table.data_model().set_bold_rows(
+            row_idx
+            for row_idx, row in enumerate(self._statement_rows)
+            if row.source is None
+        )
+
+    def _on_table_double_clicked(self, index: QModelIndex) -> None:
+        if index.isValid():
+            self._open_voucher_dialog(index.row(), index.column())
 
     def _open_voucher_dialog(self, row_index: int, _column: int) -> None:
-        if row_index < 0 or row_index >= len(self._table_source_rows):
+        if row_index < 0 or row_index >= self.table.data_model().rowCount():
             return
 
-        selected_row = self._table_source_rows[row_index]
+        source_index = self.table.data_model().source_row(row_index)
+        selected_row = self._table_source_rows[source_index]
         if selected_row is None:
             return
-        voucher_rows = rows_for_voucher(self._all_rows, selected_row)
+        # Alle linjer i bilaget har samme transaksjons-ID, så oppslaget i
+        # indeksen gir et lite utvalg å filtrere på fullstendig bilagsnøkkel.
+        candidates = self._index.voucher_rows(selected_row.transaksjons_id)
+        voucher_rows = rows_for_voucher(candidates, selected_row)
         if not voucher_rows:
             return
 
@@ -408,10 +456,7 @@ class HovedbokPage(QWidget):
         )
         layout.addWidget(info)
 
-        detail_table = create_table_widget()
-        detail_table.horizontalHeader().setSectionResizeMode(
-            QHeaderView.ResizeToContents
-        )
+        detail_table = create_table_view()
         detail_rows = [
             (
                 row.konto,
@@ -449,17 +494,48 @@ class HovedbokPage(QWidget):
 
         dialog.exec()
 
-    def _net_series(self, df: "pd.DataFrame", prefix: str) -> "pd.Series":
-        net_col = f"{prefix}_netto"
-        if net_col in df.columns:
-            return pd.to_numeric(df[net_col], errors="coerce").fillna(0.0)
 
-        debit_col = f"{prefix} Debet"
-        credit_col = f"{prefix} Kredit"
-        debit_series = pd.to_numeric(df.get(debit_col, 0.0), errors="coerce").fillna(
-            0.0
-        )
-        credit_series = pd.to_numeric(df.get(credit_col, 0.0), errors="coerce").fillna(
-            0.0
-        )
-        return debit_series - credit_series
+def _collect_account_balances(
+    df: "pd.DataFrame | None",
+) -> Tuple[Dict[str, Tuple[float, float]], Dict[str, str]]:
+    """Henter IB/UB og navn per konto fra saldobalansen."""
+
+    balances: Dict[str, Tuple[float, float]] = {}
+    names: Dict[str, str] = {}
+    if df is None or df.empty or "Konto" not in df.columns:
+        return balances, names
+
+    ib_series = _net_series(df, "IB")
+    ub_series = _net_series(df, "UB")
+
+    for idx in df.index:
+        raw = df.at[idx, "Konto"]
+        if raw is None or pd.isna(raw):
+            continue
+        account = str(raw).strip()
+        if not account:
+            continue
+
+        ib = float(ib_series.get(idx, 0.0))
+        ub = float(ub_series.get(idx, 0.0))
+        balances[account] = (ib, ub)
+
+        account_name = ""
+        if "Kontonavn" in df.columns:
+            raw_name = df.at[idx, "Kontonavn"]
+            if raw_name is not None and not pd.isna(raw_name):
+                account_name = str(raw_name).strip()
+        names[account] = account_name
+    return balances, names
+
+
+def _net_series(df: "pd.DataFrame", prefix: str) -> "pd.Series":
+    net_col = f"{prefix}_netto"
+    if net_col in df.columns:
+        return pd.to_numeric(df[net_col], errors="coerce").fillna(0.0)
+
+    debit_col = f"{prefix} Debet"
+    credit_col = f"{prefix} Kredit"
+    debit_series = pd.to_numeric(df.get(debit_col, 0.0), errors="coerce").fillna(0.0)
+    credit_series = pd.to_numeric(df.get(credit_col, 0.0), errors="coerce").fillna(0.0)
+    return debit_series - credit_series
@@ -17,10 +17,10 @@ from PySide6.QtWidgets import (
     QWidget,
 )
 
-from ...industry_groups import IndustryClassification
 from ..widgets import CardFrame
 
 if TYPE_CHECKING:  # pragma: no cover
+    from ...industry_groups import IndustryClassification
     from ... import saft  # type: ignore
 
 __all__ = ["ImportPage"]
@@ -41,9 +41,9 @@ from ..tables import (
 from ..widgets import CardFrame
 from ..multi_year_stats import (
     assessment_level,
-    deviation_assessment,
-    normal_variation_text,
-    standard_deviation_without_current,
+    revenue_share_frame,
+    share_statistics,
+    summaries_frame,
 )
 
 
@@ -62,7 +62,17 @@ class KeyMetricDefinition:
 
 pd = lazy_pandas()
 
-__all__ = ["RegnskapsanalysePage"]
+__all__ = ["RegnskapsanalyseModel", "RegnskapsanalysePage"]
+
+
+@dataclass(frozen=True)
+class RegnskapsanalyseModel:
+    """Ferdig beregnet balanse- og resultatanalyse for ett datasett."""
+
+    fiscal_year: Optional[str]
+    prepared_df: Optional[pd.DataFrame]
+    balance_rows: Tuple[regnskap.AnalysisRow, ...] = ()
+    result_rows: Tuple[regnskap.AnalysisRow, ...] = ()
 
 
 class RegnskapsanalysePage(QWidget):
@@ -265,6 +275,7 @@ class RegnskapsanalysePage(QWidget):
         self._set_active_section(0)
 
         self._summary_history: List[SummarySnapshot] = []
+        self._history_summaries: pd.DataFrame = pd.DataFrame()
         self._comparison_rows: Optional[
             Sequence[
                 Tuple[
@@ -292,24 +303,55 @@ class RegnskapsanalysePage(QWidget):
             button.setChecked(idx == safe_index)
             button.blockSignals(False)
 
+    @staticmethod
+    def compute_model(
+        df: Optional[pd.DataFrame], fiscal_year: Optional[str] = None
+    ) -> RegnskapsanalyseModel:
+        """Beregner analysene uten å røre widgeten (trådsikker)."""
+
+        year = fiscal_year.strip() if fiscal_year and fiscal_year.strip() else None
+        if df is None or df.empty:
+            return RegnskapsanalyseModel(year, None)
+        prepared = regnskap.prepare_regnskap_dataframe(df)
+        if prepared.empty:
+            return RegnskapsanalyseModel(year, prepared)
+        return RegnskapsanalyseModel(
+            year,
+            prepared,
+            tuple(regnskap.compute_balance_analysis(prepared)),
+            tuple(regnskap.compute_result_analysis(prepared)),
+        )
+
+    def apply_model(self, model: RegnskapsanalyseModel) -> None:
+        """Viser en ferdig beregnet modell."""
+
+        year_changed = model.fiscal_year != self._fiscal_year
+        self._fiscal_year = model.fiscal_year
+        self._prepared_df = model.prepared_df
+        self._update_balance_table(model.balance_rows)
+        self._update_result_table(model.result_rows)
+        if year_changed:
+            self._update_key_metrics_section()
+
     def set_dataframe(
         self, df: Optional[pd.DataFrame], fiscal_year: Optional[str] = None
     ) -> None:
-        self._fiscal_year = (
-            fiscal_year.strip() if fiscal_year and fiscal_year.strip() else None
-        )
-        if df is None or df.empty:
-            self._prepared_df = None
-            self._clear_balance_table()
-            self._clear_result_table()
-            return
+        self.apply_model(self.compute_model(df, fiscal_year))
 
-        self._prepared_df = regnskap.prepare_regnskap_dataframe(df)
-        self._update_balance_table()
-        self._update_result_table()
+    def set_summary_history(
+        self,
+        snapshots: Sequence[SummarySnapshot],
+        summaries: Optional[pd.DataFrame] = None,
+    ) -> None:
+        """Viser historikken.
+
+        ``summaries`` er butikkens samlede NS4102-ramme indeksert på
+        datasettnøkkel (``SaftDatasetStore.multi_year_summaries``). Uten den
+        bygges rammen fra sammendragene i øyeblikksbildene.
+        """
 
-    def set_summary_history(self, snapshots: Sequence[SummarySnapshot]) -> None:
         self._summary_history = list(snapshots)
+        self._history_summaries = self._select_history_summaries(summaries)
         self._update_multi_year_section()
         self._update_key_metrics_section()
         self._update_summary_section()
@@ -340,12 +382,11 @@ class RegnskapsanalysePage(QWidget):
         self.result_info.show()
         self._reset_analysis_table_height(self.result_table)
 
-    def _update_balance_table(self) -> None:
+    def _update_balance_table(self, rows: Sequence[regnskap.AnalysisRow]) -> None:
         if self._prepared_df is None or self._prepared_df.empty:
             self._clear_balance_table()
             return
 
-        rows = regnskap.compute_balance_analysis(self._prepared_df)
         current_label, previous_label = self._year_headers()
         table_rows: List[Tuple[object, object, object, object]] = []
         spacer_after_labels = {
@@ -375,12 +416,11 @@ class RegnskapsanalysePage(QWidget):
         self._lock_analysis_column_widths(self.balance_table)
         self._schedule_table_height_adjustment(self.balance_table)
 
-    def _update_result_table(self) -> None:
+    def _update_result_table(self, rows: Sequence[regnskap.AnalysisRow]) -> None:
         if self._prepared_df is None or self._prepared_df.empty:
             self._clear_result_table()
             return
 
-        rows = regnskap.compute_result_analysis(self._prepared_df)
         current_label, previous_label = self._year_headers()
         table_rows: List[Tuple[object, object, object, object]] = []
         for row in rows:
@@ -1019,13 +1059,32 @@ class RegnskapsanalysePage(QWidget):
             return None
         return revenue - varekostnad
 
+    def _select_history_summaries(
+        self, summaries: Optional[pd.DataFrame]
+    ) -> pd.DataFrame:
+        keys = [snapshot.key for snapshot in self._summary_history]
+        if summaries is not None and all(
+            key is not None and key in summaries.index for key in keys
+        ):
+            return summaries.loc[keys].reset_index(drop=True)
+        return summaries_frame(
+            [snapshot.summary for snapshot in self._summary_history],
+            index=range(len(self._summary_history)),
+        )
+
+    def _multi_year_summaries(self) -> pd.DataFrame:
+        return self._history_summaries
+
     def _multi_year_value_rows(self) -> List[List[object]]:
         snapshots = list(self._summary_history)
+        summaries = self._multi_year_summaries()
         row_specs: List[Tuple[str, Iterable[object]]] = []
 
         def _values_for(key: str) -> Iterable[object]:
-            for snapshot in snapshots:
-                yield self._get_numeric(snapshot.summary, key)
+            if key not in summaries:
+                return [None] * len(snapshots)
+            column = summaries[key]
+            return [None if pd.isna(value) else float(value) for value in column]
 
         row_specs.append(("Salgsinntekter", _values_for("salgsinntekter")))
         row_specs.append(("Annen inntekt", _values_for("annen_inntekt")))
@@ -1080,46 +1139,37 @@ class RegnskapsanalysePage(QWidget):
 
         if include_average:
             share_columns.append("Vurdering")
-        revenue_per_snapshot = [
-            self._get_numeric(snapshot.summary, "salgsinntekter")
-            or self._get_numeric(snapshot.summary, "sum_inntekter")
-            or self._get_numeric(snapshot.summary, "driftsinntekter")
-            for snapshot in self._summary_history
+
+        share_lines = [
+            ("Varekostnad", "varekostnad"),
+            ("Lønnskostnader", "lonn"),
+            ("Andre driftskostnader", "andre_drift"),
+            ("Annen kostnad", "annen_kost"),
+            ("Finanskostnader", "finanskostnader"),
         ]
+        shares = revenue_share_frame(
+            self._multi_year_summaries(), [key for _, key in share_lines]
+        )
+        statistics = share_statistics(shares)
 
-        def _percent_row(label: str, key: str) -> None:
+        for label, key in share_lines:
             row: List[object] = [label]
-            percentages: List[Optional[float]] = []
-            for idx, snapshot in enumerate(self._summary_history):
-                numerator = self._get_numeric(snapshot.summary, key)
-                percent = self._ratio(numerator, revenue_per_snapshot[idx])
-                percentages.append(percent)
-            formatted = [self._format_percent(value) for value in percentages]
-            values: List[object] = list(formatted)
+            values: List[object] = [
+                self._format_percent(None if pd.isna(value) else float(value))
+                for value in shares[key]
+            ]
             if include_average and average_insert_at is not None:
-                avg_value = self._average_without_current(percentages)
-                std_dev = standard_deviation_without_current(percentages)
-                avg_text = self._format_percent(avg_value)
-                normal_text = normal_variation_text(avg_value, std_dev)
-                assessment_text = deviation_assessment(
-                    percentages[-1] if percentages else None, avg_value, std_dev
-                )
+                line_stats = statistics.loc[key]
                 values[average_insert_at - 1 : average_insert_at - 1] = [
-                    avg_text,
-                    normal_text,
+                    self._format_percent(line_stats["Gjennomsnitt"]),
+                    line_stats["Normal variasjon"],
                 ]
                 if spacer_insert_at is not None:
                     values.insert(spacer_insert_at - 1, "")
-                values.append(assessment_text)
+                values.append(line_stats["Vurdering"])
             row.extend(values)
             percent_rows.append(row)
 
-        _percent_row("Varekostnad", "varekostnad")
-        _percent_row("Lønnskostnader", "lonn")
-        _percent_row("Andre driftskostnader", "andre_drift")
-        _percent_row("Annen kostnad", "annen_kost")
-        _percent_row("Finanskostnader", "finanskostnader")
-
         assessment_col = share_columns.index("Vurdering") if include_average else None
         spacer_col = spacer_insert_at - 1 if spacer_insert_at is not None else None
         money_cols = {
@@ -1259,13 +1309,6 @@ class RegnskapsanalysePage(QWidget):
             return None
         return sum(valid) / len(valid)
 
-    def _average_without_current(
-        self, values: Sequence[Optional[float]]
-    ) -> Optional[float]:
-        if len(values) <= 1:
-            return None
-        return self._average(values[:-1])
-
     def _update_summary_section(self) -> None:
         active = self._active_snapshot()
         if not active:
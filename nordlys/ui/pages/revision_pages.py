@@ -21,6 +21,7 @@ from PySide6.QtWidgets import (
     QDialog,
     QDialogButtonBox,
     QCheckBox,
+    QComboBox,
     QDoubleSpinBox,
     QFileDialog,
     QFrame,
@@ -49,22 +50,29 @@ from ...regnskap.driftsmidler import (
     AssetAccession,
     AssetAccessionSummary,
     AssetMovement,
+    AssetRollForwardDataset,
+    AssetRollForwardRow,
     CapitalizationCandidate,
-    find_asset_accessions,
-    find_capitalization_candidates,
-    find_possible_disposals,
+    build_asset_register,
+    build_asset_roll_forward,
     summarize_asset_accessions_by_account,
 )
 from ...regnskap.mva import (
+    VAT_LEVEL_ACCOUNT,
+    VAT_LEVEL_MONTH,
+    VAT_LEVEL_SUPPLIER,
+    VAT_LEVELS,
+    VatCodeProfile,
     VatDeviation,
     VatDeviationAccountSummary,
-    find_vat_deviations,
     summarize_vat_deviations,
 )
 from ...saft.models import CostVoucher
 from ..tables import (
+    DataTableView,
     apply_compact_row_heights,
     compact_row_base_height,
+    create_table_view,
     create_table_widget,
     populate_table,
 )
@@ -74,15 +82,110 @@ if TYPE_CHECKING:  # pragma: no cover - kun for typekontroll
     import pandas as pd
 
 __all__ = [
+    "FixedAssetsModel",
     "FixedAssetsPage",
     "ChecklistPage",
     "VoucherReviewResult",
     "CostVoucherReviewPage",
     "SalesArPage",
     "PurchasesApPage",
+    "MvaDeviationModel",
     "MvaDeviationPage",
 ]
 
+_FLOW_HEADERS = ["Motkonto", "Ført inn (debet)", "Ført ut (kredit)"]
+_CUSTOMER_WARNING_HEADERS = ["Kundenr", "Kundenavn", "Org.nr", "Registerstatus"]
+_SUPPLIER_WARNING_HEADERS = [
+    "Leverandørnr",
+    "Leverandørnavn",
+    "Org.nr",
+    "Registerstatus",
+]
+
+_ROLL_FORWARD_HEADERS = [
+    "År",
+    "Konto",
+    "Kontonavn",
+    "IB",
+    "Tilganger",
+    "Øvrige bevegelser",
+    "UB",
+    "IB mot fjorårets UB",
+]
+
+_MVA_ACCOUNT_DETAIL_HEADERS = [
+    "Bilag",
+    "Dato",
+    "Leverandør",
+    "MVA-kode",
+    "Motkonto",
+    "Beløp",
+    "Beskrivelse",
+]
+_COST_VOUCHER_LINE_HEADERS = [
+    "Konto",
+    "Kontonavn",
+    "MVA-kode",
+    "Tekst",
+    "Debet",
+    "Kredit",
+]
+
+_MVA_LEVEL_LABELS = {
+    VAT_LEVEL_ACCOUNT: "Per konto",
+    VAT_LEVEL_SUPPLIER: "Per konto og leverandør",
+    VAT_LEVEL_MONTH: "Per konto og måned",
+}
+_MVA_DIMENSION_HEADERS = {
+    VAT_LEVEL_SUPPLIER: "Leverandør",
+    VAT_LEVEL_MONTH: "Måned",
+}
+
+
+def _build_registry_warning_card(
+    parties: str, headers: Sequence[str]
+) -> Tuple[CardFrame, QTableWidget, QLabel]:
+    """Kort som lister motparter med varsel i Enhetsregisteret."""
+
+    card = CardFrame(
+        "Registervarsler",
+        f"{parties} som er konkurs, under avvikling eller slettet i Enhetsregisteret.",
+    )
+    table = create_table_widget()
+    table.setColumnCount(len(headers))
+    table.setHorizontalHeaderLabels(list(headers))
+    table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeToContents)
+    note = QLabel()
+    note.setObjectName("infoLabel")
+    note.setWordWrap(True)
+    note.hide()
+    card.add_widget(note)
+    card.add_widget(table)
+    card.hide()
+    return card, table, note
+
+
+def _show_registry_warnings(
+    card: CardFrame,
+    table: QTableWidget,
+    note: QLabel,
+    headers: Sequence[str],
+    rows: Iterable[Tuple[str, str, str, str]],
+    snapshot_imported_at: Optional[float],
+) -> None:
+    row_buffer = list(rows)
+    populate_table(table, headers, row_buffer)
+    table.setVisible(bool(row_buffer))
+    if snapshot_imported_at is not None:
+        imported = datetime.fromtimestamp(snapshot_imported_at)
+        age_days = max(0, (datetime.now() - imported).days)
+        note.setText(
+            "Registerstatus er hentet fra en lokal kopi av Enhetsregisteret "
+            f"importert {imported.strftime('%d.%m.%Y')} ({age_days} dager siden)."
+        )
+    note.setVisible(snapshot_imported_at is not None)
+    card.setVisible(bool(row_buffer) or snapshot_imported_at is not None)
+
 
 def _requested_top_count(spin_box: QSpinBox) -> int:
     """Returner brukers valg etter at spinboxen har tolket inndata."""
@@ -92,6 +195,29 @@ def _requested_top_count(spin_box: QSpinBox) -> int:
     return max(spin_box.minimum(), min(spin_box.maximum(), value))
 
 
+@dataclass(frozen=True)
+class MvaDeviationModel:
+    """Ferdig beregnet mva-profil og avvik for ett datasett."""
+
+    vouchers: Tuple[CostVoucher, ...]
+    profile: Optional[VatCodeProfile]
+    min_observations: int
+    deviations: Tuple[VatDeviation, ...] = ()
+    summaries: Tuple[VatDeviationAccountSummary, ...] = ()
+    level: str = VAT_LEVEL_ACCOUNT
+    flag_counts: Tuple[Tuple[str, int], ...] = ()
+
+
+@dataclass(frozen=True)
+class FixedAssetsModel:
+    """Ferdig beregnet anleggsregister for ett datasett."""
+
+    accessions: Tuple[AssetAccession, ...]
+    disposals: Tuple[AssetMovement, ...]
+    capitalization_candidates: Tuple[CapitalizationCandidate, ...]
+    roll_forward: Tuple[AssetRollForwardRow, ...] = ()
+
+
 @dataclass
 class VoucherReviewResult:
     """Resultat fra vurdering av et enkelt bilag."""
@@ -111,6 +237,7 @@ class _MvaAccountVoucherRow:
     voucher_amount: float
     description: str
     is_deviation: bool
+    transaction_id: str = ""
 
 
 class ChecklistPage(QWidget):
@@ -145,10 +272,16 @@ class _MvaAccountDetailsDialog(QDialog):
         account_name: str,
         expected_vat_code: str,
         rows: Sequence[_MvaAccountVoucherRow],
+        dimension_label: str = "",
+        dimension: str = "",
         parent: Optional[QWidget] = None,
     ) -> None:
         super().__init__(parent)
-        self.setWindowTitle(f"MVA-avvik {account}")
+        self.setWindowTitle(
+            f"MVA-avvik {account} – {dimension}"
+            if dimension
+            else f"MVA-avvik {account}"
+        )
         self.setModal(True)
         self.resize(1000, 620)
 
@@ -156,35 +289,22 @@ class _MvaAccountDetailsDialog(QDialog):
         layout.setContentsMargins(16, 16, 16, 16)
         layout.setSpacing(12)
 
+        dimension_line = f"{dimension_label}: {dimension}\n" if dimension else ""
         intro = QLabel(
             "Konto: "
             f"{account} ({account_name or 'Ukjent konto'})\n"
+            f"{dimension_line}"
             f"Vanlig MVA-kode: {expected_vat_code}\n"
             f"Avvikende bilag: {len(rows)}"
         )
         intro.setWordWrap(True)
         layout.addWidget(intro)
 
-        table = create_table_widget()
-        table.setColumnCount(7)
-        table.setHorizontalHeaderLabels(
-            [
-                "Bilag",
-                "Dato",
-                "Leverandør",
-                "MVA-kode",
-                "Motkonto",
-                "Beløp",
-                "Beskrivelse",
-            ]
-        )
+        # En konto kan ha svært mange avvikende bilag; modellbasert tabell.
+        table = create_table_view()
+        table.setHorizontalHeaderLabels(_MVA_ACCOUNT_DETAIL_HEADERS)
         header = table.horizontalHeader()
-        header.setSectionResizeMode(0, QHeaderView.ResizeToContents)
-        header.setSectionResizeMode(1, QHeaderView.ResizeToContents)
         header.setSectionResizeMode(2, QHeaderView.Stretch)
-        header.setSectionResizeMode(3, QHeaderView.ResizeToContents)
-        header.setSectionResizeMode(4, QHeaderView.ResizeToContents)
-        header.setSectionResizeMode(5, QHeaderView.ResizeToContents)
         header.setSectionResizeMode(6, QHeaderView.Stretch)
         table_rows = [
             (
@@ -198,20 +318,7 @@ class _MvaAccountDetailsDialog(QDialog):
             )
             for item in sorted(rows, key=_mva_account_row_sort_key)
         ]
-        populate_table(
-            table,
-            [
-                "Bilag",
-                "Dato",
-                "Leverandør",
-                "MVA-kode",
-                "Motkonto",
-                "Beløp",
-                "Beskrivelse",
-            ],
-            table_rows,
-            money_cols={5},
-        )
+        populate_table(table, _MVA_ACCOUNT_DETAIL_HEADERS, table_rows, money_cols={5})
         layout.addWidget(table, 1)
 
         buttons = QDialogButtonBox(QDialogButtonBox.Close)
@@ -226,12 +333,29 @@ class _MvaAccountDetailsDialog(QDialog):
         return value.strftime("%d.%m.%Y")
 
 
+def _deviation_flag_counts(
+    profile: VatCodeProfile, minimum_observations: int
+) -> Tuple[Tuple[str, int], ...]:
+    """Antall avvikende linjer per nivå, til visning i nivåvelgeren."""
+
+    flags = profile.deviation_flags(minimum_observations)
+    return tuple((level, int(flags[level].sum())) for level in VAT_LEVELS)
+
+
 def _mva_deviation_sort_key(item: VatDeviation) -> tuple[int, date, str]:
     has_no_date = 1 if item.transaction_date is None else 0
     sort_date = item.transaction_date or date.min
     return (has_no_date, sort_date, item.voucher_number)
 
 
+def _mva_voucher_key(
+    item: VatDeviation | _MvaAccountVoucherRow,
+) -> tuple[str, str, Optional[date]]:
+    # Bilagsnummer er bare unike innenfor en journal; transaksjons-ID og dato
+    # skiller bilag med samme nummer.
+    return (item.transaction_id, item.voucher_number, item.transaction_date)
+
+
 def _mva_account_row_sort_key(item: _MvaAccountVoucherRow) -> tuple[int, date, str]:
     has_no_date = 1 if item.transaction_date is None else 0
     sort_date = item.transaction_date or date.min
@@ -239,14 +363,20 @@ def _mva_account_row_sort_key(item: _MvaAccountVoucherRow) -> tuple[int, date, s
 
 
 class MvaDeviationPage(QWidget):
-    """Viser oppsummering av avvikende mva-behandling per konto."""
+    """Viser oppsummering av avvikende mva-behandling per konto.
+
+    Avvik kan vises per konto, per konto og leverandør eller per konto og
+    måned; nivåvelgeren viser antall avvikende linjer på hvert nivå.
+    """
 
     def __init__(self, title: str, subtitle: str) -> None:
         super().__init__()
-        self._deviations_by_account: dict[str, list[VatDeviation]] = {}
+        self._deviations_by_group: dict[tuple[str, str], list[VatDeviation]] = {}
         self._account_names: dict[str, str] = {}
-        self._expected_vat_by_account: dict[str, str] = {}
+        self._expected_vat_by_group: dict[tuple[str, str], str] = {}
+        self._shown_level = VAT_LEVEL_ACCOUNT
         self._vouchers: list[CostVoucher] = []
+        self._vat_profile: Optional[VatCodeProfile] = None
         self._all_deviations: list[VatDeviation] = []
         self._all_summaries: list[VatDeviationAccountSummary] = []
 
@@ -259,6 +389,7 @@ class MvaDeviationPage(QWidget):
 
         intro = QLabel(
             "Siden viser oppsummering per konto med antall avvikende bilag og sum. "
+            "Velg nivå for å sammenligne mot vanlig kode per leverandør eller måned. "
             "Trykk 'Vis bilag' for detaljer."
         )
         intro.setWordWrap(True)
@@ -271,6 +402,16 @@ class MvaDeviationPage(QWidget):
         filter_row = QHBoxLayout()
         filter_row.setContentsMargins(0, 0, 0, 0)
         filter_row.setSpacing(10)
+        filter_row.addWidget(QLabel("Nivå:"))
+        self.level_combo = QComboBox()
+        for level in VAT_LEVELS:
+            self.level_combo.addItem(_MVA_LEVEL_LABELS[level], level)
+        self.level_combo.setEnabled(False)
+        self.level_combo.currentIndexChanged.connect(
+            lambda _index: self._recompute_deviations()
+        )
+        filter_row.addWidget(self.level_combo)
+        filter_row.addSpacing(16)
         self.chk_min_amount = QCheckBox("Vis kun avvik over sum:")
         self.chk_min_amount.toggled.connect(self._on_filter_toggled)
         self.spin_min_amount = QDoubleSpinBox()
@@ -286,6 +427,16 @@ class MvaDeviationPage(QWidget):
         )
         filter_row.addWidget(self.chk_min_amount)
         filter_row.addWidget(self.spin_min_amount)
+        filter_row.addSpacing(16)
+        filter_row.addWidget(QLabel("Minst antall bilag per gruppe:"))
+        self.spin_min_observations = QSpinBox()
+        self.spin_min_observations.setRange(2, 1000)
+        self.spin_min_observations.setValue(2)
+        self.spin_min_observations.setEnabled(False)
+        self.spin_min_observations.valueChanged.connect(
+            lambda _value: self._recompute_deviations()
+        )
+        filter_row.addWidget(self.spin_min_observations)
         filter_row.addStretch(1)
         self.card.add_layout(filter_row)
 
@@ -320,11 +471,12 @@ class MvaDeviationPage(QWidget):
         )
 
         self.table = create_table_widget()
-        self.table.setColumnCount(7)
+        self.table.setColumnCount(8)
         self.table.setHorizontalHeaderLabels(
             [
                 "Konto",
                 "Kontonavn",
+                "Leverandør",
                 "Vanlig MVA-kode",
                 "Avvikende bilag",
                 "Sum avvik",
@@ -339,8 +491,10 @@ class MvaDeviationPage(QWidget):
         header.setSectionResizeMode(3, QHeaderView.ResizeToContents)
         header.setSectionResizeMode(4, QHeaderView.ResizeToContents)
         header.setSectionResizeMode(5, QHeaderView.ResizeToContents)
-        header.setSectionResizeMode(6, QHeaderView.Fixed)
-        self.table.setColumnWidth(6, 132)
+        header.setSectionResizeMode(6, QHeaderView.ResizeToContents)
+        header.setSectionResizeMode(7, QHeaderView.Fixed)
+        self.table.setColumnWidth(7, 132)
+        self.table.setColumnHidden(2, True)
         self.table.verticalHeader().setMinimumSectionSize(40)
         self.table.verticalHeader().setDefaultSectionSize(40)
         self.table.hide()
@@ -350,15 +504,109 @@ class MvaDeviationPage(QWidget):
         layout.addWidget(self.card, 1)
         self._set_summary_values(0, 0, 0.0)
 
-    def set_vouchers(self, vouchers: Sequence[CostVoucher]) -> None:
-        self._deviations_by_account = {}
+    @staticmethod
+    def compute_model(
+        vouchers: Sequence[CostVoucher],
+        vat_profile: Optional[VatCodeProfile],
+        min_observations: int,
+        level: str = VAT_LEVEL_ACCOUNT,
+    ) -> "MvaDeviationModel":
+        """Bygger mva-profil og avvik uten å røre widgeten (trådsikker)."""
+
+        if not vouchers:
+            return MvaDeviationModel(
+                tuple(vouchers), None, min_observations, level=level
+            )
+        profile = vat_profile
+        if profile is None:
+            profile = VatCodeProfile.from_vouchers(vouchers)
+        deviations = tuple(profile.deviations(min_observations, level=level))
+        return MvaDeviationModel(
+            tuple(vouchers),
+            profile,
+            min_observations,
+            deviations,
+            tuple(summarize_vat_deviations(deviations)),
+            level,
+            _deviation_flag_counts(profile, min_observations),
+        )
+
+    def apply_model(self, model: "MvaDeviationModel") -> None:
+        """Viser en ferdig beregnet modell."""
+
+        self._vouchers = list(model.vouchers)
+        self._vat_profile = model.profile
+        self.spin_min_observations.setEnabled(self._vat_profile is not None)
+        self.level_combo.setEnabled(self._vat_profile is not None)
+        if (
+            model.min_observations != self.min_observations()
+            or model.level != self.level()
+        ):
+            # Terskel eller nivå ble endret mens modellen ble beregnet.
+            self._recompute_deviations()
+            return
+        self._set_level_counts(model.flag_counts)
+        self._show_deviations(model.deviations, model.summaries, model.level)
+
+    def min_observations(self) -> int:
+        return self.spin_min_observations.value()
+
+    def level(self) -> str:
+        """Valgt nivå for sammenligning (konto, leverandør eller måned)."""
+
+        return str(self.level_combo.currentData() or VAT_LEVEL_ACCOUNT)
+
+    def set_vouchers(
+        self,
+        vouchers: Sequence[CostVoucher],
+        vat_profile: Optional[VatCodeProfile] = None,
+    ) -> None:
+        self.apply_model(
+            self.compute_model(
+                vouchers, vat_profile, self.min_observations(), self.level()
+            )
+        )
+
+    def _recompute_deviations(self) -> None:
+        """Finner avvik på nytt fra mva-profilen uten å lese bilagene igjen."""
+
+        level = self.level()
+        if self._vat_profile is None:
+            self._set_level_counts(())
+            self._show_deviations((), (), level)
+            return
+        minimum = self.min_observations()
+        deviations = self._vat_profile.deviations(minimum, level=level)
+        self._set_level_counts(_deviation_flag_counts(self._vat_profile, minimum))
+        self._show_deviations(deviations, summarize_vat_deviations(deviations), level)
+
+    def _set_level_counts(self, flag_counts: Sequence[Tuple[str, int]]) -> None:
+        counts = dict(flag_counts)
+        for index in range(self.level_combo.count()):
+            level = self.level_combo.itemData(index)
+            label = _MVA_LEVEL_LABELS[level]
+            if level in counts:
+                label = f"{label} ({self._format_count(counts[level])})"
+            self.level_combo.setItemText(index, label)
+
+    def _show_deviations(
+        self,
+        deviations: Sequence[VatDeviation],
+        summaries: Sequence[VatDeviationAccountSummary],
+        level: str = VAT_LEVEL_ACCOUNT,
+    ) -> None:
+        self._deviations_by_group = {}
         self._account_names = {}
-        self._expected_vat_by_account = {}
-        self._vouchers = list(vouchers)
+        self._expected_vat_by_group = {}
         self._all_deviations = []
         self._all_summaries = []
+        self._shown_level = level
+        dimension_header = _MVA_DIMENSION_HEADERS.get(level)
+        self.table.setColumnHidden(2, dimension_header is None)
+        if dimension_header is not None:
+            self.table.setHorizontalHeaderItem(2, QTableWidgetItem(dimension_header))
 
-        if not vouchers:
+        if self._vat_profile is None:
             self.status_label.setText("Ingen bilag tilgjengelig i valgt periode.")
             self.table.setRowCount(0)
             self._set_summary_values(0, 0, 0.0)
@@ -367,8 +615,6 @@ class MvaDeviationPage(QWidget):
             self.spin_min_amount.setEnabled(False)
             return
 
-        deviations = find_vat_deviations(vouchers)
-        summaries = summarize_vat_deviations(deviations)
         self._all_deviations = list(deviations)
         self._all_summaries = list(summaries)
         if not summaries:
@@ -381,12 +627,12 @@ class MvaDeviationPage(QWidget):
             return
 
         for item in deviations:
-            account = item.account
-            if account not in self._deviations_by_account:
-                self._deviations_by_account[account] = []
-            self._deviations_by_account[account].append(item)
-            self._account_names[account] = item.account_name
-            self._expected_vat_by_account[account] = item.expected_vat_code
+            group = (item.account, item.dimension)
+            if group not in self._deviations_by_group:
+                self._deviations_by_group[group] = []
+            self._deviations_by_group[group].append(item)
+            self._account_names[item.account] = item.account_name
+            self._expected_vat_by_group[group] = item.expected_vat_code
 
         self.chk_min_amount.setEnabled(True)
         self.spin_min_amount.setEnabled(self.chk_min_amount.isChecked())
@@ -431,39 +677,40 @@ class MvaDeviationPage(QWidget):
         for row, summary in enumerate(visible_summaries):
             self._set_text_item(row, 0, summary.account)
             self._set_text_item(row, 1, summary.account_name)
-            self._set_text_item(row, 2, summary.expected_vat_code)
-            self._set_text_item(row, 3, self._format_count(summary.deviation_count))
-            self._set_text_item(row, 4, format_currency(summary.deviation_amount))
-            self._set_text_item(row, 5, self._format_count(summary.total_count))
+            self._set_text_item(row, 2, summary.dimension)
+            self._set_text_item(row, 3, summary.expected_vat_code)
+            self._set_text_item(row, 4, self._format_count(summary.deviation_count))
+            self._set_text_item(row, 5, format_currency(summary.deviation_amount))
+            self._set_text_item(row, 6, self._format_count(summary.total_count))
 
             button = QPushButton("Vis bilag")
             button.setObjectName("tableActionButton")
             button.setMinimumWidth(108)
             button.setMinimumHeight(30)
             button.clicked.connect(
-                lambda _checked=False, account=summary.account: self._show_details(
-                    account
+                lambda _checked=False, account=summary.account, dimension=summary.dimension: self._show_details(
+                    account, dimension
                 )
             )
-            self.table.setCellWidget(row, 6, button)
+            self.table.setCellWidget(row, 7, button)
             self.table.setRowHeight(row, 40)
 
         total_amount = sum(item.deviation_amount for item in visible_summaries)
         total_deviation_vouchers = sum(
             item.deviation_count for item in visible_summaries
         )
-        self._set_summary_values(
-            len(visible_summaries), total_deviation_vouchers, total_amount
-        )
+        account_count = len({item.account for item in visible_summaries})
+        self._set_summary_values(account_count, total_deviation_vouchers, total_amount)
+        unit = "kontoer" if self._shown_level == VAT_LEVEL_ACCOUNT else "grupper"
         if self.chk_min_amount.isChecked():
             self.status_label.setText(
                 "Viser "
-                f"{self._format_count(len(visible_summaries))} kontoer med MVA-avvik "
+                f"{self._format_count(len(visible_summaries))} {unit} med MVA-avvik "
                 f"over {format_currency(minimum_sum)}."
             )
         else:
             self.status_label.setText(
-                f"Fant {self._format_count(len(visible_summaries))} kontoer med MVA-avvik."
+                f"Fant {self._format_count(len(visible_summaries))} {unit} med MVA-avvik."
             )
         self._toggle_table(True)
 
@@ -474,25 +721,38 @@ class MvaDeviationPage(QWidget):
         self.badge_vouchers.set_value(self._format_count(voucher_count))
         self.badge_amount.set_value(format_currency(total_amount))
 
-    def _show_details(self, account: str) -> None:
-        expected_vat = self._expected_vat_by_account.get(account)
+    def _show_details(self, account: str, dimension: str = "") -> None:
+        dialog = self._details_dialog(account, dimension)
+        if dialog is not None:
+            dialog.exec()
+
+    def _details_dialog(
+        self, account: str, dimension: str = ""
+    ) -> Optional[_MvaAccountDetailsDialog]:
+        group = (account, dimension)
+        expected_vat = self._expected_vat_by_group.get(group)
         if not expected_vat:
-            return
+            return None
+        # Avvikene i gruppen avgrenser bilagene til valgt leverandør eller måned.
+        voucher_keys = {
+            _mva_voucher_key(item) for item in self._deviations_by_group.get(group, [])
+        }
         rows = [
             row
             for row in self._collect_account_rows(account, expected_vat)
-            if row.is_deviation
+            if row.is_deviation and _mva_voucher_key(row) in voucher_keys
         ]
         if not rows:
-            return
-        dialog = _MvaAccountDetailsDialog(
+            return None
+        return _MvaAccountDetailsDialog(
             account=account,
             account_name=self._account_names.get(account, ""),
             expected_vat_code=expected_vat,
             rows=rows,
+            dimension_label=_MVA_DIMENSION_HEADERS.get(self._shown_level, ""),
+            dimension=dimension,
             parent=self,
         )
-        dialog.exec()
 
     def _collect_account_rows(
         self, account: str, expected_vat_code: str
@@ -544,6 +804,7 @@ class MvaDeviationPage(QWidget):
                     voucher_amount=abs(account_amount),
                     description=(voucher.description or "").strip(),
                     is_deviation=observed_vat_code != expected_vat_code,
+                    transaction_id=(voucher.transaction_id or "").strip(),
                 )
             )
         return rows
@@ -557,7 +818,7 @@ class MvaDeviationPage(QWidget):
 
     def _set_text_item(self, row: int, column: int, text: str) -> None:
         item = QTableWidgetItem(text)
-        if column in {3, 4, 5}:
+        if column in {4, 5, 6}:
             item.setTextAlignment(Qt.AlignHCenter | Qt.AlignVCenter)
         self.table.setItem(row, column, item)
 
@@ -810,25 +1071,10 @@ class _CostVoucherReviewModule(QWidget):
         self.value_status = cast(QLabel, getattr(self, "value_status"))
         self._update_status_display(None)
 
-        self.table_lines = create_table_widget()
-        self.table_lines.setColumnCount(6)
-        self.table_lines.setHorizontalHeaderLabels(
-            ["Konto", "Kontonavn", "MVA-kode", "Tekst", "Debet", "Kredit"]
-        )
-        self.table_lines.horizontalHeader().setSectionResizeMode(
-            0, QHeaderView.ResizeToContents
-        )
+        self.table_lines = create_table_view()
+        self.table_lines.setHorizontalHeaderLabels(_COST_VOUCHER_LINE_HEADERS)
         self.table_lines.horizontalHeader().setSectionResizeMode(1, QHeaderView.Stretch)
-        self.table_lines.horizontalHeader().setSectionResizeMode(
-            2, QHeaderView.ResizeToContents
-        )
         self.table_lines.horizontalHeader().setSectionResizeMode(3, QHeaderView.Stretch)
-        self.table_lines.horizontalHeader().setSectionResizeMode(
-            4, QHeaderView.ResizeToContents
-        )
-        self.table_lines.horizontalHeader().setSectionResizeMode(
-            5, QHeaderView.ResizeToContents
-        )
         self.detail_card.add_widget(self.table_lines)
 
         comment_label = QLabel("Kommentar (frivillig):")
@@ -1229,23 +1475,23 @@ class _CostVoucherReviewModule(QWidget):
         self.value_amount.setText(self._format_amount(voucher.amount))
         self.value_description.setText(voucher.description or "–")
 
-        self.table_lines.setRowCount(len(voucher.lines))
-        for row, line in enumerate(voucher.lines):
-            self.table_lines.setItem(row, 0, QTableWidgetItem(line.account or "–"))
-            account_name_item = QTableWidgetItem(line.account_name or "–")
-            account_name_item.setToolTip(line.account_name or "")
-            self.table_lines.setItem(row, 1, account_name_item)
-            vat_item = QTableWidgetItem(line.vat_code or "–")
-            self.table_lines.setItem(row, 2, vat_item)
-            self.table_lines.setItem(row, 3, QTableWidgetItem(line.description or ""))
-            debit_item = QTableWidgetItem(self._format_amount(line.debit))
-            debit_item.setTextAlignment(Qt.AlignHCenter | Qt.AlignVCenter)
-            self.table_lines.setItem(row, 4, debit_item)
-            credit_item = QTableWidgetItem(self._format_amount(line.credit))
-            credit_item.setTextAlignment(Qt.AlignHCenter | Qt.AlignVCenter)
-            self.table_lines.setItem(row, 5, credit_item)
-
-        self.table_lines.resizeRowsToContents()
+        # Beløpene vises med øre, derfor formateres de her og ikke som
+        # pengekolonner i modellen.
+        populate_table(
+            self.table_lines,
+            _COST_VOUCHER_LINE_HEADERS,
+            [
+                (
+                    line.account or "–",
+                    line.account_name or "–",
+                    line.vat_code or "–",
+                    line.description or "",
+                    self._format_amount(line.debit),
+                    self._format_amount(line.credit),
+                )
+                for line in voucher.lines
+            ],
+        )
         current_result = self._get_current_result()
         if current_result and current_result.comment:
             self.txt_comment.setPlainText(current_result.comment)
@@ -1926,10 +2172,12 @@ class FixedAssetsPage(QWidget):
         additions_page = self._build_accession_page()
         disposals_page = self._build_disposal_page()
         capitalizations_page = self._build_capitalization_page()
+        roll_forward_page = self._build_roll_forward_page()
 
         self.tab_widget.addTab(additions_page, "Tilganger")
         self.tab_widget.addTab(disposals_page, "Avganger")
         self.tab_widget.addTab(capitalizations_page, "Burde aktiveres")
+        self.tab_widget.addTab(roll_forward_page, "Avstemming over år")
 
         layout.addWidget(self.tab_widget)
 
@@ -1987,7 +2235,7 @@ class FixedAssetsPage(QWidget):
         self.capitalization_card.setSizePolicy(
             QSizePolicy.Expanding, QSizePolicy.Expanding
         )
-        self.capitalization_table = create_table_widget()
+        self.capitalization_table = create_table_view()
         self.capitalization_table.setColumnCount(6)
         self.capitalization_table.setHorizontalHeaderLabels(
             [
@@ -2012,25 +2260,78 @@ class FixedAssetsPage(QWidget):
         page_layout.addWidget(self.capitalization_card, 1)
         return page
 
-    def _configure_full_width_table(self, table: QTableWidget) -> None:
+    def _build_roll_forward_page(self) -> QWidget:
+        page = QWidget()
+        page_layout = QVBoxLayout(page)
+        page_layout.setContentsMargins(0, 0, 0, 0)
+        page_layout.setSpacing(24)
+
+        self.roll_forward_card = CardFrame(
+            "Avstemming over år",
+            "IB, tilganger og UB per 11xx-12xx-konto for alle innleste år.",
+        )
+        self.roll_forward_card.setSizePolicy(
+            QSizePolicy.Expanding, QSizePolicy.Expanding
+        )
+        self.roll_forward_table = create_table_view()
+        self.roll_forward_table.setColumnCount(len(_ROLL_FORWARD_HEADERS))
+        self.roll_forward_table.setHorizontalHeaderLabels(_ROLL_FORWARD_HEADERS)
+        self._configure_full_width_table(self.roll_forward_table)
+        self.roll_forward_empty = EmptyStateWidget(
+            "Ingen anleggskontoer",
+            "Importer en eller flere SAF-T-filer for å rulle driftsmidlene fremover.",
+            icon="📊",
+        )
+        self.roll_forward_table.hide()
+        self.roll_forward_card.add_widget(self.roll_forward_empty)
+        self.roll_forward_card.add_widget(self.roll_forward_table)
+
+        page_layout.addWidget(self.roll_forward_card, 1)
+        return page
+
+    def _configure_full_width_table(self, table: QTableWidget | DataTableView) -> None:
         header = table.horizontalHeader()
         header.setSectionResizeMode(QHeaderView.Stretch)
         table.setHorizontalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
         table.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
 
+    @staticmethod
+    def compute_model(
+        trial_balance: Optional["pd.DataFrame"],
+        vouchers: Sequence[CostVoucher],
+        roll_forward_datasets: Sequence[AssetRollForwardDataset] = (),
+    ) -> FixedAssetsModel:
+        """Kjører anleggsregisteret uten å røre widgeten (trådsikker).
+
+        ``roll_forward_datasets`` er (år, saldobalanse, bilag) for alle
+        innleste år, slik ``SaftDatasetStore.asset_roll_forward_datasets``
+        leverer dem.
+        """
+
+        register = build_asset_register(trial_balance, vouchers)
+        return FixedAssetsModel(
+            tuple(register.accessions),
+            tuple(register.disposals),
+            tuple(register.capitalization_candidates),
+            tuple(build_asset_roll_forward(roll_forward_datasets)),
+        )
+
+    def apply_model(self, model: FixedAssetsModel) -> None:
+        """Viser en ferdig beregnet modell."""
+
+        self._populate_accessions(model.accessions)
+        self._populate_movements(
+            self.disposal_table, self.disposal_empty, model.disposals
+        )
+        self._populate_capitalizations(model.capitalization_candidates)
+        self._populate_roll_forward(model.roll_forward)
+
     def update_data(
         self,
         trial_balance: Optional["pd.DataFrame"],
         vouchers: Sequence[CostVoucher],
     ) -> None:
-        additions = find_asset_accessions(vouchers)
-        self._populate_accessions(additions)
-
-        disposals = find_possible_disposals(trial_balance)
-        self._populate_movements(self.disposal_table, self.disposal_empty, disposals)
-
-        candidates = find_capitalization_candidates(vouchers)
-        self._populate_capitalizations(candidates)
+        self.apply_model(self.compute_model(trial_balance, vouchers))
 
     def clear(self) -> None:
         self.update_data(None, [])
@@ -2039,7 +2340,7 @@ class FixedAssetsPage(QWidget):
         self,
     ) -> Tuple[
         CardFrame,
-        QTableWidget,
+        DataTableView,
         QTableWidget,
         QLabel,
         EmptyStateWidget,
@@ -2059,7 +2360,7 @@ class FixedAssetsPage(QWidget):
         content_layout.setContentsMargins(0, 0, 0, 0)
         content_layout.setSpacing(8)
 
-        table = create_table_widget()
+        table = create_table_view()
         table.setColumnCount(8)
         table.setHorizontalHeaderLabels(
             [
@@ -2106,9 +2407,9 @@ class FixedAssetsPage(QWidget):
 
     def _build_movement_card(
         self, title: str, subtitle: str, empty_title: str
-    ) -> Tuple[CardFrame, QTableWidget, EmptyStateWidget]:
+    ) -> Tuple[CardFrame, DataTableView, EmptyStateWidget]:
         card = CardFrame(title, subtitle)
-        table = create_table_widget()
+        table = create_table_view()
         table.setColumnCount(5)
         table.setHorizontalHeaderLabels(["Konto", "Kontonavn", "IB", "UB", "Endring"])
         empty = EmptyStateWidget(
@@ -2123,7 +2424,7 @@ class FixedAssetsPage(QWidget):
 
     def _populate_movements(
         self,
-        table: QTableWidget,
+        table: DataTableView,
         empty_state: EmptyStateWidget,
         movements: Sequence[AssetMovement],
     ) -> None:
@@ -2222,6 +2523,30 @@ class FixedAssetsPage(QWidget):
             self.capitalization_table, self.capitalization_empty, bool(rows)
         )
 
+    def _populate_roll_forward(self, rows: Sequence[AssetRollForwardRow]) -> None:
+        table_rows = [
+            (
+                str(row.year) if row.year is not None else "—",
+                row.account,
+                row.name or "—",
+                row.opening_balance,
+                row.additions,
+                row.other_movements,
+                row.closing_balance,
+                row.opening_difference,
+            )
+            for row in rows
+        ]
+        populate_table(
+            self.roll_forward_table,
+            _ROLL_FORWARD_HEADERS,
+            table_rows,
+            money_cols={3, 4, 5, 6, 7},
+        )
+        self._toggle_empty_state(
+            self.roll_forward_table, self.roll_forward_empty, bool(table_rows)
+        )
+
     @staticmethod
     def _format_date(value: object) -> str:
         if isinstance(value, datetime):
@@ -2234,7 +2559,9 @@ class FixedAssetsPage(QWidget):
 
     @staticmethod
     def _toggle_empty_state(
-        table: QTableWidget, empty_state: EmptyStateWidget, has_rows: bool
+        table: QTableWidget | DataTableView,
+        empty_state: EmptyStateWidget,
+        has_rows: bool,
     ) -> None:
         if has_rows:
             empty_state.hide()
@@ -2365,6 +2692,13 @@ class SalesArPage(QWidget):
         self.top_card.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
         page_layout.addWidget(self.top_card, 1)
 
+        (
+            self.registry_card,
+            self.registry_table,
+            self.registry_note,
+        ) = _build_registry_warning_card("Kunder", _CUSTOMER_WARNING_HEADERS)
+        page_layout.addWidget(self.registry_card)
+
         return page
 
     def _build_credit_note_tab(self) -> QWidget:
@@ -2416,7 +2750,7 @@ class SalesArPage(QWidget):
         self.list_empty.setSizePolicy(
             QSizePolicy.Expanding, QSizePolicy.MinimumExpanding
         )
-        self.list_table = create_table_widget()
+        self.list_table = create_table_view()
         self.list_table.setColumnCount(5)
         self.list_table.setHorizontalHeaderLabels(
             ["Dato", "Bilagsnr", "Beskrivelse", "Kontoer", "Beløp"]
@@ -2502,6 +2836,25 @@ class SalesArPage(QWidget):
         self.top_table.hide()
         self.empty_state.show()
 
+    def set_registry_warnings(
+        self,
+        rows: Iterable[Tuple[str, str, str, str]],
+        snapshot_imported_at: Optional[float] = None,
+    ) -> None:
+        """Viser kunder som er konkurs, under avvikling eller slettet.
+
+        ``snapshot_imported_at`` viser alderen på en lokal registerkopi.
+        """
+
+        _show_registry_warnings(
+            self.registry_card,
+            self.registry_table,
+            self.registry_note,
+            _CUSTOMER_WARNING_HEADERS,
+            rows,
+            snapshot_imported_at,
+        )
+
     def set_credit_notes(
         self,
         rows: Iterable[Tuple[str, str, str, str, float]],
@@ -2599,6 +2952,22 @@ class SalesArPage(QWidget):
         )
         self.receivable_missing_table.setSortingEnabled(True)
 
+    def set_counter_account_flows(
+        self,
+        receivable_rows: Iterable[Tuple[str, float, float]],
+        bank_rows: Iterable[Tuple[str, float, float]],
+    ) -> None:
+        """Viser hvilke kontoer som fører mot kundefordringer og bank."""
+
+        for table, empty_state, rows in (
+            (self.receivable_flow_table, self.receivable_flow_empty, receivable_rows),
+            (self.bank_flow_table, self.bank_flow_empty, bank_rows),
+        ):
+            row_buffer = list(rows or [])
+            populate_table(table, _FLOW_HEADERS, row_buffer, money_cols={1, 2})
+            self._toggle_empty_state(table, empty_state, bool(row_buffer))
+            table.setSortingEnabled(True)
+
     def clear_receivable_overview(self) -> None:
         self._update_receivable_summary(None)
         self.receivable_missing_table.setRowCount(0)
@@ -2851,7 +3220,9 @@ class SalesArPage(QWidget):
 
     @staticmethod
     def _toggle_empty_state(
-        table: QTableWidget, empty_state: EmptyStateWidget, has_rows: bool
+        table: QTableWidget | DataTableView,
+        empty_state: EmptyStateWidget,
+        has_rows: bool,
     ) -> None:
         if has_rows:
             empty_state.hide()
@@ -2941,7 +3312,7 @@ class SalesArPage(QWidget):
         empty_layout.setContentsMargins(12, 4, 12, 12)
         empty_layout.setSpacing(8)
 
-        self.missing_sales_table = create_table_widget()
+        self.missing_sales_table = create_table_view()
         self.missing_sales_table.setColumnCount(6)
         self.missing_sales_table.setHorizontalHeaderLabels(
             [
@@ -3030,7 +3401,7 @@ class SalesArPage(QWidget):
         missing_empty_layout.setContentsMargins(12, 4, 12, 12)
         missing_empty_layout.setSpacing(8)
 
-        self.receivable_missing_table = create_table_widget()
+        self.receivable_missing_table = create_table_view()
         self.receivable_missing_table.setColumnCount(6)
         self.receivable_missing_table.setHorizontalHeaderLabels(
             [
@@ -3060,6 +3431,12 @@ class SalesArPage(QWidget):
 
         self.receivable_card.add_layout(missing_layout)
 
+        self.receivable_flow_table, self.receivable_flow_empty = (
+            self._build_flow_section(
+                self.receivable_card, "Motkontoer mot kundefordringer"
+            )
+        )
+
         page_layout.addWidget(self.receivable_card)
         self._update_receivable_summary(None)
         self._toggle_empty_state(
@@ -3129,7 +3506,7 @@ class SalesArPage(QWidget):
             QSizePolicy.Expanding, QSizePolicy.Minimum
         )
 
-        self.bank_mismatch_table = create_table_widget()
+        self.bank_mismatch_table = create_table_view()
         self.bank_mismatch_table.setColumnCount(8)
         self.bank_mismatch_table.setHorizontalHeaderLabels(
             [
@@ -3161,9 +3538,44 @@ class SalesArPage(QWidget):
 
         self.bank_card.add_layout(mismatch_layout)
 
+        self.bank_flow_table, self.bank_flow_empty = self._build_flow_section(
+            self.bank_card, "Motkontoer mot bank"
+        )
+
         page_layout.addWidget(self.bank_card)
         return page
 
+    def _build_flow_section(
+        self, card: CardFrame, title: str
+    ) -> Tuple[QTableWidget, EmptyStateWidget]:
+        """Tabell over motkontoer hentet fra konto-til-konto-flyten."""
+
+        section_title = QLabel(title)
+        section_title.setObjectName("analysisSectionTitle")
+
+        empty_state = EmptyStateWidget(
+            "Ingen motkontoer",
+            "Fant ingen bilagslinjer mot kontoene i valgt datasett.",
+        )
+        empty_state.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Minimum)
+
+        table = create_table_widget()
+        table.setColumnCount(len(_FLOW_HEADERS))
+        table.setHorizontalHeaderLabels(_FLOW_HEADERS)
+        table.setSortingEnabled(True)
+        table.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
+        table.hide()
+
+        section_layout = QVBoxLayout()
+        section_layout.setContentsMargins(0, 0, 0, 0)
+        section_layout.setSpacing(4)
+        section_layout.addWidget(section_title, 0, Qt.AlignLeft | Qt.AlignTop)
+        section_layout.addWidget(empty_state, 0, Qt.AlignLeft | Qt.AlignTop)
+        section_layout.addWidget(table)
+        section_layout.setStretch(2, 1)
+        card.add_layout(section_layout)
+        return table, empty_state
+
     def _build_placeholder_tab(self, title: str, message: str) -> QWidget:
         page = QWidget()
         layout = QVBoxLayout(page)
@@ -3240,6 +3652,13 @@ class PurchasesApPage(QWidget):
         self.top_card.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
         layout.addWidget(self.top_card, 1)
 
+        (
+            self.registry_card,
+            self.registry_table,
+            self.registry_note,
+        ) = _build_registry_warning_card("Leverandører", _SUPPLIER_WARNING_HEADERS)
+        layout.addWidget(self.registry_card)
+
         self.set_controls_enabled(False)
 
     def _handle_calc_clicked(self) -> None:
@@ -3262,6 +3681,25 @@ class PurchasesApPage(QWidget):
         self.top_table.hide()
         self.empty_state.show()
 
+    def set_registry_warnings(
+        self,
+        rows: Iterable[Tuple[str, str, str, str]],
+        snapshot_imported_at: Optional[float] = None,
+    ) -> None:
+        """Viser leverandører som er konkurs, under avvikling eller slettet.
+
+        ``snapshot_imported_at`` viser alderen på en lokal registerkopi.
+        """
+
+        _show_registry_warnings(
+            self.registry_card,
+            self.registry_table,
+            self.registry_note,
+            _SUPPLIER_WARNING_HEADERS,
+            rows,
+            snapshot_imported_at,
+        )
+
     def set_controls_enabled(self, enabled: bool) -> None:
         self.calc_button.setEnabled(enabled)
         self.top_spin.setEnabled(enabled)
@@ -110,10 +110,9 @@ class NordlysWindow(QMainWindow):
         key = current.data(0, Qt.UserRole)
         if not key:
             return
-        widget = self._page_manager.ensure_page(key)
+        widget = self._page_manager.show_page(key)
         if widget is None:
             return
-        self.stack.setCurrentWidget(widget)
         self.header_bar.set_title(current.text(0))
         if hasattr(self, "info_card"):
             self.info_card.setVisible(key in {"dashboard", "import"})
@@ -222,6 +221,7 @@ class NordlysWindow(QMainWindow):
                 parent=self,
                 schedule_responsive_update=self._responsive.schedule_update,
                 update_header_fields=self._update_header_fields,
+                task_runner=self._task_runner,
             )
             self._page_manager, self._page_registry = initialize_pages(
                 self,
@@ -2,7 +2,7 @@
 
 from __future__ import annotations
 
-from typing import Optional, Set, Tuple
+from typing import List, Optional, Set, Tuple
 
 from PySide6.QtCore import QTimer
 from PySide6.QtWidgets import (
@@ -17,6 +17,7 @@ from PySide6.QtWidgets import (
 
 from ..settings import NAV_PANEL_WIDTH_OVERRIDE
 from .navigation import NavigationPanel
+from .tables import DataTableView, estimate_column_widths
 from .widgets import CardFrame
 
 
@@ -153,10 +154,10 @@ class ResponsiveLayoutController:
 
     def _apply_table_sizing(self, min_section_size: int, available_width: int) -> None:
         current_widget = self._stack.currentWidget()
-        tables = current_widget.findChildren(QTableWidget) if current_widget else []
+        tables = self._find_tables(current_widget) if current_widget else []
 
         if not tables:
-            tables = self._window.findChildren(QTableWidget)
+            tables = self._find_tables(self._window)
         if not tables:
             return
 
@@ -184,6 +185,12 @@ class ResponsiveLayoutController:
             header.setStretchLastSection(False)
             header.setMinimumSectionSize(min_section_size)
 
+            if isinstance(table, DataTableView):
+                # Lange lister måles på et utvalg rader i stedet for alle.
+                estimate_column_widths(table)
+                table.setProperty("_responsive_signature", sizing_signature)
+                continue
+
             for col in range(column_count):
                 if header.sectionResizeMode(col) != QHeaderView.ResizeToContents:
                     header.setSectionResizeMode(col, QHeaderView.ResizeToContents)
@@ -191,7 +198,16 @@ class ResponsiveLayoutController:
                 table.resizeColumnsToContents()
             table.setProperty("_responsive_signature", sizing_signature)
 
-    def _ensure_visibility_update_hook(self, table: QTableWidget) -> None:
+    @staticmethod
+    def _find_tables(widget: QWidget) -> List[QTableWidget | DataTableView]:
+        return [
+            *widget.findChildren(QTableWidget),
+            *widget.findChildren(DataTableView),
+        ]
+
+    def _ensure_visibility_update_hook(
+        self, table: QTableWidget | DataTableView
+    ) -> None:
         widget: Optional[QWidget] = table.parentWidget()
         while widget is not None:
             if isinstance(widget, (QTabWidget, QStackedWidget)):
@@ -8,19 +8,26 @@ from PySide6.QtCore import Qt
 from PySide6.QtWidgets import (
     QAbstractItemView,
     QHeaderView,
+    QStyle,
     QStyleOptionViewItem,
     QTableView,
     QTableWidget,
     QTableWidgetItem,
+    QWidget,
 )
 
 from ..helpers.lazy_imports import lazy_pandas
-from .delegates import CompactRowDelegate
+from .delegates import BOTTOM_BORDER_ROLE, TOP_BORDER_ROLE, CompactRowDelegate
+from .models.columnar_table_model import ColumnarTableModel
 
 __all__ = [
+    "DataTableView",
     "create_table_widget",
+    "create_table_view",
+    "estimate_column_widths",
     "apply_compact_row_heights",
     "populate_table",
+    "populate_dataframe",
     "suspend_table_updates",
     "format_money_norwegian",
     "format_integer_norwegian",
@@ -29,6 +36,23 @@ __all__ = [
 
 pd = lazy_pandas()
 
+# Hindrer at én lang tekst gjør kolonnen bredere enn skjermen.
+_MAX_ESTIMATED_COLUMN_WIDTH = 480
+
+_DEFAULT_ITEM_FLAGS = QTableWidgetItem().flags()
+# Roller som sidene setter på celler etter utfyllingen. ``Qt.UserRole`` er
+# ikke med; den bruker populate_table selv til tallverdien.
+_DECORATION_ROLES = (
+    Qt.FontRole,
+    Qt.ForegroundRole,
+    Qt.BackgroundRole,
+    Qt.CheckStateRole,
+    Qt.ToolTipRole,
+    Qt.UserRole + 1,
+    TOP_BORDER_ROLE,
+    BOTTOM_BORDER_ROLE,
+)
+
 
 class _CompatibleTableWidget(QTableWidget):
     """Tabell som skjuler forskjeller mellom Qt-plattformer."""
@@ -42,15 +66,76 @@ class _CompatibleTableWidget(QTableWidget):
             return option
 
 
+class DataTableView(QTableView):
+    """Tabellvisning for lange lister, støttet av :class:`ColumnarTableModel`.
+
+    Cellene formateres først når de tegnes, og kolonnebredder anslås fra et
+    utvalg rader. Visningen tilbyr de delene av ``QTableWidget``-API-et som
+    sidene bruker for å sette overskrifter og tømme tabellen.
+    """
+
+    def __init__(self, parent: Optional[QWidget] = None) -> None:
+        super().__init__(parent)
+        self._data_model = ColumnarTableModel(self, formatter=_format_value)
+        self.setModel(self._data_model)
+
+    def data_model(self) -> ColumnarTableModel:
+        return self._data_model
+
+    def rowCount(self) -> int:
+        return self._data_model.total_row_count()
+
+    def columnCount(self) -> int:
+        return self._data_model.columnCount()
+
+    def setRowCount(self, rows: int) -> None:
+        if rows != 0:
+            raise ValueError("DataTableView fylles via populate_table")
+        self._data_model.clear()
+
+    def setColumnCount(self, columns: int) -> None:
+        headers = self._data_model.headers()[:columns]
+        headers.extend(str(index + 1) for index in range(len(headers), columns))
+        self._data_model.set_headers(headers)
+
+    def setHorizontalHeaderLabels(self, labels: Sequence[str]) -> None:
+        self._data_model.set_headers(list(labels))
+
+    def clearContents(self) -> None:
+        self._data_model.clear()
+
+    def viewOptions(self) -> QStyleOptionViewItem:  # pragma: no cover - Qt-spesifikt
+        try:
+            return super().viewOptions()
+        except AttributeError:
+            option = QStyleOptionViewItem()
+            option.initFrom(self)
+            return option
+
+
 def create_table_widget() -> QTableWidget:
     table = _CompatibleTableWidget()
+    _configure_table(table)
+    table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeToContents)
+    return table
+
+
+def create_table_view() -> DataTableView:
+    """Lager en modellbasert tabell for lister som kan bli lange."""
+
+    table = DataTableView()
+    _configure_table(table)
+    table.horizontalHeader().setSectionResizeMode(QHeaderView.Interactive)
+    return table
+
+
+def _configure_table(table: QTableView) -> None:
     table.setAlternatingRowColors(True)
     table.setEditTriggers(QAbstractItemView.NoEditTriggers)
     table.setSelectionBehavior(QAbstractItemView.SelectRows)
     table.setFocusPolicy(Qt.NoFocus)
     table.setVerticalScrollMode(QAbstractItemView.ScrollPerPixel)
     table.setHorizontalScrollMode(QAbstractItemView.ScrollPerPixel)
-    table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeToContents)
     table.verticalHeader().setVisible(False)
     table.verticalHeader().setSectionResizeMode(QHeaderView.ResizeToContents)
     table.setObjectName("cardTable")
@@ -58,7 +143,6 @@ def create_table_widget() -> QTableWidget:
     table.setItemDelegate(delegate)
     table._compact_delegate = delegate  # type: ignore[attr-defined]
     apply_compact_row_heights(table)
-    return table
 
 
 def apply_compact_row_heights(table: QTableWidget | QTableView) -> None:
@@ -78,20 +162,41 @@ def apply_compact_row_heights(table: QTableWidget | QTableView) -> None:
             current_height = table.rowHeight(row)
             target_height = max(minimum_height, current_height)
             table.setRowHeight(row, target_height)
-        return
+    # Modellbaserte tabeller bruker standardhøyden i det faste hodet, så det
+    # trengs ingen løkke over radene.
+
+
+def estimate_column_widths(table: QTableView, *, sample: int = 200) -> None:
+    """Setter kolonnebredder ut fra overskriften og et utvalg rader.
+
+    Gjelder kun kolonner med ``QHeaderView.Interactive``; kolonner som strekkes
+    eller styres på annen måte, røres ikke.
+    """
 
     model = table.model()
-    if model is None:
+    header = table.horizontalHeader()
+    if not isinstance(model, ColumnarTableModel) or header is None:
         return
-    row_count = model.rowCount()
-    if row_count == 0:
+    column_count = model.columnCount()
+    if column_count == 0:
         return
-    for row in range(row_count):
-        header.resizeSection(row, minimum_height)
+    metrics = table.fontMetrics()
+    header_metrics = header.fontMetrics()
+    padding = 2 * table.style().pixelMetric(QStyle.PM_FocusFrameHMargin) + 16
+    rows = model.sample_rows(sample)
+    for column in range(column_count):
+        if header.sectionResizeMode(column) != QHeaderView.Interactive:
+            continue
+        widest = header_metrics.horizontalAdvance(model.headers()[column]) + 12
+        for row in rows:
+            text = model.display_text(row, column)
+            widest = max(widest, metrics.horizontalAdvance(text))
+        width = max(header.minimumSectionSize(), widest + padding)
+        header.resizeSection(column, min(width, _MAX_ESTIMATED_COLUMN_WIDTH))
 
 
 def populate_table(
-    table: QTableWidget,
+    table: QTableWidget | DataTableView,
     columns: Sequence[str],
     rows: Iterable[Sequence[object]],
     *,
@@ -110,40 +215,116 @@ def populate_table(
             if not _all_numeric_columns_zero(row, zero_value_idx)
         ]
 
-    table.setRowCount(0)
-    table.setColumnCount(len(columns))
-    table.setHorizontalHeaderLabels(columns)
+    if isinstance(table, DataTableView):
+        table.data_model().set_rows(columns, row_buffer, money_cols=money_idx)
+        estimate_column_widths(table)
+        _finish_populate(table)
+        return
 
     if not row_buffer:
+        table.setRowCount(0)
+        table.setColumnCount(len(columns))
+        table.setHorizontalHeaderLabels(columns)
         table.clearContents()
         apply_compact_row_heights(table)
         return
 
+    # Med samme kolonner (f.eks. ved bytte mellom år) beholdes cellene som
+    # ikke er endret, i stedet for å bygge hele tabellen på nytt.
+    same_columns = _header_labels(table) == list(columns)
+    if not same_columns:
+        table.setRowCount(0)
+        table.setColumnCount(len(columns))
+        table.setHorizontalHeaderLabels(columns)
+
     sorting_enabled = table.isSortingEnabled()
     table.setSortingEnabled(False)
     table.setUpdatesEnabled(False)
 
+    changed = not same_columns or table.rowCount() != len(row_buffer)
     try:
         table.setRowCount(len(row_buffer))
-
+        column_count = table.columnCount()
         for row_idx, row in enumerate(row_buffer):
             for col_idx, value in enumerate(row):
-                display = _format_value(value, col_idx in money_idx)
-                item = QTableWidgetItem(display)
-                if isinstance(value, (int, float)):
-                    item.setData(Qt.UserRole, float(value))
-                else:
-                    item.setData(Qt.UserRole, None)
-                if col_idx in money_idx or isinstance(value, (int, float)):
-                    item.setTextAlignment(Qt.AlignHCenter | Qt.AlignVCenter)
-                else:
-                    item.setTextAlignment(Qt.AlignLeft | Qt.AlignVCenter)
-                table.setItem(row_idx, col_idx, item)
+                if _set_cell(table, row_idx, col_idx, value, col_idx in money_idx):
+                    changed = True
+            for col_idx in range(len(row), column_count):
+                if table.takeItem(row_idx, col_idx) is not None:
+                    changed = True
     finally:
         table.setUpdatesEnabled(True)
         table.setSortingEnabled(sorting_enabled)
 
-    table.resizeColumnsToContents()
+    if changed:
+        table.resizeColumnsToContents()
+    _finish_populate(table)
+
+
+def _header_labels(table: QTableWidget) -> list[str]:
+    labels = []
+    for column in range(table.columnCount()):
+        item = table.horizontalHeaderItem(column)
+        labels.append(item.text() if item is not None else "")
+    return labels
+
+
+def _set_cell(
+    table: QTableWidget, row: int, column: int, value: object, money: bool
+) -> bool:
+    """Setter cellen om innholdet er endret. Returnerer om cellen ble byttet."""
+
+    display = _format_value(value, money)
+    numeric = float(value) if isinstance(value, (int, float)) else None
+    if money or isinstance(value, (int, float)):
+        alignment = Qt.AlignHCenter | Qt.AlignVCenter
+    else:
+        alignment = Qt.AlignLeft | Qt.AlignVCenter
+
+    existing = table.item(row, column)
+    if (
+        existing is not None
+        and _is_plain_item(existing)
+        and existing.text() == display
+        and existing.data(Qt.UserRole) == numeric
+        and existing.textAlignment() == int(alignment)
+    ):
+        return False
+
+    item = QTableWidgetItem(display)
+    item.setData(Qt.UserRole, numeric)
+    item.setTextAlignment(alignment)
+    table.setItem(row, column, item)
+    return True
+
+
+def _is_plain_item(item: QTableWidgetItem) -> bool:
+    """Om cellen er uendret siden :func:`populate_table` laget den.
+
+    Sider som setter f.eks. fet skrift, farge, verktøytips eller egne data på
+    enkelte celler, gjør det etter utfyllingen; slike celler lages på nytt i
+    stedet for å gjenbrukes.
+    """
+
+    return item.flags() == _DEFAULT_ITEM_FLAGS and all(
+        item.data(role) is None for role in _DECORATION_ROLES
+    )
+
+
+def populate_dataframe(
+    table: DataTableView,
+    df: "pd.DataFrame",
+    *,
+    money_cols: Optional[Iterable[int]] = None,
+) -> None:
+    """Viser en DataFrame kolonnevis, uten å bygge rader eller celleobjekter."""
+
+    table.data_model().set_dataframe(df, money_cols=money_cols)
+    estimate_column_widths(table)
+    _finish_populate(table)
+
+
+def _finish_populate(table: QTableView) -> None:
     apply_compact_row_heights(table)
     window = table.window()
     schedule_hook = getattr(window, "_schedule_responsive_update", None)
@@ -107,6 +107,7 @@ def create_data_controller(
     parent: QMainWindow,
     schedule_responsive_update: Callable[[], None],
     update_header_fields: Callable[[], None],
+    task_runner: Optional[TaskRunner] = None,
 ) -> SaftDataController:
     """Sett opp datakontrolleren for hovedvinduet."""
 
@@ -118,6 +119,7 @@ def create_data_controller(
         parent=parent,
         schedule_responsive_update=schedule_responsive_update,
         update_header_fields=update_header_fields,
+        task_runner=task_runner,
     )
 
 
@@ -128,7 +130,12 @@ def initialize_pages(
 ) -> Tuple[PageManager, PageRegistry]:
     """Opprett og registrer alle sidene i applikasjonen."""
 
-    page_manager = PageManager(window, stack, data_controller.apply_page_state)
+    page_manager = PageManager(
+        window,
+        stack,
+        data_controller.apply_page_state,
+        data_controller.on_page_shown,
+    )
     page_registry = PageRegistry(page_manager, data_controller)
     page_registry.register_all()
     return page_manager, page_registry
@@ -163,4 +170,8 @@ def create_import_controller(
         log_import_event=data_controller.log_import_event,
         load_error_handler=data_controller.on_load_error,
     )
+    controller.sig_brreg_refreshed.connect(data_controller.apply_brreg_refresh)
+    controller.sig_counterparties_enriched.connect(
+        data_controller.apply_counterparty_registry
+    )
     return controller
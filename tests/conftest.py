@@ -1,3 +1,4 @@
+import importlib
 import sys
 import types
 from collections.abc import Iterator
@@ -171,3 +172,14 @@ def dummy_pyside6() -> Iterator[None]:
         yield
     finally:
         _restore_modules(original_modules)
+
+
+@pytest.fixture(autouse=True)
+def _isolated_cache_dir(
+    tmp_path_factory: pytest.TempPathFactory, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Hindrer at tester leser eller skriver brukerens lokale Brønnøysund-cache."""
+
+    brreg_cache = importlib.import_module("nordlys.integrations.brreg_cache")
+    monkeypatch.setattr(brreg_cache, "_CACHE_DIR", tmp_path_factory.mktemp("cache"))
+    monkeypatch.setattr(brreg_cache, "_CACHE_DIR_INITIALIZED", True)
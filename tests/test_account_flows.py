@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+from datetime import date
+
+import pytest
+
+from nordlys.saft.account_flows import build_account_flow_matrix
+from nordlys.saft.models import CostVoucher, VoucherLine
+
+
+def _voucher(*lines: tuple[str, float, float]) -> CostVoucher:
+    return CostVoucher(
+        transaction_id="TX",
+        document_number="1",
+        transaction_date=date(2024, 1, 1),
+        supplier_id=None,
+        supplier_name=None,
+        description=None,
+        amount=0.0,
+        lines=[
+            VoucherLine(
+                account=account,
+                account_name=None,
+                description=None,
+                vat_code=None,
+                debit=debit,
+                credit=credit,
+            )
+            for account, debit, credit in lines
+        ],
+    )
+
+
+def _sample_matrix():
+    return build_account_flow_matrix(
+        [
+            # Salg: 3000 og 2700 krediteres mot 1500.
+            _voucher(
+                ("1500", 1250.0, 0.0), ("3000", 0.0, 1000.0), ("2700", 0.0, 250.0)
+            ),
+            # Innbetaling: 1500 krediteres mot bank.
+            _voucher(("1920", 1250.0, 0.0), ("1500", 0.0, 1250.0)),
+            # Kjøp fordelt på to kostnadskonti.
+            _voucher(("6300", 300.0, 0.0), ("6800", 100.0, 0.0), ("2400", 0.0, 400.0)),
+            _voucher(("1500", 500.0, 0.0), ("3000", 0.0, 500.0)),
+        ]
+    )
+
+
+def test_flow_matrix_aggregates_pairs_across_vouchers() -> None:
+    matrix = _sample_matrix()
+    frame = matrix.to_frame().set_index(["Fra konto", "Til konto"])
+
+    assert frame.loc[("3000", "1500"), "Beløp"] == pytest.approx(1500.0)
+    assert frame.loc[("3000", "1500"), "Bilag"] == 2
+    assert frame.loc[("2400", "6300"), "Beløp"] == pytest.approx(300.0)
+    assert frame.loc[("2400", "6800"), "Beløp"] == pytest.approx(100.0)
+
+
+def test_flow_matrix_prefix_slices() -> None:
+    matrix = _sample_matrix()
+
+    assert matrix.inflows(["1500"]) == {"2700": 250.0, "3000": 1500.0}
+    assert matrix.inflows(["19"]) == {"1500": 1250.0}
+    assert matrix.outflows(["24"]) == {"6300": 300.0, "6800": 100.0}
+    assert matrix.flow_between(["3"], ["15"]) == pytest.approx(1500.0)
+    assert matrix.counter_accounts("1500") == ["1920", "2700", "3000"]
+    assert matrix.counter_accounts("9999") == []
+
+
+def test_flow_matrix_rare_flows_and_empty_input() -> None:
+    rare = _sample_matrix().rare_flows(max_vouchers=1, min_amount=200.0)
+    assert list(zip(rare["Fra konto"], rare["Til konto"])) == [
+        ("1500", "1920"),
+        ("2400", "6300"),
+        ("2700", "1500"),
+    ]
+
+    empty = build_account_flow_matrix([])
+    assert empty.is_empty
+    assert empty.inflows(["1500"]) == {}
+    assert empty.to_frame().empty
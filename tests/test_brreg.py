@@ -90,3 +90,40 @@ def test_fetch_brreg_timeout(monkeypatch):
 
     assert data is None
     assert "tidsavbrudd" in error.lower()
+
+
+def _regnskap(year: int, inntekter: float, eiendeler: float) -> dict:
+    return {
+        "regnskapsperiode": {"fraDato": f"{year}-01-01", "tilDato": f"{year}-12-31"},
+        "resultatregnskapResultat": {
+            "driftsresultat": {"driftsinntekter": {"sumDriftsinntekter": inntekter}}
+        },
+        "eiendeler": {"sumEiendeler": eiendeler},
+    }
+
+
+def test_map_brreg_metrics_by_year_and_frame():
+    payload = [_regnskap(2023, 500.0, 900.0), _regnskap(2022, 400.0, 800.0)]
+
+    by_year = brreg.map_brreg_metrics_by_year(payload)
+    frame = brreg.brreg_metrics_frame(payload)
+
+    assert sorted(by_year) == [2022, 2023]
+    assert by_year[2023]["driftsinntekter"] == 500.0
+    assert by_year[2022]["eiendeler_UB"] == 800.0
+    assert list(frame.index) == [2022, 2023]
+    assert frame.loc[2023, "eiendeler_UB"] == 900.0
+    assert list(frame.columns) == [rule.key for rule in brreg.BRREG_METRIC_RULES]
+
+
+def test_extract_metrics_uses_declarative_rules():
+    index = brreg.NumberIndex.from_json({"a": {"sumX": 1}, "b": {"sumY": 2}})
+    rules = (
+        brreg.MetricRule(
+            "y_or_x",
+            (brreg.MetricLookup(("sumZ",)), brreg.MetricLookup(("sumY", "sumX"))),
+        ),
+        brreg.MetricRule("x_not_a", (brreg.MetricLookup(("sumX",), ("a.",)),)),
+    )
+
+    assert brreg.extract_metrics(index, rules) == {"y_or_x": 2.0, "x_not_a": None}
@@ -3,10 +3,14 @@ import pytest
 from nordlys.industry_groups import IndustryClassification
 from nordlys.saft.brreg_enrichment import (
     _clear_enrichment_cache,
+    annotate_counterparties,
+    counterparty_orgnrs,
+    enrich_counterparties,
     enrich_from_header,
 )
 from nordlys.saft import brreg_enrichment
 from nordlys.saft.header import SaftHeader
+from nordlys.saft.masterfiles import CustomerInfo, SupplierInfo
 
 
 @pytest.fixture(autouse=True)
@@ -141,3 +145,147 @@ def test_enrich_from_header_falls_back_to_name_on_failure(
     assert result.industry is not None
     assert result.industry.group == "Salg av varer og tjenester"
     assert result.industry_error == "Brreg nede"
+
+
+def test_enrich_counterparties_annotates_customers_and_suppliers(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    requested: list[list[str]] = []
+
+    def fake_fetch(orgnrs, *, snapshot_times=None):
+        requested.append(list(orgnrs))
+        if snapshot_times is not None:
+            snapshot_times["222222222"] = 1_700_000_000.0
+        return (
+            {
+                "111111111": {
+                    "navn": "Konkursbo AS",
+                    "konkurs": True,
+                    "naeringskode1": {"kode": "47.110", "beskrivelse": "Butikk"},
+                },
+                "222222222": {"navn": "Frisk AS", "registrertIMvaregisteret": True},
+            },
+            {"333333333": "Enhetsregisteret: ingen treff."},
+        )
+
+    monkeypatch.setattr(brreg_enrichment, "fetch_enheter_cached", fake_fetch)
+
+    customers = [
+        CustomerInfo("K1", "1001", "Kunde", registration_number="111 111 111"),
+        CustomerInfo("K2", "1002", "Privat"),
+    ]
+    suppliers = [
+        SupplierInfo("L1", "2001", "Lev", registration_number="NO222222222MVA"),
+        SupplierInfo("L2", "2002", "Ukjent", registration_number="333333333"),
+        SupplierInfo("L3", "2003", "Samme", registration_number="111111111"),
+    ]
+
+    orgnrs = counterparty_orgnrs(customers, suppliers)
+    registry = enrich_counterparties(orgnrs)
+    matched = annotate_counterparties(customers, suppliers, registry)
+
+    assert requested == [["111111111", "222222222", "333333333"]]
+    assert matched == 4
+    assert customers[0].registry is not None
+    assert customers[0].registry.has_warning
+    assert customers[0].registry.warning_text == "Konkurs"
+    assert customers[0].registry.naringskode == "47.110"
+    assert customers[1].registry is None
+    assert suppliers[0].registry is not None
+    assert suppliers[0].registry.mva_reg is True
+    assert not suppliers[0].registry.has_warning
+    assert suppliers[0].registry.snapshot_imported_at == 1_700_000_000.0
+    assert customers[0].registry.snapshot_imported_at is None
+    assert suppliers[1].registry is not None
+    assert suppliers[1].registry.error == "Enhetsregisteret: ingen treff."
+
+
+def test_stale_registry_data_is_served_then_refreshed(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    import time
+
+    from nordlys.constants import BRREG_URL_TMPL
+    from nordlys.integrations import brreg_cache, brreg_client
+    from nordlys.integrations.brreg_models import BrregServiceResult
+
+    brreg_cache.clear_fallback_cache()
+    cache_key = brreg_cache.make_cache_key(
+        BRREG_URL_TMPL.format(orgnr="123456789"), "passthrough"
+    )
+    brreg_cache.http_cache().put(
+        cache_key,
+        BrregServiceResult([{"versjon": "gammel"}], None, None, False),
+        stored_at=time.time() - 7 * 60 * 60,
+    )
+    monkeypatch.setattr(
+        brreg_client,
+        "_request_json",
+        lambda *_, **__: BrregServiceResult([{"versjon": "ny"}], None, None, False),
+    )
+    monkeypatch.setattr(brreg_enrichment, "classify_from_orgnr", lambda *_: None)
+    header = SaftHeader(
+        company_name="Testbed AS",
+        orgnr="123456789",
+        fiscal_year=None,
+        period_start=None,
+        period_end=None,
+        file_version=None,
+    )
+
+    served = enrich_from_header(header)
+    refreshed = brreg_enrichment.refresh_enrichment([header])
+
+    assert served.stale is True
+    assert served.brreg_json == [{"versjon": "gammel"}]
+    fresh = refreshed["123456789"]
+    assert fresh is not None and fresh.stale is False
+    assert fresh.brreg_json == [{"versjon": "ny"}]
+
+
+def test_only_import_enrichment_accepts_month_old_brreg_data(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    import time
+
+    from nordlys import brreg
+    from nordlys.constants import BRREG_URL_TMPL
+    from nordlys.integrations import brreg_cache, brreg_client
+    from nordlys.integrations.brreg_models import BrregServiceResult
+
+    brreg_cache.clear_fallback_cache()
+    _clear_enrichment_cache()
+    cache_key = brreg_cache.make_cache_key(
+        BRREG_URL_TMPL.format(orgnr="123456789"), "passthrough"
+    )
+
+    def _store_old() -> None:
+        brreg_cache.http_cache().put(
+            cache_key,
+            BrregServiceResult([{"versjon": "gammel"}], None, None, False),
+            stored_at=time.time() - 3 * 24 * 60 * 60,
+        )
+
+    monkeypatch.setattr(
+        brreg_client,
+        "_request_json",
+        lambda *_, **__: BrregServiceResult([{"versjon": "ny"}], None, None, False),
+    )
+    monkeypatch.setattr(brreg_enrichment, "classify_from_orgnr", lambda *_: None)
+    header = SaftHeader(
+        company_name="Testbed AS",
+        orgnr="123456789",
+        fiscal_year=None,
+        period_start=None,
+        period_end=None,
+        file_version=None,
+    )
+
+    _store_old()
+    assert brreg.fetch_brreg("123456789") == ([{"versjon": "ny"}], None)
+
+    _store_old()
+    served = enrich_from_header(header)
+    assert served.stale is True
+    assert served.brreg_json == [{"versjon": "gammel"}]
+    brreg_enrichment.wait_for_refreshes(timeout=5)
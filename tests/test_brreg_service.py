@@ -54,7 +54,6 @@ def test_get_company_status_maps_flags(monkeypatch):
 
 
 def test_fetch_enhetsregister_uses_fallback_cache(monkeypatch):
-    monkeypatch.setattr(brreg_client, "REQUESTS_CACHE_AVAILABLE", False, raising=False)
     brreg_cache.clear_fallback_cache()
     brreg_cache.set_session(None)
 
@@ -87,7 +86,6 @@ def test_fetch_enhetsregister_uses_fallback_cache(monkeypatch):
 
 
 def test_fetch_enhetsregister_caches_not_found(monkeypatch):
-    monkeypatch.setattr(brreg_client, "REQUESTS_CACHE_AVAILABLE", False, raising=False)
     brreg_cache.clear_fallback_cache()
     brreg_cache.set_session(None)
 
@@ -116,7 +114,6 @@ def test_fetch_enhetsregister_caches_not_found(monkeypatch):
 
 
 def test_fetch_enhetsregister_interprets_empty_list_as_not_found(monkeypatch):
-    monkeypatch.setattr(brreg_client, "REQUESTS_CACHE_AVAILABLE", False, raising=False)
     brreg_cache.clear_fallback_cache()
     brreg_cache.set_session(None)
 
@@ -144,7 +141,6 @@ def test_fetch_enhetsregister_interprets_empty_list_as_not_found(monkeypatch):
 
 
 def test_fetch_regnskapsregister_accepts_list_payload(monkeypatch):
-    monkeypatch.setattr(brreg_client, "REQUESTS_CACHE_AVAILABLE", False, raising=False)
     brreg_cache.clear_fallback_cache()
     brreg_cache.set_session(None)
 
@@ -171,13 +167,13 @@ def test_fetch_regnskapsregister_accepts_list_payload(monkeypatch):
 
 
 def test_fallback_cache_prunes_old_entries(monkeypatch):
-    monkeypatch.setattr(brreg_client, "REQUESTS_CACHE_AVAILABLE", False, raising=False)
     brreg_cache.clear_fallback_cache()
     brreg_cache.set_session(None)
-    monkeypatch.setattr(brreg_cache, "_CACHE_TTL_SECONDS", 10, raising=False)
+    cache = brreg_cache.http_cache()
+    monkeypatch.setattr(cache, "ttl_seconds", 10)
 
-    time_calls = iter([0.0, 0.0, 25.0])
-    monkeypatch.setattr(brreg_cache.time, "monotonic", lambda: next(time_calls))
+    now = {"value": 0.0}
+    monkeypatch.setattr(cache, "clock", lambda: now["value"])
 
     result = BrregServiceResult(
         data={"konkurs": False},
@@ -187,6 +183,7 @@ def test_fallback_cache_prunes_old_entries(monkeypatch):
     )
 
     brreg_cache.fallback_cache_set("orgnr=123", result)
+    now["value"] = 25.0
     cached = brreg_cache.fallback_cache_get("orgnr=123")
 
     assert cached is None
@@ -203,3 +200,118 @@ def test_invalid_orgnr_gives_clear_error() -> None:
 
     assert status.orgnr == ""
     assert status.source is None
+
+
+class _StubBrregServer:
+    """Lokal HTTP-server som etterligner Enhetsregisteret i testene."""
+
+    def __init__(
+        self,
+        *,
+        delay: float = 0.0,
+        throttle_once: frozenset[str] = frozenset(),
+        throttle_always: frozenset[str] = frozenset(),
+    ):
+        import http.server
+        import json
+        import threading
+        import time
+
+        self.hits: dict[str, int] = {}
+        self._lock = threading.Lock()
+        stub = self
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            def do_GET(self) -> None:  # noqa: N802 - http.server-API
+                orgnr = self.path.rstrip("/").rsplit("/", 1)[-1]
+                with stub._lock:
+                    stub.hits[orgnr] = stub.hits.get(orgnr, 0) + 1
+                    count = stub.hits[orgnr]
+                time.sleep(delay)
+                if orgnr in throttle_always or (orgnr in throttle_once and count == 1):
+                    self.send_response(429)
+                    self.send_header("Retry-After", "0")
+                    self.end_headers()
+                    return
+                body = json.dumps({"organisasjonsnummer": orgnr}).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *_: object) -> None:
+                return None
+
+        self._server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url_template(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/enheter/{{orgnr}}"
+
+    def __enter__(self) -> "_StubBrregServer":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *_: object) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+
+def _use_stub(monkeypatch, server: _StubBrregServer) -> None:
+    monkeypatch.setattr(brreg_client, "ENHETSREGISTER_URL_TMPL", server.url_template)
+    brreg_cache.clear_fallback_cache()
+    # Den ekte sesjonen med retry-adapteren, men ny for hver test.
+    monkeypatch.setattr(brreg_cache, "_SESSION", None)
+
+
+def test_fetch_many_deduplicates_and_reports_invalid(monkeypatch):
+    with _StubBrregServer() as server:
+        _use_stub(monkeypatch, server)
+        results = brreg_service.fetch_many(
+            ["111111111", "222 222 222", "111111111", "12"], max_workers=4
+        )
+
+    assert server.hits == {"111111111": 1, "222222222": 1}
+    assert results["111111111"].data == {"organisasjonsnummer": "111111111"}
+    assert results["222222222"].error_code is None
+    assert results["12"].error_code == "invalid_orgnr"
+
+
+def test_concurrent_lookups_for_same_orgnr_are_coalesced(monkeypatch):
+    from concurrent.futures import ThreadPoolExecutor
+
+    with _StubBrregServer(delay=0.2) as server:
+        _use_stub(monkeypatch, server)
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            results = list(
+                executor.map(brreg_service.fetch_enhetsregister, ["333333333"] * 4)
+            )
+
+    assert server.hits == {"333333333": 1}
+    assert all(result.error_code is None for result in results)
+
+
+def test_fetch_many_retries_after_rate_limit(monkeypatch):
+    with _StubBrregServer(throttle_once=frozenset({"444444444"})) as server:
+        _use_stub(monkeypatch, server)
+        results = brreg_service.fetch_many(["444444444", "555555555"])
+
+    assert server.hits["444444444"] == 2
+    assert results["444444444"].error_code is None
+    assert results["555555555"].error_code is None
+
+
+def test_rate_limit_reaches_gate_with_real_session(monkeypatch):
+    trips: list[float | None] = []
+    monkeypatch.setattr(brreg_client._RATE_LIMIT_GATE, "trip", trips.append)
+
+    with _StubBrregServer(throttle_always=frozenset({"666666666"})) as server:
+        _use_stub(monkeypatch, server)
+        result = brreg_service.fetch_enhetsregister("666666666")
+
+    assert server.hits == {"666666666": 1}
+    assert result.error_code == "rate_limited"
+    assert trips == [0.0]
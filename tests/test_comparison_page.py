@@ -0,0 +1,48 @@
+from __future__ import annotations
+
+from typing import Generator
+
+import pandas as pd
+import pytest
+
+try:  # pragma: no cover - miljøavhengig
+    from PySide6.QtWidgets import QApplication
+except (ImportError, OSError) as exc:  # pragma: no cover - miljøavhengig
+    pytest.skip(f"PySide6 er ikke tilgjengelig: {exc}", allow_module_level=True)
+
+from nordlys.ui.pages.comparison_page import ComparisonPage
+
+
+@pytest.fixture(scope="session")
+def qapp() -> Generator[QApplication, None, None]:
+    app = QApplication.instance()
+    if app is None:
+        app = QApplication([])
+    yield app
+
+
+def test_year_comparison_card_lists_each_year_and_hides_when_empty(
+    qapp: QApplication,
+) -> None:
+    page = ComparisonPage()
+    assert page.year_card.isHidden()
+
+    page.update_year_comparison(
+        pd.DataFrame(
+            [
+                (2022, "Driftsinntekter", 1000.0, 1000.0, 0.0),
+                (2023, "Driftsinntekter", 1200.0, 1150.0, 50.0),
+            ],
+            columns=["År", "Felt", "SAF-T", "Brreg", "Avvik"],
+        )
+    )
+
+    assert not page.year_card.isHidden()
+    assert page.year_table.rowCount() == 2
+    assert page.year_table.item(1, 0).text() == "2023"
+    assert page.year_table.item(1, 1).text() == "Driftsinntekter"
+    assert page.year_table.item(1, 4).text() == "50"
+
+    page.update_year_comparison(pd.DataFrame(columns=["År", "Felt"]))
+    assert page.year_card.isHidden()
+    assert page.year_table.rowCount() == 0
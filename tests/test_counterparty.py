@@ -0,0 +1,53 @@
+from __future__ import annotations
+
+import xml.etree.ElementTree as ET
+
+from nordlys.saft.counterparty import CounterpartyResolver
+from nordlys.saft.entry_helpers import (
+    SOURCE_DIMENSIONS,
+    SOURCE_LEDGER_LINE,
+    resolve_tx_customer_id,
+)
+
+NS = {"n1": "urn:StandardAuditFile-Taxation-Financial:NO"}
+
+
+def _transaction(body: str) -> ET.Element:
+    return ET.fromstring(
+        '<Transaction xmlns="urn:StandardAuditFile-Taxation-Financial:NO">'
+        f"{body}</Transaction>"
+    )
+
+
+def test_resolve_tx_customer_id_reports_source() -> None:
+    receivable = _transaction(
+        "<Line><AccountID>1500</AccountID><CustomerID>K1</CustomerID></Line>"
+    )
+    dimensions = _transaction(
+        "<Line><AccountID>3000</AccountID>"
+        "<Dimensions><CustomerID>K2</CustomerID></Dimensions></Line>"
+    )
+
+    assert resolve_tx_customer_id(receivable, NS) == ("K1", SOURCE_LEDGER_LINE)
+    assert resolve_tx_customer_id(dimensions, NS) == ("K2", SOURCE_DIMENSIONS)
+    assert resolve_tx_customer_id(_transaction(""), NS) == (None, None)
+
+
+def test_counterparty_resolver_memoises_and_counts_sources() -> None:
+    transaction = _transaction(
+        "<Line><AccountID>2400</AccountID><SupplierID>L1</SupplierID></Line>"
+        "<Line><AccountID>6300</AccountID></Line>"
+    )
+    resolver = CounterpartyResolver(NS)
+
+    first = resolver.resolve(transaction)
+    second = resolver.resolve(transaction)
+
+    assert first is second
+    assert resolver.supplier_id(transaction) == "L1"
+    assert resolver.customer_id(transaction) is None
+    assert len(resolver) == 1
+    stats = resolver.stats
+    assert stats[f"leverandør:{SOURCE_LEDGER_LINE}"] == 1
+    assert stats["kunde:ingen"] == 1
+    assert stats["cache_treff"] == 3
@@ -5,7 +5,8 @@ import pytest
 
 from nordlys.saft.header import SaftHeader
 from nordlys.saft.loader import SaftLoadResult
-from nordlys.saft.masterfiles import SupplierInfo
+from nordlys.saft.masterfiles import CustomerInfo, SupplierInfo
+from nordlys.saft.models import CostVoucher, VoucherLine
 from nordlys.saft.reporting_customers import (
     ReceivablePostingAnalysis,
     SalesReceivableCorrelation,
@@ -386,3 +387,301 @@ def test_prepare_supplier_purchases_fills_missing_names_from_supplier_ids() -> N
     prepared = store._prepare_supplier_purchases(purchases)
 
     assert list(prepared["Leverandørnavn"]) == ["Brus AS", "Brus AS"]
+
+
+def test_customer_registry_is_shared_between_years() -> None:
+    store = SaftDatasetStore()
+    first = _make_result("2023.xml", analysis_year=2023, fiscal_year="2023")
+    second = _make_result("2024.xml", analysis_year=2024, fiscal_year="2024")
+    third = _make_result("2025.xml", analysis_year=2025, fiscal_year="2025")
+    for result in (first, second):
+        result.customers = {
+            "K1": CustomerInfo(
+                customer_id="K1", customer_number="1001", name="Kunde AS"
+            )
+        }
+    third.customers = {
+        **second.customers,
+        "K2": CustomerInfo(customer_id="K2", customer_number="1002", name="Ny AS"),
+    }
+    store.apply_batch([first, second, third])
+
+    store.activate("2023.xml")
+    customers_2023 = store._customers  # type: ignore[attr-defined]
+    store.activate("2024.xml")
+    assert store._customers is customers_2023  # type: ignore[attr-defined]
+
+    store.activate("2025.xml")
+    assert store._customers["K1"] is customers_2023["K1"]  # type: ignore[attr-defined]
+    assert store.lookup_customer_name("1002", None) == "Ny AS"
+    assert len(store._customer_registry) == 2  # type: ignore[attr-defined]
+
+
+def test_vat_profile_is_built_once_and_kept_with_dataset() -> None:
+    store = SaftDatasetStore()
+    result = _make_result("2024.xml", analysis_year=2024, fiscal_year="2024")
+    store.apply_batch([result])
+    assert store.activate("2024.xml")
+
+    profile = store.vat_profile
+
+    assert len(profile) == 0
+    assert result.vat_profile is profile
+    assert store.activate("2024.xml")
+    assert store.vat_profile is profile
+
+
+def test_counter_account_flows_come_from_flow_matrix() -> None:
+    def voucher(*lines: tuple[str, float, float]) -> CostVoucher:
+        return CostVoucher(
+            transaction_id="TX",
+            document_number="1",
+            transaction_date=None,
+            supplier_id=None,
+            supplier_name=None,
+            description=None,
+            amount=0.0,
+            lines=[
+                VoucherLine(account, None, None, None, debit, credit)
+                for account, debit, credit in lines
+            ],
+        )
+
+    store = SaftDatasetStore()
+    result = _make_result("2024.xml", analysis_year=2024, fiscal_year="2024")
+    result.all_vouchers = [
+        voucher(("1500", 1250.0, 0.0), ("3000", 0.0, 1000.0), ("2700", 0.0, 250.0)),
+        voucher(("1920", 1250.0, 0.0), ("1500", 0.0, 1250.0)),
+        voucher(("1920", 80.0, 0.0), ("8050", 0.0, 80.0)),
+    ]
+    store.apply_batch([result])
+    assert store.activate("2024.xml")
+
+    assert store.counter_account_flow_rows(("1500",)) == [
+        ("1920", 0.0, 1250.0),
+        ("3000", 1000.0, 0.0),
+        ("2700", 250.0, 0.0),
+    ]
+    assert store.counter_account_flow_rows(("19", "2380")) == [
+        ("1500", 1250.0, 0.0),
+        ("8050", 80.0, 0.0),
+    ]
+    assert store.account_flows is store.account_flows
+
+
+def test_brreg_map_and_comparison_follow_dataset_year() -> None:
+    regnskaper = [
+        {
+            "regnskapsperiode": {"tilDato": f"{year}-12-31"},
+            "sumDriftsinntekter": revenue,
+            "sumEiendeler": 1000.0,
+        }
+        for year, revenue in ((2024, 300.0), (2023, 200.0))
+    ]
+    store = SaftDatasetStore()
+    results = [
+        _make_result("a.xml", analysis_year=2023, fiscal_year="2023"),
+        _make_result("b.xml", analysis_year=2024, fiscal_year="2024"),
+    ]
+    for result in results:
+        result.brreg_json = regnskaper  # type: ignore[assignment]
+        result.brreg_map = {"driftsinntekter": 300.0}
+    store.apply_batch(results)
+
+    store.activate("a.xml")
+    assert store.brreg_map is not None
+    assert store.brreg_map["driftsinntekter"] == 200.0
+
+    store._multi_year_summaries = pd.DataFrame(  # type: ignore[attr-defined]
+        {
+            "driftsinntekter": [210.0, 300.0],
+            "arsresultat": [0.0, 0.0],
+            "eiendeler_UB_brreg": [1000.0, 1000.0],
+            "egenkapital_UB": [0.0, 0.0],
+            "gjeld_UB_brreg": [0.0, 0.0],
+        },
+        index=["a.xml", "b.xml"],
+    )
+    comparison = store.brreg_year_comparison()
+    revenue = comparison.loc[comparison["Felt"] == "Driftsinntekter"]
+
+    assert list(revenue["År"]) == [2023, 2024]
+    assert list(revenue["Avvik"]) == [10.0, 0.0]
+
+
+def test_brreg_comparison_uses_one_dataset_per_year() -> None:
+    regnskaper = [
+        {
+            "regnskapsperiode": {"tilDato": "2024-12-31"},
+            "sumDriftsinntekter": 300.0,
+            "sumEiendeler": 1000.0,
+        }
+    ]
+    store = SaftDatasetStore()
+    results = [
+        _make_result(name, analysis_year=2024, fiscal_year="2024")
+        for name in ("a.xml", "b.xml", "c.xml")
+    ]
+    for result in results:
+        result.brreg_json = regnskaper  # type: ignore[assignment]
+    store.apply_batch(results)
+    store._multi_year_summaries = pd.DataFrame(  # type: ignore[attr-defined]
+        {
+            "driftsinntekter": [310.0, 320.0, 330.0],
+            "arsresultat": [0.0, 0.0, 0.0],
+            "eiendeler_UB_brreg": [1000.0, 1000.0, 1000.0],
+            "egenkapital_UB": [0.0, 0.0, 0.0],
+            "gjeld_UB_brreg": [0.0, 0.0, 0.0],
+        },
+        index=["a.xml", "b.xml", "c.xml"],
+    )
+
+    def _revenue() -> list[float]:
+        comparison = store.brreg_year_comparison()
+        return list(comparison.loc[comparison["Felt"] == "Driftsinntekter", "SAF-T"])
+
+    store.activate("b.xml")
+    assert _revenue() == [320.0]
+
+    store._current_key = None  # type: ignore[attr-defined]
+    assert _revenue() == [330.0]
+
+
+def test_apply_brreg_refresh_updates_stale_datasets() -> None:
+    from nordlys.saft.brreg_enrichment import BrregEnrichment
+
+    store = SaftDatasetStore()
+    results = [
+        _make_result("a.xml", analysis_year=2023, fiscal_year="2023"),
+        _make_result("b.xml", analysis_year=2024, fiscal_year="2024"),
+    ]
+    for result in results:
+        result.brreg_json = {"versjon": "gammel"}
+        result.brreg_stale = True
+    store.apply_batch(results)
+    store.activate("b.xml")
+
+    assert [header.orgnr for header in store.stale_brreg_headers()] == ["123456789"]
+    fresh = BrregEnrichment(
+        {"versjon": "ny"}, {"driftsinntekter": 1.0}, None, None, None
+    )
+
+    changed = store.apply_brreg_refresh({"123456789": fresh})
+
+    assert changed == ["a.xml", "b.xml"]
+    assert store.brreg_json == {"versjon": "ny"}
+    assert store.stale_brreg_headers() == []
+    assert store.apply_brreg_refresh({"123456789": fresh}) == []
+
+
+def test_failed_brreg_refresh_keeps_data_and_stops_retrying() -> None:
+    store = SaftDatasetStore()
+    result = _make_result("a.xml", analysis_year=2023, fiscal_year="2023")
+    result.brreg_json = {"versjon": "gammel"}
+    result.brreg_stale = True
+    store.apply_batch([result])
+    store.activate("a.xml")
+
+    assert store.apply_brreg_refresh({"123456789": None}) == []
+
+    assert store.brreg_json == {"versjon": "gammel"}
+    assert store.stale_brreg_headers() == []
+
+
+def test_derived_views_are_cached_until_result_changes(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    from nordlys.ui.data_manager import dataset_store
+
+    calls: List[str] = []
+    original = dataset_store._posting_rows
+
+    def _counting(*args, **kwargs):
+        calls.append("bygg")
+        return original(*args, **kwargs)
+
+    monkeypatch.setattr(dataset_store, "_posting_rows", _counting)
+
+    def _result() -> SaftLoadResult:
+        result = _make_result("a.xml", analysis_year=2023, fiscal_year="2023")
+        result.credit_notes = pd.DataFrame(
+            {
+                "Dato": [pd.Timestamp("2023-03-01"), None],
+                "Bilagsnr": ["K1", "K2"],
+                "Beskrivelse": ["Kreditnota", "Uten dato"],
+                "Beløp": [-100.0, "ugyldig"],
+            }
+        )
+        return result
+
+    store = SaftDatasetStore()
+    store.apply_batch([_result()])
+    store.activate("a.xml")
+
+    rows = store.credit_note_rows()
+    assert rows == [
+        ("01.03.2023", "K1", "Kreditnota", "—", -100.0),
+        ("—", "K2", "Uten dato", "—", 0.0),
+    ]
+    rows.clear()
+    assert len(store.credit_note_rows()) == 2
+    assert store.credit_note_monthly_summary() == [("Mars", 1, -100.0)]
+    assert calls == ["bygg"]
+
+    store.apply_batch([_result()])
+    store.activate("a.xml")
+    store.credit_note_rows()
+    assert calls == ["bygg", "bygg"]
+
+
+def test_counterparty_warning_rows_list_flagged_parties() -> None:
+    from nordlys.saft.brreg_enrichment import CounterpartyRegistryInfo
+
+    def _info(
+        orgnr: str,
+        *,
+        konkurs: bool = False,
+        deleted: bool = False,
+        snapshot_imported_at: float | None = None,
+    ):
+        return CounterpartyRegistryInfo(
+            orgnr=orgnr,
+            name=None,
+            naringskode=None,
+            naring_description=None,
+            konkurs=konkurs,
+            avvikling=None,
+            mva_reg=None,
+            deleted=deleted,
+            snapshot_imported_at=snapshot_imported_at,
+        )
+
+    store = SaftDatasetStore()
+    result = _make_result("2023.xml", analysis_year=2023, fiscal_year="2023")
+    result.customers = {
+        "K1": CustomerInfo("K1", "1001", "Konkurs AS", registration_number="111111111"),
+        "K2": CustomerInfo("K2", "1002", "Frisk AS", registration_number="222222222"),
+    }
+    result.suppliers = {
+        "L1": SupplierInfo("L1", "2001", "Borte AS", registration_number="333333333"),
+    }
+    store.apply_batch([result])
+    store.activate("2023.xml")
+    assert store.counterparty_warning_rows() == []
+
+    store.apply_counterparty_registry(
+        {
+            "111111111": _info("111111111", konkurs=True),
+            "222222222": _info("222222222", snapshot_imported_at=1_700_000_000.0),
+            "333333333": _info("333333333", deleted=True),
+        }
+    )
+
+    assert store.counterparty_warning_rows() == [
+        ("1001", "Konkurs AS", "111111111", "Konkurs")
+    ]
+    assert store.counterparty_warning_rows(suppliers=True) == [
+        ("2001", "Borte AS", "333333333", "Slettet")
+    ]
+    assert store.counterparty_snapshot_imported_at() == 1_700_000_000.0
+    assert store.counterparty_snapshot_imported_at(suppliers=True) is None
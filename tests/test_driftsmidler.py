@@ -6,7 +6,10 @@ from nordlys.regnskap.driftsmidler import (
     AssetAccession,
     AssetAccessionSummary,
     AssetMovement,
+    AssetLedger,
     CapitalizationCandidate,
+    build_asset_register,
+    build_asset_roll_forward,
     find_asset_accessions,
     find_capitalization_candidates,
     find_possible_disposals,
@@ -534,3 +537,113 @@ def test_find_capitalization_candidates_aggregates_per_voucher():
             description="Del 2",
         ),
     ]
+
+
+def _asset_voucher(
+    document: str,
+    when: date,
+    account: str,
+    amount: float,
+) -> CostVoucher:
+    return CostVoucher(
+        transaction_id=document,
+        document_number=document,
+        transaction_date=when,
+        supplier_id=None,
+        supplier_name="Leverandør",
+        description=None,
+        amount=abs(amount),
+        lines=[
+            VoucherLine(
+                account=account,
+                account_name="Maskiner",
+                description=None,
+                vat_code=None,
+                debit=max(amount, 0.0),
+                credit=max(-amount, 0.0),
+            )
+        ],
+    )
+
+
+def test_asset_ledger_matches_reversal_on_amount_within_window():
+    vouchers = [
+        _asset_voucher("A1", date(2024, 1, 10), "1200", 10_000.0),
+        _asset_voucher("A2", date(2024, 7, 1), "1200", 10_000.0),
+        _asset_voucher("A3", date(2024, 7, 20), "1200", -10_000.0),
+        _asset_voucher("A4", date(2024, 8, 1), "1200", 40_000.0),
+    ]
+
+    accessions = AssetLedger().add_vouchers(vouchers).accessions()
+
+    assert [(item.document, item.amount) for item in accessions] == [
+        ("A1", 10_000.0),
+        ("A4", 40_000.0),
+    ]
+
+
+def test_asset_ledger_nets_unmatched_reversal_against_account_pool():
+    vouchers = [
+        _asset_voucher("A1", date(2024, 1, 10), "1200", 50_000.0),
+        _asset_voucher("A2", date(2024, 11, 1), "1200", -30_000.0),
+    ]
+
+    accessions = AssetLedger().add_vouchers(vouchers).accessions()
+
+    assert [(item.document, item.amount) for item in accessions] == [("A1", 20_000.0)]
+
+
+def test_build_asset_register_combines_all_findings():
+    vouchers = [_asset_voucher("A1", date(2024, 3, 1), "1200", 25_000.0)]
+    vouchers.append(_asset_voucher("K1", date(2024, 4, 1), "6540", 35_000.0))
+    tb = pd.DataFrame(
+        {
+            "Konto": ["1250"],
+            "Kontonavn": ["Inventar"],
+            "IB_netto": [8_000.0],
+            "UB_netto": [0.0],
+        }
+    )
+
+    register = build_asset_register(tb, vouchers)
+
+    assert [item.document for item in register.accessions] == ["A1"]
+    assert [item.document for item in register.capitalization_candidates] == ["K1"]
+    assert [item.account for item in register.disposals] == ["1250"]
+
+
+def test_build_asset_roll_forward_links_years():
+    tb_2023 = pd.DataFrame(
+        {
+            "Konto": ["1200"],
+            "Kontonavn": ["Maskiner"],
+            "IB_netto": [100_000.0],
+            "UB_netto": [120_000.0],
+        }
+    )
+    tb_2024 = pd.DataFrame(
+        {
+            "Konto": ["1200"],
+            "Kontonavn": ["Maskiner"],
+            "IB_netto": [119_000.0],
+            "UB_netto": [100_000.0],
+        }
+    )
+    datasets = [
+        (2023, tb_2023, [_asset_voucher("A1", date(2023, 5, 1), "1200", 40_000.0)]),
+        (2024, tb_2024, []),
+    ]
+
+    rows = build_asset_roll_forward(datasets)
+
+    assert [(row.year, row.account) for row in rows] == [
+        (2023, "1200"),
+        (2024, "1200"),
+    ]
+    first, second = rows
+    assert first.additions == 40_000.0
+    assert first.other_movements == -20_000.0
+    assert first.opening_difference is None
+    assert second.additions == 0.0
+    assert second.other_movements == -19_000.0
+    assert second.opening_difference == -1_000.0
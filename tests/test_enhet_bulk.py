@@ -0,0 +1,136 @@
+from __future__ import annotations
+
+import gzip
+import json
+import time
+
+import pytest
+
+from nordlys import industry_groups_cli
+from nordlys.integrations import brreg_client, brreg_service, enhet_bulk
+from nordlys.integrations.brreg_models import BrregServiceResult
+
+_ENHETER = [
+    {
+        "organisasjonsnummer": "111111111",
+        "navn": "Konkurs AS",
+        "naeringskode1": {"kode": "47.110", "beskrivelse": "Butikk", "x": 1},
+        "konkurs": True,
+        "forretningsadresse": {"adresse": ["Gate 1"]},
+    },
+    {
+        "organisasjonsnummer": "222222222",
+        "navn": "Tekst [med] {klammer}, AS",
+        "registrertIMvaregisteret": False,
+    },
+    {"organisasjonsnummer": "12", "navn": "Ugyldig"},
+]
+
+
+@pytest.fixture
+def snapshot_file(tmp_path, monkeypatch: pytest.MonkeyPatch):
+    target = tmp_path / "snapshot.sqlite3"
+    monkeypatch.setattr(enhet_bulk, "SNAPSHOT_PATH", target)
+    return target
+
+
+def test_import_streams_gzipped_json_in_small_chunks(
+    tmp_path, snapshot_file, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(enhet_bulk, "_READ_SIZE", 7)
+    bulk = tmp_path / "enheter_alle.json.gz"
+    with gzip.open(bulk, "wt", encoding="utf-8") as fh:
+        json.dump(_ENHETER, fh, ensure_ascii=False, indent=2)
+
+    progress: list[int] = []
+    count = enhet_bulk.import_bulk_file(bulk, progress=progress.append)
+
+    assert count == 2
+    assert progress[-1] == 2
+    assert enhet_bulk.lookup_snapshot("111111111") == {
+        "organisasjonsnummer": "111111111",
+        "navn": "Konkurs AS",
+        "naeringskode1": {"kode": "47.110", "beskrivelse": "Butikk"},
+        "konkurs": True,
+    }
+    assert enhet_bulk.lookup_snapshot_many(["222222222", "333333333"]) == {
+        "222222222": {
+            "organisasjonsnummer": "222222222",
+            "navn": "Tekst [med] {klammer}, AS",
+            "registrertIMvaregisteret": False,
+        }
+    }
+
+
+def test_import_csv_and_lookups_skip_network(
+    tmp_path, snapshot_file, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    bulk = tmp_path / "enheter_alle.csv"
+    bulk.write_text(
+        "organisasjonsnummer,navn,naeringskode1.kode,konkurs,"
+        "underTvangsavviklingEllerTvangsopplosning\n"
+        '333333333,"Lager, AS",46.900,false,true\n',
+        encoding="utf-8",
+    )
+    assert industry_groups_cli.main(["--importer-enhetsregister", str(bulk)]) == 0
+
+    def no_network(*_: object, **__: object):
+        raise AssertionError("Oppslaget skulle vært besvart fra indeksen")
+
+    monkeypatch.setattr(brreg_client, "_fetch_coalesced", no_network)
+
+    single = brreg_service.fetch_enhetsregister("333 333 333")
+    batch = brreg_service.fetch_many(["333333333"])
+    status = brreg_service.get_company_status("333333333")
+
+    assert single.data == {
+        "organisasjonsnummer": "333333333",
+        "navn": "Lager, AS",
+        "naeringskode1": {"kode": "46.900"},
+        "konkurs": "false",
+        "underTvangsavviklingEllerTvangsoppløsning": "true",
+    }
+    assert single.from_cache is True
+    assert single.snapshot_imported_at == enhet_bulk.snapshot_imported_at()
+    assert batch["333333333"].data == single.data
+    assert status.konkurs is False
+    assert status.avvikling is True
+
+
+def test_old_snapshot_only_backs_up_failed_live_lookups(
+    tmp_path, snapshot_file, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    bulk = tmp_path / "enheter_alle.json"
+    bulk.write_text(json.dumps(_ENHETER[:1]), encoding="utf-8")
+    imported_at = time.time() - 90 * 24 * 60 * 60
+    with monkeypatch.context() as patch:
+        patch.setattr(enhet_bulk.time, "time", lambda: imported_at)
+        enhet_bulk.import_bulk_file(bulk)
+
+    age = enhet_bulk.snapshot_age_seconds()
+    assert age is not None and age > enhet_bulk.SNAPSHOT_MAX_AGE_SECONDS
+    assert enhet_bulk.lookup_snapshot("111111111") is None
+
+    live = {"organisasjonsnummer": "111111111", "navn": "Konkurs AS", "konkurs": False}
+    responses = {"111111111": BrregServiceResult(live, None, None, False)}
+
+    def fake_live(url: str, *_: object, **__: object) -> BrregServiceResult:
+        return responses["111111111"]
+
+    monkeypatch.setattr(brreg_client, "_fetch_coalesced", fake_live)
+
+    single = brreg_service.fetch_enhetsregister("111111111")
+    batch = brreg_service.fetch_many(["111111111"])
+    assert single.data == live and single.snapshot_imported_at is None
+    assert batch["111111111"].data == live
+    assert brreg_service.get_company_status("111111111").konkurs is False
+
+    # Uten nett er den gamle kopien bedre enn ingenting, og alderen følger med.
+    responses["111111111"] = BrregServiceResult(
+        None, "connection_error", "Nettverket er nede", False
+    )
+    single = brreg_service.fetch_enhetsregister("111111111")
+    batch = brreg_service.fetch_many(["111111111"])
+    assert single.data is not None and single.data["konkurs"] is True
+    assert single.snapshot_imported_at == pytest.approx(imported_at)
+    assert batch["111111111"].snapshot_imported_at == pytest.approx(imported_at)
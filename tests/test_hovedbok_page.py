@@ -98,11 +98,8 @@ def test_voucher_search_uses_same_columns_as_voucher_popup(qapp: QApplication) -
     page.voucher_search_input.setText("B-10")
     page.apply_filter()
 
-    headers = [
-        page.table.horizontalHeaderItem(index).text()
-        for index in range(page.table.columnCount())
-    ]
-    assert headers == [
+    model = page.table.data_model()
+    assert model.headers() == [
         "Konto",
         "Kontonavn",
         "Bilagstype",
@@ -112,8 +109,8 @@ def test_voucher_search_uses_same_columns_as_voucher_popup(qapp: QApplication) -
         "Debet",
         "Kredit",
     ]
-    assert page.table.item(0, 0).text() == "1500"
-    assert page.table.item(0, 1).text() == "Kundefordringer"
+    assert model.index(0, 0).data() == "1500"
+    assert model.index(0, 1).data() == "Kundefordringer"
 
 
 def test_empty_state_vises_i_resultatpanel(qapp: QApplication) -> None:
@@ -169,3 +166,21 @@ def test_markering_viser_lopende_summering_for_bilag(qapp: QApplication) -> None
         page.selection_summary_label.text()
         == "Markert 2 linjer · Debet: 1 000 · Kredit: 1 000"
     )
+
+
+def test_account_field_supports_prefix_and_text_search(qapp: QApplication) -> None:
+    page = HovedbokPage()
+    page.set_vouchers([_voucher()])
+    _set_balances(page)
+
+    page.search_input.setText("30")
+    page.apply_filter()
+    assert page.account_name_label.text() == "Kontoer som starter på 30: 1 kontoer"
+    assert page.status_label.text() == "Viser 1 føringer."
+
+    page.search_input.setText("motpost")
+    page.apply_filter()
+    model = page.table.data_model()
+    assert page.account_name_label.text() == "Tekstsøk: motpost"
+    assert model.headers()[0] == "Konto"
+    assert model.index(0, 0).data() == "1500"
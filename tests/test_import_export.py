@@ -83,3 +83,72 @@ def test_require_dataset_loaded_warns_when_missing(dummy_pyside6: None) -> None:
     assert warnings == [
         (controller._window, "Ingenting å eksportere", "Last inn SAF-T først."),
     ]
+
+
+def test_failed_counterparty_lookups_wait_for_next_import(
+    dummy_pyside6: None,
+) -> None:
+    import nordlys.ui.import_export as import_export
+
+    importlib.reload(import_export)
+    controller_class = import_export.ImportExportController
+    controller = controller_class.__new__(controller_class)
+
+    pending = ["111111111", "222222222"]
+    submitted: list[list[str]] = []
+    applied: list[dict] = []
+
+    controller._dataset_store = types.SimpleNamespace(
+        pending_counterparty_orgnrs=lambda: list(pending),
+        apply_counterparty_registry=lambda registry: applied.append(registry) or 0,
+    )
+    controller._task_runner = types.SimpleNamespace(
+        run=lambda _func, orgnrs, **_: submitted.append(list(orgnrs)) or "task"
+    )
+    controller._log_import_event = lambda _message: None
+    controller._enrichment_task_id = None
+    controller._enrichment_attempted = set()
+
+    controller._start_counterparty_enrichment()
+    assert submitted == [["111111111", "222222222"]]
+
+    # Brønnøysund svarte ikke for 222222222, som fortsatt står som ubehandlet.
+    pending.remove("111111111")
+    controller._handle_enrichment_finished({"111111111": object()})
+    assert submitted == [["111111111", "222222222"]]
+    assert controller._enrichment_task_id is None
+
+    controller._start_counterparty_enrichment()
+    assert submitted[-1] == ["222222222"]
+
+
+def test_failed_brreg_refresh_is_not_requeued(dummy_pyside6: None) -> None:
+    import nordlys.ui.import_export as import_export
+    from nordlys.ui.data_manager.dataset_store import SaftDatasetStore
+
+    importlib.reload(import_export)
+    controller_class = import_export.ImportExportController
+    controller = controller_class.__new__(controller_class)
+
+    store = SaftDatasetStore()
+    header = types.SimpleNamespace(orgnr="123456789")
+    store._results = {  # type: ignore[attr-defined]
+        "a.xml": types.SimpleNamespace(brreg_stale=True, header=header)
+    }
+    store._orgnrs = {"a.xml": "123456789"}  # type: ignore[attr-defined]
+    submitted: list[object] = []
+
+    controller._dataset_store = store
+    controller._task_runner = types.SimpleNamespace(
+        run=lambda _func, headers, **_: submitted.append(headers) or "refresh"
+    )
+    controller._brreg_refresh_task_id = None
+
+    controller._start_brreg_refresh()
+    assert submitted == [[header]]
+
+    # Brønnøysund er nede: oppdateringen feilet for selskapet.
+    controller._handle_brreg_refresh_finished({"123456789": None})
+
+    assert submitted == [[header]]
+    assert controller._brreg_refresh_task_id is None
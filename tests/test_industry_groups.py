@@ -65,7 +65,7 @@ def test_import_does_not_pull_saft_modules(monkeypatch: pytest.MonkeyPatch) -> N
 
 
 def test_cache_prevents_double_fetch(monkeypatch: pytest.MonkeyPatch, tmp_path) -> None:
-    cache_path = tmp_path / "cache.json"
+    cache_path = tmp_path / "cache.sqlite3"
     monkeypatch.setattr(industry_groups, "CACHE_PATH", cache_path)
 
     calls: list[str] = []
@@ -84,6 +84,83 @@ def test_cache_prevents_double_fetch(monkeypatch: pytest.MonkeyPatch, tmp_path)
     assert second.group == "Salg av varer (detaljhandel)"
     assert calls == ["333444555"], "Forventet at cache hindrer nytt API-kall"
 
-    with cache_path.open("r", encoding="utf-8") as fh:
-        cached = json.load(fh)
-    assert "333444555" in cached
+    cached = industry_groups.load_cached_brreg("333444555")
+    assert cached is not None
+    assert cached["naeringskode1"]["kode"] == "47.910"
+
+
+def test_fetch_enheter_cached_batches_missing_orgnrs(
+    monkeypatch: pytest.MonkeyPatch, tmp_path
+) -> None:
+    from nordlys.integrations.brreg_models import BrregServiceResult
+
+    legacy_path = tmp_path / "brreg_cache.json"
+    legacy_path.write_text(json.dumps({"111111111": {"navn": "Cachet AS"}}))
+    monkeypatch.setattr(industry_groups, "CACHE_PATH", tmp_path / "brreg_cache.sqlite3")
+
+    batches: list[list[str]] = []
+
+    def fake_fetch_many(orgnrs):
+        batches.append(list(orgnrs))
+        return {
+            "222222222": BrregServiceResult({"navn": "Ny AS"}, None, None, False),
+            "333333333": BrregServiceResult(None, "not_found", "Ingen treff", False),
+            "444444444": BrregServiceResult(None, "timeout", "Tidsavbrudd", False),
+            "555555555": BrregServiceResult(
+                {"navn": "Kopi AS"}, None, None, True, 1_700_000_000.0
+            ),
+        }
+
+    monkeypatch.setattr(industry_groups, "fetch_many", fake_fetch_many)
+
+    snapshot_times: dict[str, float] = {}
+    data, errors = industry_groups.fetch_enheter_cached(
+        [
+            "111111111",
+            "222 222 222",
+            "333333333",
+            "222222222",
+            "12",
+            "444444444",
+            "555555555",
+        ],
+        snapshot_times=snapshot_times,
+    )
+
+    assert batches == [["222222222", "333333333", "444444444", "555555555"]]
+    assert data == {
+        "111111111": {"navn": "Cachet AS"},
+        "222222222": {"navn": "Ny AS"},
+        "555555555": {"navn": "Kopi AS"},
+    }
+    # Data fra bulkindeksen merkes med alderen og lagres ikke som ferske.
+    assert snapshot_times == {"555555555": 1_700_000_000.0}
+    assert industry_groups.load_cached_brreg("555555555") is None
+    assert errors["333333333"] == "Ingen treff"
+    # Midlertidige feil gir verken data eller feil, så numrene kan prøves igjen.
+    assert "444444444" not in errors
+    assert "12" in errors
+    assert industry_groups.load_cached_brreg("222222222") == {"navn": "Ny AS"}
+
+
+def test_cache_migrates_json_once_and_honours_ttl(tmp_path) -> None:
+    from nordlys.integrations.enhet_store import EnhetStore
+
+    legacy_path = tmp_path / "brreg_cache.json"
+    legacy_path.write_text(json.dumps({"111111111": {"navn": "Gammel AS"}}))
+
+    store = EnhetStore(tmp_path / "cache.sqlite3", ttl_seconds=60)
+    assert store.migrate_json(legacy_path) == 1
+    assert store.migrate_json(legacy_path) == 0
+    assert store.get("111111111") == {"navn": "Gammel AS"}
+
+    store.put("222222222", {"navn": "Utløpt AS"}, fetched_at=0.0)
+    store.put("111111111", {"navn": "Oppdatert AS"})
+
+    assert store.get_many(["111111111", "222222222"]) == {
+        "111111111": {"navn": "Oppdatert AS"}
+    }
+    assert store.get("222222222", include_expired=True) == {"navn": "Utløpt AS"}
+    assert store.purge_expired() == 1
+    assert len(store) == 1
+    store.close()
@@ -4,11 +4,13 @@ from datetime import date
 
 from nordlys.saft.ledger import (
     build_ledger_rows,
+    build_ledger_table,
     build_statement_rows,
     filter_ledger_rows,
     rows_for_voucher,
     voucher_key_for_row,
 )
+from nordlys.saft.ledger_index import LedgerIndex
 from nordlys.saft.models import CostVoucher, VoucherLine
 
 
@@ -127,3 +129,67 @@ def test_build_statement_rows_has_running_total() -> None:
     running_values = [row.akkumulert_belop for row in movement_rows]
     assert 1000.0 in running_values
     assert 0.0 in running_values
+
+
+def test_ledger_index_matches_linear_search() -> None:
+    rows = build_ledger_rows(
+        [
+            _voucher(),
+            _voucher(transaction_id="TX-2", document_number="B-11"),
+            _voucher(transaction_id="TX-3", document_number=None),
+        ]
+    )
+    index = LedgerIndex(rows)
+
+    for query in ("300", "1", "kundeford", "sa", "salgsinntekt", "x", " 15 "):
+        assert filter_ledger_rows(index, query) == filter_ledger_rows(rows, query)
+    assert index.accounts_with_prefix("15") == ["1500"]
+    assert index.accounts_with_prefix("4") == []
+    assert [row.transaksjons_id for row in index.voucher_rows("b-11")] == [
+        "TX-2",
+        "TX-2",
+    ]
+    assert len(index.voucher_rows("tx-3")) == 2
+    assert {row.konto for row in index.text_rows("januar")} == {"3000"}
+    assert index.account_rows(["3000", "1500"]) == [
+        row for row in rows if row.konto in {"3000", "1500"}
+    ]
+
+
+def test_ledger_table_sorts_like_rows_and_builds_statement() -> None:
+    later = CostVoucher(
+        transaction_id="TX-0",
+        document_number="A-1",
+        transaction_date=date(2024, 2, 1),
+        supplier_id=None,
+        supplier_name=None,
+        description="Bank",
+        amount=50.0,
+        lines=[
+            VoucherLine("1920", "Bank", "Innbetaling", None, 50.0, 0.0),
+            VoucherLine("1500", "Kundefordringer", None, None, 0.0, 50.0),
+        ],
+    )
+    undated = CostVoucher("TX-9", None, None, None, None, None, 0.0, later.lines)
+    table = build_ledger_table([later, undated, _voucher()])
+    rows = table.rows()
+
+    assert rows == sorted(
+        rows, key=lambda row: (row.dato, row.bilagsnr, row.transaksjons_id, row.konto)
+    )
+    assert [row.dato for row in rows][-1] == "—"
+    assert rows[0].motkontoer == "3000"
+    assert rows[2].beskrivelse == "—"
+    assert len(table.voucher_offsets(2)) == 2
+    assert rows_for_voucher(table, rows[0]) == rows_for_voucher(rows, rows[0])
+
+    balances = {"1500": (10.0, -40.0)}
+    assert build_statement_rows(table, balances) == build_statement_rows(rows, balances)
+    statement = build_statement_rows(table.take(table.konto == "1500"), balances)
+    assert [row.akkumulert_belop for row in statement] == [
+        10.0,
+        1010.0,
+        960.0,
+        910.0,
+        -40.0,
+    ]
@@ -0,0 +1,116 @@
+from __future__ import annotations
+
+import pytest
+
+from nordlys.integrations.lookup_cache import (
+    LookupCache,
+    SqliteTier,
+    allow_stale,
+    cache_stats,
+    get_cache,
+)
+
+
+def test_lru_evicts_to_persistent_tier_and_counts(tmp_path) -> None:
+    tier = SqliteTier(tmp_path / "cache.sqlite3", "test_lru")
+    cache: LookupCache[dict] = LookupCache(
+        "test_lru", ttl_seconds=60, max_entries=2, persistent=tier
+    )
+    for key in ("a", "b", "c"):
+        cache.put(key, {"key": key})
+
+    assert len(cache) == 2
+    assert cache.get("a") == {"key": "a"}
+    stats = cache.stats
+    assert stats.evictions == 2  # "a" ved innsetting av "c", "b" da "a" ble lest inn
+    assert stats.persistent_hits == 1
+    assert stats.hits == 1
+
+    reopened: LookupCache[dict] = LookupCache(
+        "test_lru", ttl_seconds=60, persistent=SqliteTier(tier.path, "test_lru")
+    )
+    assert reopened.get_many(["b", "c", "d"]) == {"b": {"key": "b"}, "c": {"key": "c"}}
+    assert get_cache("test_lru") is reopened
+    assert cache_stats()["test_lru"]["misses"] == 1
+
+    reopened.clear()
+    assert SqliteTier(tier.path, "test_lru").load_many(["a", "b", "c"]) == {}
+
+
+def test_stale_value_is_served_while_refreshing() -> None:
+    now = {"value": 0.0}
+    cache: LookupCache[str] = LookupCache(
+        "test_swr", ttl_seconds=10, stale_seconds=100, clock=lambda: now["value"]
+    )
+    loads: list[str] = []
+
+    def loader() -> str:
+        loads.append("load")
+        return f"v{len(loads)}"
+
+    first = cache.get_or_load("k", loader)
+    assert (first.value, first.from_cache) == ("v1", False)
+    assert cache.get_or_load("k", loader).from_cache is True
+
+    now["value"] = 50.0
+    stale = cache.get_or_load("k", loader)
+    assert (stale.value, stale.stale) == ("v1", True)
+    cache.wait_for_refreshes(timeout=5)
+    assert cache.get("k") == "v2"
+
+    now["value"] = 500.0
+    assert cache.get("k") is None
+    assert cache.get("k", include_expired=True) == "v2"
+
+    def failing() -> str:
+        raise RuntimeError("nede")
+
+    with pytest.raises(RuntimeError):
+        cache.get_or_load("k", failing)
+    stats = cache.stats
+    assert (stats.loads, stats.load_errors, stats.refreshes) == (3, 1, 1)
+    assert stats.stale_hits == 2
+
+
+def test_allow_stale_widens_window_and_flags_only_its_own_lookups() -> None:
+    import threading
+
+    now = {"value": 0.0}
+    cache: LookupCache[str] = LookupCache(
+        "test_scope", ttl_seconds=10, stale_seconds=5, clock=lambda: now["value"]
+    )
+    cache.put("gammel", "v0", stored_at=0.0)
+    cache.put("fersk", "f0", stored_at=95.0)
+    cache.put("nylig", "n0", stored_at=88.0)
+    now["value"] = 100.0
+
+    # Utenfor blokken er verdien for gammel og hentes på nytt med en gang.
+    plain = cache.get_or_load("gammel", lambda: "v1")
+    assert (plain.value, plain.from_cache) == ("v1", False)
+
+    cache.put("gammel", "v0", stored_at=0.0)
+    with allow_stale(1_000, ["test_scope"]) as scope:
+        fresh = cache.get_or_load("fersk", lambda: "f1")
+        assert (fresh.value, scope.stale) == ("f0", False)
+
+        # Et foreldet oppslag i en annen tråd hører ikke til denne blokken.
+        served_elsewhere: list[bool] = []
+        other = threading.Thread(
+            target=lambda: served_elsewhere.append(
+                cache.get_or_load("nylig", lambda: "n1").stale
+            )
+        )
+        other.start()
+        other.join()
+        assert served_elsewhere == [True]
+        assert scope.stale is False
+
+        cache.put("gammel", "v0", stored_at=0.0)
+        served = cache.get_or_load("gammel", lambda: "v2")
+    cache.wait_for_refreshes(timeout=5)
+
+    assert (served.value, served.stale, scope.stale) == ("v0", True, True)
+    with allow_stale(1_000, ["et_annet_navnerom"]) as other_scope:
+        cache.put("gammel", "v0", stored_at=0.0)
+        assert cache.get_or_load("gammel", lambda: "v3").value == "v3"
+    assert other_scope.stale is False
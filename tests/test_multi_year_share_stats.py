@@ -4,7 +4,10 @@ from nordlys.ui.multi_year_stats import (
     assessment_level,
     deviation_assessment,
     normal_variation_text,
+    revenue_share_frame,
+    share_statistics,
     standard_deviation,
+    summaries_frame,
 )
 
 
@@ -60,3 +63,30 @@ def test_deviation_assessment_with_zero_std_dev() -> None:
 
     assert unchanged.startswith("Helt normal variasjon")
     assert changed.startswith("Uvanlig avvik")
+
+
+def test_share_statistics_matches_scalar_helpers() -> None:
+    summaries = summaries_frame(
+        [
+            {"salgsinntekter": 1000.0, "varekostnad": 400.0},
+            {"salgsinntekter": 0.0, "sum_inntekter": 800.0, "varekostnad": 400.0},
+            {"salgsinntekter": 1000.0, "varekostnad": 700.0},
+        ],
+        index=[2021, 2022, 2023],
+    )
+
+    shares = revenue_share_frame(summaries, ["varekostnad", "lonnskostnad"])
+    stats = share_statistics(shares)
+
+    assert list(shares["varekostnad"]) == [40.0, 50.0, 70.0]
+    expected_std = standard_deviation([40.0, 50.0])
+    assert stats.loc["varekostnad", "Gjennomsnitt"] == 45.0
+    assert stats.loc["varekostnad", "Standardavvik"] == expected_std
+    assert stats.loc["varekostnad", "Normal variasjon"] == normal_variation_text(
+        45.0, expected_std
+    )
+    assert stats.loc["varekostnad", "Vurdering"] == deviation_assessment(
+        70.0, 45.0, expected_std
+    )
+    assert stats.loc["lonnskostnad", "Gjennomsnitt"] is None
+    assert stats.loc["lonnskostnad", "Vurdering"] == "—"
@@ -1,6 +1,13 @@
 from datetime import date
 
-from nordlys.regnskap.mva import find_vat_deviations, summarize_vat_deviations
+from nordlys.regnskap.mva import (
+    VAT_LEVEL_ACCOUNT,
+    VAT_LEVEL_MONTH,
+    VAT_LEVEL_SUPPLIER,
+    VatCodeProfile,
+    find_vat_deviations,
+    summarize_vat_deviations,
+)
 from nordlys.saft.models import CostVoucher, VoucherLine
 
 
@@ -374,3 +381,67 @@ def test_find_vat_deviations_uses_account_line_amount_not_voucher_total() -> Non
 
     sales_summary = next(item for item in summaries if item.account == "3000")
     assert sales_summary.deviation_amount == 900.0
+
+
+def test_vat_code_profile_recomputes_for_new_minimum_without_rescanning() -> None:
+    vouchers = [
+        _voucher(
+            tx_id=str(index),
+            doc=f"B{index}",
+            tx_date=date(2025, 1, index),
+            supplier="Nord AS",
+            vat_code="2" if index == 4 else "1",
+        )
+        for index in range(1, 5)
+    ]
+    profile = VatCodeProfile.from_vouchers(vouchers)
+
+    assert len(profile) == 4
+    assert profile.account_norms.loc["6320", "expected_vat_code"] == "1"
+    assert [item.voucher_number for item in profile.deviations(2)] == ["B4"]
+    assert profile.deviations(5) == []
+    assert profile.deviations(4) == find_vat_deviations(
+        vouchers, minimum_observations=4
+    )
+
+
+def test_vat_code_profile_flags_supplier_and_month_levels() -> None:
+    rows = [
+        ("1", date(2025, 1, 5), "Nord AS", "1"),
+        ("2", date(2025, 1, 6), "Nord AS", "1"),
+        ("3", date(2025, 1, 7), "Nord AS", "1"),
+        ("4", date(2025, 2, 5), "Vest AS", "14"),
+        ("5", date(2025, 2, 6), "Vest AS", "14"),
+        ("6", date(2025, 2, 7), "Vest AS", "1"),
+    ]
+    vouchers = [
+        _voucher(
+            tx_id=tx, doc=f"B{tx}", tx_date=tx_date, supplier=supplier, vat_code=code
+        )
+        for tx, tx_date, supplier, code in rows
+    ]
+    profile = VatCodeProfile.from_vouchers(vouchers)
+
+    by_account = [item.voucher_number for item in profile.deviations(3)]
+    by_supplier = profile.deviations(3, level=VAT_LEVEL_SUPPLIER)
+    by_month = profile.deviations(3, level=VAT_LEVEL_MONTH)
+
+    assert by_account == ["B4", "B5"]
+    assert {item.level for item in profile.deviations(3)} == {VAT_LEVEL_ACCOUNT}
+    assert [(item.voucher_number, item.dimension) for item in by_supplier] == [
+        ("B6", "Vest AS")
+    ]
+    assert by_supplier[0].expected_vat_code == "14"
+    assert [(item.voucher_number, item.dimension) for item in by_month] == [
+        ("B6", "2025-02")
+    ]
+    assert (
+        profile.norms(VAT_LEVEL_SUPPLIER).loc[("6320", "Nord AS"), "total_count"] == 3
+    )
+
+    flags = profile.deviation_flags(3)
+    assert flags.sum().to_dict() == {
+        VAT_LEVEL_ACCOUNT: 2,
+        VAT_LEVEL_SUPPLIER: 1,
+        VAT_LEVEL_MONTH: 1,
+    }
@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+import threading
+import time
+
+import pytest
+
+try:  # pragma: no cover - miljøavhengig
+    from PySide6.QtWidgets import QApplication
+except (ImportError, OSError) as exc:  # pragma: no cover - miljøavhengig
+    pytest.skip(f"PySide6 er ikke tilgjengelig: {exc}", allow_module_level=True)
+
+from nordlys.core.task_runner import TaskRunner
+from nordlys.ui.page_models import PageModelPipeline
+
+
+@pytest.fixture(scope="module")
+def qapp() -> QApplication:
+    app = QApplication.instance()
+    if app is None:
+        app = QApplication([])
+    return app
+
+
+def _wait_until(qapp: QApplication, condition, timeout: float = 5.0) -> None:
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise AssertionError("Tidsavbrudd mens vi ventet på sidemodellen")
+        qapp.processEvents()
+        time.sleep(0.005)
+
+
+def test_newer_model_replaces_pending_one(qapp: QApplication) -> None:
+    runner = TaskRunner(max_threads=2)
+    pipeline = PageModelPipeline(runner)
+    release = threading.Event()
+    applied: list[str] = []
+    threads: list[bool] = []
+
+    def slow(value: str) -> str:
+        release.wait(5)
+        return value
+
+    def apply(value: str) -> None:
+        threads.append(threading.current_thread() is threading.main_thread())
+        applied.append(value)
+
+    pipeline.submit("side", slow, ("gammel",), apply)
+    pipeline.submit("side", str.upper, ("ny",), apply)
+    _wait_until(qapp, lambda: applied)
+    release.set()
+    runner._pool.waitForDone(5000)
+    qapp.processEvents()
+
+    assert applied == ["NY"]
+    assert threads == [True]
+    assert not pipeline.is_pending("side")
+
+
+def test_cancel_all_drops_results_and_reports_errors(qapp: QApplication) -> None:
+    runner = TaskRunner(max_threads=1)
+    pipeline = PageModelPipeline(runner)
+    applied: list[object] = []
+    errors: list[str] = []
+
+    pipeline.submit("a", len, ("abc",), applied.append)
+    pipeline.submit("b", len, ("abcd",), applied.append)
+    assert sorted(pipeline.cancel_all()) == ["a", "b"]
+
+    def broken() -> None:
+        raise ValueError("ugyldig saldobalanse")
+
+    pipeline.submit("c", broken, (), applied.append, on_error=errors.append)
+    _wait_until(qapp, lambda: errors)
+    runner._pool.waitForDone(5000)
+    qapp.processEvents()
+
+    assert applied == []
+    assert "ugyldig saldobalanse" in errors[0]
@@ -8,6 +8,8 @@ except (ImportError, OSError) as exc:  # pragma: no cover - miljøavhengig
 
 from nordlys.ui.data_manager import SaftDatasetStore
 from nordlys.ui.page_state_handler import PageStateHandler
+from nordlys.ui.pages import SammenstillingsanalysePage
+from nordlys.ui.pages.dataframe_page import DataFramePage
 
 
 @pytest.fixture(scope="session")
@@ -182,6 +184,21 @@ def test_no_suggestions_when_difference_is_between_one_and_two(
     assert suggestions == []
 
 
+def test_matches_search_all_accounts_in_trial_balance(_qapp: QApplication) -> None:
+    store = SaftDatasetStore()
+    handler = PageStateHandler(store, {}, lambda: None)
+    # Kontoene som forklarer avviket ligger langt ut i saldobalansen.
+    accounts = [str(1000 + index) for index in range(400)]
+    values = [5000.0 + 7.0 * index for index in range(400)]
+    values[250] = 123.45
+    values[390] = 876.55
+    df = pd.DataFrame({"Konto": accounts, "UB_netto": values})
+
+    matches = handler._find_balance_matches(-1000.0, df)
+
+    assert [entry.account for entry in matches[0]] == ["1250", "1390"]
+
+
 def test_suggestions_are_shown_as_table(_qapp: QApplication) -> None:
     store = SaftDatasetStore()
     store._saft_summary = {  # type: ignore[attr-defined]
@@ -244,3 +261,84 @@ def test_separator_between_assets_and_liabilities(_qapp: QApplication) -> None:
     combined_html = "".join(suggestions)
     assert "<hr" in combined_html
     assert combined_html.index("Gjeld") > combined_html.index("<hr")
+
+
+class _CountingPage(DataFramePage):
+    def __init__(self) -> None:
+        super().__init__("Saldobalanse", "")
+        self.frames: list = []
+
+    def set_dataframe(self, df) -> None:  # type: ignore[override]
+        self.frames.append(df)
+
+
+class _CountingSammenstilling(SammenstillingsanalysePage):
+    def __init__(self) -> None:
+        super().__init__()
+        self.frames: list = []
+
+    def set_dataframe(self, df, fiscal_year=None) -> None:  # type: ignore[override]
+        self.frames.append(df)
+
+
+def test_hidden_pages_are_filled_when_shown_once_per_dataset(
+    _qapp: QApplication,
+) -> None:
+    store = SaftDatasetStore()
+    handler = PageStateHandler(store, {}, lambda: None)
+    visible = _CountingPage()
+    hidden = _CountingSammenstilling()
+    handler.apply_page_state("plan.saldobalanse", visible)
+    handler.apply_page_state("plan.sammenstilling", hidden)
+    handler.on_page_shown("plan.saldobalanse", visible)
+    assert (len(visible.frames), len(hidden.frames)) == (1, 1)
+
+    frame = pd.DataFrame({"Konto": ["1920"], "UB_netto": [100.0]})
+    store._saft_df = frame  # type: ignore[attr-defined]
+    store._current_key = "2024"  # type: ignore[attr-defined]
+    handler.mark_dataset_changed()
+    assert visible.frames[-1] is frame
+    assert len(visible.frames) == 2
+
+    # Skjult side er ikke rørt, og synlig side fylles ikke på nytt.
+    handler.mark_dataset_changed()
+    handler.on_page_shown("plan.saldobalanse", visible)
+    assert len(visible.frames) == 2
+    assert len(hidden.frames) == 1
+
+    handler.on_page_shown("plan.sammenstilling", hidden)
+    handler.on_page_shown("plan.sammenstilling", hidden)
+    assert len(hidden.frames) == 2
+    assert hidden.frames[-1] is frame
+
+    handler.invalidate_pages()
+    handler.on_page_shown("plan.saldobalanse", visible)
+    assert len(visible.frames) == 3
+    assert len(hidden.frames) == 2  # skjult side venter til den vises igjen
+
+
+def test_page_models_are_reused_when_switching_back_to_a_dataset(
+    _qapp: QApplication,
+) -> None:
+    store = SaftDatasetStore()
+    handler = PageStateHandler(store, {}, lambda: None)
+    computed: list[str] = []
+    shown: list[str] = []
+
+    def compute(dataset: str) -> str:
+        computed.append(dataset)
+        return f"modell {dataset}"
+
+    def show(dataset: str) -> None:
+        store._current_key = dataset  # type: ignore[attr-defined]
+        handler._run_page_model("rev.mva", compute, (dataset,), shown.append)
+
+    for dataset in ("A", "B", "A"):
+        show(dataset)
+
+    assert computed == ["A", "B"]
+    assert shown == ["modell A", "modell B", "modell A"]
+
+    handler.invalidate_pages()
+    show("A")
+    assert computed == ["A", "B", "A"]
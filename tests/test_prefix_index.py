@@ -0,0 +1,31 @@
+from __future__ import annotations
+
+import pytest
+
+from nordlys.helpers.prefix_index import PrefixSumIndex
+
+
+def test_prefix_sum_covers_all_columns_and_overlapping_prefixes() -> None:
+    index = PrefixSumIndex(["1920", "1500", "1580", "3000", "15"])
+    index.add_columns(
+        {"UB": [100.0, 10.0, 5.0, -50.0, 1.0], "IB": [1.0, 2.0, 3.0, 4.0, 5.0]}
+    )
+
+    assert list(index.prefix_sum(["15"])) == pytest.approx([16.0, 10.0])
+    assert list(index.prefix_sum(["15", "1500"])) == pytest.approx([16.0, 10.0])
+    assert index.column_sum("UB", ["1500", "19"]) == pytest.approx(110.0)
+    assert index.column_sum("IB", ["4"]) == 0.0
+    with pytest.raises(KeyError):
+        index.column_sum("forrige", ["1"])
+
+
+def test_range_sum_on_numeric_keys_and_empty_index() -> None:
+    index = PrefixSumIndex([3000, 3900, 4000, 1920])
+    index.add_column("netto", [-100.0, -20.0, 40.0, 80.0])
+
+    assert list(index.range_sum(3000, 3999)) == pytest.approx([-120.0])
+    assert list(index.range_sum(5000, 5999)) == [0.0]
+
+    empty = PrefixSumIndex([])
+    empty.add_column("UB", [])
+    assert empty.column_sum("UB", ["1"]) == 0.0
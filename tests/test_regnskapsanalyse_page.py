@@ -0,0 +1,49 @@
+from __future__ import annotations
+
+from typing import Generator
+
+import pandas as pd
+import pytest
+
+try:  # pragma: no cover - miljøavhengig
+    from PySide6.QtWidgets import QApplication
+except (ImportError, OSError) as exc:  # pragma: no cover - miljøavhengig
+    pytest.skip(f"PySide6 er ikke tilgjengelig: {exc}", allow_module_level=True)
+
+from nordlys.ui.data_manager.dataset_store import SummarySnapshot
+from nordlys.ui.pages.regnskapsanalyse_page import RegnskapsanalysePage
+
+
+@pytest.fixture(scope="session")
+def qapp() -> Generator[QApplication, None, None]:
+    app = QApplication.instance()
+    if app is None:
+        app = QApplication([])
+    yield app
+
+
+def _row_values(page: RegnskapsanalysePage, label: str) -> list[str]:
+    table = page.multi_year_table
+    for row in range(table.rowCount()):
+        if table.item(row, 0).text() == label:
+            return [
+                table.item(row, col).text() for col in range(1, table.columnCount())
+            ]
+    raise AssertionError(f"Fant ikke raden {label!r}")
+
+
+def test_multi_year_table_uses_store_summaries(qapp: QApplication) -> None:
+    page = RegnskapsanalysePage()
+    snapshots = [
+        SummarySnapshot("Test AS 2023", {"salgsinntekter": 1.0}, 2023, False, "a"),
+        SummarySnapshot("Test AS 2024", {"salgsinntekter": 2.0}, 2024, True, "b"),
+    ]
+    summaries = pd.DataFrame(
+        {"salgsinntekter": [3000.0, 1000.0, 2000.0]}, index=["c", "a", "b"]
+    )
+
+    page.set_summary_history(snapshots, summaries)
+    assert _row_values(page, "Salgsinntekter") == ["1 000", "2 000"]
+
+    page.set_summary_history(snapshots)
+    assert _row_values(page, "Salgsinntekter") == ["1", "2"]
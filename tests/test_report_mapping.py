@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+import json
+
+import pytest
+
+from nordlys.saft.report_mapping import (
+    BASIS_UB,
+    AccountRange,
+    ReportLine,
+    compile_report_mapping,
+    load_report_mapping,
+)
+
+
+def test_compiled_mapping_resolves_terms_for_all_periods() -> None:
+    lines = (
+        ReportLine("resultat", terms=(("inntekt", 1.0), ("kostnad", -1.0))),
+        ReportLine("inntekt", ranges=(AccountRange(3000, 3999, weight=-1.0),)),
+        ReportLine("kostnad", ranges=(AccountRange(4000, 7999),)),
+        ReportLine("bank", ranges=(AccountRange(1900, 1999, BASIS_UB),)),
+    )
+    aggregation = compile_report_mapping(lines, [3000, 4000, 1920, 6300])
+
+    ib = [[0.0, 0.0], [0.0, 0.0], [100.0, 50.0], [0.0, 0.0]]
+    ub = [[-1000.0, -800.0], [400.0, 300.0], [700.0, 550.0], [100.0, 50.0]]
+    result = aggregation.apply(ib, ub)
+
+    assert list(result["inntekt"]) == [1000.0, 800.0]
+    assert list(result["kostnad"]) == [500.0, 350.0]
+    assert list(result["resultat"]) == [500.0, 450.0]
+    assert list(result["bank"]) == [700.0, 550.0]
+
+
+def test_compiled_mapping_is_reused_for_the_same_accounts() -> None:
+    np = pytest.importorskip("numpy")
+    lines = (ReportLine("bank", ranges=(AccountRange(1900, 1999, BASIS_UB),)),)
+
+    first = compile_report_mapping(lines, np.array([1920, 3000]))
+
+    assert compile_report_mapping(lines, [1920, 3000]) is first
+    assert compile_report_mapping(lines, [1920, 3000, 4000]) is not first
+    assert not first.matrix.flags.writeable
+
+
+def test_compile_rejects_unknown_and_circular_references() -> None:
+    with pytest.raises(ValueError, match="Ukjent rapportlinje"):
+        compile_report_mapping([ReportLine("a", terms=(("b", 1.0),))], [1000])
+    with pytest.raises(ValueError, match="Sirkulær"):
+        compile_report_mapping(
+            [
+                ReportLine("a", terms=(("b", 1.0),)),
+                ReportLine("b", terms=(("a", 1.0),)),
+            ],
+            [1000],
+        )
+
+
+def test_load_report_mapping_from_json(tmp_path) -> None:
+    path = tmp_path / "kobling.json"
+    path.write_text(
+        json.dumps(
+            {
+                "lines": [
+                    {
+                        "key": "salg",
+                        "ranges": [{"start": 30000, "stop": 39999, "weight": -1}],
+                    },
+                    {"key": "dobbel", "terms": [{"line": "salg", "weight": 2}]},
+                ]
+            }
+        ),
+        encoding="utf-8",
+    )
+
+    lines = load_report_mapping(path)
+
+    assert lines[0] == ReportLine(
+        "salg", ranges=(AccountRange(30000, 39999, weight=-1.0),)
+    )
+    assert lines[1].terms == (("salg", 2.0),)
+    with pytest.raises(ValueError):
+        load_report_mapping({"lines": [{"ranges": []}]})
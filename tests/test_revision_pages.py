@@ -3,15 +3,27 @@ from __future__ import annotations
 from datetime import date
 from typing import Generator
 
+import pandas as pd
 import pytest
 
 try:  # pragma: no cover - miljøavhengig
-    from PySide6.QtWidgets import QApplication, QWidget
+    from PySide6.QtWidgets import QApplication, QLabel, QWidget
 except (ImportError, OSError) as exc:  # pragma: no cover - miljøavhengig
     pytest.skip(f"PySide6 er ikke tilgjengelig: {exc}", allow_module_level=True)
 
+from nordlys.regnskap.mva import (
+    VAT_LEVEL_ACCOUNT,
+    VAT_LEVEL_MONTH,
+    VAT_LEVEL_SUPPLIER,
+)
 from nordlys.saft.models import CostVoucher, VoucherLine
-from nordlys.ui.pages.revision_pages import _CostVoucherReviewModule
+from nordlys.ui.pages.revision_pages import (
+    FixedAssetsPage,
+    MvaDeviationPage,
+    PurchasesApPage,
+    _CostVoucherReviewModule,
+)
+from nordlys.ui.tables import DataTableView
 
 
 @pytest.fixture(scope="session")
@@ -80,3 +92,152 @@ def test_clicking_status_overview_row_shows_selected_voucher(
     module._on_selection_overview_row_clicked(1, 0)
 
     assert module.value_document.text() == "1002"
+    lines = module.table_lines.data_model()
+    assert lines.rowCount() == 1
+    assert lines.display_text(0, 0) == "4000"
+    assert lines.display_text(0, 4) == "2 000,00"
+
+
+def _vat_voucher(number: str, month: int, supplier: str, vat_code: str) -> CostVoucher:
+    voucher = _voucher(number, supplier, 1000.0)
+    line = voucher.lines[0]
+    return CostVoucher(
+        transaction_id=voucher.transaction_id,
+        document_number=voucher.document_number,
+        transaction_date=date(2024, month, 2),
+        supplier_id=voucher.supplier_id,
+        supplier_name=voucher.supplier_name,
+        description=voucher.description,
+        amount=voucher.amount,
+        lines=[
+            VoucherLine(
+                account=line.account,
+                account_name=line.account_name,
+                description=line.description,
+                vat_code=vat_code,
+                debit=line.debit,
+                credit=line.credit,
+            )
+        ],
+    )
+
+
+def test_mva_page_switches_between_account_supplier_and_month(
+    qapp: QApplication,
+) -> None:
+    page = MvaDeviationPage("MVA", "Test")
+    rows = [
+        ("1", 1, "A", "1"),
+        ("2", 1, "A", "1"),
+        ("3", 1, "A", "1"),
+        ("4", 2, "B", "14"),
+        ("5", 2, "B", "14"),
+        ("6", 2, "B", "1"),
+    ]
+    vouchers = [_vat_voucher(*row) for row in rows]
+    page.spin_min_observations.setValue(3)
+    page.apply_model(
+        MvaDeviationPage.compute_model(vouchers, None, 3, VAT_LEVEL_SUPPLIER)
+    )
+    assert page.level() == VAT_LEVEL_ACCOUNT
+    # Modellen var for et annet nivå og beregnes på nytt for valgt nivå.
+    assert page.table.rowCount() == 1
+    assert page.table.isColumnHidden(2)
+    assert page.badge_vouchers.value_label.text() == "2"
+    assert page.level_combo.itemText(1) == "Per konto og leverandør (1)"
+
+    page.level_combo.setCurrentIndex(page.level_combo.findData(VAT_LEVEL_SUPPLIER))
+    assert not page.table.isColumnHidden(2)
+    assert page.table.horizontalHeaderItem(2).text() == "Leverandør"
+    assert page.table.item(0, 2).text() == "Leverandør B"
+    assert page.table.item(0, 3).text() == "14"
+    dialog = page._details_dialog("4000", "Leverandør B")
+    assert dialog is not None
+    assert any(
+        "Leverandør: Leverandør B" in label.text()
+        for label in dialog.findChildren(QLabel)
+    )
+    (detail_table,) = dialog.findChildren(DataTableView)
+    assert detail_table.rowCount() == 1
+    assert detail_table.data_model().display_text(0, 0) == "6"
+
+    page.level_combo.setCurrentIndex(page.level_combo.findData(VAT_LEVEL_MONTH))
+    assert page.table.horizontalHeaderItem(2).text() == "Måned"
+    assert page.table.item(0, 2).text() == "2024-02"
+
+
+def test_mva_detail_dialog_separates_vouchers_sharing_a_number(
+    qapp: QApplication,
+) -> None:
+    page = MvaDeviationPage("MVA", "Test")
+    rows = [
+        ("1", 1, "A", "1"),
+        ("2", 1, "A", "1"),
+        ("3", 1, "A", "1"),
+        ("4", 2, "B", "14"),
+        ("5", 2, "B", "14"),
+        ("6", 2, "B", "1"),
+    ]
+    vouchers = [_vat_voucher(*row) for row in rows]
+    # Samme bilagsnummer i en annen journal, hos en leverandør uten avvik.
+    other_journal = _vat_voucher("6", 1, "A", "1")
+    other_journal.transaction_id = "AP-6"
+    vouchers.append(other_journal)
+    page.spin_min_observations.setValue(3)
+    page.apply_model(
+        MvaDeviationPage.compute_model(vouchers, None, 3, VAT_LEVEL_SUPPLIER)
+    )
+    page.level_combo.setCurrentIndex(page.level_combo.findData(VAT_LEVEL_SUPPLIER))
+
+    dialog = page._details_dialog("4000", "Leverandør B")
+
+    assert dialog is not None
+    (detail_table,) = dialog.findChildren(DataTableView)
+    assert detail_table.rowCount() == 1
+    assert detail_table.data_model().display_text(0, 2) == "Leverandør B"
+
+
+def test_fixed_assets_page_shows_roll_forward_for_all_years(
+    qapp: QApplication,
+) -> None:
+    page = FixedAssetsPage("Driftsmidler", "Test")
+
+    def _tb(opening: float, closing: float) -> pd.DataFrame:
+        return pd.DataFrame(
+            {
+                "Konto": ["1200"],
+                "Kontonavn": ["Maskiner"],
+                "IB_netto": [opening],
+                "UB_netto": [closing],
+            }
+        )
+
+    datasets = [(2023, _tb(100.0, 120.0), []), (2024, _tb(119.0, 100.0), [])]
+    page.apply_model(FixedAssetsPage.compute_model(None, [], datasets))
+
+    model = page.roll_forward_table.data_model()
+    assert model.rowCount() == 2
+    assert model.index(0, 0).data() == "2023"
+    assert model.index(1, 7).data() == "-1"
+    assert model.index(0, 7).data() == "—"
+    assert not page.roll_forward_table.isHidden()
+
+    page.clear()
+    assert page.roll_forward_table.isHidden()
+
+
+def test_purchases_page_shows_registry_warnings(qapp: QApplication) -> None:
+    page = PurchasesApPage("Innkjøp", "Test", lambda _source, _topn: None)
+    assert page.registry_card.isHidden()
+
+    page.set_registry_warnings([("2001", "Borte AS", "333333333", "Slettet")])
+    assert not page.registry_card.isHidden()
+    assert page.registry_table.item(0, 3).text() == "Slettet"
+
+    page.set_registry_warnings([])
+    assert page.registry_card.isHidden()
+
+    page.set_registry_warnings([], snapshot_imported_at=1_699_956_000.0)
+    assert not page.registry_card.isHidden()
+    assert page.registry_table.isHidden()
+    assert "14.11.2023" in page.registry_note.text()
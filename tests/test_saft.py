@@ -13,9 +13,12 @@ import pandas as pd
 import pytest
 
 from nordlys.saft import (
+    AccountRange,
+    ReportLine,
     check_trial_balance,
     iter_saft_entries,
     ns4102_summary_from_tb,
+    ns4102_summaries_by_year,
     parse_customers,
     parse_saft_header,
     parse_saldobalanse,
@@ -107,6 +110,7 @@ def build_sample_root() -> ET.Element:
         </Customer>
         <Supplier>
           <SupplierID>S1</SupplierID>
+          <RegistrationNumber>987654321</RegistrationNumber>
           <SupplierAccountID>2001</SupplierAccountID>
           <SupplierName>Leverandør 1</SupplierName>
         </Supplier>
@@ -1199,6 +1203,7 @@ def test_parse_suppliers_and_compute_purchases():
     suppliers = parse_suppliers(root)
     assert "S1" in suppliers
     assert suppliers["S1"].supplier_number == "2001"
+    assert suppliers["S1"].registration_number == "987654321"
 
     ns = {"n1": root.tag.split("}")[0][1:]}
     df = compute_purchases_per_supplier(root, ns, year=2023)
@@ -2511,3 +2516,25 @@ def test_extract_all_vouchers_uses_voucher_description_when_available() -> None:
 
     assert len(vouchers) == 1
     assert vouchers[0].description == "Inngående faktura"
+
+
+def test_ns4102_summaries_by_year_matches_single_year_summary():
+    frames = {
+        2023: build_summary_frame([(1920, 500.0), (3000, -1200.0), (4000, 700.0)]),
+        2024: build_summary_frame([(1920, 800.0), (3100, -300.0), (6300, 150.0)]),
+    }
+
+    combined = ns4102_summaries_by_year(frames)
+
+    assert list(combined.index) == [2023, 2024]
+    for year, frame in frames.items():
+        expected = ns4102_summary_from_tb(frame)
+        for key, value in expected.items():
+            assert combined.loc[year, key] == pytest.approx(value)
+
+
+def test_ns4102_summary_accepts_custom_mapping():
+    frame = build_summary_frame([(30100, -500.0), (3000, -100.0)])
+    lines = (ReportLine("salg", ranges=(AccountRange(30000, 39999, weight=-1.0),)),)
+
+    assert ns4102_summary_from_tb(frame, lines=lines) == {"salg": 500.0}
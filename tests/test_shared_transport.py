@@ -0,0 +1,218 @@
+from __future__ import annotations
+
+import gc
+import mmap
+import multiprocessing
+import os
+import pickle
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from nordlys.saft.header import SaftHeader
+from nordlys.saft.loader import SaftLoadResult
+from nordlys.saft.models import CostVoucher, VoucherLine
+from nordlys.saft import shared_transport
+from nordlys.saft.reporting_customers import SalesReceivableCorrelation
+from nordlys.saft.shared_transport import (
+    SharedLoadResult,
+    attach_result,
+    share_frame,
+    share_result,
+)
+from nordlys.saft.validation import SaftValidationResult
+from nordlys.ui.data_manager.dataset_store import SaftDatasetStore
+
+
+def _trial_balance(rows: int) -> pd.DataFrame:
+    return pd.DataFrame(
+        {
+            "Konto": [str(3000 + position % 50) for position in range(rows)],
+            "Kontonavn": pd.Series(
+                [None if position % 7 == 0 else "Salg" for position in range(rows)],
+                dtype=object,
+            ),
+            "UB": np.arange(rows, dtype=float) * 1.5,
+            "Antall": np.arange(rows, dtype=np.int64),
+            "Dato": pd.date_range("2023-01-01", periods=rows, freq="h"),
+            "Blandet": [position if position % 2 else "x" for position in range(rows)],
+        }
+    )
+
+
+def _vouchers() -> list[CostVoucher]:
+    return [
+        CostVoucher(
+            transaction_id=f"T{number}",
+            document_number=None if number == 2 else str(number),
+            transaction_date=None if number == 3 else date(2023, 1, number),
+            supplier_id="L1",
+            supplier_name="Leverandør AS",
+            description="Kontorrekvisita",
+            amount=100.0 * number,
+            lines=[
+                VoucherLine("6800", "Kontorrekvisita", None, "1", 80.0 * number, 0.0),
+                VoucherLine("2400", None, "Faktura", None, 0.0, 100.0 * number),
+            ][: 1 + number % 2],
+        )
+        for number in range(1, 5)
+    ]
+
+
+def _make_result(file_path: str, orgnr: str = "123456789") -> SaftLoadResult:
+    all_vouchers = _vouchers()
+    return SaftLoadResult(
+        file_path=file_path,
+        header=SaftHeader(
+            company_name="Test AS",
+            orgnr=orgnr,
+            fiscal_year="2023",
+            period_start="2023-01-01",
+            period_end="2023-12-31",
+            file_version="1.30",
+        ),
+        dataframe=_trial_balance(20),
+        customers={},
+        customer_sales=pd.DataFrame({"Kundenr": ["1"], "Omsetning eks mva": [10.0]}),
+        suppliers={},
+        supplier_purchases=None,
+        credit_notes=None,
+        sales_ar_correlation=SalesReceivableCorrelation(
+            with_receivable_total=1.0,
+            without_receivable_total=2.0,
+            missing_sales=pd.DataFrame({"Bilagsnr": ["7"], "Beløp": [2.0]}),
+        ),
+        receivable_analysis=None,
+        bank_analysis=None,
+        cost_vouchers=[all_vouchers[0], all_vouchers[2]],
+        all_vouchers=all_vouchers,
+        analysis_year=2023,
+        summary={},
+        validation=SaftValidationResult(
+            audit_file_version=None,
+            version_family=None,
+            schema_version=None,
+            is_valid=None,
+        ),
+    )
+
+
+def test_frame_round_trip_is_zero_copy_and_independent_of_size() -> None:
+    frame = _trial_balance(1_000).set_index("Konto")
+    shared = share_frame(frame)
+    small = share_frame(_trial_balance(10).set_index("Konto"))
+    # Beskrivelsen som sendes mellom prosessene er like stor uansett antall rader.
+    assert abs(len(pickle.dumps(shared)) - len(pickle.dumps(small))) < 64
+    small.discard()
+
+    attached, segment = shared.attach()
+    pd.testing.assert_frame_equal(attached, frame)
+
+    with open(shared.segment, "r+b") as fh:
+        raw = mmap.mmap(fh.fileno(), 0)
+    ub_spec = shared.specs[list(frame.columns).index("UB")]
+    raw_ub = np.frombuffer(raw, dtype=float, count=len(frame), offset=ub_spec.offset)
+    raw_ub[0] = -1.0
+    assert attached["UB"].iloc[0] == -1.0
+    del raw_ub
+    raw.close()
+
+    segment.release()
+    del attached
+    assert segment.released
+    assert not Path(shared.segment).exists()
+
+
+def test_result_round_trip_keeps_vouchers_and_analysis_frames() -> None:
+    result = _make_result("a.xml")
+    shared = pickle.loads(pickle.dumps(share_result(result)))
+
+    assert isinstance(shared, SharedLoadResult)
+    assert shared.result.all_vouchers == []
+    assert shared.cost_positions is not None
+
+    attached, segments = attach_result(shared)
+    try:
+        pd.testing.assert_frame_equal(attached.dataframe, result.dataframe)
+        pd.testing.assert_frame_equal(attached.customer_sales, result.customer_sales)
+        assert attached.sales_ar_correlation is not None
+        pd.testing.assert_frame_equal(
+            attached.sales_ar_correlation.missing_sales,
+            result.sales_ar_correlation.missing_sales,
+        )
+        assert attached.supplier_purchases is None
+        assert attached.all_vouchers == result.all_vouchers
+        assert attached.cost_vouchers == result.cost_vouchers
+        assert attached.cost_vouchers[1] is attached.all_vouchers[2]
+    finally:
+        for segment in segments:
+            segment.release()
+
+
+def test_frame_shared_by_worker_process_can_be_attached() -> None:
+    frame = _trial_balance(50)
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+        shared = executor.submit(share_frame, frame).result(timeout=60)
+
+    # Arbeiderprosessen er borte; segmentet skal likevel finnes (også på Windows).
+    attached, segment = shared.attach()
+    pd.testing.assert_frame_equal(attached, frame)
+    del attached
+    segment.release()
+
+
+def test_store_attaches_shared_results_and_releases_replaced_segments() -> None:
+    store = SaftDatasetStore()
+    store.apply_batch([share_result(_make_result("a.xml"))])
+
+    stored = store._results["a.xml"]  # type: ignore[attr-defined]
+    pd.testing.assert_frame_equal(stored.dataframe, _trial_balance(20))
+    assert len(stored.all_vouchers) == 4
+    first_segments = list(store._shared_segments["a.xml"])  # type: ignore[attr-defined]
+    assert first_segments and not any(seg.released for seg in first_segments)
+
+    store.apply_batch([share_result(_make_result("a.xml"))])
+    assert all(seg.released for seg in first_segments)
+
+    current = list(store._shared_segments["a.xml"])  # type: ignore[attr-defined]
+    store.reset()
+    assert all(seg.released for seg in current)
+    assert store._shared_segments == {}  # type: ignore[attr-defined]
+
+
+def test_release_waits_for_views_when_the_os_refuses_to_delete_mapped_files(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    shared = share_frame(_trial_balance(20))
+    attached, segment = shared.attach()
+    real_remove = os.remove
+
+    def windows_remove(path: str) -> None:
+        # Windows nekter å slette en fil som fortsatt er tilordnet.
+        if path == shared.segment and not segment.closed:
+            raise PermissionError(path)
+        real_remove(path)
+
+    monkeypatch.setattr(shared_transport.os, "remove", windows_remove)
+
+    segment.release()
+    assert Path(shared.segment).exists()
+    assert attached["UB"].iloc[3] == 4.5
+
+    del attached
+    gc.collect()
+    shared_transport._retry_pending_close()  # type: ignore[attr-defined]
+    assert segment.closed
+    assert not Path(shared.segment).exists()
+
+
+def test_discard_removes_unread_segment() -> None:
+    shared = share_frame(_trial_balance(5))
+    assert Path(shared.segment).exists()
+    shared.discard()
+    assert not Path(shared.segment).exists()
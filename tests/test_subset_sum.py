@@ -0,0 +1,64 @@
+from __future__ import annotations
+
+import itertools
+import random
+
+import pytest
+
+from nordlys.helpers.subset_sum import find_subset_sums
+
+
+def _brute_force(values, target, max_size, tolerance_ore):
+    target_ore = round(target * 100)
+    found = set()
+    for size in range(1, max_size + 1):
+        for combo in itertools.combinations(range(len(values)), size):
+            total = sum(round(values[index] * 100) for index in combo)
+            if abs(total - target_ore) <= tolerance_ore:
+                found.add(combo)
+    return found
+
+
+def test_matches_brute_force_for_all_sizes() -> None:
+    rng = random.Random(7)
+    for _ in range(25):
+        values = [round(rng.uniform(-500, 500), 2) for _ in range(rng.randint(1, 11))]
+        target = round(rng.uniform(-800, 800), 2)
+        max_size = rng.randint(1, 5)
+        matches = find_subset_sums(
+            values,
+            target,
+            tolerance_ore=500,
+            max_size=max_size,
+            top_k=10**6,
+            time_budget=None,
+        )
+
+        assert {match.indices for match in matches} == _brute_force(
+            values, target, max_size, 500
+        )
+
+
+def test_ranks_by_size_then_deviation_and_respects_sign() -> None:
+    values = [100.0, 250.5, -30.0, 999.99, 350.0]
+
+    matches = find_subset_sums(values, 350.5, top_k=2)
+    assert [match.indices for match in matches] == [(4,), (0, 1)]
+    assert matches[0].deviation_ore == 50
+    assert matches[1].deviation_ore == 0
+
+    assert find_subset_sums(values, -220.5) == []
+    flipped = find_subset_sums(values, -220.5, either_sign=True)
+    assert flipped[0].indices == (1, 2)
+    assert flipped[0].total_ore == 22050
+
+
+def test_four_and_five_accounts_and_invalid_size() -> None:
+    values = [1.0, 2.0, 4.0, 8.0, 16.0, 32.0]
+
+    four = find_subset_sums(values, 15.0, max_size=4, tolerance_ore=0)
+    assert [match.indices for match in four] == [(0, 1, 2, 3)]
+    five = find_subset_sums(values, 55.0, max_size=5, tolerance_ore=0)
+    assert [match.indices for match in five] == [(0, 1, 2, 4, 5)]
+    with pytest.raises(ValueError):
+        find_subset_sums(values, 1.0, max_size=6)
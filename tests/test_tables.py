@@ -9,7 +9,14 @@ try:  # pragma: no cover - miljøavhengig
 except (ImportError, OSError) as exc:  # pragma: no cover - miljøavhengig
     pytest.skip(f"PySide6 er ikke tilgjengelig: {exc}", allow_module_level=True)
 
-from nordlys.ui.tables import create_table_widget, populate_table
+from PySide6.QtCore import Qt
+
+from nordlys.ui.tables import (
+    create_table_view,
+    create_table_widget,
+    populate_dataframe,
+    populate_table,
+)
 
 
 @pytest.fixture(scope="session")
@@ -48,3 +55,112 @@ def test_populate_table_keeps_zero_rows_when_disabled(qapp: QApplication) -> Non
 
     assert table.rowCount() == 2
     assert table.item(1, 0).text() == "Immaterielle eiendeler"
+
+
+def test_table_view_formats_lazily_and_sorts_by_permutation(
+    qapp: QApplication,
+) -> None:
+    table = create_table_view()
+    model = table.data_model()
+    model.set_window_size(2)
+    rows = [("Kunde C", 2500.0), ("Kunde A", None), ("Kunde B", 10.0)]
+
+    populate_table(table, ["Kunde", "Beløp"], rows, money_cols={1})
+
+    assert (table.rowCount(), model.rowCount()) == (3, 2)
+    assert model.index(0, 1).data() == "2 500"
+    assert model.index(0, 1).data(Qt.UserRole) == 2500.0
+    assert model.canFetchMore()
+    model.fetchMore()
+    assert model.rowCount() == 3
+
+    model.sort(1, Qt.DescendingOrder)
+    assert [model.index(row, 0).data() for row in range(3)] == [
+        "Kunde C",
+        "Kunde B",
+        "Kunde A",
+    ]
+    model.sort(0, Qt.AscendingOrder)
+    assert model.source_row(0) == 1
+    assert model.row_values(2) == ("Kunde C", 2500.0)
+
+
+def test_table_view_estimates_widths_from_sample(qapp: QApplication) -> None:
+    pd = pytest.importorskip("pandas")
+    table = create_table_view()
+    frame = pd.DataFrame({"Konto": ["1920"] * 5000, "Tekst": ["x" * 40] * 5000})
+
+    populate_dataframe(table, frame)
+
+    header = table.horizontalHeader()
+    assert table.rowCount() == 5000
+    assert header.sectionSize(1) > header.sectionSize(0)
+    assert len(table.data_model().sample_rows(200)) == 200
+
+
+def test_repopulating_keeps_unchanged_cells(qapp: QApplication) -> None:
+    table = create_table_widget()
+    populate_table(
+        table, ["Konto", "UB"], [("1920", 100.0), ("3000", -50.0)], money_cols={1}
+    )
+    kept = table.item(0, 1)
+    styled = table.item(1, 0)
+    font = styled.font()
+    font.setBold(True)
+    styled.setFont(font)
+
+    populate_table(
+        table, ["Konto", "UB"], [("1920", 100.0), ("3000", -75.0)], money_cols={1}
+    )
+
+    assert table.item(0, 1) is kept
+    assert table.item(1, 1).text() == "-75"
+    # Celler med egen formatering lages på nytt, uten formateringen.
+    assert table.item(1, 0) is not styled
+    assert not table.item(1, 0).font().bold()
+
+
+def test_repopulating_replaces_cells_with_tooltip_or_extra_data(
+    qapp: QApplication,
+) -> None:
+    table = create_table_widget()
+    rows = [("1920", 100.0), ("3000", -50.0)]
+    populate_table(table, ["Konto", "UB"], rows, money_cols={1})
+    kept = table.item(0, 0)
+    with_tooltip = table.item(0, 1)
+    with_tooltip.setToolTip("Bank")
+    with_key = table.item(1, 0)
+    with_key.setData(Qt.UserRole + 1, "3000")
+
+    populate_table(table, ["Konto", "UB"], rows, money_cols={1})
+
+    assert table.item(0, 0) is kept
+    assert table.item(0, 1) is not with_tooltip
+    assert not table.item(0, 1).toolTip()
+    assert table.item(1, 0) is not with_key
+    assert table.item(1, 0).data(Qt.UserRole + 1) is None
+
+
+def test_table_view_updates_changed_cells_without_reset(qapp: QApplication) -> None:
+    table = create_table_view()
+    model = table.data_model()
+    populate_table(table, ["Konto", "UB"], [("1920", 100.0), ("3000", -50.0)])
+    model.sort(1, Qt.AscendingOrder)
+    resets: list[bool] = []
+    changes: list[tuple[int, int, int, int]] = []
+    model.modelReset.connect(lambda: resets.append(True))
+    model.dataChanged.connect(
+        lambda first, last, *_: changes.append(
+            (first.row(), first.column(), last.row(), last.column())
+        )
+    )
+
+    populate_table(table, ["Konto", "UB"], [("1920", 100.0), ("3000", -60.0)])
+    assert resets == []
+    assert changes == [(0, 1, 0, 1)]
+    assert model.index(0, 1).data() == "-60"
+
+    # Endret rekkefølge i sorteringen krever en full oppdatering.
+    populate_table(table, ["Konto", "UB"], [("1920", 100.0), ("3000", 160.0)])
+    assert resets == [True]
+    assert model.index(1, 0).data() == "3000"
@@ -2,6 +2,13 @@
 
 from __future__ import annotations
 
+import json
+import os
+import subprocess
+import sys
+import textwrap
+from pathlib import Path
+
 import pytest
 
 pyside_app = pytest.importorskip(
@@ -17,6 +24,84 @@ QtWidgets = pytest.importorskip(
 QApplication = QtWidgets.QApplication
 NordlysWindow = pyside_app.NordlysWindow
 
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+# Tid fra prosessstart til hovedvinduet er tegnet første gang (inkludert
+# import av PySide6). Måles i en egen prosess med ``-X importtime``.
+FIRST_PAINT_BUDGET_SECONDS = 2.0
+
+# Tunge biblioteker og sidemoduler som ikke skal lastes før de trengs.
+DEFERRED_MODULES = (
+    "pandas",
+    "numpy",
+    "reportlab",
+    "openpyxl",
+    "requests",
+    "nordlys.saft",
+    "nordlys.ui.pages.revision_pages",
+    "nordlys.ui.pages.hovedbok_page",
+    "nordlys.ui.pages.dashboard_page",
+)
+
+_STARTUP_SCRIPT = textwrap.dedent(
+    """
+    import json
+    import sys
+    import time
+
+    started = time.perf_counter()
+
+    from PySide6.QtCore import QEvent, QObject
+
+    from nordlys.ui.pyside_app import create_app
+
+
+    class _PaintProbe(QObject):
+        first_paint = None
+
+        def eventFilter(self, _obj, event):
+            if self.first_paint is None and event.type() == QEvent.Paint:
+                self.first_paint = time.perf_counter()
+            return False
+
+
+    app, window = create_app()
+    probe = _PaintProbe()
+    app.installEventFilter(probe)
+    window.show()
+    while probe.first_paint is None and time.perf_counter() - started < 30:
+        app.processEvents()
+    window._ensure_startup_completed()
+    app.processEvents()
+    interactive = time.perf_counter()
+
+    print(
+        json.dumps(
+            {
+                "first_paint": (probe.first_paint or interactive) - started,
+                "interactive": interactive - started,
+                "modules": sorted(sys.modules),
+                "pages": sorted(window._page_manager._page_map),
+            }
+        )
+    )
+    window.close()
+    """
+)
+
+
+def _slowest_imports(importtime_log: str, limit: int = 10) -> list[str]:
+    timings: list[tuple[int, str]] = []
+    for line in importtime_log.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        parts = line.split("|")
+        if len(parts) != 3 or not parts[1].strip().isdigit():
+            continue
+        timings.append((int(parts[1]), parts[2].strip()))
+    timings.sort(reverse=True)
+    return [f"{name}: {micros / 1000:.0f} ms" for micros, name in timings[:limit]]
+
 
 def _ensure_qt_app() -> QApplication:
     app = QApplication.instance()
@@ -55,3 +140,31 @@ def test_schedule_startup_no_timer_when_in_progress() -> None:
         assert window._startup_timer is None  # type: ignore[attr-defined]
     finally:
         window.close()
+
+
+def test_cold_start_stays_within_budget_and_defers_heavy_imports() -> None:
+    env = dict(os.environ)
+    env.setdefault("QT_QPA_PLATFORM", "offscreen")
+    env["PYTHONPATH"] = os.pathsep.join(
+        filter(None, [str(PROJECT_ROOT), env.get("PYTHONPATH")])
+    )
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", _STARTUP_SCRIPT],
+        capture_output=True,
+        text=True,
+        env=env,
+        cwd=PROJECT_ROOT,
+        timeout=120,
+    )
+    assert completed.returncode == 0, completed.stderr[-2000:]
+    result = json.loads(completed.stdout.strip().splitlines()[-1])
+    slowest = "\n".join(_slowest_imports(completed.stderr))
+
+    loaded = sorted(set(DEFERRED_MODULES) & set(result["modules"]))
+    assert loaded == [], f"Lastet ved oppstart: {loaded}\n{slowest}"
+    # Bare startsiden bygges; resten lages ved første navigasjon.
+    assert result["pages"] == ["import"]
+    assert result["first_paint"] <= FIRST_PAINT_BUDGET_SECONDS, (
+        f"Første tegning tok {result['first_paint']:.2f} s "
+        f"(budsjett {FIRST_PAINT_BUDGET_SECONDS:.1f} s)\n{slowest}"
+    )